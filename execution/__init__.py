@@ -0,0 +1,20 @@
+# execution/__init__.py
+
+"""
+Execution Module
+
+Order management and broker connectivity, and the multi-process live
+trading pipeline built on top of them.
+"""
+
+from importlib import import_module
+
+# The broker module's file name is not a valid identifier, so load it explicitly
+_broker = import_module('.oms_&_broker_connect', __name__)
+OrderType = _broker.OrderType
+OrderSide = _broker.OrderSide
+Order = _broker.Order
+Position = _broker.Position
+AbstractBroker = _broker.AbstractBroker
+SimulatedBroker = _broker.SimulatedBroker
+LiveBroker = _broker.LiveBroker
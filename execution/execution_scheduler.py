@@ -0,0 +1,565 @@
+"""
+Execution Scheduler Module
+
+Works parent orders as child orders over intraday bars. Each day a parent's
+remaining quantity is capped by MarketImpactModel.estimate_optimal_trade_size
+and split over the day's bars by calculate_trade_schedule along an intraday
+volume profile; each bar the slice is sent as a market order, limited to a
+share of the bar's volume, with anything left over carried to later bars.
+Children fill in a MatchingEngine (backtests) or through a SimulatedBroker,
+and every parent's implementation shortfall against its arrival price is
+reported.
+
+Daily data is split into synthetic intraday bars: prices move piecewise
+linearly from the open through the low and high to the close, and volume
+follows the profile.
+"""
+
+import time
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from config.logging_config import logger
+from execution.matching_engine import MatchingEngine
+from src.utils.trade_ledger import TradeLedger
+
+_broker = import_module('execution.oms_&_broker_connect')
+Order, OrderSide, OrderType = _broker.Order, _broker.OrderSide, _broker.OrderType
+
+CHILD_ORDER_SCHEMA = {
+    'parent_id': object,
+    'pair_id': object,
+    'symbol': object,
+    'time': 'datetime64[ns]',
+    'bar': np.int64,
+    'planned_quantity': np.float64,  # Signed slice of the day's schedule
+    'quantity': np.float64,  # Signed fill
+    'arrival_price': np.float64,
+    'reference_price': np.float64,  # Typical price of the bar
+    'price': np.float64,
+    'fee': np.float64
+}
+
+REPORT_COLUMNS = [
+    'order_id', 'pair_id', 'symbol', 'quantity', 'filled_quantity', 'arrival_price', 'average_price',
+    'last_price', 'execution_cost', 'impact_cost', 'opportunity_cost', 'fees', 'shortfall', 'shortfall_bps',
+    'child_orders', 'days', 'status'
+]
+
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_LENGTH = pd.Timedelta(hours=6, minutes=30)
+
+
+def intraday_volume_profile(num_periods: int) -> np.ndarray:
+    """U-shaped intraday volume profile, heaviest at the open and the close; sums to 1."""
+    x = (np.arange(num_periods) + 0.5) / num_periods
+    profile = 1 + 4 * (x - 0.5) ** 2
+    return profile / profile.sum()
+
+
+def split_daily_bar(
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        profile: np.ndarray
+) -> np.ndarray:
+    """
+    Split one daily bar into synthetic intraday bars.
+
+    Args:
+        open_, high, low, close, volume: Daily bar
+        profile: Share of the daily volume traded in each intraday bar
+
+    Returns:
+        np.ndarray: One (open, high, low, close, volume) row per intraday bar
+    """
+    n = len(profile)
+    # Up days visit the low first, down days the high
+    path = [open_, low, high, close] if close >= open_ else [open_, high, low, close]
+    prices = np.interp(np.linspace(0.0, 1.0, n + 1), [0.0, 1 / 3, 2 / 3, 1.0], path)
+    bars = np.empty((n, 5))
+    bars[:, 0] = prices[:-1]
+    bars[:, 3] = prices[1:]
+    bars[:, 1] = np.maximum(prices[:-1], prices[1:])
+    bars[:, 2] = np.minimum(prices[:-1], prices[1:])
+    bars[:, 4] = volume * profile
+    return bars
+
+
+def bar_times(date, num_periods: int) -> pd.DatetimeIndex:
+    """End times of ``num_periods`` equal bars over the regular session of ``date``."""
+    day = pd.Timestamp(date).normalize()
+    return day + SESSION_OPEN + SESSION_LENGTH * (np.arange(1, num_periods + 1) / num_periods)
+
+
+@dataclass
+class ParentOrder:
+    """An order worked by the scheduler; quantities are signed."""
+    order_id: str
+    symbol: str
+    quantity: float
+    arrival_price: float
+    start: pd.Timestamp
+    pair_id: Optional[Hashable] = None
+    filled_quantity: float = 0.0
+    filled_value: float = 0.0
+    impact_cost: float = 0.0  # Paid over the bars' typical prices
+    fees: float = 0.0
+    last_price: Optional[float] = None
+    child_orders: int = 0
+    days: int = 0
+    status: str = "working"
+    slices: Optional[np.ndarray] = None  # The day's planned child quantities
+    carry: float = 0.0  # Planned but not yet sent
+
+    @property
+    def remaining(self) -> float:
+        return self.quantity - self.filled_quantity
+
+    @property
+    def average_price(self) -> Optional[float]:
+        return self.filled_value / self.filled_quantity if self.filled_quantity else None
+
+
+class ExecutionScheduler:
+    """
+    Schedules parent orders over intraday bars and reports their shortfall.
+
+    ``start_day`` plans every working parent's child quantities for the day,
+    ``execute_bar`` sends one bar's children, and ``execute_day`` does both
+    for daily bars split into synthetic intraday bars. ``schedule_pair`` and
+    ``rebalance`` turn target pair positions into parents, and ``run`` works
+    them over daily OHLCV data until they are done.
+
+    Children are market orders at the bar's typical price plus the impact
+    model's slippage. Across parents, at most ``max_participation`` of a
+    bar's volume in a symbol is taken. With ``complete_by_close`` the last
+    bar of a day fills whatever of the day's plan is left regardless of
+    volume, as a backtest that books trades in full needs.
+    """
+
+    def __init__(
+            self,
+            impact_model=None,
+            price_data: Optional[pd.DataFrame] = None,
+            volume_data: Optional[pd.DataFrame] = None,
+            num_periods: int = 13,
+            volume_profile: Optional[Sequence[float]] = None,
+            max_participation: float = 0.1,
+            daily_participation: float = 0.1,
+            broker=None,
+            transaction_cost: float = 0.0,
+            complete_by_close: bool = False
+    ):
+        """
+        Args:
+            impact_model: optimization.MarketImpactModel planning the schedules and
+                pricing the fills (defaults to the engine's)
+            price_data: Daily price history (dates x symbols) for volatility and spread
+            volume_data: Daily volume history (dates x symbols) for ADV
+            num_periods: Intraday bars per day
+            volume_profile: Expected share of daily volume per intraday bar
+                (defaults to intraday_volume_profile)
+            max_participation: Maximum share of a bar's volume taken per symbol
+            daily_participation: Maximum share of ADV a parent trades per day
+            broker: SimulatedBroker to send the children to; without one they
+                fill in the scheduler's own MatchingEngine
+            transaction_cost: Fee per traded notional when filling in the engine
+                (the broker charges its own)
+            complete_by_close: Fill the rest of the day's plan on its last bar
+        """
+        self._impact_model = impact_model
+        self.price_data = price_data
+        self.volume_data = volume_data
+        self.num_periods = num_periods
+        if volume_profile is None:
+            volume_profile = intraday_volume_profile(num_periods)
+        self.volume_profile = np.asarray(volume_profile, dtype=np.float64) / np.sum(volume_profile)
+        if len(self.volume_profile) != num_periods:
+            raise ValueError(f"Volume profile has {len(self.volume_profile)} periods, expected {num_periods}")
+        self.max_participation = max_participation
+        self.daily_participation = daily_participation
+        self.broker = broker
+        self.transaction_cost = transaction_cost
+        self.complete_by_close = complete_by_close
+
+        if broker is not None:
+            self.engine = broker.engine
+        else:
+            self.engine = MatchingEngine(impact_model, price_data, volume_data)
+
+        self.parents: Dict[str, ParentOrder] = {}
+        self._working: Dict[str, ParentOrder] = {}
+        self.children = TradeLedger(CHILD_ORDER_SCHEMA, pair_column='pair_id', capacity=1024)
+        self._order_counter = 0
+        self._bar = 0
+
+    @property
+    def impact_model(self) -> 'MarketImpactModel':
+        if self._impact_model is None:
+            self._impact_model = self.engine.impact_model
+        return self._impact_model
+
+    def working_orders(self) -> List[ParentOrder]:
+        """Parents with quantity left to trade."""
+        return list(self._working.values())
+
+    def schedule(
+            self,
+            symbol: str,
+            quantity: float,
+            arrival_price: float,
+            date,
+            pair_id: Optional[Hashable] = None
+    ) -> Optional[ParentOrder]:
+        """
+        Add a parent order; it is worked from the next ``start_day``.
+
+        Args:
+            symbol: Traded symbol
+            quantity: Signed shares, positive to buy
+            arrival_price: Decision price the shortfall is measured against
+            date: Decision date
+            pair_id: Pair the order belongs to
+
+        Returns:
+            Optional[ParentOrder]: The parent, or None for a zero quantity
+        """
+        if quantity == 0:
+            return None
+        self._order_counter += 1
+        parent = ParentOrder(f"SCHED_{self._order_counter}", symbol, float(quantity), float(arrival_price),
+                             pd.Timestamp(date), pair_id)
+        self.parents[parent.order_id] = parent
+        self._working[parent.order_id] = parent
+        return parent
+
+    def schedule_pair(
+            self,
+            pair_id: Hashable,
+            targets: Mapping[str, float],
+            positions: Mapping[str, float],
+            prices: Mapping[str, float],
+            date
+    ) -> List[ParentOrder]:
+        """
+        Schedule the legs that move a pair from its positions to its targets.
+
+        Args:
+            pair_id: Pair identifier
+            targets: Symbol -> target position
+            positions: Symbol -> current position
+            prices: Arrival prices of the symbols
+            date: Decision date
+
+        Returns:
+            List[ParentOrder]: The parents of the legs that change
+        """
+        parents = []
+        for symbol, target in targets.items():
+            parent = self.schedule(symbol, target - positions.get(symbol, 0), prices[symbol], date, pair_id)
+            if parent is not None:
+                parents.append(parent)
+        return parents
+
+    def rebalance(
+            self,
+            targets: Mapping[Hashable, Mapping[str, float]],
+            positions: Optional[Mapping[Hashable, Mapping[str, float]]],
+            prices: Mapping[str, float],
+            date
+    ) -> List[ParentOrder]:
+        """Schedule a multi-pair rebalance: pair -> symbol -> target, from pair -> symbol -> position."""
+        positions = positions or {}
+        parents = []
+        for pair_id, pair_targets in targets.items():
+            parents.extend(self.schedule_pair(pair_id, pair_targets, positions.get(pair_id, {}), prices, date))
+        return parents
+
+    def cancel(self, order_id: str) -> bool:
+        """Stop working a parent; its unfilled quantity counts as opportunity cost."""
+        parent = self._working.pop(order_id, None)
+        if parent is None:
+            logger.warning(f"No working scheduled order {order_id} to cancel.")
+            return False
+        parent.status = "cancelled"
+        return True
+
+    def start_day(self, date):
+        """Plan the day's child quantities of every working parent."""
+        model = self.impact_model
+        for parent in self._working.values():
+            today = model.estimate_optimal_trade_size(parent.symbol, parent.remaining, 0.0, self.price_data,
+                                                      self.volume_data, date, self.daily_participation)
+            parent.slices = model.calculate_trade_schedule(parent.symbol, today, self.num_periods, self.price_data,
+                                                           self.volume_data, date,
+                                                           volume_profile=self.volume_profile).to_numpy()
+            parent.carry = 0.0
+            parent.days += 1
+        self._bar = 0
+
+    def execute_bar(self, bar_time, bars: Mapping[str, Tuple[float, float, float, float, float]]) -> int:
+        """
+        Send the children of the next bar of the day.
+
+        Args:
+            bar_time: Bar timestamp
+            bars: Symbol -> (open, high, low, close, volume) of the bar
+
+        Returns:
+            int: Number of child orders filled
+        """
+        if self._bar >= self.num_periods:
+            raise RuntimeError("All bars of the day were executed; call start_day first")
+        k = self._bar
+        self._bar += 1
+        if self.broker is not None:
+            self.broker.process_bar(bar_time, bars)
+
+        complete = self.complete_by_close and k == self.num_periods - 1
+        taken: Dict[str, float] = {}
+        n_fills = 0
+        for parent in list(self._working.values()):
+            if parent.slices is None:
+                continue
+            planned = parent.slices[k]
+            bar = bars.get(parent.symbol)
+            if bar is None:
+                parent.carry += planned
+                continue
+            _, high, low, close, volume = bar
+            parent.last_price = close
+
+            want = planned + parent.carry
+            quantity = float(np.round(want))
+            if not complete and np.isfinite(volume):
+                available = max(np.floor(volume * self.max_participation) - taken.get(parent.symbol, 0.0), 0.0)
+                quantity = float(np.clip(quantity, -available, available))
+            parent.carry = want - quantity
+            if quantity == 0:
+                continue
+
+            reference = (high + low + close) / 3
+            fill = self._send(parent, quantity, reference, bar_time)
+            if fill is None:
+                parent.carry += quantity
+                continue
+            price, fee = fill
+            taken[parent.symbol] = taken.get(parent.symbol, 0.0) + abs(quantity)
+            self.children.append(parent_id=parent.order_id, pair_id=parent.pair_id, symbol=parent.symbol,
+                                 time=bar_time, bar=k, planned_quantity=planned, quantity=quantity,
+                                 arrival_price=parent.arrival_price, reference_price=reference, price=price, fee=fee)
+            parent.filled_quantity += quantity
+            parent.filled_value += quantity * price
+            parent.impact_cost += quantity * (price - reference)
+            parent.fees += fee
+            parent.child_orders += 1
+            n_fills += 1
+            if abs(parent.remaining) < 1e-9:
+                parent.status = "filled"
+                del self._working[parent.order_id]
+        return n_fills
+
+    def _send(self, parent: ParentOrder, quantity: float, reference: float, bar_time) -> Optional[Tuple[float, float]]:
+        """Fill one child order; returns (price, fee), or None if it was rejected."""
+        side = 1 if quantity > 0 else -1
+        if self.broker is not None:
+            order = Order(symbol=parent.symbol, side=OrderSide.BUY if side > 0 else OrderSide.SELL,
+                          quantity=abs(quantity), order_type=OrderType.MARKET, price=reference,
+                          timestamp=pd.Timestamp(bar_time).to_pydatetime())
+            if not self.broker.place_order(order):
+                return None
+            return order.average_price, order.average_price * abs(quantity) * self.broker.transaction_cost
+
+        child_id = f"{parent.order_id}_{parent.child_orders + 1}"
+        fill = self.engine.execute_market(child_id, parent.symbol, side, abs(quantity),
+                                          reference_price=reference, date=bar_time)
+        if fill is None:
+            return None
+        return fill[0], fill[0] * abs(quantity) * self.transaction_cost
+
+    def execute_day(self, date, bars: Mapping[str, Tuple[float, float, float, float, float]]) -> int:
+        """
+        Work the working parents over one day given as daily bars.
+
+        Args:
+            date: Trading day
+            bars: Symbol -> daily (open, high, low, close, volume); split into
+                ``num_periods`` synthetic intraday bars
+
+        Returns:
+            int: Number of child orders filled
+        """
+        self.start_day(date)
+        symbols = {parent.symbol for parent in self._working.values()}
+        intraday = {symbol: split_daily_bar(*bars[symbol], self.volume_profile)
+                    for symbol in symbols if symbol in bars}
+        n_fills = 0
+        for k, bar_time in enumerate(bar_times(date, self.num_periods)):
+            n_fills += self.execute_bar(bar_time, {symbol: tuple(split[k]) for symbol, split in intraday.items()})
+        return n_fills
+
+    def run(
+            self,
+            data: Mapping[str, pd.DataFrame],
+            start=None,
+            max_days: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Work every parent over daily OHLCV data until they are done.
+
+        Args:
+            data: Symbol -> DataFrame indexed by date with Open, High, Low,
+                Close and Volume columns
+            start: First trading day (defaults to the day after the latest parent's start)
+            max_days: Maximum number of days to trade
+
+        Returns:
+            pd.DataFrame: The shortfall report
+        """
+        symbols = {parent.symbol for parent in self._working.values()}
+        frames = {symbol: data[symbol][['Open', 'High', 'Low', 'Close', 'Volume']]
+                  for symbol in symbols if symbol in data}
+        missing = symbols - set(frames)
+        if missing:
+            logger.warning(f"No bars for scheduled symbols {sorted(missing)}")
+        if start is None:
+            start = max(parent.start for parent in self._working.values()) + pd.Timedelta(days=1)
+
+        dates = pd.DatetimeIndex(sorted(set().union(*(frame.index for frame in frames.values()))))
+        bars_by_symbol = {symbol: dict(zip(frame.index, frame.itertuples(index=False, name=None)))
+                          for symbol, frame in frames.items()}
+        for day, date in enumerate(dates[dates >= pd.Timestamp(start)]):
+            if not self._working or (max_days is not None and day >= max_days):
+                break
+            self.execute_day(date, {symbol: bars[date] for symbol, bars in bars_by_symbol.items() if date in bars})
+        return self.report()
+
+    def report(self) -> pd.DataFrame:
+        """
+        Implementation shortfall of every parent against its arrival price.
+
+        Execution cost is what the fills paid over the arrival price, of which
+        impact cost is the part paid over the bars' typical prices; opportunity
+        cost is what the unfilled quantity lost to the last price seen, and the
+        shortfall adds the fees. Positive values are costs.
+        """
+        parents = list(self.parents.values())
+        if not parents:
+            return pd.DataFrame(columns=REPORT_COLUMNS)
+
+        quantity = np.array([parent.quantity for parent in parents])
+        filled = np.array([parent.filled_quantity for parent in parents])
+        filled_value = np.array([parent.filled_value for parent in parents])
+        arrival = np.array([parent.arrival_price for parent in parents])
+        last = np.array([parent.arrival_price if parent.last_price is None else parent.last_price
+                         for parent in parents])
+        fees = np.array([parent.fees for parent in parents])
+
+        execution_cost = filled_value - filled * arrival
+        opportunity_cost = (quantity - filled) * (last - arrival)
+        shortfall = execution_cost + opportunity_cost + fees
+        with np.errstate(divide='ignore', invalid='ignore'):
+            average_price = np.where(filled != 0, filled_value / filled, np.nan)
+
+        return pd.DataFrame({
+            'order_id': [parent.order_id for parent in parents],
+            'pair_id': [parent.pair_id for parent in parents],
+            'symbol': [parent.symbol for parent in parents],
+            'quantity': quantity,
+            'filled_quantity': filled,
+            'arrival_price': arrival,
+            'average_price': average_price,
+            'last_price': last,
+            'execution_cost': execution_cost,
+            'impact_cost': [parent.impact_cost for parent in parents],
+            'opportunity_cost': opportunity_cost,
+            'fees': fees,
+            'shortfall': shortfall,
+            'shortfall_bps': shortfall / (np.abs(quantity) * arrival) * 10000,
+            'child_orders': [parent.child_orders for parent in parents],
+            'days': [parent.days for parent in parents],
+            'status': [parent.status for parent in parents]
+        }, columns=REPORT_COLUMNS)
+
+    def summary(self) -> Dict[str, float]:
+        """Totals of the shortfall report; bps are of the arrival notional."""
+        report = self.report()
+        notional = float((report['quantity'].abs() * report['arrival_price']).sum())
+        shortfall = float(report['shortfall'].sum())
+        return {
+            'parent_orders': len(report),
+            'child_orders': int(report['child_orders'].sum()),
+            'completed_orders': int((report['status'] == 'filled').sum()),
+            'fill_rate_pct': float(report['filled_quantity'].abs().sum() / report['quantity'].abs().sum() * 100)
+            if len(report) else 0.0,
+            'arrival_notional': notional,
+            'execution_cost': float(report['execution_cost'].sum()),
+            'impact_cost': float(report['impact_cost'].sum()),
+            'impact_bps': float(report['impact_cost'].sum()) / notional * 10000 if notional else 0.0,
+            'opportunity_cost': float(report['opportunity_cost'].sum()),
+            'fees': float(report['fees'].sum()),
+            'shortfall': shortfall,
+            'shortfall_bps': shortfall / notional * 10000 if notional else 0.0
+        }
+
+
+def benchmark_execution_scheduler(n_pairs: int = 50, n_days: int = 5, num_periods: int = 13,
+                                  adv: float = 2e6, rebalance_pct_adv: float = 0.05,
+                                  seed: int = 0) -> Dict[str, float]:
+    """
+    Schedule a random multi-pair rebalance and compare it with trading each leg at once.
+
+    Every pair trades ``rebalance_pct_adv`` of ADV in both legs over random
+    walk daily bars; the immediate alternative sends each parent as a single
+    order on the first bar.
+
+    Returns:
+        Dict[str, float]: Scheduled and immediate shortfall and impact in bps, child orders and seconds
+    """
+    rng = np.random.default_rng(seed)
+    n_symbols = 2 * n_pairs
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    dates = pd.bdate_range('2024-01-02', periods=n_days + 64)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, size=(len(dates), n_symbols)), axis=0))
+    opens = closes * np.exp(rng.normal(0, 0.005, size=closes.shape))
+    highs = np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, 0.005, size=closes.shape)))
+    lows = np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, 0.005, size=closes.shape)))
+    volumes = adv * np.exp(rng.normal(0, 0.2, size=closes.shape))
+    price_data = pd.DataFrame(closes, index=dates, columns=symbols)
+    volume_data = pd.DataFrame(volumes, index=dates, columns=symbols)
+    data = {symbol: pd.DataFrame({'Open': opens[:, i], 'High': highs[:, i], 'Low': lows[:, i],
+                                  'Close': closes[:, i], 'Volume': volumes[:, i]}, index=dates)
+            for i, symbol in enumerate(symbols)}
+
+    decision = dates[63]
+    size = np.round(adv * rebalance_pct_adv)
+    targets = {(symbols[2 * i], symbols[2 * i + 1]): {symbols[2 * i]: size, symbols[2 * i + 1]: -size}
+               for i in range(n_pairs)}
+    prices = price_data.loc[decision].to_dict()
+
+    results = {}
+    for name, profile in (('scheduled', None), ('immediate', np.eye(num_periods)[0] + 1e-12)):
+        scheduler = ExecutionScheduler(price_data=price_data, volume_data=volume_data, num_periods=num_periods,
+                                       volume_profile=profile, max_participation=1.0 if profile is not None else 0.1)
+        scheduler.rebalance(targets, None, prices, decision)
+        scheduler.impact_model  # Load the model before timing
+        started = time.perf_counter()
+        scheduler.run(data, max_days=n_days)
+        elapsed = time.perf_counter() - started
+        summary = scheduler.summary()
+        results[f"{name}_shortfall_bps"] = summary['shortfall_bps']
+        results[f"{name}_impact_bps"] = summary['impact_bps']
+        results[f"{name}_child_orders"] = summary['child_orders']
+        results[f"{name}_fill_rate_pct"] = summary['fill_rate_pct']
+        results[f"{name}_seconds"] = elapsed
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in benchmark_execution_scheduler().items():
+        print(f"{name}: {value:,.2f}" if isinstance(value, float) else f"{name}: {value}")
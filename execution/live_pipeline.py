@@ -0,0 +1,516 @@
+"""
+Live Pipeline
+
+Runs live ingestion, signal computation and order management in separate
+processes so they do not compete for one interpreter lock. Bars and signals
+flow through fixed-layout shared-memory rings; a supervisor watches every
+stage's heartbeat and stops the pipeline when a stage dies or stalls.
+
+    python -m execution.live_pipeline --replay --tickers AAPL MSFT NVDA AMD
+"""
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import queue
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from config.logging_config import logger
+from execution.shared_ring import BAR_RECORD, SIGNAL_RECORD, SharedRingBuffer
+
+STAGES = ('ingestion', 'signals', 'orders')
+ACTION_CODES = {'enter_long': 1, 'enter_short': -1, 'exit': 0}
+
+# Layout of the shared control block (doubles)
+_STOP = 0
+_HEARTBEAT = 1  # One slot per stage
+_PROCESSED = 1 + len(STAGES)  # One slot per stage
+_CONTROL_SIZE = 1 + 2 * len(STAGES)
+
+
+def _beat(control, stage: int):
+    control[_HEARTBEAT + stage] = time.time()
+
+
+def _put(ring: SharedRingBuffer, records: np.ndarray, control, stage: int) -> int:
+    """Write records with backpressure, still beating and honouring stop while blocked."""
+    written = 0
+    while written < len(records) and not control[_STOP]:
+        written += ring.put(records[written:], timeout=0.1)
+        _beat(control, stage)
+    return written
+
+
+def _bars_to_records(updates: Dict[str, pd.DataFrame], symbol_index: Dict[str, int]) -> np.ndarray:
+    n_records = sum(len(bars) for bars in updates.values())
+    records = np.empty(n_records, dtype=BAR_RECORD)
+    position = 0
+    for ticker, bars in updates.items():
+        n_bars = len(bars)
+        block = records[position:position + n_bars]
+        dates = pd.DatetimeIndex(pd.to_datetime(bars['Date'], utc=True))
+        block['time'] = dates.tz_convert(None).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        block['symbol'] = symbol_index[ticker]
+        for field in ('open', 'high', 'low', 'close', 'volume'):
+            block[field] = bars[field.capitalize()].to_numpy(dtype=np.float64)
+        position += n_bars
+    return records
+
+
+def run_ingestion(config: Dict, bar_spec, control):
+    """Ingestion stage: poll the provider and publish new bars to the bar ring."""
+    from src.data.live_data import LiveDataHandler
+    from src.data.market_data_providers import ReplayProvider, YFinanceProvider
+
+    stage = STAGES.index('ingestion')
+    bars = SharedRingBuffer.attach(bar_spec)
+    tickers = config['tickers']
+    symbol_index = {ticker: i for i, ticker in enumerate(tickers)}
+
+    scratch = None
+    if config['replay']:
+        provider = ReplayProvider(
+            data_dir=config['replay_dir'],
+            speed=config['speed'],
+            warmup_bars=config['warmup_bars']
+        )
+        # Replayed bars go to a store of their own, so they neither mix with
+        # live data nor look already stored to the next replay
+        scratch = tempfile.TemporaryDirectory(prefix='replay_bars_')
+    else:
+        provider = YFinanceProvider()
+    handler = LiveDataHandler(
+        tickers,
+        update_interval=config['update_interval'],
+        data_interval=config['data_interval'],
+        provider=provider,
+        data_dir=scratch.name if scratch else None
+    )
+
+    def publish(updates):
+        records = _bars_to_records(updates, symbol_index)
+        control[_PROCESSED + stage] += _put(bars, records, control, stage)
+
+    handler.subscribe(publish)
+    exit_code = 0
+    try:
+        cycles = 0
+        while not control[_STOP]:
+            started = time.monotonic()
+            handler.update_once()
+            cycles += 1
+            _beat(control, stage)
+
+            if config['replay'] and all(provider.exhausted(ticker) for ticker in tickers):
+                logger.info("Replay feed exhausted")
+                break
+            if config['max_cycles'] and cycles >= config['max_cycles']:
+                break
+            while not control[_STOP] and time.monotonic() - started < handler.update_interval:
+                time.sleep(min(0.5, handler.update_interval))
+                _beat(control, stage)
+
+    except Exception as e:
+        logger.error(f"Ingestion stage failed: {str(e)}")
+        control[_STOP] = 1
+        exit_code = 1
+    finally:
+        bars.close()
+        handler.stop_live_updates(timeout=1)
+        bars.release()
+        if scratch:
+            scratch.cleanup()
+    sys.exit(exit_code)
+
+
+def run_signals(config: Dict, bar_spec, signal_spec, control):
+    """Signal stage: feed bars to the streaming signal engine and publish its signals."""
+    from src.strategy.live_signal_engine import LiveSignalEngine
+
+    stage = STAGES.index('signals')
+    bars = SharedRingBuffer.attach(bar_spec)
+    signals = SharedRingBuffer.attach(signal_spec)
+    tickers = config['tickers']
+    pairs = [tuple(pair) for pair in config['pairs']]
+    pair_index = {pair: i for i, pair in enumerate(pairs)}
+    symbol_index = {ticker: i for i, ticker in enumerate(tickers)}
+    leg_x = np.array([symbol_index[x] for x, _ in pairs])
+    leg_y = np.array([symbol_index[y] for _, y in pairs])
+
+    engine = LiveSignalEngine(
+        pairs,
+        window=config['window'],
+        entry_threshold=config['entry_threshold'],
+        exit_threshold=config['exit_threshold'],
+        min_observations=config['min_observations']
+    )
+    last_price = np.full(len(tickers), np.nan)
+
+    exit_code = 0
+    try:
+        while True:
+            batch = bars.get(config['batch_size'])
+            _beat(control, stage)
+            if len(batch) == 0:
+                if (bars.closed and len(bars) == 0) or control[_STOP]:
+                    break
+                time.sleep(0.0005)
+                continue
+
+            batch = batch[np.argsort(batch['time'], kind='stable')]
+            for group in np.split(batch, np.flatnonzero(np.diff(batch['time'])) + 1):
+                last_price[group['symbol']] = group['close']
+                emitted = engine.update(
+                    pd.Timestamp(int(group['time'][0]), tz='UTC'),
+                    {tickers[s]: price for s, price in zip(group['symbol'].tolist(), group['close'].tolist())}
+                )
+                if not emitted:
+                    continue
+
+                records = np.empty(len(emitted), dtype=SIGNAL_RECORD)
+                for record, signal in zip(records, emitted):
+                    p = pair_index[signal.pair]
+                    record['time'] = group['time'][0]
+                    record['pair'] = p
+                    record['action'] = ACTION_CODES[signal.action]
+                    record['zscore'] = signal.zscore
+                    record['beta'] = signal.beta
+                    record['price_x'] = last_price[leg_x[p]]
+                    record['price_y'] = last_price[leg_y[p]]
+                _put(signals, records, control, stage)
+            control[_PROCESSED + stage] += len(batch)
+
+    except Exception as e:
+        logger.error(f"Signal stage failed: {str(e)}")
+        control[_STOP] = 1
+        exit_code = 1
+    finally:
+        signals.close()
+        summary = engine.latency.summary()
+        logger.info(f"Signal engine: {summary['count']} bars, p50 {summary['p50'] * 1e6:.0f}us, "
+                    f"p99 {summary['p99'] * 1e6:.0f}us")
+        bars.release()
+        signals.release()
+    sys.exit(exit_code)
+
+
+def run_orders(config: Dict, signal_spec, control, results):
+    """
+    Order stage: turn pair signals into orders on the simulated broker.
+
+    Orders go through an AsyncOrderGateway, so both legs of an entry are
+    sent together and an entry whose legs do not both fill is unwound.
+    """
+    from execution import Order, OrderSide, OrderType, SimulatedBroker
+    from execution.order_gateway import AsyncOrderGateway, BrokerAdapter
+
+    stage = STAGES.index('orders')
+    signals = SharedRingBuffer.attach(signal_spec)
+    pairs = [tuple(pair) for pair in config['pairs']]
+    broker = SimulatedBroker(
+        initial_balance=config['capital'],
+        transaction_cost=config['transaction_cost'],
+        allow_short=True
+    )
+    broker.engine.impact_model  # Load the model now rather than inside the first order's latency
+    holdings: Dict[int, Dict[str, int]] = {}  # Pair -> signed shares per leg
+    last_price: Dict[str, float] = {}
+    stats = {'orders': 0, 'rejected': 0, 'entries': 0, 'exits': 0, 'unwound': 0}
+    loop = asyncio.new_event_loop()
+    gateway = AsyncOrderGateway(BrokerAdapter(broker), id_prefix='PIPE')
+
+    def order(symbol: str, quantity: int) -> Order:
+        side = OrderSide.BUY if quantity > 0 else OrderSide.SELL
+        return Order(symbol, side, abs(quantity), OrderType.MARKET, price=last_price[symbol])
+
+    async def close(p: int):
+        """Offset a pair's legs, keeping whatever did not fill for the next exit signal."""
+        legs = holdings[p]
+        exits = {symbol: gateway.submit(order(symbol, -quantity)) for symbol, quantity in legs.items()}
+        if not await gateway.wait(list(exits.values()), config['order_timeout']):
+            await asyncio.gather(*(gateway.cancel(exit_.order_id) for exit_ in exits.values()))
+            await gateway.wait(list(exits.values()), gateway.cancel_timeout)
+
+        for symbol, exit_ in exits.items():
+            filled = int(exit_.filled_quantity)
+            legs[symbol] -= filled if legs[symbol] > 0 else -filled
+        if any(legs.values()):
+            holdings[p] = {symbol: quantity for symbol, quantity in legs.items() if quantity != 0}
+            logger.warning(f"Exit of pair {pairs[p]} left {holdings[p]} open")
+        else:
+            del holdings[p]
+            stats['exits'] += 1
+
+    async def handle(batch: np.ndarray):
+        for record in batch:
+            _beat(control, stage)
+            p = int(record['pair'])
+            symbol_x, symbol_y = pairs[p]
+            price_x, price_y = float(record['price_x']), float(record['price_y'])
+            last_price[symbol_x], last_price[symbol_y] = price_x, price_y
+
+            if record['action'] == 0:
+                if p in holdings:
+                    await close(p)
+            elif p not in holdings:
+                # Long spread buys Y and sells beta-weighted X; short spread the reverse
+                direction = int(record['action'])
+                quantity_y = direction * int(config['pair_notional'] / price_y)
+                quantity_x = -direction * int(config['pair_notional'] * float(record['beta']) / price_x)
+                if quantity_x == 0 or quantity_y == 0:
+                    continue
+                result = await gateway.submit_pair(order(symbol_y, quantity_y), order(symbol_x, quantity_x),
+                                                   timeout=config['order_timeout'])
+                if result.filled:
+                    holdings[p] = {symbol_y: quantity_y, symbol_x: quantity_x}
+                    stats['entries'] += 1
+                else:
+                    stats['unwound'] += 1
+
+    exit_code = 0
+    try:
+        loop.run_until_complete(gateway.start())
+        while True:
+            batch = signals.get()
+            _beat(control, stage)
+            if len(batch) == 0:
+                if (signals.closed and len(signals) == 0) or control[_STOP]:
+                    break
+                time.sleep(0.0005)
+                continue
+
+            loop.run_until_complete(handle(batch))
+            broker.update_positions(last_price)
+            control[_PROCESSED + stage] += len(batch)
+
+    except Exception as e:
+        logger.error(f"Order stage failed: {str(e)}")
+        control[_STOP] = 1
+        exit_code = 1
+    finally:
+        loop.run_until_complete(gateway.stop())
+        loop.close()
+        position_value = sum(pos.quantity * pos.current_price for pos in broker.positions.values())
+        stats.update({
+            'orders': len(gateway.records),
+            'rejected': sum(record.status == 'rejected' for record in gateway.records.values()),
+            'balance': broker.get_account_balance(),
+            'equity': broker.get_account_balance() + position_value,
+            'open_pairs': len(holdings),
+            'order_latency_p99': gateway.fill_latency.percentile(99)
+        })
+        results.put(stats)
+        signals.release()
+    sys.exit(exit_code)
+
+
+class LivePipeline:
+    """Supervisor of the ingestion, signal and order processes."""
+
+    def __init__(
+            self,
+            tickers: List[str],
+            pairs: Optional[List[Tuple[str, str]]] = None,
+            replay: bool = True,
+            replay_dir: Optional[str] = None,
+            speed: Optional[float] = None,
+            warmup_bars: int = 1,
+            update_interval: float = 0.0,
+            data_interval: str = '1m',
+            max_cycles: Optional[int] = None,
+            window: int = 90,
+            entry_threshold: float = 2.0,
+            exit_threshold: float = 1.0,
+            min_observations: int = 30,
+            capital: float = 1000000,
+            pair_notional: float = 50000,
+            transaction_cost: float = 0.0001,
+            order_timeout: float = 1.0,
+            bar_ring_size: int = 65536,
+            signal_ring_size: int = 8192,
+            batch_size: int = 4096,
+            heartbeat_timeout: float = 10.0
+    ):
+        """
+        Args:
+            tickers: Symbols to ingest
+            pairs: (symbol_x, symbol_y) pairs to trade; consecutive tickers if None
+            replay: Use the local replay feed instead of Yahoo Finance
+            replay_dir: Directory of replay CSV files
+            speed: Replay bars per second (None for one bar per update cycle)
+            warmup_bars: Replay bars available on the first update
+            update_interval: Seconds between ingestion cycles
+            data_interval: Bar interval requested from the live provider
+            max_cycles: Stop ingestion after this many update cycles
+            window: Rolling window of the signal engine
+            entry_threshold: |z-score| that opens a pair position
+            exit_threshold: |z-score| that closes it
+            min_observations: Bars before a pair emits signals
+            capital: Starting balance of the simulated broker
+            pair_notional: Dollar size of the Y leg of each pair position
+            transaction_cost: Broker fee as a fraction of traded value
+            order_timeout: Seconds both legs of an entry have to fill before it is unwound
+            bar_ring_size: Records in the bar ring
+            signal_ring_size: Records in the signal ring
+            batch_size: Bars the signal stage takes per read
+            heartbeat_timeout: Seconds without a heartbeat before a stage counts as stalled
+        """
+        if pairs is None:
+            pairs = list(zip(tickers[::2], tickers[1::2]))
+        unknown = {symbol for pair in pairs for symbol in pair} - set(tickers)
+        if unknown:
+            raise ValueError(f"Pair symbols not among the tickers: {sorted(unknown)}")
+
+        self.heartbeat_timeout = heartbeat_timeout
+        self.bar_ring_size = bar_ring_size
+        self.signal_ring_size = signal_ring_size
+        self.config = {
+            'tickers': list(tickers),
+            'pairs': [list(pair) for pair in pairs],
+            'replay': replay,
+            'replay_dir': replay_dir,
+            'speed': speed,
+            'warmup_bars': warmup_bars,
+            'update_interval': update_interval,
+            'data_interval': data_interval,
+            'max_cycles': max_cycles,
+            'window': window,
+            'entry_threshold': entry_threshold,
+            'exit_threshold': exit_threshold,
+            'min_observations': min_observations,
+            'capital': capital,
+            'pair_notional': pair_notional,
+            'transaction_cost': transaction_cost,
+            'order_timeout': order_timeout,
+            'batch_size': batch_size
+        }
+
+    def run(self) -> Dict:
+        """
+        Start the three stages, supervise them until the feed ends or a stage fails.
+
+        Returns:
+            Dict: Pipeline counters, ring backpressure and the order stage's results
+        """
+        ctx = mp.get_context('spawn')
+        bar_ring = SharedRingBuffer(BAR_RECORD, self.bar_ring_size)
+        signal_ring = SharedRingBuffer(SIGNAL_RECORD, self.signal_ring_size)
+        control = ctx.Array('d', _CONTROL_SIZE, lock=False)
+        for stage in range(len(STAGES)):
+            control[_HEARTBEAT + stage] = time.time()
+        results = ctx.Queue()
+
+        processes = [
+            ctx.Process(target=run_ingestion, args=(self.config, bar_ring.spec, control),
+                        name='pipeline-ingestion'),
+            ctx.Process(target=run_signals, args=(self.config, bar_ring.spec, signal_ring.spec, control),
+                        name='pipeline-signals'),
+            ctx.Process(target=run_orders, args=(self.config, signal_ring.spec, control, results),
+                        name='pipeline-orders')
+        ]
+        started = time.time()
+        # Consumers first, so the producer never starts against an unattended ring
+        for process in reversed(processes):
+            process.start()
+        logger.info(f"Live pipeline started: {len(self.config['tickers'])} tickers, "
+                    f"{len(self.config['pairs'])} pairs")
+
+        failed = []
+        try:
+            while any(process.is_alive() for process in processes):
+                time.sleep(0.2)
+                now = time.time()
+                for stage, process in enumerate(processes):
+                    if process.exitcode not in (None, 0) and STAGES[stage] not in failed:
+                        logger.error(f"Pipeline stage {STAGES[stage]} exited with code {process.exitcode}")
+                        failed.append(STAGES[stage])
+                        control[_STOP] = 1
+                    elif process.is_alive() and now - control[_HEARTBEAT + stage] > self.heartbeat_timeout:
+                        logger.error(f"Pipeline stage {STAGES[stage]} missed its heartbeat; stopping")
+                        failed.append(STAGES[stage])
+                        control[_STOP] = 1
+                        process.terminate()
+        except KeyboardInterrupt:
+            logger.info("Interrupted; stopping live pipeline")
+            control[_STOP] = 1
+        finally:
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+        try:
+            order_stats = results.get(timeout=1)
+        except queue.Empty:
+            order_stats = {}
+
+        summary = {
+            'runtime': time.time() - started,
+            'failed_stages': failed,
+            'bars': int(control[_PROCESSED + STAGES.index('ingestion')]),
+            'bars_processed': int(control[_PROCESSED + STAGES.index('signals')]),
+            'signals': signal_ring.written,
+            'signals_processed': int(control[_PROCESSED + STAGES.index('orders')]),
+            'bar_backpressure_seconds': bar_ring.wait_seconds,
+            'signal_backpressure_seconds': signal_ring.wait_seconds,
+            **order_stats
+        }
+        bar_ring.release()
+        signal_ring.release()
+        logger.info(f"Live pipeline finished: {summary}")
+        return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point of the live pipeline."""
+    parser = argparse.ArgumentParser(description="Multi-process live pair trading pipeline")
+    parser.add_argument('--tickers', nargs='+', required=True, help="Symbols to ingest")
+    parser.add_argument('--pairs', nargs='*', default=None,
+                        help="Pairs as X:Y (default: consecutive tickers)")
+    parser.add_argument('--replay', action='store_true', help="Use the local replay feed")
+    parser.add_argument('--replay-dir', default=None, help="Directory of replay CSV files")
+    parser.add_argument('--speed', type=float, default=None, help="Replay bars per second")
+    parser.add_argument('--warmup-bars', type=int, default=1)
+    parser.add_argument('--update-interval', type=float, default=0.0)
+    parser.add_argument('--data-interval', default='1m')
+    parser.add_argument('--max-cycles', type=int, default=None)
+    parser.add_argument('--window', type=int, default=90)
+    parser.add_argument('--entry-threshold', type=float, default=2.0)
+    parser.add_argument('--exit-threshold', type=float, default=1.0)
+    parser.add_argument('--capital', type=float, default=1000000)
+    parser.add_argument('--pair-notional', type=float, default=50000)
+    parser.add_argument('--order-timeout', type=float, default=1.0)
+    parser.add_argument('--heartbeat-timeout', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    pairs = [tuple(pair.split(':')) for pair in args.pairs] if args.pairs else None
+    pipeline = LivePipeline(
+        tickers=args.tickers,
+        pairs=pairs,
+        replay=args.replay,
+        replay_dir=args.replay_dir,
+        speed=args.speed,
+        warmup_bars=args.warmup_bars,
+        update_interval=args.update_interval,
+        data_interval=args.data_interval,
+        max_cycles=args.max_cycles,
+        window=args.window,
+        entry_threshold=args.entry_threshold,
+        exit_threshold=args.exit_threshold,
+        capital=args.capital,
+        pair_notional=args.pair_notional,
+        order_timeout=args.order_timeout,
+        heartbeat_timeout=args.heartbeat_timeout
+    )
+    summary = pipeline.run()
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+"""
+Matching Engine Module
+
+Simulated exchange behind SimulatedBroker. Every symbol has price-time
+priority books of resting limit orders and of untriggered stop orders; each
+bar (or tick, as a bar with open == high == low == close) triggers stops,
+crosses limits and fills market orders. Fills of a bar are priced in one
+batch, with slippage from the square-root MarketImpactModel, and recorded
+in a columnar TradeLedger.
+"""
+
+import gc
+import heapq
+import itertools
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Hashable, List, Optional, Tuple
+from config.logging_config import logger
+from src.utils.trade_ledger import TradeLedger
+
+FILL_SCHEMA = {
+    'order_id': object,
+    'symbol': object,
+    'side': np.int8,  # 1 buy, -1 sell
+    'quantity': np.float64,
+    'price': np.float64,
+    'reference_price': np.float64,
+    'slippage': np.float64,
+    'time': 'datetime64[ns]'
+}
+
+MARKET, LIMIT, STOP, STOP_LIMIT = 'market', 'limit', 'stop', 'stop_limit'
+
+_heappush, _heappop = heapq.heappush, heapq.heappop
+
+
+class _EngineOrder:
+    """Book entry of one order."""
+    __slots__ = ('order_id', 'symbol', 'side', 'quantity', 'remaining', 'order_type',
+                 'limit_price', 'stop_price', 'status', 'filled_value')
+
+    def __init__(self, order_id, symbol, side, quantity, order_type, limit_price, stop_price):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.remaining = quantity
+        self.order_type = order_type
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+        self.status = 'pending'
+        self.filled_value = 0.0
+
+    @property
+    def average_price(self) -> float:
+        filled = self.quantity - self.remaining
+        return self.filled_value / filled if filled > 0 else float('nan')
+
+
+class _SymbolBook:
+    """Resting orders of one symbol. Heap keys give price-time priority."""
+    __slots__ = ('bids', 'asks', 'buy_stops', 'sell_stops')
+
+    def __init__(self):
+        self.bids = []  # (-limit, seq, order)
+        self.asks = []  # (limit, seq, order)
+        self.buy_stops = []  # (stop, seq, order): lowest stop triggers first
+        self.sell_stops = []  # (-stop, seq, order): highest stop triggers first
+
+    def __len__(self) -> int:
+        return len(self.bids) + len(self.asks) + len(self.buy_stops) + len(self.sell_stops)
+
+
+class MatchingEngine:
+    """
+    Event-driven order matching against bar data.
+
+    Rules per bar (open, high, low, close, volume):
+
+    - Buy stops trigger when high >= stop, sell stops when low <= stop. A
+      triggered stop fills as a market order at the stop (or the open if the
+      bar gapped through it); a triggered stop-limit joins the limit book.
+    - Buy limits fill when low <= limit at min(limit, open); sell limits when
+      high >= limit at max(limit, open), in price-time priority. A stop-limit
+      triggered in the bar trades from its trigger price instead of the open.
+    - With ``max_participation`` set, fills per side are capped at that share
+      of the bar's volume and the last order in priority is partially filled.
+
+    Market and triggered-stop fills pay the model's temporary and permanent
+    impact plus half the spread; limit fills never cross their limit.
+    Cancelled orders are removed lazily when they reach the top of a book.
+    """
+
+    def __init__(
+            self,
+            impact_model: Optional['MarketImpactModel'] = None,
+            price_data: Optional[pd.DataFrame] = None,
+            volume_data: Optional[pd.DataFrame] = None,
+            max_participation: Optional[float] = None
+    ):
+        """
+        Args:
+            impact_model: Slippage model (defaults to MarketImpactModel())
+            price_data: Daily price history (dates x symbols) for the model's volatility and spread
+            volume_data: Daily volume history (dates x symbols) for the model's ADV
+            max_participation: Maximum share of a bar's volume filled per side
+        """
+        self._impact_model = impact_model
+        self.price_data = price_data
+        self.volume_data = volume_data
+        self.max_participation = max_participation
+
+        self.books: Dict[str, _SymbolBook] = {}
+        self.orders: Dict[Hashable, _EngineOrder] = {}
+        self.last_price: Dict[str, float] = {}
+        self.last_time: Dict[str, Optional[pd.Timestamp]] = {}
+        self.fills = TradeLedger(FILL_SCHEMA, capacity=1024)
+        self._sequence = itertools.count()
+        self._impact_inputs: Dict[str, Tuple] = {}
+
+    @property
+    def impact_model(self) -> 'MarketImpactModel':
+        if self._impact_model is None:
+            # Imported on first use: the optimization module is slow to load
+            from src.strategy.optimization import MarketImpactModel
+            self._impact_model = MarketImpactModel()
+        return self._impact_model
+
+    def submit(
+            self,
+            order_id: Hashable,
+            symbol: str,
+            side: int,
+            quantity: float,
+            order_type: str = LIMIT,
+            limit_price: Optional[float] = None,
+            stop_price: Optional[float] = None
+    ) -> _EngineOrder:
+        """
+        Rest an order in the books until a bar triggers or fills it.
+
+        Args:
+            order_id: Unique order identifier
+            symbol: Traded symbol
+            side: 1 to buy, -1 to sell
+            quantity: Shares, positive
+            order_type: 'limit', 'stop' or 'stop_limit' ('market' fills on the next bar's open)
+            limit_price: Limit price of limit and stop-limit orders
+            stop_price: Trigger price of stop and stop-limit orders
+        """
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = _SymbolBook()
+        order = _EngineOrder(order_id, symbol, side, quantity, order_type, limit_price, stop_price)
+
+        seq = next(self._sequence)
+        # Pushes are inlined: submission is the hot path of a full book
+        if order_type == LIMIT:
+            if side > 0:
+                _heappush(book.bids, (-limit_price, seq, order))
+            else:
+                _heappush(book.asks, (limit_price, seq, order))
+        elif order_type == STOP or order_type == STOP_LIMIT:
+            if side > 0:
+                _heappush(book.buy_stops, (stop_price, seq, order))
+            else:
+                _heappush(book.sell_stops, (-stop_price, seq, order))
+        elif order_type == MARKET:
+            # Marketable at any price: ahead of every limit, filled at the next open
+            if side > 0:
+                _heappush(book.bids, (-np.inf, seq, order))
+            else:
+                _heappush(book.asks, (0.0, seq, order))
+        else:
+            raise ValueError(f"Unknown order type: {order_type}")
+        self.orders[order_id] = order
+        return order
+
+    @staticmethod
+    def _rest_limit(book: _SymbolBook, order: _EngineOrder, seq: int):
+        if order.side > 0:
+            _heappush(book.bids, (-order.limit_price, seq, order))
+        else:
+            _heappush(book.asks, (order.limit_price, seq, order))
+
+    def cancel(self, order_id: str) -> bool:
+        """Cancel a resting order; returns False if it is unknown or already done."""
+        order = self.orders.get(order_id)
+        if order is None or order.status in ('filled', 'cancelled'):
+            return False
+        order.status = 'cancelled'
+        del self.orders[order_id]
+        return True
+
+    def open_orders(self, symbol: Optional[str] = None) -> int:
+        if symbol is None:
+            return len(self.orders)
+        return sum(1 for order in self.orders.values() if order.symbol == symbol)
+
+    def execute_market(
+            self,
+            order_id: str,
+            symbol: str,
+            side: int,
+            quantity: float,
+            reference_price: Optional[float] = None,
+            date=None
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Fill a market order immediately against the last known price.
+
+        Args:
+            order_id: Order identifier recorded with the fill
+            symbol: Traded symbol
+            side: 1 to buy, -1 to sell
+            quantity: Shares, positive
+            reference_price: Price to fill against (defaults to the symbol's last price)
+            date: Fill time (defaults to the symbol's last bar time)
+
+        Returns:
+            (fill price, slippage per share), or None if no price is known
+        """
+        if reference_price is None:
+            reference_price = self.last_price.get(symbol)
+        if reference_price is None or not reference_price > 0:
+            return None
+        if date is None:
+            date = self.last_time.get(symbol)
+
+        slippage = float(self._slippage(symbol, date, np.array([quantity]))[0]) * reference_price
+        price = reference_price + side * slippage
+        self.fills.append(order_id=order_id, symbol=symbol, side=side, quantity=quantity,
+                          price=price, reference_price=reference_price, slippage=slippage, time=date)
+        return price, slippage
+
+    def _slippage(self, symbol: str, date, sizes: np.ndarray) -> np.ndarray:
+        """Impact plus half spread, as a fraction of price, for fills of ``sizes`` shares."""
+        # The model's inputs come from daily history, so intraday fills share their day's
+        day = None if date is None else pd.Timestamp(date).normalize()
+        inputs = self._impact_inputs.get(symbol)
+        if inputs is None or inputs[0] != day:
+            model = self.impact_model
+            volatility = model._get_volatility(symbol, self.price_data, day)
+            adv = model._get_adv(symbol, self.volume_data, day)
+            spread = model._get_spread(symbol, self.price_data, day)
+            inputs = self._impact_inputs[symbol] = (day, volatility, adv, spread)
+
+        _, volatility, adv, spread = inputs
+        model = self.impact_model
+        return (model._calculate_temporary_impact(sizes, volatility, adv)
+                + model._calculate_permanent_impact(sizes, volatility, adv)
+                + model._calculate_spread_cost(sizes, spread, 1))
+
+    def process_bar(self, symbol: str, date, open_: float, high: float, low: float,
+                    close: float, volume: float = np.inf) -> int:
+        """Match one symbol against one bar; returns the number of fills."""
+        return self.process_bars(date, {symbol: (open_, high, low, close, volume)})
+
+    def process_bars(self, date, bars: Dict[str, Tuple[float, float, float, float, float]]) -> int:
+        """
+        Match every book against the bars of one timestamp.
+
+        Args:
+            date: Bar timestamp
+            bars: Symbol -> (open, high, low, close, volume)
+
+        Returns:
+            int: Number of fills recorded
+        """
+        columns = {name: [] for name in ('order_id', 'symbol', 'side', 'quantity', 'price',
+                                         'reference_price', 'slippage')}
+
+        for symbol, (open_, high, low, close, volume) in bars.items():
+            self.last_price[symbol] = close
+            self.last_time[symbol] = date
+            book = self.books.get(symbol)
+            if not book:
+                continue
+
+            triggered, trigger_prices = self._trigger_stops(book, open_, high, low)
+            capacity = np.inf if self.max_participation is None else volume * self.max_participation
+            fills: List[Tuple[_EngineOrder, float, float]] = []
+            self._match_side(book, 1, book.bids, triggered, trigger_prices, open_, low, capacity, fills)
+            self._match_side(book, -1, book.asks, triggered, trigger_prices, open_, high, capacity, fills)
+            if fills:
+                self._price_fills(symbol, date, fills, columns)
+
+        if not columns['order_id']:
+            return 0
+        self.fills.extend({**columns, 'time': date})
+        return len(columns['order_id'])
+
+    def _trigger_stops(self, book: _SymbolBook, open_: float, high: float, low: float
+                       ) -> Tuple[List[Tuple[_EngineOrder, float]], Dict[_EngineOrder, float]]:
+        """
+        Pop triggered stops.
+
+        Stops are returned with their fill reference. Stop-limits join the
+        limit book, and the price they were triggered at is returned for them,
+        since this bar they cannot trade before the stop was reached.
+        """
+        triggered = []
+        trigger_prices = {}
+        while book.buy_stops and book.buy_stops[0][0] <= high:
+            stop, seq, order = _heappop(book.buy_stops)
+            if order.status == 'cancelled':
+                continue
+            if order.order_type == STOP_LIMIT:
+                self._rest_limit(book, order, seq)
+                trigger_prices[order] = max(stop, open_)
+            else:
+                triggered.append((order, max(stop, open_)))
+        while book.sell_stops and -book.sell_stops[0][0] >= low:
+            key, seq, order = _heappop(book.sell_stops)
+            if order.status == 'cancelled':
+                continue
+            if order.order_type == STOP_LIMIT:
+                self._rest_limit(book, order, seq)
+                trigger_prices[order] = min(-key, open_)
+            else:
+                triggered.append((order, min(-key, open_)))
+        return triggered, trigger_prices
+
+    def _match_side(self, book: _SymbolBook, side: int, heap: list,
+                    triggered: List[Tuple[_EngineOrder, float]], trigger_prices: Dict[_EngineOrder, float],
+                    open_: float, extreme: float, capacity: float,
+                    fills: List[Tuple[_EngineOrder, float, float]]):
+        """
+        Fill one side of a book against a bar, in priority order, up to ``capacity`` shares.
+
+        ``extreme`` is the bar's low for bids and its high for asks. Limits
+        trade from the open, or from the trigger price for stop-limits
+        triggered this bar, capped at their limit.
+        """
+        available = capacity
+        # Triggered stops go ahead of resting limits
+        for order, reference in triggered:
+            if order.side == side and available > 0:
+                available -= self._fill(order, available, reference, fills)
+
+        # Bids are keyed by -limit, so one comparison of keys serves both sides
+        bound = -extreme if side > 0 else extreme
+        while heap and available > 0:
+            key, seq, order = heap[0]
+            if order.status == 'cancelled':
+                _heappop(heap)
+                continue
+            if key > bound:
+                break
+            if order.order_type == MARKET:
+                reference = open_
+            else:
+                start = trigger_prices.get(order, open_) if trigger_prices else open_
+                if side > 0:
+                    reference = -key if -key < start else start
+                else:
+                    reference = key if key > start else start
+            size = order.remaining if order.remaining < available else available
+            order.remaining -= size
+            available -= size
+            fills.append((order, size, reference))
+            if order.remaining <= 0:
+                _heappop(heap)
+
+        # Stops left unfilled for lack of volume wait in the book as market orders
+        for order, _ in triggered:
+            if order.side == side and order.remaining > 0:
+                order.order_type = MARKET
+                _heappush(heap, (-np.inf if side > 0 else 0.0, next(self._sequence), order))
+
+    @staticmethod
+    def _fill(order: _EngineOrder, available: float, reference: float,
+              fills: List[Tuple[_EngineOrder, float, float]]) -> float:
+        size = min(order.remaining, available)
+        order.remaining -= size
+        fills.append((order, size, reference))
+        return size
+
+    def _price_fills(self, symbol: str, date, fills: List[Tuple[_EngineOrder, float, float]],
+                     columns: Dict[str, list]):
+        """Apply impact to one symbol's fills in a single vectorized pass."""
+        orders, sizes, reference = zip(*fills)
+        sizes = np.array(sizes)
+        reference = np.array(reference)
+        side = np.fromiter((order.side for order in orders), dtype=np.int8, count=len(orders))
+        price = reference + side * self._slippage(symbol, date, sizes) * reference
+
+        # Limit orders never fill through their limit; NaN marks orders without one
+        limit = np.fromiter((order.limit_price if order.order_type in (LIMIT, STOP_LIMIT) else np.nan
+                             for order in orders), dtype=np.float64, count=len(orders))
+        price = np.where(side * (price - limit) > 0, limit, price)
+
+        open_orders = self.orders
+        for order, value in zip(orders, (price * sizes).tolist()):
+            order.filled_value += value
+            if order.remaining <= 0:
+                order.status = 'filled'
+                open_orders.pop(order.order_id, None)
+            else:
+                order.status = 'partially_filled'
+
+        columns['order_id'].extend([order.order_id for order in orders])
+        columns['symbol'].extend([symbol] * len(orders))
+        columns['side'].extend(side.tolist())
+        columns['quantity'].extend(sizes.tolist())
+        columns['price'].extend(price.tolist())
+        columns['reference_price'].extend(reference.tolist())
+        columns['slippage'].extend((price - reference).tolist())
+
+    def fills_frame(self) -> pd.DataFrame:
+        """All fills so far as a DataFrame."""
+        return self.fills.to_frame(copy=True)
+
+
+def benchmark_matching_engine(n_orders: int = 200_000, n_symbols: int = 100,
+                              n_bars: int = 50, seed: int = 0, pause_gc: bool = False) -> Dict[str, float]:
+    """
+    Time order submission and bar matching on random limit and stop orders.
+
+    The garbage collector stays on. Objects that exist before the timed
+    phases (loaded modules, the generated orders) are frozen out of its
+    passes, as a long-running process would after startup, so the passes
+    cover what the engine itself allocates.
+
+    Args:
+        n_orders: Orders submitted before matching
+        n_symbols: Symbols the orders are spread over
+        n_bars: Bars matched per symbol
+        seed: Random seed
+        pause_gc: Pause the cyclic garbage collector during the timed phases, as timeit does
+
+    Returns:
+        Dict[str, float]: Orders, fills, seconds and orders/second of each phase
+    """
+    rng = np.random.default_rng(seed)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    symbol_idx = rng.integers(n_symbols, size=n_orders)
+    sides = rng.choice([1, -1], size=n_orders)
+    types = rng.choice([LIMIT, STOP, STOP_LIMIT], size=n_orders, p=[0.7, 0.2, 0.1])
+    offsets = rng.uniform(0.0, 0.05, size=n_orders)
+    limits = (100.0 * (1 - sides * offsets)).tolist()  # Passive side of 100
+    stops = (100.0 * (1 + sides * offsets)).tolist()  # Aggressive side of 100
+    quantities = rng.integers(1, 500, size=n_orders).astype(float).tolist()
+    order_symbols = [symbols[i] for i in symbol_idx]
+    sides, types = sides.tolist(), types.tolist()
+
+    engine = MatchingEngine(max_participation=0.1)
+    engine.impact_model  # Load the model outside the timed phases
+    closes = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(n_bars, n_symbols)), axis=0))
+    dates = pd.date_range('2024-01-01', periods=n_bars, freq='min')
+
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.freeze()
+    if pause_gc:
+        gc.disable()
+    try:
+        started = time.perf_counter()
+        for i in range(n_orders):
+            engine.submit(i, order_symbols[i], sides[i], quantities[i], types[i],
+                          limit_price=limits[i], stop_price=stops[i])
+        submit_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for t in range(n_bars):
+            bars = {
+                symbol: (closes[t - 1, j] if t else 100.0, closes[t, j] * 1.01, closes[t, j] * 0.99,
+                         closes[t, j], 2e5)
+                for j, symbol in enumerate(symbols)
+            }
+            engine.process_bars(dates[t], bars)
+        match_seconds = time.perf_counter() - started
+    finally:
+        gc.unfreeze()
+        if gc_was_enabled:
+            gc.enable()
+
+    results = {
+        'orders': n_orders,
+        'fills': len(engine.fills),
+        'submit_seconds': submit_seconds,
+        'submit_orders_per_second': n_orders / submit_seconds,
+        'match_seconds': match_seconds,
+        'match_fills_per_second': len(engine.fills) / match_seconds if match_seconds else float('nan'),
+        'orders_per_second': n_orders / (submit_seconds + match_seconds)
+    }
+    logger.info(f"Matching engine benchmark: {results['orders_per_second']:,.0f} orders/s, "
+                f"{results['fills']} fills")
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in benchmark_matching_engine().items():
+        print(f"{name}: {value:,.2f}" if isinstance(value, float) else f"{name}: {value}")
@@ -6,12 +6,18 @@ It includes order management, position tracking, account balance,
 and transaction cost handling if desired.
 """
 
-from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 from enum import Enum
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from abc import ABC, abstractmethod
 from config.logging_config import logger
+from execution.matching_engine import MatchingEngine
+from execution.order_journal import (
+    ACK, CANCEL, EVENT_NAMES, FILL, FLAG_BATCH, FLAG_BATCH_START, NEW, REJECT, JournalEvent, OrderJournal
+)
 
 
 class OrderType(Enum):
@@ -39,6 +45,8 @@ class Order:
     status: str = "pending"
     timestamp: datetime = datetime.now()
     order_id: Optional[str] = None
+    filled_quantity: float = 0.0
+    average_price: Optional[float] = None
 
 
 @dataclass
@@ -57,6 +65,9 @@ class Position:
         self.pnl = (self.current_price - self.entry_price) * self.quantity
 
 
+_ORDER_TYPES = list(OrderType)
+
+
 class AbstractBroker(ABC):
     """
     Abstract base class for broker implementations.
@@ -92,22 +103,57 @@ class SimulatedBroker(AbstractBroker):
     - Stores a dictionary of positions and orders.
     - Optionally handles transaction cost internally,
       though your Backtester can also do it.
-    - Immediately executes MARKET orders; other order types
-      remain in 'pending' until something triggers them.
+    - Immediately executes MARKET orders at the order price, or the last
+      known price, plus market impact; LIMIT, STOP and STOP_LIMIT orders rest
+      in a MatchingEngine and fill when ``process_bar`` crosses them.
+    - With an OrderJournal, every order event is journaled and the state is
+      snapshotted periodically; ``recover`` rebuilds a broker from it.
     """
 
-    def __init__(self, initial_balance: float = 100000, transaction_cost: float = 0.001):
+    def __init__(self, initial_balance: float = 100000, transaction_cost: float = 0.001,
+                 allow_short: bool = False, matching_engine: Optional[MatchingEngine] = None,
+                 journal: Optional[OrderJournal] = None):
         """
         Args:
             initial_balance (float): Starting account balance.
             transaction_cost (float): e.g. 0.001 => 0.1% per trade.
+            allow_short (bool): Let SELL orders open or extend short positions,
+                as the short leg of a pair trade needs.
+            matching_engine (Optional[MatchingEngine]): Books and slippage model
+                for fills (defaults to MatchingEngine()).
+            journal (Optional[OrderJournal]): Durable log of order events. An
+                empty journal gets a snapshot of the starting state, so that
+                recovery does not depend on the initial balance being passed again.
         """
         self.balance = initial_balance
         self.transaction_cost = transaction_cost
+        self.allow_short = allow_short
 
         self.positions: Dict[str, Position] = {}
         self.orders: Dict[str, Order] = {}
         self.order_counter = 0
+        self.engine = matching_engine or MatchingEngine()
+        self._fill_cursor = len(self.engine.fills)
+        self.journal = journal
+        if journal is not None and journal.is_empty:
+            self.snapshot()
+
+    def _record(self, event: int, order: Order, **fields):
+        """Journal an order event."""
+        if self.journal is None:
+            return
+        self.journal.append(event, order.order_id, order.symbol, 1 if order.side == OrderSide.BUY else -1,
+                            **fields)
+
+    def _snapshot_if_due(self):
+        """
+        Snapshot when the journal asks for it.
+
+        Only called once an order's events are complete and booked, so a
+        snapshot never separates an order's NEW from its ACK or FILL.
+        """
+        if self.journal is not None and self.journal.needs_snapshot:
+            self.snapshot()
 
     def place_order(self, order: Order) -> bool:
         """
@@ -117,14 +163,29 @@ class SimulatedBroker(AbstractBroker):
         try:
             self.order_counter += 1
             order.order_id = f"ORDER_{self.order_counter}"
+            self._record(NEW, order, quantity=order.quantity, price=order.price or 0.0,
+                         stop_price=order.stop_price or 0.0, order_type=_ORDER_TYPES.index(order.order_type),
+                         timestamp=order.timestamp.timestamp())
 
             if not self._validate_order(order):
+                order.status = "rejected"
+                self._record(REJECT, order)
                 return False
 
             if order.order_type == OrderType.MARKET:
                 return self._execute_order(order)
 
+            self.engine.submit(
+                order.order_id,
+                order.symbol,
+                1 if order.side == OrderSide.BUY else -1,
+                order.quantity,
+                order.order_type.value,
+                limit_price=order.price,
+                stop_price=order.stop_price
+            )
             self.orders[order.order_id] = order
+            self._record(ACK, order)
             logger.info(f"Pending order placed: {order}")
             return True
 
@@ -132,10 +193,17 @@ class SimulatedBroker(AbstractBroker):
             logger.error(f"Error placing order: {e}")
             return False
 
+        finally:
+            self._snapshot_if_due()
+
     def cancel_order(self, order_id: str) -> bool:
         """Cancel an existing pending order."""
         if order_id in self.orders:
-            del self.orders[order_id]
+            self.engine.cancel(order_id)
+            order = self.orders.pop(order_id)
+            order.status = "cancelled"
+            self._record(CANCEL, order)
+            self._snapshot_if_due()
             logger.info(f"Order cancelled: {order_id}")
             return True
         logger.warning(f"No such order_id {order_id} to cancel.")
@@ -151,12 +219,111 @@ class SimulatedBroker(AbstractBroker):
 
     def update_positions(self, current_prices: Dict[str, float]):
         """
-        Update all positions with current market prices.
+        Update positions with current market prices.
         Called typically once per bar/day/tick in your backtest or event loop.
+        Only symbols that are both held and priced are visited, and the prices
+        become the reference for subsequent MARKET orders.
+        """
+        self.engine.last_price.update(current_prices)
+        if len(current_prices) < len(self.positions):
+            for symbol, price in current_prices.items():
+                position = self.positions.get(symbol)
+                if position is not None:
+                    position.update(price)
+        else:
+            for symbol, position in self.positions.items():
+                price = current_prices.get(symbol)
+                if price is not None:
+                    position.update(price)
+
+    def process_bar(
+            self,
+            date,
+            bars: Union[Mapping[str, Tuple[float, float, float, float, float]], pd.DataFrame]
+    ) -> int:
         """
-        for symbol, position in self.positions.items():
-            if symbol in current_prices:
-                position.update(current_prices[symbol])
+        Match resting orders against one timestamp's bars and book the fills.
+
+        Args:
+            date: Bar timestamp.
+            bars: Symbol -> (open, high, low, close, volume), or a DataFrame
+                indexed by symbol with Open, High, Low, Close and Volume columns.
+
+        Returns:
+            int: Number of fills.
+        """
+        if isinstance(bars, pd.DataFrame):
+            bars = dict(zip(bars.index, bars[['Open', 'High', 'Low', 'Close', 'Volume']].itertuples(
+                index=False, name=None)))
+
+        n_fills = self.engine.process_bars(date, bars)
+        if n_fills:
+            self._book_fills()
+        self.update_positions({symbol: bar[3] for symbol, bar in bars.items()})
+        return n_fills
+
+    def _book_fills(self):
+        """Apply the engine's new fills to balance, positions and order statuses in one batch."""
+        start, self._fill_cursor = self._fill_cursor, len(self.engine.fills)
+        fills = {name: self.engine.fills.column(name)[start:] for name in
+                 ('order_id', 'symbol', 'side', 'quantity', 'price', 'time')}
+        filled = self._settle_fills(fills['order_id'].tolist(), fills['symbol'].tolist(), fills['side'],
+                                    fills['quantity'], fills['price'])
+        for order in filled:
+            logger.info(f"Order executed: {order}")
+
+        if self.journal is not None:
+            timestamp = pd.Timestamp(fills['time'][0]).timestamp() if len(fills['time']) else 0.0
+            value = fills['price'] * fills['quantity']
+            for k, (order_id, symbol, side, quantity, price) in enumerate(zip(
+                    fills['order_id'], fills['symbol'], fills['side'].tolist(),
+                    fills['quantity'].tolist(), fills['price'].tolist())):
+                self.journal.append(FILL, order_id, symbol, side, quantity=quantity, price=price,
+                                    fee=value[k] * self.transaction_cost, timestamp=timestamp,
+                                    flags=FLAG_BATCH | (FLAG_BATCH_START if k == 0 else 0))
+            self._snapshot_if_due()
+
+    def _settle_fills(self, order_ids: List[str], symbols: List[str], sides: np.ndarray,
+                      quantities: np.ndarray, prices: np.ndarray) -> List[Order]:
+        """
+        Book one bar's fills: balance at once, one position update per symbol and side.
+
+        Returns:
+            List[Order]: Orders the fills completed.
+        """
+        value = prices * quantities
+        self.balance -= float(np.sum(sides * value) + np.sum(value) * self.transaction_cost)
+
+        # The volume-weighted fill of each symbol and side
+        by_side: Dict[Tuple[str, int], List[float]] = {}
+        by_order: Dict[str, List[float]] = {}
+        for order_id, symbol, side, quantity, fill_value in zip(order_ids, symbols, sides.tolist(),
+                                                                quantities.tolist(), value.tolist()):
+            totals = by_side.setdefault((symbol, side), [0.0, 0.0])
+            totals[0] += quantity
+            totals[1] += fill_value
+            totals = by_order.setdefault(order_id, [0.0, 0.0])
+            totals[0] += quantity
+            totals[1] += fill_value
+
+        for (symbol, side), (quantity, fill_value) in by_side.items():
+            if side < 0 and symbol not in self.positions and not self.allow_short:
+                continue
+            self._apply_fill(symbol, side * quantity, fill_value / quantity)
+
+        filled = []
+        for order_id, (quantity, fill_value) in by_order.items():
+            order = self.orders.get(order_id)
+            if order is None:
+                continue
+            filled_value = (order.average_price or 0.0) * order.filled_quantity + fill_value
+            order.filled_quantity += quantity
+            order.average_price = filled_value / order.filled_quantity
+            order.status = 'partially_filled' if order.filled_quantity < order.quantity else 'filled'
+            if order.status == 'filled':
+                del self.orders[order_id]
+                filled.append(order)
+        return filled
 
     def _validate_order(self, order: Order) -> bool:
         """Check if the order parameters are valid (enough balance, correct price, etc.)."""
@@ -165,19 +332,25 @@ class SimulatedBroker(AbstractBroker):
                 logger.error(f"Invalid order quantity {order.quantity}")
                 return False
 
-            if order.order_type != OrderType.MARKET:
+            if order.order_type in (OrderType.LIMIT, OrderType.STOP_LIMIT):
                 if (order.price is None) or (order.price <= 0):
                     logger.error(f"Invalid price {order.price} for {order.order_type}")
                     return False
 
+            if order.order_type in (OrderType.STOP, OrderType.STOP_LIMIT):
+                if (order.stop_price is None) or (order.stop_price <= 0):
+                    logger.error(f"Invalid stop price {order.stop_price} for {order.order_type}")
+                    return False
+
             if order.side == OrderSide.BUY:
-                cost_estimate = order.quantity * (order.price or 0)
+                reference = order.price or order.stop_price or self.engine.last_price.get(order.symbol, 0)
+                cost_estimate = order.quantity * reference
                 cost_estimate += cost_estimate * self.transaction_cost
                 if cost_estimate > self.balance:
                     logger.error("Insufficient balance to place buy order.")
                     return False
 
-            if order.side == OrderSide.SELL:
+            if order.side == OrderSide.SELL and not self.allow_short:
                 pos = self.get_position(order.symbol)
                 if not pos or pos.quantity < order.quantity:
                     logger.error("Insufficient position for sell order.")
@@ -189,46 +362,52 @@ class SimulatedBroker(AbstractBroker):
             logger.error(f"Error validating order: {e}")
             return False
 
+    def _apply_fill(self, symbol: str, signed_quantity: float, fill_price: float):
+        """
+        Apply a fill to the position of a symbol.
+
+        Adding to a position averages the entry price; reducing it keeps the
+        entry price; crossing through zero starts a new position at the fill.
+        """
+        pos = self.positions.get(symbol)
+        if pos is None:
+            self.positions[symbol] = Position(
+                symbol=symbol,
+                quantity=signed_quantity,
+                entry_price=fill_price,
+                current_price=fill_price
+            )
+            return
+
+        new_qty = pos.quantity + signed_quantity
+        if new_qty == 0 or (not self.allow_short and new_qty < 0):
+            del self.positions[symbol]
+        elif pos.quantity * signed_quantity > 0:
+            pos.entry_price = (pos.entry_price * pos.quantity + fill_price * signed_quantity) / new_qty
+            pos.quantity = new_qty
+        elif pos.quantity * new_qty < 0:
+            pos.quantity = new_qty
+            pos.entry_price = fill_price
+        else:
+            pos.quantity = new_qty
+
     def _execute_order(self, order: Order) -> bool:
         """
         Execute the order in the simulated environment.
         Adjust balance and positions immediately for MARKET orders.
         """
         try:
-            fill_price = order.price if order.price else 100.0
-
-            order_cost = fill_price * order.quantity
-            cost_fee = order_cost * self.transaction_cost
-
-            if order.side == OrderSide.BUY:
-                total_spend = order_cost + cost_fee
-                self.balance -= total_spend
-                if order.symbol in self.positions:
-                    pos = self.positions[order.symbol]
-                    new_qty = pos.quantity + order.quantity
-                    avg_price = (pos.entry_price * pos.quantity + order_cost) / new_qty
-                    pos.quantity = new_qty
-                    pos.entry_price = avg_price
-                else:
-                    self.positions[order.symbol] = Position(
-                        symbol=order.symbol,
-                        quantity=order.quantity,
-                        entry_price=fill_price,
-                        current_price=fill_price
-                    )
-
-            elif order.side == OrderSide.SELL:
-                proceeds = order_cost - cost_fee
-                self.balance += proceeds
-                pos = self.positions.get(order.symbol)
-                if pos:
-                    new_qty = pos.quantity - order.quantity
-                    if new_qty > 0:
-                        pos.quantity = new_qty
-                    else:
-                        del self.positions[order.symbol]
-
-            order.status = "filled"
+            side = 1 if order.side == OrderSide.BUY else -1
+            fill = self.engine.execute_market(order.order_id, order.symbol, side, order.quantity,
+                                              reference_price=order.price)
+            if fill is None:
+                order.status = "rejected"
+                self._record(REJECT, order)
+                logger.error(f"No price for {order.symbol} to fill market order {order.order_id}")
+                return False
+            self._fill_cursor = len(self.engine.fills)
+            fee = self._settle_market_fill(order, fill[0])
+            self._record(FILL, order, quantity=order.quantity, price=fill[0], fee=fee)
             logger.info(f"Order executed: {order}")
             return True
 
@@ -236,6 +415,141 @@ class SimulatedBroker(AbstractBroker):
             logger.error(f"Error executing order: {e}")
             return False
 
+    def _settle_market_fill(self, order: Order, fill_price: float) -> float:
+        """Book a complete fill of a market order; returns the fee."""
+        order.filled_quantity = order.quantity
+        order.average_price = fill_price
+
+        order_cost = fill_price * order.quantity
+        cost_fee = order_cost * self.transaction_cost
+
+        if order.side == OrderSide.BUY:
+            total_spend = order_cost + cost_fee
+            self.balance -= total_spend
+            self._apply_fill(order.symbol, order.quantity, fill_price)
+
+        elif order.side == OrderSide.SELL:
+            proceeds = order_cost - cost_fee
+            self.balance += proceeds
+            if order.symbol in self.positions or self.allow_short:
+                self._apply_fill(order.symbol, -order.quantity, fill_price)
+
+        order.status = "filled"
+        return cost_fee
+
+    def _state(self) -> Dict[str, Any]:
+        """Plain-data copy of the broker state for a journal snapshot."""
+        def plain(record) -> Dict[str, Any]:
+            fields = asdict(record)
+            for name, value in fields.items():
+                if isinstance(value, Enum):
+                    fields[name] = value.value
+            return fields
+
+        return {
+            'balance': self.balance,
+            'order_counter': self.order_counter,
+            'orders': [plain(order) for order in self.orders.values()],
+            'positions': [plain(position) for position in self.positions.values()],
+            'last_price': dict(self.engine.last_price)
+        }
+
+    def snapshot(self) -> int:
+        """Write a journal snapshot of the current state; returns the sequence it covers."""
+        if self.journal is None:
+            raise RuntimeError("Broker has no journal to snapshot into")
+        return self.journal.write_snapshot(self._state())
+
+    @classmethod
+    def recover(cls, journal: OrderJournal, **kwargs) -> 'SimulatedBroker':
+        """
+        Rebuild a broker from its journal: the latest snapshot plus the events after it.
+
+        Working orders are resubmitted to the matching engine, for their
+        remaining quantity and in their original order.
+
+        Args:
+            journal (OrderJournal): Journal the broker wrote.
+            **kwargs: Constructor arguments (transaction_cost, allow_short, ...);
+                the balance comes from the journal's snapshot, which a broker
+                writes as soon as it is attached to an empty journal.
+
+        Returns:
+            SimulatedBroker: Broker with the recovered state, journaling to ``journal``.
+        """
+        state, events = journal.load()
+        if state is None and events:
+            raise ValueError("Order journal has events but no snapshot of the state they start from")
+        broker = cls(**kwargs)
+        if state is not None:
+            broker.balance = state['balance']
+            broker.order_counter = state['order_counter']
+            broker.engine.last_price.update(state['last_price'])
+            for fields in state['orders']:
+                order = Order(**{**fields, 'side': OrderSide(fields['side']),
+                                 'order_type': OrderType(fields['order_type'])})
+                broker.orders[order.order_id] = order
+            for fields in state['positions']:
+                broker.positions[fields['symbol']] = Position(**fields)
+
+        broker._replay(events)
+        for order in sorted(broker.orders.values(), key=lambda o: int(o.order_id.split('_')[-1])):
+            broker.engine.submit(order.order_id, order.symbol, 1 if order.side == OrderSide.BUY else -1,
+                                 order.quantity - order.filled_quantity, order.order_type.value,
+                                 limit_price=order.price, stop_price=order.stop_price)
+        broker.journal = journal
+        logger.info(f"Recovered broker from journal: {len(events)} events after snapshot, "
+                    f"{len(broker.orders)} working orders, {len(broker.positions)} positions")
+        return broker
+
+    def _replay(self, events: List[JournalEvent]):
+        """Apply journaled events to the state, exactly as they were booked."""
+        placed: Dict[str, Order] = {}
+        batch: List[JournalEvent] = []
+
+        def settle_batch():
+            if batch:
+                self._settle_fills([e.order_id for e in batch], [e.symbol for e in batch],
+                                   np.array([e.side for e in batch]), np.array([e.quantity for e in batch]),
+                                   np.array([e.price for e in batch]))
+                batch.clear()
+
+        def placed_order(event: JournalEvent) -> Order:
+            # Snapshots are only taken between complete orders, so a NEW always precedes its ACK or FILL
+            order = placed.pop(event.order_id, None)
+            if order is None:
+                raise ValueError(f"Corrupt order journal: {EVENT_NAMES[event.event]} of {event.order_id} "
+                                 f"(seq {event.seq}) without its NEW")
+            return order
+
+        for event in events:
+            if event.event != FILL or not event.flags & FLAG_BATCH or event.flags & FLAG_BATCH_START:
+                settle_batch()
+
+            if event.event == NEW:
+                self.order_counter = max(self.order_counter, int(event.order_id.split('_')[-1]))
+                placed[event.order_id] = Order(
+                    symbol=event.symbol,
+                    side=OrderSide.BUY if event.side > 0 else OrderSide.SELL,
+                    quantity=event.quantity,
+                    order_type=_ORDER_TYPES[event.order_type],
+                    price=event.price or None,
+                    stop_price=event.stop_price or None,
+                    timestamp=datetime.fromtimestamp(event.time),
+                    order_id=event.order_id
+                )
+            elif event.event == ACK:
+                self.orders[event.order_id] = placed_order(event)
+            elif event.event == FILL and event.flags & FLAG_BATCH:
+                batch.append(event)
+            elif event.event == FILL:
+                self._settle_market_fill(placed_order(event), event.price)
+            elif event.event == CANCEL:
+                self.orders.pop(event.order_id, None)
+            elif event.event == REJECT:
+                placed.pop(event.order_id, None)
+        settle_batch()
+
 
 class LiveBroker(AbstractBroker):
     """
@@ -244,10 +558,13 @@ class LiveBroker(AbstractBroker):
     Alpaca, TDA, or other. This class is an example stub.
     """
 
-    def __init__(self, api_key: str, api_secret: str, paper_trading: bool = True):
+    def __init__(self, api_key: str, api_secret: str, paper_trading: bool = True,
+                 journal: Optional[OrderJournal] = None):
         self.api_key = api_key
         self.api_secret = api_secret
         self.paper_trading = paper_trading
+        # Implementations record new/ack/fill/cancel events here, as SimulatedBroker does
+        self.journal = journal
         # self.client = (Some Client Library)
 
     def place_order(self, order: Order) -> bool:
@@ -0,0 +1,563 @@
+"""
+Order Gateway Module
+
+Asynchronous order entry for the OMS. The gateway batches submissions to
+an asynchronous broker transport, tracks every order's state from the
+broker's execution reports, notifies callbacks on each change and measures
+acknowledgement and fill latency. ``submit_pair`` sends both legs of a pair
+trade together and unwinds whatever filled if the pair does not complete
+within a timeout.
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from importlib import import_module
+from typing import Callable, Dict, List, Optional
+from config.logging_config import logger
+from src.utils.latency import LatencyHistogram
+
+_broker = import_module('execution.oms_&_broker_connect')
+Order, OrderSide, OrderType = _broker.Order, _broker.OrderSide, _broker.OrderType
+
+TERMINAL_STATES = frozenset({'filled', 'cancelled', 'rejected'})
+
+
+@dataclass
+class ExecutionReport:
+    """State change of one order as reported by a broker."""
+    order_id: str
+    status: str  # acknowledged, partially_filled, filled, cancelled, rejected
+    fill_quantity: float = 0.0  # Quantity of this fill only
+    fill_price: Optional[float] = None
+    message: str = ""
+
+
+@dataclass
+class OrderRecord:
+    """Gateway-side state of one order."""
+    order: Order
+    status: str = "new"
+    filled_quantity: float = 0.0
+    average_price: Optional[float] = None
+    submitted_at: Optional[float] = None
+    acknowledged_at: Optional[float] = None
+    completed_at: Optional[float] = None
+    message: str = ""
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def order_id(self) -> str:
+        return self.order.order_id
+
+    @property
+    def remaining(self) -> float:
+        return self.order.quantity - self.filled_quantity
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+
+@dataclass
+class PairOrderResult:
+    """Outcome of a pair order: 'filled', 'unwound' or 'unwind_failed'."""
+    status: str
+    legs: List[OrderRecord]
+    unwinds: List[OrderRecord] = field(default_factory=list)
+    latency: float = 0.0
+
+    @property
+    def filled(self) -> bool:
+        return self.status == 'filled'
+
+
+class AsyncBroker(ABC):
+    """
+    Asynchronous broker transport.
+
+    ``submit_orders`` only has to hand the batch over; the outcome of each
+    order arrives later as ExecutionReports passed to the listener, which
+    must be called from the gateway's event loop.
+    """
+
+    def __init__(self):
+        self._listener: Optional[Callable[[ExecutionReport], None]] = None
+
+    def set_listener(self, listener: Callable[[ExecutionReport], None]):
+        self._listener = listener
+
+    def _report(self, report: ExecutionReport):
+        if self._listener is not None:
+            self._listener(report)
+
+    @abstractmethod
+    async def submit_orders(self, orders: List[Order]):
+        """Send a batch of orders."""
+        pass
+
+    @abstractmethod
+    async def cancel_order(self, order_id: str):
+        """Request cancellation of a working order."""
+        pass
+
+
+class StubBroker(AsyncBroker):
+    """
+    In-process broker that acknowledges after a network latency and fills
+    orders in one or more chunks, for testing the gateway without a venue.
+    """
+
+    def __init__(
+            self,
+            latency: float = 0.001,
+            jitter: float = 0.0005,
+            fill_latency: float = 0.0005,
+            partial_fill_probability: float = 0.2,
+            max_partial_fills: int = 3,
+            reject_probability: float = 0.0,
+            prices: Optional[Dict[str, float]] = None,
+            seed: Optional[int] = None
+    ):
+        """
+        Args:
+            latency: Mean one-way delay before a batch is acknowledged, in seconds
+            jitter: Uniform random spread added to every delay
+            fill_latency: Delay between acknowledgement and each fill
+            partial_fill_probability: Chance that an order fills in several chunks
+            max_partial_fills: Maximum number of chunks of a partially filled order
+            reject_probability: Chance that an order is rejected on arrival
+            prices: Fill prices for orders without a price
+            seed: Random seed
+        """
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.fill_latency = fill_latency
+        self.partial_fill_probability = partial_fill_probability
+        self.max_partial_fills = max_partial_fills
+        self.reject_probability = reject_probability
+        self.prices = dict(prices or {})
+        self.rng = random.Random(seed)
+
+        self.batches = 0
+        self._working: Dict[str, Order] = {}
+        self._tasks: set = set()
+
+    def _delay(self, base: float) -> float:
+        return base + self.rng.uniform(0, self.jitter)
+
+    async def submit_orders(self, orders: List[Order]):
+        self.batches += 1
+        for order in orders:
+            self._working[order.order_id] = order
+        task = asyncio.get_running_loop().create_task(self._work(orders))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _work(self, orders: List[Order]):
+        await asyncio.sleep(self._delay(self.latency))
+        fills = []
+        for order in orders:
+            if order.order_id not in self._working:
+                continue
+            price = order.price or self.prices.get(order.symbol)
+            if price is None or self.rng.random() < self.reject_probability:
+                del self._working[order.order_id]
+                self._report(ExecutionReport(order.order_id, 'rejected', message="rejected by stub broker"))
+                continue
+            self._report(ExecutionReport(order.order_id, 'acknowledged'))
+            chunks = 1
+            if self.rng.random() < self.partial_fill_probability:
+                chunks = self.rng.randint(2, max(2, self.max_partial_fills))
+            fills.append(self._fill(order, price, chunks))
+        await asyncio.gather(*fills)
+
+    async def _fill(self, order: Order, price: float, chunks: int):
+        remaining = order.quantity
+        for chunk in range(chunks, 0, -1):
+            await asyncio.sleep(self._delay(self.fill_latency))
+            if order.order_id not in self._working:
+                return  # Cancelled in between
+            quantity = remaining if chunk == 1 else max(1, round(remaining / chunk))
+            remaining -= quantity
+            if remaining <= 0:
+                del self._working[order.order_id]
+            self._report(ExecutionReport(order.order_id, 'filled' if remaining <= 0 else 'partially_filled',
+                                         fill_quantity=quantity, fill_price=price))
+
+    async def cancel_order(self, order_id: str):
+        await asyncio.sleep(self._delay(self.latency))
+        if self._working.pop(order_id, None) is not None:
+            self._report(ExecutionReport(order_id, 'cancelled'))
+
+
+class BrokerAdapter(AsyncBroker):
+    """
+    Runs a synchronous AbstractBroker (e.g. SimulatedBroker) behind the gateway.
+
+    Orders the broker fills on placement are reported immediately; orders it
+    leaves working are reported by ``poll`` as their fills arrive.
+    """
+
+    def __init__(self, broker):
+        """
+        Args:
+            broker (AbstractBroker): Broker whose place_order/cancel_order are called.
+        """
+        super().__init__()
+        self.broker = broker
+        self._working: Dict[str, Order] = {}
+        self._broker_ids: Dict[str, str] = {}
+        self._reported: Dict[str, float] = {}
+
+    async def submit_orders(self, orders: List[Order]):
+        for order in orders:
+            # The broker assigns its own id; report under the gateway's
+            order_id = order.order_id
+            accepted = self.broker.place_order(order)
+            self._broker_ids[order_id], order.order_id = order.order_id, order_id
+            if not accepted:
+                del self._broker_ids[order_id]
+                self._report(ExecutionReport(order_id, 'rejected',
+                                             message=f"rejected by {type(self.broker).__name__}"))
+                continue
+            self._report(ExecutionReport(order_id, 'acknowledged'))
+            self._working[order_id] = order
+            self._reported[order_id] = 0.0
+        self.poll()
+
+    def poll(self):
+        """Report fills the broker made since the last call."""
+        for order_id, order in list(self._working.items()):
+            reported = self._reported[order_id]
+            if order.filled_quantity <= reported:
+                continue
+            self._reported[order_id] = order.filled_quantity
+            done = order.filled_quantity >= order.quantity
+            if done:
+                self._forget(order_id)
+            self._report(ExecutionReport(order_id, 'filled' if done else 'partially_filled',
+                                         fill_quantity=order.filled_quantity - reported,
+                                         fill_price=order.average_price))
+
+    def _forget(self, order_id: str):
+        del self._working[order_id]
+        del self._broker_ids[order_id]
+        del self._reported[order_id]
+
+    async def cancel_order(self, order_id: str):
+        if order_id in self._working and self.broker.cancel_order(self._broker_ids[order_id]):
+            self._forget(order_id)
+            self._report(ExecutionReport(order_id, 'cancelled'))
+
+
+class AsyncOrderGateway:
+    """
+    Batched, state-tracking order entry on top of an AsyncBroker.
+
+    ``submit`` only queues an order; a sender task drains the queue into
+    batches of up to ``batch_size`` orders, waiting at most ``batch_window``
+    seconds for a batch to fill up. Callbacks registered with ``on_update``
+    receive (record, report) for every state change.
+    """
+
+    def __init__(
+            self,
+            broker: AsyncBroker,
+            batch_size: int = 100,
+            batch_window: float = 0.0002,
+            cancel_timeout: float = 1.0,
+            id_prefix: str = "GW"
+    ):
+        """
+        Args:
+            broker: Transport the batches are sent to
+            batch_size: Maximum orders per broker call
+            batch_window: Seconds to wait for more orders before sending a partial batch
+            cancel_timeout: Seconds a pair unwind waits for cancel confirmations
+            id_prefix: Prefix of the order ids assigned by the gateway
+        """
+        self.broker = broker
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.cancel_timeout = cancel_timeout
+        self.id_prefix = id_prefix
+
+        self.records: Dict[str, OrderRecord] = {}
+        self.ack_latency = LatencyHistogram()
+        self.fill_latency = LatencyHistogram()
+        self.pair_latency = LatencyHistogram()
+        self.batches_sent = 0
+        self._callbacks: List[Callable[[OrderRecord, ExecutionReport], None]] = []
+        self._counter = itertools.count(1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the sender task on the running loop."""
+        if self._sender is not None:
+            return
+        self.broker.set_listener(self._on_report)
+        self._queue = asyncio.Queue()
+        self._sender = asyncio.get_running_loop().create_task(self._send_loop())
+
+    async def stop(self):
+        """Send what is queued, then stop the sender task."""
+        if self._sender is None:
+            return
+        await self._queue.join()
+        self._sender.cancel()
+        try:
+            await self._sender
+        except asyncio.CancelledError:
+            pass
+        self._sender = None
+
+    async def __aenter__(self) -> 'AsyncOrderGateway':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    def on_update(self, callback: Callable[[OrderRecord, ExecutionReport], None]):
+        """Register a callback for order state changes."""
+        self._callbacks.append(callback)
+
+    def submit(self, order: Order) -> OrderRecord:
+        """Queue an order for the next batch and return its record."""
+        if self._sender is None:
+            raise RuntimeError("Order gateway is not started")
+        order.order_id = f"{self.id_prefix}_{next(self._counter)}"
+        record = OrderRecord(order=order, submitted_at=time.perf_counter())
+        self.records[order.order_id] = record
+        self._queue.put_nowait(record)
+        return record
+
+    def submit_many(self, orders: List[Order]) -> List[OrderRecord]:
+        return [self.submit(order) for order in orders]
+
+    async def cancel(self, order_id: str):
+        """Request cancellation; the record turns 'cancelled' when the broker confirms."""
+        record = self.records.get(order_id)
+        if record is not None and not record.is_terminal:
+            await self.broker.cancel_order(order_id)
+
+    async def wait(self, records: List[OrderRecord], timeout: Optional[float] = None) -> bool:
+        """Wait until every record is terminal; False if the timeout expired first."""
+        pending = [record.done.wait() for record in records if not record.is_terminal]
+        if not pending:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.gather(*pending), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _send_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            for record in batch:
+                record.status = 'submitted'
+            try:
+                await self.broker.submit_orders([record.order for record in batch])
+                self.batches_sent += 1
+            except Exception as e:
+                logger.error(f"Order batch of {len(batch)} failed: {str(e)}")
+                for record in batch:
+                    self._on_report(ExecutionReport(record.order_id, 'rejected', message=str(e)))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _on_report(self, report: ExecutionReport):
+        record = self.records.get(report.order_id)
+        if record is None or record.is_terminal:
+            return
+
+        now = time.perf_counter()
+        if record.acknowledged_at is None and report.status != 'rejected':
+            record.acknowledged_at = now
+            self.ack_latency.record(now - record.submitted_at)
+
+        if report.fill_quantity > 0:
+            filled_value = (record.average_price or 0.0) * record.filled_quantity
+            record.filled_quantity += report.fill_quantity
+            record.average_price = (filled_value + report.fill_quantity * report.fill_price) / record.filled_quantity
+        record.status = report.status
+        record.message = report.message
+
+        if record.is_terminal:
+            record.completed_at = now
+            if record.status == 'filled':
+                self.fill_latency.record(now - record.submitted_at)
+            record.done.set()
+
+        for callback in self._callbacks:
+            try:
+                callback(record, report)
+            except Exception as e:
+                logger.error(f"Order update callback failed: {str(e)}")
+
+    async def submit_pair(self, leg_a: Order, leg_b: Order, timeout: float = 1.0) -> PairOrderResult:
+        """
+        Send both legs of a pair trade concurrently, all or nothing.
+
+        Both legs go out in the same batch. If either is rejected, or both
+        are not filled within ``timeout`` seconds, working legs are cancelled
+        and any filled quantity is offset with market orders.
+
+        Args:
+            leg_a: First leg
+            leg_b: Second leg
+            timeout: Seconds allowed for both legs to fill
+
+        Returns:
+            PairOrderResult: 'filled', 'unwound', or 'unwind_failed' if the
+            offsetting orders did not all fill.
+        """
+        started = time.perf_counter()
+        legs = self.submit_many([leg_a, leg_b])
+        completed = await self._wait_pair(legs, timeout)
+
+        if completed and all(leg.status == 'filled' for leg in legs):
+            latency = time.perf_counter() - started
+            self.pair_latency.record(latency)
+            return PairOrderResult('filled', legs, latency=latency)
+
+        # Stop the legs still working, then offset whatever filled
+        working = [leg for leg in legs if not leg.is_terminal]
+        await asyncio.gather(*(self.cancel(leg.order_id) for leg in working))
+        if not await self.wait(working, self.cancel_timeout):
+            logger.warning(f"Pair leg cancel not confirmed within {self.cancel_timeout}s; "
+                           f"unwinding fills so far")
+
+        unwinds = self.submit_many([
+            Order(
+                symbol=leg.order.symbol,
+                side=OrderSide.SELL if leg.order.side == OrderSide.BUY else OrderSide.BUY,
+                quantity=leg.filled_quantity,
+                order_type=OrderType.MARKET,
+                price=leg.average_price
+            )
+            for leg in legs if leg.filled_quantity > 0
+        ])
+        await self.wait(unwinds, timeout)
+        status = 'unwound' if all(unwind.status == 'filled' for unwind in unwinds) else 'unwind_failed'
+        if status == 'unwind_failed':
+            logger.error(f"Pair order {legs[0].order_id}/{legs[1].order_id} left unhedged fills")
+        return PairOrderResult(status, legs, unwinds, latency=time.perf_counter() - started)
+
+    async def _wait_pair(self, legs: List[OrderRecord], timeout: float) -> bool:
+        """Wait for both legs, returning early when one is rejected or cancelled."""
+        deadline = time.perf_counter() + timeout
+        pending = {asyncio.ensure_future(leg.done.wait()): leg for leg in legs if not leg.is_terminal}
+        try:
+            while pending:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return False
+                done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if pending.pop(task).status != 'filled':
+                        return False
+            return all(leg.status == 'filled' for leg in legs)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def latency_summary(self) -> Dict[str, Dict[str, float]]:
+        """Acknowledgement, order fill and pair fill latency percentiles, in seconds."""
+        return {
+            'ack': self.ack_latency.summary(),
+            'fill': self.fill_latency.summary(),
+            'pair': self.pair_latency.summary()
+        }
+
+
+async def _run_gateway_benchmark(n_pairs: int, concurrency: int, broker: AsyncBroker,
+                                 timeout: float) -> Dict:
+    outcomes: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncOrderGateway(broker) as gateway:
+        async def trade(i: int):
+            async with semaphore:
+                result = await gateway.submit_pair(
+                    Order(f"X{i % 50}", OrderSide.BUY, 100, OrderType.MARKET, price=100.0),
+                    Order(f"Y{i % 50}", OrderSide.SELL, 80, OrderType.MARKET, price=125.0),
+                    timeout=timeout
+                )
+                outcomes[result.status] = outcomes.get(result.status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(trade(i) for i in range(n_pairs)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'pairs': n_pairs,
+        'seconds': elapsed,
+        'pairs_per_second': n_pairs / elapsed,
+        'batches': gateway.batches_sent,
+        'outcomes': outcomes,
+        'latency': gateway.latency_summary()
+    }
+
+
+def benchmark_order_gateway(
+        n_pairs: int = 2000,
+        concurrency: int = 50,
+        latency: float = 0.001,
+        partial_fill_probability: float = 0.2,
+        reject_probability: float = 0.01,
+        timeout: float = 0.05,
+        seed: int = 0
+) -> Dict:
+    """
+    Send pair orders through the gateway to a StubBroker and measure latency.
+
+    Args:
+        n_pairs: Pair orders to send
+        concurrency: Pair orders in flight at once
+        latency: Stub broker one-way latency in seconds
+        partial_fill_probability: Share of orders the stub fills in chunks
+        reject_probability: Share of orders the stub rejects, forcing unwinds
+        timeout: Pair fill timeout in seconds
+        seed: Random seed of the stub broker
+
+    Returns:
+        Dict: Throughput, batch count, pair outcomes and latency summaries
+    """
+    broker = StubBroker(latency=latency, partial_fill_probability=partial_fill_probability,
+                        reject_probability=reject_probability, seed=seed)
+    results = asyncio.run(_run_gateway_benchmark(n_pairs, concurrency, broker, timeout))
+    logger.info(f"Order gateway benchmark: {results['pairs_per_second']:,.0f} pairs/s, "
+                f"outcomes {results['outcomes']}")
+    return results
+
+
+if __name__ == "__main__":
+    results = benchmark_order_gateway()
+    for name in ('pairs', 'seconds', 'pairs_per_second', 'batches', 'outcomes'):
+        print(f"{name}: {results[name]}")
+    for name, summary in results['latency'].items():
+        print(f"{name} latency (ms): " + ", ".join(
+            f"{key}={value * 1000:.3f}" for key, value in summary.items() if key != 'count'))
@@ -0,0 +1,402 @@
+"""
+Order Journal Module
+
+Append-only binary journal of OMS order events (new, ack, fill, cancel,
+reject) with periodic state snapshots. Every record carries a CRC32, so a
+record torn by a crash is detected and dropped on recovery; restoring a
+broker means loading the latest snapshot and replaying only the events
+written after it.
+
+Writes are buffered and flushed in batches. The fsync policy decides what
+a crash can lose:
+
+- 'always': every event is flushed and fsynced before append returns.
+- 'batch': each flushed batch is fsynced (at most ``batch_size`` events or
+  ``flush_interval`` seconds are at risk).
+- 'none': batches are handed to the OS without fsync (survives a process
+  crash, not a power loss).
+"""
+
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from config.logging_config import logger
+
+NEW, ACK, FILL, CANCEL, REJECT = range(5)
+EVENT_NAMES = ('new', 'ack', 'fill', 'cancel', 'reject')
+FSYNC_POLICIES = ('always', 'batch', 'none')
+
+# Fills booked together for one bar: FLAG_BATCH on each, FLAG_BATCH_START on the first
+FLAG_BATCH = 1
+FLAG_BATCH_START = 2
+
+_RECORD_HEADER = struct.Struct('<II')  # payload length, crc32 of payload
+_EVENT = struct.Struct('<QBbBBdddddHH')  # seq, type, side, order type, flags, time, quantity, price, stop, fee, id/symbol lengths
+_SNAPSHOT_MAGIC = b'OMSSNAP1'
+_SNAPSHOT_HEADER = struct.Struct('<8sQI')  # magic, seq, crc32 of the pickled state
+
+
+class JournalEvent(NamedTuple):
+    """One decoded journal record."""
+    seq: int
+    event: int
+    order_id: str
+    symbol: str
+    side: int  # 1 buy, -1 sell
+    order_type: int
+    flags: int
+    time: float
+    quantity: float
+    price: float
+    stop_price: float
+    fee: float
+
+
+def _encode(seq: int, event: int, order_id: str, symbol: str, side: int, order_type: int, flags: int,
+            timestamp: float, quantity: float, price: float, stop_price: float, fee: float) -> bytes:
+    order_id_bytes = order_id.encode()
+    symbol_bytes = symbol.encode()
+    payload = _EVENT.pack(seq, event, side, order_type, flags, timestamp, quantity, price, stop_price, fee,
+                          len(order_id_bytes), len(symbol_bytes)) + order_id_bytes + symbol_bytes
+    return _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode_records(data: bytes) -> Tuple[List[JournalEvent], int]:
+    """Decode records up to the first torn or corrupt one; returns them and the valid length."""
+    events = []
+    offset = 0
+    end = len(data)
+    header_size, event_size = _RECORD_HEADER.size, _EVENT.size
+    unpack_header, unpack_event, crc32 = _RECORD_HEADER.unpack_from, _EVENT.unpack_from, zlib.crc32
+    while offset + header_size <= end:
+        length, crc = unpack_header(data, offset)
+        start = offset + header_size
+        offset = start + length
+        if length < event_size or offset > end or crc32(data[start:offset]) != crc:
+            offset = start - header_size
+            break
+        seq, event, side, order_type, flags, timestamp, quantity, price, stop_price, fee, id_length, _ = \
+            unpack_event(data, start)
+        id_start = start + event_size
+        symbol_start = id_start + id_length
+        events.append(JournalEvent(seq, event, data[id_start:symbol_start].decode(),
+                                   data[symbol_start:offset].decode(), side, order_type, flags,
+                                   timestamp, quantity, price, stop_price, fee))
+    return events, offset
+
+
+class OrderJournal:
+    """
+    Segmented, checksummed order event log with snapshots.
+
+    Files in ``directory``: ``journal_<first seq>.log`` segments and
+    ``snapshot_<seq>.bin`` snapshots. A snapshot starts a new segment, and
+    segments wholly covered by the latest snapshot are deleted unless
+    ``keep_history`` is set.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            fsync: str = 'batch',
+            batch_size: int = 512,
+            flush_interval: float = 0.01,
+            snapshot_every: int = 50000,
+            keep_history: bool = False
+    ):
+        """
+        Args:
+            directory (str): Journal directory, created if missing.
+            fsync (str): 'always', 'batch' or 'none'.
+            batch_size (int): Buffered events that trigger a flush.
+            flush_interval (float): Longest time an event stays buffered, in seconds
+                (a background thread flushes idle buffers).
+            snapshot_every (int): Events after which ``needs_snapshot`` turns True.
+            keep_history (bool): Keep segments and snapshots older than the latest snapshot.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got '{fsync}'")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.keep_history = keep_history
+
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._first_buffered_at = 0.0
+        self._file = None
+        self._closed = False
+        self.events_since_snapshot = 0
+        self.stats = {'events': 0, 'flushes': 0, 'fsyncs': 0, 'bytes': 0}
+
+        self.seq = self._open_tail()
+        self._flusher = None
+        if fsync != 'always' and flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name='order-journal-flush', daemon=True)
+            self._flusher.start()
+
+    def _segments(self) -> List[Tuple[int, Path]]:
+        return sorted((int(path.stem.split('_')[1]), path) for path in self.directory.glob('journal_*.log'))
+
+    def _snapshots(self) -> List[Tuple[int, Path]]:
+        return sorted((int(path.stem.split('_')[1]), path) for path in self.directory.glob('snapshot_*.bin'))
+
+    def _open_tail(self) -> int:
+        """Open the last segment for appending, cutting off a torn tail; returns the last seq."""
+        segments = self._segments()
+        last_seq = self._snapshots()[-1][0] if self._snapshots() else 0
+        if segments:
+            start, path = segments[-1]
+            events, valid = _decode_records(path.read_bytes())
+            if valid < path.stat().st_size:
+                logger.warning(f"Order journal {path.name}: dropping {path.stat().st_size - valid} "
+                               f"bytes of torn records")
+                with open(path, 'r+b') as f:
+                    f.truncate(valid)
+            if events:
+                last_seq = max(last_seq, events[-1].seq)
+            else:
+                last_seq = max(last_seq, start - 1)
+            self._file = open(path, 'ab')
+        else:
+            self._file = open(self.directory / f"journal_{last_seq + 1:012d}.log", 'ab')
+        return last_seq
+
+    def append(
+            self,
+            event: int,
+            order_id: str,
+            symbol: str = '',
+            side: int = 0,
+            quantity: float = 0.0,
+            price: float = 0.0,
+            stop_price: float = 0.0,
+            fee: float = 0.0,
+            order_type: int = 0,
+            flags: int = 0,
+            timestamp: Optional[float] = None
+    ) -> int:
+        """
+        Append one event; returns its sequence number.
+
+        Args:
+            event (int): NEW, ACK, FILL, CANCEL or REJECT.
+            order_id (str): Order the event belongs to.
+            symbol (str): Order symbol.
+            side (int): 1 buy, -1 sell.
+            quantity (float): Order quantity (NEW) or fill quantity (FILL).
+            price (float): Limit/reference price (NEW) or fill price (FILL).
+            stop_price (float): Stop price (NEW).
+            fee (float): Fee charged for a fill.
+            order_type (int): Index of the order type.
+            flags (int): Event flags, e.g. FLAG_BATCH.
+            timestamp (Optional[float]): Event time in epoch seconds (default: now).
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Order journal is closed")
+            self.seq += 1
+            record = _encode(self.seq, event, order_id, symbol, side, order_type, flags,
+                             time.time() if timestamp is None else timestamp,
+                             quantity, price, stop_price, fee)
+            if not self._buffered:
+                self._first_buffered_at = time.monotonic()
+            self._buffer += record
+            self._buffered += 1
+            self.events_since_snapshot += 1
+            self.stats['events'] += 1
+            if self.fsync == 'always' or self._buffered >= self.batch_size:
+                self._flush_locked()
+            return self.seq
+
+    @property
+    def needs_snapshot(self) -> bool:
+        return self.events_since_snapshot >= self.snapshot_every
+
+    @property
+    def is_empty(self) -> bool:
+        """True until the journal holds an event or a snapshot."""
+        return self.seq == 0 and not self._snapshots()
+
+    def flush(self):
+        """Write buffered events (and fsync them unless the policy is 'none')."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffered:
+            return
+        self._file.write(self._buffer)
+        self._file.flush()
+        if self.fsync != 'none':
+            os.fsync(self._file.fileno())
+            self.stats['fsyncs'] += 1
+        self.stats['flushes'] += 1
+        self.stats['bytes'] += len(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            with self._lock:
+                if self._closed:
+                    return
+                if self._buffered and time.monotonic() - self._first_buffered_at >= self.flush_interval:
+                    self._flush_locked()
+
+    def write_snapshot(self, state: Dict[str, Any]) -> int:
+        """
+        Persist ``state`` as of the last appended event and start a new segment.
+
+        The snapshot is written to a temporary file, fsynced and renamed into
+        place, so a crash leaves either the old or the new snapshot.
+
+        Returns:
+            int: Sequence number the snapshot covers.
+        """
+        with self._lock:
+            self._flush_locked()
+            seq = self.seq
+            payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            path = self.directory / f"snapshot_{seq:012d}.bin"
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, seq, zlib.crc32(payload)))
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+            self._file.close()
+            self._file = open(self.directory / f"journal_{seq + 1:012d}.log", 'ab')
+            self.events_since_snapshot = 0
+            if not self.keep_history:
+                self._prune(seq)
+        return seq
+
+    def _prune(self, snapshot_seq: int):
+        """Delete snapshots and segments the snapshot at ``snapshot_seq`` makes redundant."""
+        for seq, path in self._snapshots():
+            if seq < snapshot_seq:
+                path.unlink()
+        for start, path in self._segments():
+            if start <= snapshot_seq:
+                path.unlink()
+
+    def _load_snapshot(self) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Latest snapshot that passes its checksum, newest first."""
+        for seq, path in reversed(self._snapshots()):
+            data = path.read_bytes()
+            if len(data) >= _SNAPSHOT_HEADER.size:
+                magic, snapshot_seq, crc = _SNAPSHOT_HEADER.unpack_from(data)
+                payload = data[_SNAPSHOT_HEADER.size:]
+                if magic == _SNAPSHOT_MAGIC and zlib.crc32(payload) == crc:
+                    return snapshot_seq, pickle.loads(payload)
+            logger.warning(f"Order journal snapshot {path.name} is corrupt; trying an older one")
+        return 0, None
+
+    def load(self) -> Tuple[Optional[Dict[str, Any]], List[JournalEvent]]:
+        """
+        Read the latest valid snapshot and the events written after it.
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], List[JournalEvent]]: Snapshot state
+            (None without a snapshot) and the tail of events, oldest first.
+        """
+        self.flush()
+        snapshot_seq, state = self._load_snapshot()
+        tail: List[JournalEvent] = []
+        segments = self._segments()
+        for k, (start, path) in enumerate(segments):
+            # Skip segments that end before the snapshot
+            if k + 1 < len(segments) and segments[k + 1][0] <= snapshot_seq + 1:
+                continue
+            events, _ = _decode_records(path.read_bytes())
+            tail.extend(event for event in events if event.seq > snapshot_seq)
+        if tail and tail[0].seq != snapshot_seq + 1:
+            logger.error(f"Order journal gap: events {snapshot_seq + 1}-{tail[0].seq - 1} are missing")
+        return state, tail
+
+    def iter_events(self) -> Iterator[JournalEvent]:
+        """Every event still on disk, oldest first."""
+        self.flush()
+        for _, path in self._segments():
+            events, _ = _decode_records(path.read_bytes())
+            yield from events
+
+    def close(self):
+        """Flush, fsync (unless the policy is 'none') and close the journal."""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            self._file.close()
+        if self._flusher is not None:
+            self._flusher.join(timeout=1.0)
+
+    def __enter__(self) -> 'OrderJournal':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def benchmark_order_journal(directory: str, n_events: int = 100000, snapshot_every: int = 20000) -> Dict[str, Dict]:
+    """
+    Measure append throughput per fsync policy and snapshot-plus-tail load time.
+
+    Args:
+        directory (str): Scratch directory; one subdirectory per policy is created.
+        n_events (int): Events appended per policy.
+        snapshot_every (int): Events between snapshots of a dummy state.
+
+    Returns:
+        Dict[str, Dict]: Per policy: events/second, flushes, fsyncs and load milliseconds.
+    """
+    results = {}
+    state = {'orders': [{'order_id': f"ORDER_{k}", 'quantity': 100.0} for k in range(1000)]}
+    for policy in FSYNC_POLICIES:
+        path = Path(directory) / policy
+        n = n_events if policy != 'always' else min(n_events, 2000)
+        journal = OrderJournal(str(path), fsync=policy, snapshot_every=snapshot_every)
+        started = time.perf_counter()
+        for k in range(n):
+            journal.append(FILL, f"ORDER_{k}", "AAPL", 1, quantity=100.0, price=190.0, fee=0.19)
+            if journal.needs_snapshot:
+                journal.write_snapshot(state)
+        journal.close()
+        elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _, tail = OrderJournal(str(path), flush_interval=0).load()
+        load_ms = (time.perf_counter() - started) * 1000
+        results[policy] = {
+            'events': n,
+            'events_per_second': n / elapsed,
+            'flushes': journal.stats['flushes'],
+            'fsyncs': journal.stats['fsyncs'],
+            'tail_events': len(tail),
+            'load_ms': load_ms
+        }
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as scratch:
+        for policy, result in benchmark_order_journal(sys.argv[1] if len(sys.argv) > 1 else scratch).items():
+            print(policy, {key: round(value, 2) for key, value in result.items()})
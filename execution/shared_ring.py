@@ -0,0 +1,176 @@
+"""
+Shared Ring Module
+
+Fixed-layout ring buffers in shared memory for passing records between
+processes without pickling. Each ring has exactly one producer and one
+consumer process; the producer only advances the write cursor and the
+consumer only advances the read cursor, so no lock is needed.
+"""
+
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+# Header slots (int64)
+_WRITE, _READ, _CLOSED, _WAIT_NS, _DROPPED = range(5)
+_HEADER_BYTES = 64
+
+BAR_RECORD = np.dtype([
+    ('time', 'i8'),
+    ('symbol', 'i4'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8')
+])
+
+SIGNAL_RECORD = np.dtype([
+    ('time', 'i8'),
+    ('pair', 'i4'),
+    ('action', 'i1'),  # 1 enter long spread, -1 enter short spread, 0 exit
+    ('zscore', 'f8'),
+    ('beta', 'f8'),
+    ('price_x', 'f8'),
+    ('price_y', 'f8')
+])
+
+
+class SharedRingBuffer:
+    """
+    Single-producer single-consumer ring of NumPy records in shared memory.
+
+    ``put`` applies backpressure: when the ring is full the producer waits
+    for the consumer (up to a timeout) instead of growing a queue, and the
+    time spent waiting is recorded in the header.
+    """
+
+    def __init__(self, dtype: np.dtype, capacity: int, name: Optional[str] = None):
+        """
+        Create a ring, or attach to an existing one when ``name`` is given.
+
+        Args:
+            dtype (np.dtype): Record layout.
+            capacity (int): Number of records the ring holds.
+            name (Optional[str]): Shared memory block of an existing ring.
+        """
+        self.dtype = np.dtype(dtype)
+        self.capacity = int(capacity)
+        size = _HEADER_BYTES + self.capacity * self.dtype.itemsize
+        self._owner = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=self._owner, size=size)
+        self._header = np.ndarray((_HEADER_BYTES // 8,), dtype=np.int64, buffer=self._shm.buf)
+        self._records = np.ndarray((self.capacity,), dtype=self.dtype, buffer=self._shm.buf,
+                                   offset=_HEADER_BYTES)
+        if self._owner:
+            self._header[:] = 0
+
+    @property
+    def spec(self) -> Tuple[str, list, int]:
+        """Picklable description used to attach from another process."""
+        return self._shm.name, self.dtype.descr, self.capacity
+
+    @classmethod
+    def attach(cls, spec: Tuple[str, list, int]) -> 'SharedRingBuffer':
+        name, descr, capacity = spec
+        return cls(np.dtype(descr), capacity, name=name)
+
+    def __len__(self) -> int:
+        return int(self._header[_WRITE] - self._header[_READ])
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._header[_CLOSED])
+
+    @property
+    def wait_seconds(self) -> float:
+        """Total time the producer spent blocked on a full ring."""
+        return float(self._header[_WAIT_NS]) / 1e9
+
+    @property
+    def dropped(self) -> int:
+        return int(self._header[_DROPPED])
+
+    @property
+    def written(self) -> int:
+        return int(self._header[_WRITE])
+
+    def put(self, records: np.ndarray, timeout: Optional[float] = None, drop: bool = False) -> int:
+        """
+        Append records, waiting for free slots when the ring is full.
+
+        Args:
+            records (np.ndarray): Records with the ring's dtype.
+            timeout (Optional[float]): Seconds to wait for space (None waits forever).
+            drop (bool): Count records that did not fit before the timeout as dropped.
+
+        Returns:
+            int: Number of records written.
+        """
+        written = 0
+        n_records = len(records)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pause = 5e-5
+
+        while written < n_records:
+            head = int(self._header[_WRITE])
+            free = self.capacity - (head - int(self._header[_READ]))
+            if free <= 0:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                started = time.perf_counter_ns()
+                time.sleep(pause)
+                pause = min(pause * 2, 5e-3)
+                self._header[_WAIT_NS] += time.perf_counter_ns() - started
+                continue
+
+            pause = 5e-5
+            count = min(free, n_records - written)
+            start = head % self.capacity
+            first = min(count, self.capacity - start)
+            self._records[start:start + first] = records[written:written + first]
+            if count > first:
+                self._records[:count - first] = records[written + first:written + count]
+            # Publish only after the records are in place
+            self._header[_WRITE] = head + count
+            written += count
+
+        if drop and written < n_records:
+            self._header[_DROPPED] += n_records - written
+        return written
+
+    def get(self, max_records: Optional[int] = None) -> np.ndarray:
+        """
+        Take up to ``max_records`` available records (all if None), oldest first.
+
+        Returns:
+            np.ndarray: Copy of the records; empty if none are available.
+        """
+        tail = int(self._header[_READ])
+        count = int(self._header[_WRITE]) - tail
+        if max_records is not None:
+            count = min(count, max_records)
+        if count <= 0:
+            return np.empty(0, dtype=self.dtype)
+
+        start = tail % self.capacity
+        first = min(count, self.capacity - start)
+        out = np.empty(count, dtype=self.dtype)
+        out[:first] = self._records[start:start + first]
+        if count > first:
+            out[first:] = self._records[:count - first]
+        self._header[_READ] = tail + count
+        return out
+
+    def close(self):
+        """Mark the ring as finished; the consumer drains it and stops."""
+        self._header[_CLOSED] = 1
+
+    def release(self):
+        """Detach from the shared memory, and free it if this side created it."""
+        self._header = None
+        self._records = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
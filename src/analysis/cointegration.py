@@ -7,7 +7,9 @@ This module provides functionality for:
 3. Visualizing cointegrated pairs
 4. Generating detailed analysis reports
 """
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, Tuple
+import threading
 
 import pandas as pd
 import numpy as np
@@ -342,6 +344,125 @@ def dynamic_cointegration_with_proportion(prices: pd.DataFrame, stock1: str, sto
     return results_df, proportion_significant
 
 
+class RollingCointegrationCache:
+    """
+    Shared store of rolling Engle-Granger p-value series keyed by (pair, window).
+
+    The p-value at position i is computed from the ``window`` observations strictly
+    before i, matching the ``iloc[i - window:i]`` convention used across the strategies.
+    When a series for the same (pair, window) was already produced, only the bars
+    that are not covered by the cached inputs are re-tested.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.computed_windows = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_pvalues(self,
+                    price1: pd.Series,
+                    price2: pd.Series,
+                    window: int,
+                    pair: Optional[Tuple[str, str]] = None) -> pd.Series:
+        """
+        Rolling cointegration p-values for two aligned price series.
+
+        Args:
+            price1 (pd.Series): First price series
+            price2 (pd.Series): Second price series
+            window (int): Number of observations per cointegration test
+            pair (Optional[Tuple[str, str]]): Cache key; defaults to the series names
+
+        Returns:
+            pd.Series: p-values indexed like the joint non-missing observations (NaN before ``window``)
+        """
+        aligned = pd.concat([price1, price2], axis=1, join='inner').dropna()
+        index = aligned.index
+        values = aligned.to_numpy(dtype=float)
+
+        if pair is None:
+            pair = (price1.name, price2.name)
+        key = None if pair[0] is None or pair[1] is None else (pair[0], pair[1], window)
+
+        pvalues = np.full(len(values), np.nan)
+        start = window
+
+        if key is not None:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+            if cached is not None:
+                start = self._reuse(cached, index, values, pvalues, window)
+
+        for i in range(start, len(values)):
+            try:
+                _, pvalues[i], _ = coint(values[i - window:i, 0], values[i - window:i, 1])
+            except Exception:
+                pvalues[i] = np.nan
+        self.computed_windows += max(len(values) - start, 0)
+
+        if key is not None:
+            with self._lock:
+                self._entries[key] = (index, values, pvalues)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return pd.Series(pvalues, index=index, name='coint_pvalue')
+
+    def _reuse(self, cached, index, values, pvalues, window) -> int:
+        """Copy p-values whose input windows are unchanged; return the first position still to test"""
+        cached_index, cached_values, cached_pvalues = cached
+        if len(index) == 0:
+            return window
+
+        offset = cached_index.get_indexer([index[0]])[0]
+        if offset < 0:
+            return window
+
+        overlap = min(len(cached_index) - offset, len(index))
+        if not (cached_index[offset:offset + overlap].equals(index[:overlap])
+                and np.array_equal(cached_values[offset:offset + overlap], values[:overlap])):
+            return window
+
+        # p-value i uses rows [i - window, i), so it is reusable while i < overlap
+        if overlap > window:
+            pvalues[window:overlap] = cached_pvalues[offset + window:offset + overlap]
+            self.hits += 1
+            return overlap
+        return window
+
+
+rolling_coint_cache = RollingCointegrationCache()
+
+
+def rolling_cointegration_pvalues(price1: pd.Series,
+                                  price2: pd.Series,
+                                  window: int,
+                                  pair: Optional[Tuple[str, str]] = None) -> pd.Series:
+    """
+    Rolling cointegration p-values served from the shared cache.
+
+    Args:
+        price1 (pd.Series): First price series
+        price2 (pd.Series): Second price series
+        window (int): Number of observations per cointegration test
+        pair (Optional[Tuple[str, str]]): Cache key; defaults to the series names
+
+    Returns:
+        pd.Series: p-values aligned to the index of ``price1`` (NaN where untested)
+    """
+    pvalues = rolling_coint_cache.get_pvalues(price1, price2, window, pair)
+    return pvalues.reindex(price1.index)
+
+
 if __name__ == "__main__":
     logger.info("Loading price data...")
     prices_df = load_nasdaq100_data()
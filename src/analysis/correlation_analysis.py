@@ -15,12 +15,14 @@ import numpy as np
 from scipy.linalg import pinv
 import plotly.graph_objects as go
 from scipy import stats
-from typing import Dict, List, Tuple, Optional, Union, Any
+from typing import Dict, List, Tuple, Optional, Union, Any, Iterator, Mapping
 from pathlib import Path
 import warnings
 from dataclasses import dataclass
 from datetime import datetime
 import logging
+import threading
+from collections import OrderedDict
 from functools import lru_cache
 
 from statsmodels.stats.multitest import multipletests
@@ -61,6 +63,332 @@ def parse_pair_name(pair_name: str) -> Any:
     """Parse pair identifier back into asset names."""
     return tuple(pair_name.split('|||'))
 
+def _rolling_window_sums(data: np.ndarray, window: int) -> np.ndarray:
+    """Sum of each column over the trailing window ending at every row."""
+    cumulative = np.vstack([np.zeros((1, data.shape[1])), np.cumsum(data, axis=0)])
+    end = np.arange(1, len(data) + 1)
+    start = np.maximum(end - window, 0)
+    return cumulative[end] - cumulative[start]
+
+class RollingCorrelationTensor:
+    """
+    Rolling Pearson correlations for every asset pair computed at once.
+
+    Window sums of returns, squared returns and pairwise cross-products are taken
+    from cumulative sums, so each pair costs O(T) vector work instead of one pandas
+    rolling object per pair. Results are stored as a float32 (T, P) upper-triangle
+    array with a pair index; values match ``Series.rolling(window, min_periods).corr``.
+    """
+
+    def __init__(self,
+                 returns: pd.DataFrame,
+                 window: int,
+                 min_periods: Optional[int] = None,
+                 block_size: int = 1024):
+        self.index = returns.index
+        self.columns = returns.columns
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+
+        n_assets = len(self.columns)
+        self.rows_, self.cols_ = np.triu_indices(n_assets, k=1)
+        self.pairs = [
+            (self.columns[i], self.columns[j]) for i, j in zip(self.rows_, self.cols_)
+        ]
+        self.pair_index = {
+            validate_pair_name(asset1, asset2): k for k, (asset1, asset2) in enumerate(self.pairs)
+        }
+        self.values = self._compute(returns.to_numpy(dtype=np.float64), block_size)
+
+    def _compute(self, data: np.ndarray, block_size: int) -> np.ndarray:
+        # Correlation is shift invariant; centring keeps the cumulative sums well conditioned
+        data = data - data.mean(axis=0)
+        n_obs = len(data)
+        counts = np.minimum(np.arange(1, n_obs + 1), self.window).astype(np.float64)[:, None]
+
+        sums = _rolling_window_sums(data, self.window)
+        squares = _rolling_window_sums(data ** 2, self.window)
+        centred_ss = squares - sums ** 2 / counts
+        # Flat windows leave rounding residue instead of an exact zero variance
+        centred_ss[centred_ss <= 1e-10 * squares] = 0.0
+
+        result = np.empty((n_obs, len(self.pairs)), dtype=np.float32)
+        for start in range(0, len(self.pairs), block_size):
+            rows = self.rows_[start:start + block_size]
+            cols = self.cols_[start:start + block_size]
+
+            cross = _rolling_window_sums(data[:, rows] * data[:, cols], self.window)
+            cov = cross - sums[:, rows] * sums[:, cols] / counts
+            var = centred_ss[:, rows] * centred_ss[:, cols]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = cov / np.sqrt(var)
+            corr[~(var > 0)] = np.nan
+            result[:, start:start + len(rows)] = np.clip(corr, -1.0, 1.0)
+
+        result[counts[:, 0] < self.min_periods] = np.nan
+        return result
+
+    def column(self, asset1: str, asset2: str) -> Optional[int]:
+        """Position of a pair in the upper-triangle array, in either asset order."""
+        position = self.pair_index.get(validate_pair_name(asset1, asset2))
+        if position is None:
+            position = self.pair_index.get(validate_pair_name(asset2, asset1))
+        return position
+
+    def series(self, asset1: str, asset2: str) -> Optional[pd.Series]:
+        """Rolling correlation of one pair as a Series, or None if the pair is unknown."""
+        position = self.column(asset1, asset2)
+        if position is None:
+            return None
+        return pd.Series(self.values[:, position].astype(np.float64), index=self.index)
+
+    def matrix_at(self, position: int) -> pd.DataFrame:
+        """Full N x N correlation matrix at a given row position."""
+        n_assets = len(self.columns)
+        matrix = np.eye(n_assets)
+        matrix[self.rows_, self.cols_] = self.values[position]
+        matrix[self.cols_, self.rows_] = self.values[position]
+        return pd.DataFrame(matrix, index=self.columns, columns=self.columns)
+
+
+class _RollingCorrelationView(Mapping):
+    """Read-only ``{pair_name: Series}`` view that materialises Series on access."""
+
+    def __init__(self, tensor: RollingCorrelationTensor):
+        self.tensor = tensor
+
+    def __getitem__(self, pair_name: str) -> pd.Series:
+        series = self.tensor.series(*parse_pair_name(pair_name))
+        if series is None:
+            raise KeyError(pair_name)
+        return series
+
+    def __contains__(self, pair_name: object) -> bool:
+        return isinstance(pair_name, str) and self.tensor.column(*parse_pair_name(pair_name)) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.tensor.pair_index)
+
+    def __len__(self) -> int:
+        return len(self.tensor.pair_index)
+
+
+class PairStatisticsService:
+    """
+    Lazy per-pair statistics for drill-down views.
+
+    Rolling correlation, rolling beta and the OLS price spread of a pair are computed
+    on first request only and memoised in an LRU bounded by ``max_bytes``. Requests
+    for several pairs are computed together in one vectorised pass, and concurrent
+    requests for the same entry wait on the thread already computing it.
+    """
+
+    STATISTICS = ('correlation', 'beta', 'spread')
+
+    def __init__(self,
+                 returns: pd.DataFrame,
+                 prices: Optional[pd.DataFrame] = None,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.returns = returns
+        self.prices = prices
+        self.max_bytes = max_bytes
+
+        self._cache: OrderedDict = OrderedDict()
+        self._pending: Dict[Tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def rolling_correlation(self,
+                            asset1: str,
+                            asset2: str,
+                            window: int,
+                            min_periods: Optional[int] = None) -> pd.Series:
+        """Rolling correlation of one pair."""
+        return self.get_many('correlation', [(asset1, asset2)], window, min_periods)[(asset1, asset2)]
+
+    def rolling_beta(self,
+                     asset1: str,
+                     asset2: str,
+                     window: int,
+                     min_periods: Optional[int] = None) -> pd.Series:
+        """Rolling beta of asset1 returns on asset2 returns."""
+        return self.get_many('beta', [(asset1, asset2)], window, min_periods)[(asset1, asset2)]
+
+    def spread(self, asset1: str, asset2: str) -> pd.Series:
+        """OLS price spread asset1 - (beta * asset2 + alpha)."""
+        return self.get_many('spread', [(asset1, asset2)])[(asset1, asset2)]
+
+    def get_many(self,
+                 statistic: str,
+                 pairs: List[Tuple[str, str]],
+                 window: Optional[int] = None,
+                 min_periods: Optional[int] = None) -> Dict[Tuple[str, str], pd.Series]:
+        """
+        Fetch a statistic for several pairs, computing all cache misses in one batch.
+
+        Args:
+            statistic (str): One of 'correlation', 'beta' or 'spread'
+            pairs (List[Tuple[str, str]]): Pairs to fetch
+            window (Optional[int]): Rolling window, required for rolling statistics
+            min_periods (Optional[int]): Minimum observations, defaults to window
+
+        Returns:
+            Dict[Tuple[str, str], pd.Series]: Series keyed by pair
+        """
+        if statistic not in self.STATISTICS:
+            raise ValueError(f"Unknown statistic '{statistic}'. Choose from {self.STATISTICS}")
+        if statistic == 'spread':
+            if self.prices is None:
+                raise ValueError("Price data is required for spread statistics")
+            window = min_periods = None
+        elif window is None:
+            raise ValueError(f"A rolling window is required for '{statistic}'")
+        else:
+            min_periods = window if min_periods is None else min_periods
+
+        keys = {pair: (statistic, pair[0], pair[1], window, min_periods) for pair in pairs}
+        results = {}
+        to_compute = []
+        waiting = []
+
+        with self._lock:
+            for pair, key in keys.items():
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[pair] = self._cache[key]
+                    self.hits += 1
+                elif key in self._pending:
+                    waiting.append((pair, self._pending[key]))
+                else:
+                    self._pending[key] = threading.Event()
+                    to_compute.append(pair)
+                    self.misses += 1
+
+        if to_compute:
+            computed = {}
+            try:
+                computed = self._compute(statistic, to_compute, window, min_periods)
+            finally:
+                with self._lock:
+                    for pair, series in computed.items():
+                        self._store(keys[pair], series)
+                    events = [self._pending.pop(keys[pair]) for pair in to_compute]
+                # Wake waiters even if the computation raised; they recompute what is missing
+                for event in events:
+                    event.set()
+            results.update(computed)
+
+        for pair, event in waiting:
+            event.wait()
+            with self._lock:
+                series = self._cache.get(keys[pair])
+            if series is None:
+                # Evicted, or failed in the other thread; compute it here instead
+                series = self._compute(statistic, [pair], window, min_periods)[pair]
+            results[pair] = series
+
+        return results
+
+    def _store(self, key: Tuple, series: pd.Series) -> None:
+        size = series.memory_usage(index=False, deep=False)
+        if size > self.max_bytes:
+            return
+        if key in self._cache:
+            self.current_bytes -= self._cache.pop(key).memory_usage(index=False, deep=False)
+        self._cache[key] = series
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self.current_bytes -= evicted.memory_usage(index=False, deep=False)
+
+    def _compute(self,
+                 statistic: str,
+                 pairs: List[Tuple[str, str]],
+                 window: Optional[int],
+                 min_periods: Optional[int]) -> Dict[Tuple[str, str], pd.Series]:
+        first = [asset1 for asset1, _ in pairs]
+        second = [asset2 for _, asset2 in pairs]
+
+        if statistic == 'spread':
+            x = self.prices[first].to_numpy(dtype=np.float64)
+            y = self.prices[second].to_numpy(dtype=np.float64)
+            x_centred = x - x.mean(axis=0)
+            y_centred = y - y.mean(axis=0)
+            beta = (x_centred * y_centred).sum(axis=0) / (y_centred ** 2).sum(axis=0)
+            values = x_centred - beta * y_centred
+            index = self.prices.index
+        else:
+            x = self.returns[first].to_numpy(dtype=np.float64)
+            y = self.returns[second].to_numpy(dtype=np.float64)
+            if np.isnan(x).any() or np.isnan(y).any():
+                return self._compute_pandas(statistic, pairs, window, min_periods)
+
+            x = x - x.mean(axis=0)
+            y = y - y.mean(axis=0)
+            counts = np.minimum(np.arange(1, len(x) + 1), window).astype(np.float64)[:, None]
+            sum_x = _rolling_window_sums(x, window)
+            sum_y = _rolling_window_sums(y, window)
+            sq_x = _rolling_window_sums(x ** 2, window)
+            sq_y = _rolling_window_sums(y ** 2, window)
+            var_x = sq_x - sum_x ** 2 / counts
+            var_y = sq_y - sum_y ** 2 / counts
+            var_x[var_x <= 1e-10 * sq_x] = 0.0
+            var_y[var_y <= 1e-10 * sq_y] = 0.0
+            cov = _rolling_window_sums(x * y, window) - sum_x * sum_y / counts
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if statistic == 'correlation':
+                    denominator = var_x * var_y
+                    values = np.clip(cov / np.sqrt(denominator), -1.0, 1.0)
+                else:
+                    denominator = var_y
+                    values = cov / var_y
+            values[~(denominator > 0)] = np.nan
+            values[counts[:, 0] < max(min_periods, 1)] = np.nan
+            index = self.returns.index
+
+        return {
+            pair: pd.Series(values[:, k], index=index, name=validate_pair_name(*pair))
+            for k, pair in enumerate(pairs)
+        }
+
+    def _compute_pandas(self,
+                        statistic: str,
+                        pairs: List[Tuple[str, str]],
+                        window: int,
+                        min_periods: int) -> Dict[Tuple[str, str], pd.Series]:
+        results = {}
+        for asset1, asset2 in pairs:
+            rolling = self.returns[asset1].rolling(window=window, min_periods=min_periods)
+            if statistic == 'correlation':
+                series = rolling.corr(self.returns[asset2])
+            else:
+                series = rolling.cov(self.returns[asset2]) / self.returns[asset2].rolling(
+                    window=window, min_periods=min_periods
+                ).var()
+            results[(asset1, asset2)] = series.rename(validate_pair_name(asset1, asset2))
+        return results
+
+    def cache_info(self) -> Dict[str, int]:
+        """Cache usage counters."""
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def clear(self) -> None:
+        """Drop all memoised statistics."""
+        with self._lock:
+            self._cache.clear()
+            self.current_bytes = 0
+
+
 class CorrelationAnalyzer:
     """Class for comprehensive correlation analysis."""
 
@@ -80,8 +408,10 @@ class CorrelationAnalyzer:
         self.returns = returns
         self.pearson_corr_: Optional[pd.DataFrame] = None
         self.partial_corr_: Optional[pd.DataFrame] = None
-        self.rolling_corr_: Optional[Dict[str, pd.Series]] = None
+        self.rolling_corr_: Optional[Mapping[str, pd.Series]] = None
+        self.rolling_tensor_: Optional[RollingCorrelationTensor] = None
         self.rolling_window_: Optional[int] = None
+        self.pair_stats = PairStatisticsService(returns)
         self._last_update = datetime.now()
 
     def _validate_input(self, returns: pd.DataFrame) -> None:
@@ -166,7 +496,7 @@ class CorrelationAnalyzer:
         except Exception as e:
             raise CalculationError(f"Failed to calculate partial correlation: {str(e)}")
 
-    def calculate_rolling_correlation(self, window: Optional[int] = None) -> Dict[str, pd.Series]:
+    def calculate_rolling_correlation(self, window: Optional[int] = None) -> Mapping[str, pd.Series]:
         """
         Calculate rolling correlations for all pairs.
 
@@ -174,7 +504,8 @@ class CorrelationAnalyzer:
             window (Optional[int]): Rolling window size in days
 
         Returns:
-            Dict[str, pd.Series]: Dictionary of rolling correlations for each pair
+            Mapping[str, pd.Series]: Rolling correlation for each pair, materialised on access
+                from the shared RollingCorrelationTensor
 
         Raises:
             CalculationError: If calculation fails
@@ -187,28 +518,14 @@ class CorrelationAnalyzer:
                 self.rolling_window_ == window):
                 return self.rolling_corr_
 
-            rolling_corrs = {}
-            n_assets = len(self.returns.columns)
-
-            combinations = [
-                (i, j) for i in range(n_assets)
-                for j in range(i + 1, n_assets)
-            ]
-
-            for i, j in combinations:
-                asset1, asset2 = self.returns.columns[i], self.returns.columns[j]
-                pair_name = validate_pair_name(asset1, asset2)
-
-                rolling_corr = self.returns[asset1].rolling(
-                    window=window,
-                    min_periods=self.config.MIN_OBSERVATIONS
-                ).corr(self.returns[asset2])
-
-                rolling_corrs[pair_name] = rolling_corr
-
-            self.rolling_corr_ = rolling_corrs
+            self.rolling_tensor_ = RollingCorrelationTensor(
+                self.returns,
+                window=window,
+                min_periods=self.config.MIN_OBSERVATIONS
+            )
+            self.rolling_corr_ = _RollingCorrelationView(self.rolling_tensor_)
             self.rolling_window_ = window
-            return rolling_corrs
+            return self.rolling_corr_
 
         except Exception as e:
             raise CalculationError(f"Failed to calculate rolling correlation: {str(e)}")
@@ -281,23 +598,21 @@ class CorrelationAnalyzer:
             if self.rolling_corr_ is None:
                 self.calculate_rolling_correlation(window)
 
-            stability_metrics = {}
-            for pair, rolling_corr in self.rolling_corr_.items():
-                asset1, asset2 = parse_pair_name(pair)
-
-                metrics = {
-                    'asset1': asset1,
-                    'asset2': asset2,
-                    'mean': rolling_corr.mean(),
-                    'std': rolling_corr.std(),
-                    'min': rolling_corr.min(),
-                    'max': rolling_corr.max(),
-                    'negative_pct': np.array((rolling_corr < 0)).mean() * 100,
-                    'missing_pct': rolling_corr.isna().mean() * 100
-                }
-                stability_metrics[pair] = metrics
-
-            return pd.DataFrame(stability_metrics).T
+            values = self.rolling_tensor_.values
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", category=RuntimeWarning)
+                stability = pd.DataFrame({
+                    'asset1': [asset1 for asset1, _ in self.rolling_tensor_.pairs],
+                    'asset2': [asset2 for _, asset2 in self.rolling_tensor_.pairs],
+                    'mean': np.nanmean(values, axis=0, dtype=np.float64),
+                    'std': np.nanstd(values, axis=0, ddof=1, dtype=np.float64),
+                    'min': np.nanmin(values, axis=0).astype(np.float64),
+                    'max': np.nanmax(values, axis=0).astype(np.float64),
+                    'negative_pct': (values < 0).mean(axis=0) * 100,
+                    'missing_pct': np.isnan(values).mean(axis=0) * 100
+                }, index=list(self.rolling_tensor_.pair_index))
+
+            return stability
 
         except Exception as e:
             raise CalculationError(f"Failed to analyze correlation stability: {str(e)}")
@@ -307,12 +622,19 @@ class CorrelationAnalyzer:
         """Create a unique and safe pair identifier."""
         return f"{min(asset1, asset2)}|||{max(asset1, asset2)}"
 
-    def get_pair_rolling_correlation(self, asset1: str, asset2: str) -> pd.Series:
-        """Get rolling correlation for a specific pair."""
-        pair_name = self._validate_pair_name(asset1, asset2)
-        if self.rolling_corr_ is None:
-            self.calculate_rolling_correlation()
-        return self.rolling_corr_.get(pair_name)
+    def get_pair_rolling_correlation(self,
+                                     asset1: str,
+                                     asset2: str,
+                                     window: Optional[int] = None) -> Optional[pd.Series]:
+        """Get rolling correlation for a specific pair without computing the full universe."""
+        window = window or self.rolling_window_ or self.config.DEFAULT_WINDOW
+        if self.rolling_tensor_ is not None and self.rolling_window_ == window:
+            return self.rolling_tensor_.series(asset1, asset2)
+        if asset1 not in self.returns.columns or asset2 not in self.returns.columns:
+            return None
+        return self.pair_stats.rolling_correlation(
+            asset1, asset2, window, min_periods=self.config.MIN_OBSERVATIONS
+        )
 
     def determine_correlation_significance(self,
                                    correlation_type: str = 'pearson',
@@ -16,19 +16,30 @@ import pandas as pd
 import numpy as np
 import traceback
 from abc import ABC, abstractmethod
-from sklearn.covariance import GraphicalLasso, MinCovDet
+from sklearn.covariance import GraphicalLasso, MinCovDet, graphical_lasso
 from sklearn.ensemble import IsolationForest
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
+import queue
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
 from typing import Optional, Dict, List
 from scipy import stats
+from scipy.linalg import cho_factor, cho_solve
 import warnings
 import logging
 from sklearn.decomposition import PCA
 
+try:
+    # Private solver entry point that accepts a warm-start covariance
+    from sklearn.covariance._graph_lasso import _graphical_lasso
+except ImportError:
+    _graphical_lasso = None
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -66,6 +77,66 @@ def reduce_dimensionality(returns: pd.DataFrame, n_components: int) -> pd.DataFr
     return pd.DataFrame(reduced_data, index=returns.index)
 
 
+class _RollingWindow:
+    """Ring buffer of the most recent return rows with running sums and cross-products."""
+
+    def __init__(self, values: np.ndarray, window: int):
+        self.window = max(int(window), 2)
+        self._buffer = np.zeros((self.window, values.shape[1]))
+        tail = values[-self.window:]
+        self.count = len(tail)
+        self._buffer[:self.count] = tail
+        self._pos = self.count % self.window
+        self._recompute()
+
+    def _recompute(self) -> None:
+        data = self.data()
+        self._sum = data.sum(axis=0)
+        self._cross = data.T @ data
+
+    def data(self) -> np.ndarray:
+        """Rows currently in the window, oldest first."""
+        if self.count < self.window:
+            return self._buffer[:self.count].copy()
+        return np.concatenate([self._buffer[self._pos:], self._buffer[:self._pos]])
+
+    def push(self, row: np.ndarray) -> Optional[np.ndarray]:
+        """Append a row, returning the evicted row once the window is full."""
+        evicted = None
+        if self.count == self.window:
+            evicted = self._buffer[self._pos].copy()
+            self._sum -= evicted
+            self._cross -= np.outer(evicted, evicted)
+        else:
+            self.count += 1
+
+        self._buffer[self._pos] = row
+        self._sum += row
+        self._cross += np.outer(row, row)
+        self._pos = (self._pos + 1) % self.window
+
+        # Refresh the running sums once per full cycle to bound float drift
+        if self._pos == 0:
+            self._recompute()
+        return evicted
+
+    def resize(self, window: int) -> None:
+        self.__init__(self.data(), window)
+
+    def mean(self) -> np.ndarray:
+        return self._sum / self.count
+
+    def covariance(self, ddof: int = 1) -> np.ndarray:
+        mean = self.mean()
+        return (self._cross - self.count * np.outer(mean, mean)) / (self.count - ddof)
+
+    def cap(self, row: np.ndarray, zscore_threshold: float = 5) -> np.ndarray:
+        """Online counterpart of cap_extreme_values against the current window."""
+        mean = self.mean()
+        std = np.sqrt(np.clip(np.diag(self.covariance()), 0.0, None))
+        return np.clip(row, mean - zscore_threshold * std, mean + zscore_threshold * std)
+
+
 class BaseCovariance(ABC):
     """Base class for covariance estimation methods.
 
@@ -81,6 +152,9 @@ class BaseCovariance(ABC):
         self.correlation_ = None
         self.eigenvalues_ = None
         self.column_names_ = None
+        self.window_ = None
+        self._window = None
+        self._input_columns = None
 
     @abstractmethod
     def fit(self, returns: pd.DataFrame) -> 'BaseCovariance':
@@ -95,6 +169,72 @@ class BaseCovariance(ABC):
         """
         pass
 
+    def partial_fit(self, new_returns: pd.DataFrame, window: Optional[int] = None) -> 'BaseCovariance':
+        """
+        Roll the estimation window forward by ``new_returns`` and refresh the estimate.
+
+        The window keeps the most recent ``window`` rows (by default as many rows as
+        were passed to ``fit``). Incoming bars are capped against the current window
+        in the same way ``fit`` caps the full history.
+
+        Args:
+            new_returns (pd.DataFrame): New return rows with the columns used in ``fit``
+            window (Optional[int]): New rolling window length
+
+        Returns:
+            self: The updated estimator
+        """
+        if self._window is None:
+            raise ValueError("Covariance matrix not yet estimated. Call fit() first.")
+
+        new_returns = new_returns[self._input_columns]
+        if new_returns.isnull().any().any():
+            raise ValueError("Returns contain missing values")
+
+        if window is not None and window != self._window.window:
+            self._window.resize(window)
+            self.window_ = self._window.window
+
+        rows = self._transform_rows(new_returns.to_numpy(dtype=float))
+        capped, evicted = [], 0
+        for row in rows:
+            row = self._window.cap(row)
+            if self._window.push(row) is not None:
+                evicted += 1
+            capped.append(row)
+
+        self._partial_update(np.asarray(capped), evicted)
+        return self
+
+    def update(self, new_returns: pd.DataFrame) -> 'BaseCovariance':
+        """Alias of ``partial_fit`` for daily refreshes."""
+        return self.partial_fit(new_returns)
+
+    def _start_window(self, returns: pd.DataFrame, input_columns=None) -> None:
+        """Seed the rolling window from the (capped) rows used in ``fit``."""
+        window = self.window_ or len(returns)
+        self._window = _RollingWindow(returns.to_numpy(dtype=float), window)
+        self.window_ = self._window.window
+        self._input_columns = returns.columns if input_columns is None else input_columns
+
+    def _transform_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Map raw return rows into the space the window is kept in."""
+        return rows
+
+    def _partial_update(self, rows: np.ndarray, evicted: int) -> None:
+        """Refresh the estimate after ``rows`` entered the window; refits on the window by default."""
+        window = self._window
+        self.fit(pd.DataFrame(window.data(), columns=self._input_columns))
+        self._window = window
+        self.window_ = window.window
+
+    def _set_estimate(self, covariance: np.ndarray) -> None:
+        """Store an updated covariance; eigenvalues are recomputed lazily by ``analyze``."""
+        self.covariance_ = covariance
+        std = np.sqrt(np.diag(covariance))
+        self.correlation_ = covariance / np.outer(std, std)
+        self.eigenvalues_ = None
+
     def validate_input(self, returns: pd.DataFrame) -> None:
         """Validate input data."""
         if returns.empty:
@@ -120,6 +260,9 @@ class BaseCovariance(ABC):
         if self.covariance_ is None:
             raise ValueError("Covariance matrix not yet estimated. Call fit() first.")
 
+        if self.eigenvalues_ is None:
+            self.eigenvalues_ = np.linalg.eigvalsh(self.covariance_)
+
         analysis = {
             'condition_number': np.linalg.cond(self.covariance_),
             'eigenvalues': {
@@ -173,6 +316,7 @@ class StandardCovariance(BaseCovariance):
         returns = cap_extreme_values(returns)
         self.validate_input(returns)
         self.column_names_ = returns.columns
+        self._start_window(returns)
 
         self.covariance_ = returns.cov().values
         std = np.sqrt(np.diag(self.covariance_))
@@ -181,6 +325,10 @@ class StandardCovariance(BaseCovariance):
 
         return self
 
+    def _partial_update(self, rows: np.ndarray, evicted: int) -> None:
+        """Sample covariance straight from the window's running moments, O(N^2) per bar."""
+        self._set_estimate(self._window.covariance())
+
 class EWMACovariance(BaseCovariance):
     """EWMA-based covariance estimation."""
 
@@ -218,6 +366,7 @@ class EWMACovariance(BaseCovariance):
 
         self.column_names_ = returns_sorted.columns
         n_assets = len(self.column_names_)
+        self._start_window(returns_sorted)
 
         try:
             ewm_cov = returns_sorted.ewm(
@@ -244,6 +393,7 @@ class EWMACovariance(BaseCovariance):
             alpha = 2 / (self.span + 1)
             self.weights_ = np.array([(1-alpha)**i for i in range(len(returns))])
             self.weights_ = self.weights_[::-1] / self.weights_.sum()
+            self._seed_recursion(returns_sorted.to_numpy(dtype=float))
 
             std = np.sqrt(np.diag(self.covariance_))
             self.correlation_ = self.covariance_ / np.outer(std, std)
@@ -254,8 +404,38 @@ class EWMACovariance(BaseCovariance):
         except Exception as e:
             raise RuntimeError(f"Error computing EWMA covariance: {str(e)}")
 
+    def _seed_recursion(self, values: np.ndarray) -> None:
+        """Weighted sums behind the adjusted EWMA covariance, so later bars update in O(N^2)."""
+        decay = 1 - 2 / (self.span + 1)
+        weights = decay ** np.arange(len(values) - 1, -1, -1)
+        self._n_obs = len(values)
+        self._sum_w = weights.sum()
+        self._sum_w2 = (weights ** 2).sum()
+        self._sum_wx = weights @ values
+        self._sum_wxx = values.T @ (weights[:, None] * values)
+
+    def _partial_update(self, rows: np.ndarray, evicted: int) -> None:
+        """Recursive EWMA update matching pandas ``ewm(adjust=True).cov()``."""
+        decay = 1 - 2 / (self.span + 1)
+        for row in rows:
+            self._sum_w = decay * self._sum_w + 1.0
+            self._sum_w2 = decay ** 2 * self._sum_w2 + 1.0
+            self._sum_wx = decay * self._sum_wx + row
+            self._sum_wxx = decay * self._sum_wxx + np.outer(row, row)
+        self._n_obs += len(rows)
+
+        mean = self._sum_wx / self._sum_w
+        bias_correction = self._sum_w ** 2 / (self._sum_w ** 2 - self._sum_w2)
+        self._set_estimate((self._sum_wxx / self._sum_w - np.outer(mean, mean)) * bias_correction)
+        self.weights_ = None
+
     def analyze(self) -> dict:
         """Extended analysis including EWMA-specific metrics."""
+        if self.weights_ is None:
+            alpha = 2 / (self.span + 1)
+            self.weights_ = (1 - alpha) ** np.arange(self._n_obs)
+            self.weights_ = self.weights_[::-1] / self.weights_.sum()
+
         base_analysis = super().analyze()
 
         ewma_analysis = {
@@ -283,13 +463,18 @@ class GraphicalLassoCovariance(BaseCovariance):
         self.max_iter = max_iter
         self.tol = tol
         self.precision_ = None
+        self.pca_ = None
+        self._scaled_covariance = None
 
     def fit(self, returns: pd.DataFrame) -> 'GraphicalLassoCovariance':
         """Estimate sparse covariance using Graphical Lasso."""
-        returns = reduce_dimensionality(returns, n_components=50)
+        input_columns = returns.columns
+        self.pca_ = PCA(n_components=50)
+        returns = pd.DataFrame(self.pca_.fit_transform(returns), index=returns.index)
         returns = cap_extreme_values(returns)
         self.validate_input(returns)
         self.column_names_ = returns.columns
+        self._start_window(returns, input_columns)
 
         scaler = StandardScaler()
         scaled_returns = scaler.fit_transform(returns)
@@ -300,6 +485,7 @@ class GraphicalLassoCovariance(BaseCovariance):
             tol=self.tol
         )
         model.fit(scaled_returns)
+        self._scaled_covariance = model.covariance_
 
         scales = returns.std()
         self.covariance_ = model.covariance_ * np.outer(scales, scales)
@@ -311,6 +497,30 @@ class GraphicalLassoCovariance(BaseCovariance):
 
         return self
 
+    def _transform_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Project new returns onto the principal components fixed at ``fit``."""
+        return self.pca_.transform(rows)
+
+    def _partial_update(self, rows: np.ndarray, evicted: int) -> None:
+        """Re-solve the lasso on the rolled window, warm-started from the previous solution."""
+        covariance = self._window.covariance()
+        scales = np.sqrt(np.diag(covariance))
+        emp_cov = covariance / np.outer(scales, scales)
+
+        if _graphical_lasso is not None:
+            scaled_cov, scaled_precision = _graphical_lasso(
+                emp_cov, self.alpha, cov_init=self._scaled_covariance,
+                tol=self.tol, max_iter=self.max_iter
+            )[:2]
+        else:
+            scaled_cov, scaled_precision = graphical_lasso(
+                emp_cov, self.alpha, tol=self.tol, max_iter=self.max_iter
+            )
+        self._scaled_covariance = scaled_cov
+
+        self._set_estimate(scaled_cov * np.outer(scales, scales))
+        self.precision_ = scaled_precision / np.outer(scales, scales)
+
     def analyze(self) -> dict:
         """Extended analysis including sparsity metrics."""
         base_analysis = super().analyze()
@@ -345,6 +555,7 @@ class OLSCovariance(BaseCovariance):
         returns = cap_extreme_values(returns)
         self.validate_input(returns)
         self.column_names_ = returns.columns
+        self._start_window(returns)
 
         if self.n_factors is not None:
             denoised_returns = self._factor_denoise(returns)
@@ -358,6 +569,20 @@ class OLSCovariance(BaseCovariance):
 
         return self
 
+    def _partial_update(self, rows: np.ndarray, evicted: int) -> None:
+        """
+        Pairwise mode: the residual covariance of regressing each asset on all others
+        equals P_ij / (P_ii * P_jj) for the window precision matrix P, so one inverse of
+        the running covariance replaces N regressions. Factor mode refits on the window.
+        """
+        if self.n_factors is not None:
+            super()._partial_update(rows, evicted)
+            return
+
+        precision = np.linalg.inv(self._window.covariance())
+        diag = np.diag(precision)
+        self._set_estimate(precision / np.outer(diag, diag))
+
     def _factor_denoise(self, returns: pd.DataFrame) -> pd.DataFrame:
         """Denoise returns using PCA factors."""
         scaler = StandardScaler()
@@ -440,12 +665,14 @@ class RobustCovariance(BaseCovariance):
         self.location_ = None
         self.precision_ = None
         self.support_ = None
+        self._mcd = None
 
     def fit(self, returns: pd.DataFrame) -> 'RobustCovariance':
         """Estimate robust covariance using MCD."""
         returns = cap_extreme_values(returns)
         self.validate_input(returns)
         self.column_names_ = returns.columns
+        self._start_window(returns)
 
         if self.contamination is None:
             iso = IsolationForest(contamination='auto',
@@ -471,6 +698,7 @@ class RobustCovariance(BaseCovariance):
             self.location_ = mcd.location_
             self.precision_ = mcd.precision_
             self.support_ = mcd.support_
+            self._mcd = mcd
 
             self.mahalanobis_dist_ = mcd.mahalanobis(returns)
             threshold = np.percentile(self.mahalanobis_dist_, (1 - self.contamination_used_) * 100)
@@ -485,6 +713,58 @@ class RobustCovariance(BaseCovariance):
         except Exception as e:
             raise RuntimeError(f"MCD estimation error: {str(e)}")
 
+    def _partial_update(self, rows: np.ndarray, evicted: int, max_steps: int = 30) -> None:
+        """
+        Rolled MCD: start from the previous raw support (shifted by the evicted rows)
+        and run concentration steps on the new window instead of a fresh FastMCD search.
+        """
+        data = self._window.data()
+        n_samples = len(data)
+        n_support = min(max(int(self.support_fraction * n_samples), data.shape[1] + 1), n_samples)
+
+        previous = np.flatnonzero(self._mcd.raw_support_) - evicted
+        support = np.zeros(n_samples, dtype=bool)
+        support[previous[previous >= 0]] = True
+
+        best_det = np.inf
+        for _ in range(max_steps):
+            location = data[support].mean(axis=0)
+            covariance = np.cov(data[support], rowvar=False, ddof=0)
+            precision = np.linalg.pinv(covariance, hermitian=True)
+            centered = data - location
+            dist = np.sum(centered @ precision * centered, axis=1)
+
+            new_support = np.zeros(n_samples, dtype=bool)
+            new_support[np.argsort(dist)[:n_support]] = True
+            det = np.linalg.slogdet(covariance)[1]
+            if np.array_equal(new_support, support) or det >= best_det:
+                break
+            support, best_det = new_support, det
+
+        location = data[support].mean(axis=0)
+        covariance = np.cov(data[support], rowvar=False, ddof=0)
+        precision = np.linalg.pinv(covariance, hermitian=True)
+        centered = data - location
+
+        mcd = self._mcd
+        mcd.raw_location_ = location
+        mcd.raw_covariance_ = covariance
+        mcd.raw_support_ = support
+        mcd.location_ = location
+        mcd.support_ = support
+        mcd.dist_ = np.sum(centered @ precision * centered, axis=1)
+        mcd.correct_covariance(data)
+        mcd.reweight_covariance(data)
+
+        self.location_ = mcd.location_
+        self.precision_ = mcd.precision_
+        self.support_ = mcd.support_
+        self._set_estimate(mcd.covariance_)
+
+        self.mahalanobis_dist_ = mcd.mahalanobis(data)
+        threshold = np.percentile(self.mahalanobis_dist_, (1 - self.contamination_used_) * 100)
+        self.outlier_mask_ = self.mahalanobis_dist_ > threshold
+
     def analyze(self) -> dict:
         """Extended analysis including robustness metrics."""
         base_analysis = super().analyze()
@@ -555,14 +835,22 @@ class RobustCovariance(BaseCovariance):
         return fig
 
 class KalmanCovariance(BaseCovariance):
-    """Kalman Filter based covariance estimation."""
+    """Kalman Filter based covariance estimation.
+
+    Args:
+        diagnostic_every: Record the condition number every k update steps
+        path_file: Keep the full (T, N, N) float32 covariance path in ``covariance_path_``,
+            memory-mapped to this file (the caller owns and removes it)
+    """
 
     def __init__(self,
                  process_variance: float = 1e-5,
                  measurement_variance: float = 1e-3,
                  forgetting_factor: float = 0.97,
                  batch_size: int = 50,
-                 parameter_set: Optional[str] = None):
+                 parameter_set: Optional[str] = None,
+                 diagnostic_every: int = 1,
+                 path_file: Optional[str] = None):
         super().__init__()
 
         PARAMETER_SETS = {
@@ -595,63 +883,105 @@ class KalmanCovariance(BaseCovariance):
             self.measurement_variance = measurement_variance
             self.forgetting_factor = forgetting_factor
 
+        if diagnostic_every < 1:
+            raise ValueError("diagnostic_every must be a positive integer")
+
         self.batch_size = batch_size
+        self.diagnostic_every = diagnostic_every
+        self.path_file = path_file
         self.diagnostics_ = None
+        self.covariance_path_ = None
+        self._n_steps = 0
 
-    def fit(self, returns: pd.DataFrame) -> 'KalmanCovariance':
-        """Estimate time-varying covariance using Kalman Filter."""
-        returns = cap_extreme_values(returns)
-        self.validate_input(returns)
-        self.column_names_ = returns.columns
+    @staticmethod
+    def _repair_psd(cov: np.ndarray, eye: np.ndarray, floor: float = 1e-10) -> np.ndarray:
+        """Shift the diagonal only when a Cholesky attempt shows eigenvalues below ``floor``."""
+        try:
+            np.linalg.cholesky(cov - floor * eye)
+            return cov
+        except np.linalg.LinAlgError:
+            min_eig = np.linalg.eigvalsh(cov)[0]
+            if min_eig < floor:
+                cov = cov + (abs(min_eig) + floor) * eye
+            return cov
 
-        n_assets = returns.shape[1]
-        n_obs = returns.shape[0]
+    def _allocate_path(self, n_obs: int, n_assets: int) -> Optional[np.memmap]:
+        if self.path_file is None:
+            return None
+        return np.memmap(self.path_file, dtype=np.float32, mode='w+', shape=(n_obs, n_assets, n_assets))
 
-        self.diagnostics_ = {
-            'condition_numbers': []
-        }
+    def _filter(self, values: np.ndarray, current_cov: np.ndarray,
+                path: Optional[np.memmap] = None, step_offset: int = 0) -> np.ndarray:
+        """Run the covariance recursion over ``values`` starting from ``current_cov``."""
+        eye = np.eye(values.shape[1])
 
-        initial_batch = returns.iloc[:min(self.batch_size, n_obs)]
-        current_cov = initial_batch.cov().values
+        for i, ret in enumerate(values):
+            step = step_offset + i
+            current_cov = current_cov / self.forgetting_factor
+            current_cov += self.process_variance * eye
 
-        for start_idx in range(0, n_obs, self.batch_size):
-            end_idx = min(start_idx + self.batch_size, n_obs)
-            batch_returns = returns.iloc[start_idx:end_idx]
+            y = ret[:, None]
+            S = current_cov + self.measurement_variance * eye
 
-            for _, ret in batch_returns.iterrows():
-                current_cov = current_cov / self.forgetting_factor
-                current_cov += self.process_variance * np.eye(n_assets)
+            try:
+                K = cho_solve(cho_factor(S, check_finite=False), current_cov, check_finite=False).T
 
-                y = ret.values.reshape(-1, 1)
-                S = current_cov + self.measurement_variance * np.eye(n_assets)
+                innovation = y @ y.T - current_cov
+                current_cov = current_cov + K @ innovation
 
-                try:
-                    K = np.linalg.solve(S, current_cov).T
+                current_cov = (current_cov + current_cov.T) / 2
+                current_cov = self._repair_psd(current_cov, eye)
 
-                    innovation = y @ y.T - current_cov
-                    current_cov = current_cov + K @ innovation
+                if step % self.diagnostic_every == 0:
+                    self.diagnostics_['condition_numbers'].append(float(np.linalg.cond(current_cov)))
+                    self.diagnostics_['condition_steps'].append(step)
 
-                    current_cov = (current_cov + current_cov.T) / 2
+            except np.linalg.LinAlgError:
+                current_cov = 0.9 * current_cov + 0.1 * (y @ y.T)
 
-                    min_eig = np.min(np.real(np.linalg.eigvals(current_cov)))
-                    if min_eig < 1e-10:
-                        current_cov += (abs(min_eig) + 1e-10) * np.eye(n_assets)
+            if path is not None:
+                path[i] = current_cov
 
-                    cond_num = np.linalg.cond(current_cov)
-                    self.diagnostics_['condition_numbers'].append(float(cond_num))
+        self._n_steps = step_offset + len(values)
+        return current_cov
 
-                except np.linalg.LinAlgError:
-                    current_cov = 0.9 * current_cov + 0.1 * (y @ y.T)
+    def _partial_update(self, rows: np.ndarray, evicted: int) -> None:
+        """Continue the recursion from the last filtered state; ``covariance_path_`` covers ``fit`` only."""
+        self._set_estimate(self._filter(rows, self.covariance_, step_offset=self._n_steps))
+
+    def fit(self, returns: pd.DataFrame) -> 'KalmanCovariance':
+        """Estimate time-varying covariance using Kalman Filter."""
+        returns = cap_extreme_values(returns)
+        self.validate_input(returns)
+        self.column_names_ = returns.columns
+        self._start_window(returns)
+
+        values = returns.to_numpy(dtype=float)
+        n_obs, n_assets = values.shape
+
+        self.diagnostics_ = {
+            'condition_numbers': [],
+            'condition_steps': []
+        }
+        path = self._allocate_path(n_obs, n_assets)
+
+        initial_batch = values[:min(self.batch_size, n_obs)]
+        current_cov = np.cov(initial_batch, rowvar=False).reshape(n_assets, n_assets)
+        current_cov = self._filter(values, current_cov, path=path)
+
+        if path is not None:
+            path.flush()
+            self.covariance_path_ = path
 
         self.covariance_ = current_cov
         std = np.sqrt(np.diag(self.covariance_))
         self.correlation_ = self.covariance_ / np.outer(std, std)
-        self.eigenvalues_ = np.linalg.eigvals(self.covariance_)
+        self.eigenvalues_ = np.linalg.eigvalsh(self.covariance_)
 
         self.diagnostics_['final_condition_number'] = float(np.linalg.cond(current_cov))
         self.diagnostics_['eigenvalue_range'] = {
-            'min': float(np.min(np.real(self.eigenvalues_))),
-            'max': float(np.max(np.real(self.eigenvalues_)))
+            'min': float(np.min(self.eigenvalues_)),
+            'max': float(np.max(self.eigenvalues_))
         }
 
         return self
@@ -684,6 +1014,7 @@ class KalmanCovariance(BaseCovariance):
 
         fig.add_trace(
             go.Scatter(
+                x=self.diagnostics_.get('condition_steps'),
                 y=np.log10(self.diagnostics_['condition_numbers']),
                 name='Log10 Condition Number',
                 mode='lines'
@@ -919,6 +1250,161 @@ def save_comparison_metrics(output_dir: str, results: Dict) -> None:
         index=False
     )
 
+def _fit_estimator_worker(name: str,
+                          estimator: BaseCovariance,
+                          shm_name: str,
+                          shape: tuple,
+                          index: pd.Index,
+                          columns: pd.Index,
+                          results: mp.Queue) -> None:
+    """Fit one estimator on the returns matrix held in shared memory and report through ``results``."""
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            returns = pd.DataFrame(values.copy(), index=index, columns=columns)
+        finally:
+            shm.close()
+
+        start = time.perf_counter()
+        estimator.fit(returns)
+        fit_seconds = time.perf_counter() - start
+        results.put(('ok', name, estimator, estimator.analyze(), fit_seconds))
+    except Exception:
+        results.put(('error', name, traceback.format_exc()))
+
+
+def run_method_comparison(returns: pd.DataFrame,
+                          estimators: Dict[str, BaseCovariance],
+                          output_dir: Optional[str] = None,
+                          max_workers: Optional[int] = None,
+                          timeout: Optional[float] = None) -> tuple:
+    """Fit covariance methods in parallel worker processes on a shared returns matrix.
+
+    Every method runs in its own process, so one that exceeds the timeout
+    can be terminated without affecting the others.
+
+    Args:
+        returns: DataFrame of asset returns
+        estimators: Mapping of method name to unfitted estimator
+        output_dir: If given, matrices are saved to covariance_matrices.npz and
+            timings to method_timings.csv in this directory
+        max_workers: Number of methods fitted at once (defaults to all of them)
+        timeout: Per-method limit in seconds, measured from the start of its process;
+            a method that exceeds it is reported as a timeout and its process terminated
+
+    Returns:
+        tuple: (fitted estimators, analysis results, timings DataFrame)
+    """
+    values = np.ascontiguousarray(returns.to_numpy(dtype=np.float64))
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+
+    fitted, results, outcomes = {}, {}, {}
+    wall_start = time.perf_counter()
+    ctx = mp.get_context()
+    messages = ctx.Queue()
+    waiting = list(estimators.items())
+    running = {}  # name -> (process, started)
+    n_workers = max_workers or len(estimators)
+
+    def finish(name: str, status: str, fit_seconds: float = np.nan):
+        process, started = running.pop(name)
+        if status == 'timeout':
+            process.terminate()
+        process.join()
+        outcomes[name] = {'Status': status, 'Fit_Seconds': fit_seconds,
+                          'Elapsed_Seconds': time.perf_counter() - started}
+
+    try:
+        while waiting or running:
+            while waiting and len(running) < n_workers:
+                name, estimator = waiting.pop(0)
+                process = ctx.Process(target=_fit_estimator_worker, name=f"covariance-{name}", daemon=True,
+                                      args=(name, estimator, shm.name, values.shape, returns.index,
+                                            returns.columns, messages))
+                process.start()
+                running[name] = (process, time.perf_counter())
+
+            wait_seconds = 0.1
+            if timeout is not None:
+                next_deadline = min(started + timeout for _, started in running.values())
+                wait_seconds = min(wait_seconds, max(next_deadline - time.perf_counter(), 0))
+            try:
+                message = messages.get(timeout=wait_seconds)
+            except queue.Empty:
+                message = None
+            if message is not None and message[1] not in running:
+                message = None  # Sent just before its method timed out
+
+            if message is not None and message[0] == 'ok':
+                _, name, estimator, analysis, fit_seconds = message
+                fitted[name] = estimator
+                results[name] = analysis
+                logger.info(f"{name} fitted in {fit_seconds:.2f}s")
+                finish(name, 'ok', fit_seconds)
+            elif message is not None:
+                _, name, error = message
+                logger.error(f"Error processing {name}: {error}")
+                finish(name, 'error')
+
+            now = time.perf_counter()
+            for name, (process, started) in list(running.items()):
+                if timeout is not None and now - started > timeout:
+                    logger.error(f"{name} exceeded the {timeout}s timeout")
+                    finish(name, 'timeout')
+                elif process.exitcode not in (None, 0):
+                    logger.error(f"{name} worker exited with code {process.exitcode}")
+                    finish(name, 'error')
+    finally:
+        for name in list(running):
+            finish(name, 'timeout')
+        shm.close()
+        shm.unlink()
+
+    timings_df = pd.DataFrame([{'Method': name, **outcomes[name]} for name in estimators if name in outcomes])
+    timings_df.attrs['wall_seconds'] = time.perf_counter() - wall_start
+    logger.info(
+        f"Comparison finished in {timings_df.attrs['wall_seconds']:.2f}s "
+        f"(sum of fits {timings_df['Fit_Seconds'].sum():.2f}s)"
+    )
+
+    if output_dir is not None:
+        save_covariance_matrices(output_dir, fitted)
+        timings_df.to_csv(os.path.join(output_dir, "method_timings.csv"), index=False)
+
+    return fitted, results, timings_df
+
+def save_covariance_matrices(output_dir: str, estimators: Dict[str, BaseCovariance]) -> str:
+    """Save fitted covariance matrices and their column labels to a compressed npz archive.
+
+    Args:
+        output_dir: Directory to save the archive
+        estimators: Mapping of method name to fitted estimator
+
+    Returns:
+        Path of the written archive
+    """
+    arrays = {}
+    for name, estimator in estimators.items():
+        arrays[f"{name}__covariance"] = np.asarray(estimator.covariance_)
+        arrays[f"{name}__columns"] = np.asarray(estimator.column_names_, dtype=str)
+
+    path = os.path.join(output_dir, "covariance_matrices.npz")
+    np.savez_compressed(path, **arrays)
+    return path
+
+def load_covariance_matrices(path: str) -> Dict[str, pd.DataFrame]:
+    """Load matrices written by save_covariance_matrices as labelled DataFrames."""
+    matrices = {}
+    with np.load(path) as archive:
+        for key in archive.files:
+            if key.endswith("__covariance"):
+                name = key[:-len("__covariance")]
+                columns = archive[f"{name}__columns"]
+                matrices[name] = pd.DataFrame(archive[key], index=columns, columns=columns)
+    return matrices
+
 def main():
     """Main execution function."""
     output_dir = "covariance_analysis"
@@ -937,27 +1423,18 @@ def main():
         'Kalman': KalmanCovariance(parameter_set='moderate')
     }
 
-    results = {}
+    estimators, results, _ = run_method_comparison(returns, estimators, output_dir=output_dir)
+
     for name, estimator in estimators.items():
-        logger.info(f"Processing {name} estimator...")
-        try:
-            estimator.fit(returns)
+        estimator.plot(f"{name} Correlation Matrix").write_html(
+            os.path.join(output_dir, f"{name.lower()}_correlation.html")
+        )
 
-            estimator.plot(f"{name} Correlation Matrix").write_html(
-                os.path.join(output_dir, f"{name.lower()}_correlation.html")
+        if isinstance(estimator, KalmanCovariance):
+            estimator.plot_diagnostics().write_html(
+                os.path.join(output_dir, f"{name.lower()}_diagnostics.html")
             )
 
-            if isinstance(estimator, KalmanCovariance):
-                estimator.plot_diagnostics().write_html(
-                    os.path.join(output_dir, f"{name.lower()}_diagnostics.html")
-                )
-
-            results[name] = estimator.analyze()
-
-        except Exception as e:
-            logger.error(f"Error processing {name}: {traceback.format_exc()}")
-            continue
-
     figures = plot_method_comparison(returns, estimators)
     for i, fig in enumerate(figures):
         fig.write_html(os.path.join(output_dir, f"comparison_{i}.html"))
@@ -13,4 +13,7 @@ from .downloader import DataDownloader
 from .database import DatabaseManager
 from .preprocessor import Preprocessor
 from .feature_engineering import FeatureEngineer
-from .live_data import LiveDataHandler
\ No newline at end of file
+from .live_data import LiveDataHandler
+from .live_bar_store import LiveBarStore
+from .market_data_providers import MarketDataProvider, YFinanceProvider, ReplayProvider
+from .price_matrix import PriceMatrix
\ No newline at end of file
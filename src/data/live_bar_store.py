@@ -0,0 +1,275 @@
+"""
+Live Bar Store
+
+Append-only storage for live bars. Each ticker has an on-disk segment that
+only ever receives new bars, plus an in-memory ring buffer of its most recent
+bars, so updates cost O(new bars) and the latest bar is served from memory.
+Segments are compacted, and their old rows archived, once they grow past a
+threshold.
+"""
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from config.logging_config import logger
+
+BAR_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+BAR_COLUMNS = ['Date', 'Symbol'] + BAR_FIELDS + ['fetch_time']
+
+
+def _utc_values(values) -> np.ndarray:
+    """Timestamps as naive UTC datetime64[ns] values."""
+    index = pd.DatetimeIndex(pd.to_datetime(values, utc=True))
+    return index.tz_convert(None).to_numpy(dtype='datetime64[ns]')
+
+
+class BarRingBuffer:
+    """Fixed-capacity ring of the most recent bars of one ticker."""
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: Number of bars kept
+        """
+        self.capacity = max(int(capacity), 1)
+        self.dates = np.full(self.capacity, np.datetime64('NaT'), dtype='datetime64[ns]')
+        self.fetch_times = np.full(self.capacity, np.datetime64('NaT'), dtype='datetime64[ns]')
+        self.values = np.full((self.capacity, len(BAR_FIELDS)), np.nan)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        if self._size == 0:
+            return None
+        return self.dates[(self._next - 1) % self.capacity]
+
+    def extend(self, dates: np.ndarray, values: np.ndarray, fetch_times: np.ndarray):
+        """Append bars in time order, overwriting the oldest ones."""
+        n_new = len(dates)
+        if n_new > self.capacity:
+            dates, values, fetch_times = dates[-self.capacity:], values[-self.capacity:], fetch_times[-self.capacity:]
+            n_new = self.capacity
+
+        positions = (self._next + np.arange(n_new)) % self.capacity
+        self.dates[positions] = dates
+        self.values[positions] = values
+        self.fetch_times[positions] = fetch_times
+        self._next = (self._next + n_new) % self.capacity
+        self._size = min(self._size + n_new, self.capacity)
+
+    def _order(self) -> np.ndarray:
+        return (self._next - self._size + np.arange(self._size)) % self.capacity
+
+    def latest(self) -> Optional[Dict]:
+        """Most recent bar as a dict, or None if empty."""
+        if self._size == 0:
+            return None
+        position = (self._next - 1) % self.capacity
+        bar = {'Date': pd.Timestamp(self.dates[position], tz='UTC')}
+        bar.update(zip(BAR_FIELDS, self.values[position].tolist()))
+        bar['fetch_time'] = pd.Timestamp(self.fetch_times[position], tz='UTC')
+        return bar
+
+    def to_frame(self, symbol: str, last: Optional[int] = None) -> pd.DataFrame:
+        """Stored bars (only the ``last`` ones if given), oldest first, with BAR_COLUMNS."""
+        order = self._order()
+        if last is not None:
+            order = order[len(order) - min(last, len(order)):]
+        frame = pd.DataFrame(self.values[order], columns=BAR_FIELDS)
+        frame.insert(0, 'Date', pd.DatetimeIndex(self.dates[order]).tz_localize('UTC'))
+        frame.insert(1, 'Symbol', symbol)
+        frame['fetch_time'] = pd.DatetimeIndex(self.fetch_times[order]).tz_localize('UTC')
+        return frame
+
+
+class LiveBarStore:
+    """
+    Per-ticker append-only segments with in-memory ring buffers.
+
+    New bars (strictly later than the last stored bar) are appended to the
+    ticker's segment file before they become visible in memory, so the
+    segment is the write-ahead record of the ring. When a segment reaches
+    ``archive_threshold`` rows, its rows older than the ring are moved to the
+    archive directory and the segment is rewritten from the ring.
+    """
+
+    def __init__(
+            self,
+            data_dir: Path,
+            archive_dir: Path,
+            max_stored_rows: int = 5000,
+            archive_threshold: Optional[int] = None,
+            archive_data: bool = True,
+            fsync: bool = False
+    ):
+        """
+        Args:
+            data_dir: Directory of the active <ticker>.csv segments
+            archive_dir: Directory receiving archived rows
+            max_stored_rows: Bars kept in memory (and in a compacted segment)
+            archive_threshold: Segment rows that trigger compaction
+            archive_data: Whether to compact and archive at all
+            fsync: Force every append to disk before it becomes visible
+        """
+        self.data_dir = Path(data_dir)
+        self.archive_dir = Path(archive_dir)
+        self.max_stored_rows = max_stored_rows
+        self.archive_threshold = archive_threshold or (max_stored_rows * 2)
+        self.archive_data = archive_data
+        self.fsync = fsync
+
+        self._rings: Dict[str, BarRingBuffer] = {}
+        self._segment_rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def segment_path(self, ticker: str) -> Path:
+        return self.data_dir / f"{ticker}.csv"
+
+    def _ring(self, ticker: str) -> BarRingBuffer:
+        """Ring of a ticker, recovered from its segment on first use."""
+        ring = self._rings.get(ticker)
+        if ring is not None:
+            return ring
+
+        ring = BarRingBuffer(self.max_stored_rows)
+        segment_rows = 0
+        path = self.segment_path(ticker)
+        if path.exists() and path.stat().st_size > 0:
+            segment = pd.read_csv(path, float_precision='round_trip')
+            segment_rows = len(segment)
+            if segment_rows:
+                tail = segment.iloc[-self.max_stored_rows:]
+                ring.extend(
+                    _utc_values(tail['Date']),
+                    tail.reindex(columns=BAR_FIELDS).to_numpy(dtype=np.float64),
+                    _utc_values(tail['fetch_time']) if 'fetch_time' in tail
+                    else np.full(len(tail), np.datetime64('NaT'), dtype='datetime64[ns]')
+                )
+            logger.info(f"Recovered {len(ring)} bars for {ticker} from {segment_rows} segment rows")
+
+        self._rings[ticker] = ring
+        self._segment_rows[ticker] = segment_rows
+        return ring
+
+    def segment_rows(self, ticker: str) -> int:
+        with self._lock:
+            self._ring(ticker)
+            return self._segment_rows[ticker]
+
+    def append(self, ticker: str, bars: pd.DataFrame) -> int:
+        """
+        Append the bars that are newer than the last stored bar.
+
+        Args:
+            ticker: Ticker symbol
+            bars: Frame with a Date column and the OHLCV fields
+
+        Returns:
+            int: Number of bars appended
+        """
+        with self._lock:
+            ring = self._ring(ticker)
+            if bars is None or bars.empty:
+                return 0
+
+            dates = _utc_values(bars['Date'])
+            order = np.argsort(dates, kind='stable')
+            dates = dates[order]
+            # Keep the last bar of every timestamp, and only timestamps not stored yet
+            keep = np.append(dates[1:] != dates[:-1], True)
+            if ring.last_date is not None:
+                keep &= dates > ring.last_date
+            if not keep.any():
+                return 0
+
+            rows = order[keep]
+            new_records = bars.iloc[rows].reindex(columns=BAR_COLUMNS)
+            new_records['Date'] = pd.DatetimeIndex(dates[keep]).tz_localize('UTC')
+            new_records['Symbol'] = ticker
+
+            path = self.segment_path(ticker)
+            write_header = not path.exists() or path.stat().st_size == 0
+            with open(path, 'a', newline='') as segment:
+                new_records.to_csv(segment, header=write_header, index=False)
+                if self.fsync:
+                    segment.flush()
+                    os.fsync(segment.fileno())
+
+            fetch_times = new_records['fetch_time']
+            ring.extend(
+                dates[keep],
+                new_records[BAR_FIELDS].to_numpy(dtype=np.float64),
+                _utc_values(fetch_times) if fetch_times.notna().any()
+                else np.full(len(rows), np.datetime64('NaT'), dtype='datetime64[ns]')
+            )
+            self._segment_rows[ticker] += len(rows)
+
+            if self.archive_data and self._segment_rows[ticker] >= self.archive_threshold:
+                self.compact(ticker)
+            return len(rows)
+
+    def compact(self, ticker: str) -> int:
+        """
+        Archive the segment rows older than the ring and rewrite the segment.
+
+        Args:
+            ticker: Ticker symbol
+
+        Returns:
+            int: Number of rows archived
+        """
+        with self._lock:
+            ring = self._ring(ticker)
+            path = self.segment_path(ticker)
+            n_archive = self._segment_rows[ticker] - len(ring)
+            if n_archive <= 0 or not path.exists():
+                return 0
+
+            if self.archive_data:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+                archive_path = self.archive_dir / f"{ticker}_archive_{timestamp}.csv"
+                try:
+                    archived = pd.read_csv(path, nrows=n_archive, float_precision='round_trip')
+                    archived.to_csv(archive_path, index=False)
+                    logger.info(f"Archived {len(archived)} rows for {ticker}")
+                except Exception as e:
+                    logger.error(f"Error archiving {ticker} data: {str(e)}")
+                    return 0
+
+            # Rewrite atomically so a crash leaves either segment intact
+            temp_path = path.with_suffix('.csv.tmp')
+            ring.to_frame(ticker).to_csv(temp_path, index=False)
+            os.replace(temp_path, path)
+            self._segment_rows[ticker] = len(ring)
+            return n_archive
+
+    def latest(self, ticker: str) -> Optional[Dict]:
+        """Most recent bar of a ticker from memory."""
+        with self._lock:
+            bar = self._ring(ticker).latest()
+        if bar is not None:
+            bar['Symbol'] = ticker
+        return bar
+
+    def frame(self, ticker: str) -> pd.DataFrame:
+        """Bars of a ticker held in memory, oldest first."""
+        with self._lock:
+            return self._ring(ticker).to_frame(ticker)
+
+    def tail(self, ticker: str, n_bars: int) -> pd.DataFrame:
+        """Last ``n_bars`` bars of a ticker held in memory, oldest first."""
+        with self._lock:
+            return self._ring(ticker).to_frame(ticker, last=n_bars)
+
+    def latest_frame(self, tickers: List[str]) -> pd.DataFrame:
+        """Latest bar of every ticker that has one, one row per ticker."""
+        bars = [bar for bar in (self.latest(ticker) for ticker in tickers) if bar is not None]
+        return pd.DataFrame(bars, columns=BAR_COLUMNS)
@@ -1,14 +1,14 @@
 import time
 import pandas as pd
-import yfinance as yf
-from datetime import datetime
 import threading
-from typing import Optional, List
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, List, Tuple
 from queue import Queue
-import pytz
 from pathlib import Path
 from config.settings import PROCESSED_DATA_DIR
 from config.logging_config import logger
+from src.data.live_bar_store import LiveBarStore
+from src.data.market_data_providers import MarketDataProvider, YFinanceProvider
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', None)
@@ -27,7 +27,11 @@ class LiveDataHandler:
                  data_interval: str = '1m',
                  max_stored_rows: int = 5000,
                  archive_data: bool = True,
-                 archive_threshold: int = None):
+                 archive_threshold: int = None,
+                 provider: Optional[MarketDataProvider] = None,
+                 max_concurrency: Optional[int] = None,
+                 fetch_timeout: float = 30.0,
+                 data_dir: Optional[str] = None):
         """
         Initialize the LiveDataHandler.
 
@@ -37,12 +41,21 @@ class LiveDataHandler:
             data_interval: Data granularity ('1m', '5m', etc.)
             max_stored_rows: Maximum rows to keep in memory
             archive_data: Whether to archive old data
+            provider: Source of live bars (Yahoo Finance by default)
+            max_concurrency: Fetches in flight (defaults to the provider's cap)
+            fetch_timeout: Seconds each update cycle may take; all tickers of a cycle share this
+                one deadline, retries and rate-limit waits included
+            data_dir: Directory of the bar store (defaults to live_data under PROCESSED_DATA_DIR)
         """
         if data_interval not in self.VALID_INTERVALS:
             raise ValueError(f"Invalid interval. Must be one of {self.VALID_INTERVALS}")
 
         self.tickers = tickers
-        self.update_interval = max(update_interval, 60)
+        self.provider = provider or YFinanceProvider()
+        self.max_concurrency = min(max_concurrency or self.provider.max_concurrency,
+                                   self.provider.max_concurrency)
+        self.fetch_timeout = fetch_timeout
+        self.update_interval = max(update_interval, self.provider.min_update_interval)
         self.data_interval = data_interval
         self.max_stored_rows = max_stored_rows
         self.archive_data = archive_data
@@ -50,183 +63,232 @@ class LiveDataHandler:
 
         self._stop_event = threading.Event()
         self._data_lock = threading.Lock()
-        self._archive_lock = threading.Lock()
 
-        self.live_data = {ticker: pd.DataFrame() for ticker in tickers}
         self._error_queue = Queue()
-
-        self._setup_directories()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._late: Dict[str, Future] = {}
+        self._missed: List[str] = []  # Tickers that ran out of time last cycle
+        self._subscribers: List[Callable[[Dict[str, pd.DataFrame]], None]] = []
+        self.last_cycle_stats: Dict[str, float] = {}
+
+        self._setup_directories(data_dir)
+        self.store = LiveBarStore(
+            self.live_data_dir,
+            self.archive_dir,
+            max_stored_rows=max_stored_rows,
+            archive_threshold=self.archive_threshold,
+            archive_data=archive_data
+        )
         logger.info(
             f"Initialized LiveDataHandler for {len(tickers)} tickers "
-            f"with {data_interval} interval"
+            f"with {data_interval} interval from {self.provider.name}"
         )
 
-    def _setup_directories(self) -> None:
+    @property
+    def live_data(self) -> Dict[str, pd.DataFrame]:
+        """Bars held in memory for every ticker, oldest first."""
+        return {ticker: self.store.frame(ticker) for ticker in self.tickers}
+
+    def _setup_directories(self, data_dir: Optional[str] = None) -> None:
         """Setup necessary directories."""
-        self.live_data_dir = Path(PROCESSED_DATA_DIR.replace(r'\config', '')) / "live_data"
+        if data_dir is None:
+            self.live_data_dir = Path(PROCESSED_DATA_DIR.replace(r'\config', '')) / "live_data"
+        else:
+            self.live_data_dir = Path(data_dir)
         self.archive_dir = self.live_data_dir / "archive"
 
         for directory in [self.live_data_dir, self.archive_dir]:
             directory.mkdir(parents=True, exist_ok=True)
 
-    def fetch_live_data(self, ticker: str) -> Optional[pd.DataFrame]:
-        """Fetch latest live data with improved verification."""
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                data = yf.download(
-                    tickers=ticker,
-                    period='1d',
-                    interval=self.data_interval,
-                    progress=False,
-                    prepost=True
-                )
-
-                if data.empty:
-                    raise ValueError(f"Empty data received for {ticker}")
-
-                if isinstance(data.columns, pd.MultiIndex):
-                    data.columns = data.columns.get_level_values(0)
-
-                data['Symbol'] = ticker
-                fetch_time = datetime.now(pytz.UTC)
-                data['fetch_time'] = fetch_time
-
-                data.index = pd.to_datetime(data.index)
-                if data.index.tz is None:
-                    data.index = data.index.tz_localize('UTC')
-                else:
-                    data.index = data.index.tz_convert('UTC')
+    def fetch_live_data(self, ticker: str, deadline: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """
+        Fetch latest live data for one ticker, retrying with backoff.
 
-                data = data.reset_index()
-                data.rename(columns={'index': 'Date', 'Datetime': 'Date'}, inplace=True)
+        Args:
+            ticker: Ticker symbol
+            deadline: time.monotonic() value after which the ticker is given up
 
-                if len(data) > 0:
-                    latest_time = data['Date'].max()
-                    current_time = pd.Timestamp.now(tz='UTC')
-                    time_diff = current_time - latest_time
-                    print(f"\n{ticker} latest data time: {latest_time}")
-                    print(f"Time difference from now: {time_diff}")
+        Returns:
+            New bars (possibly empty), or None if every attempt failed
+        """
+        return self._fetch(ticker, deadline)[0]
 
-                data = data[['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume', 'fetch_time']]
+    def _fetch(self, ticker: str, deadline: Optional[float]) -> Tuple[Optional[pd.DataFrame], bool]:
+        """fetch_live_data, also telling whether the deadline ran out."""
+        for attempt in range(self.MAX_RETRIES):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if (remaining is not None and remaining <= 0) or \
+                    not self.provider.rate_limiter.acquire(timeout=remaining):
+                self._error_queue.put(f"Deadline exceeded fetching data for {ticker}")
+                return None, True
 
-                return data
+            try:
+                return self.provider.fetch(ticker, self.data_interval), False
 
             except Exception as e:
                 wait_time = min(2 ** attempt, 30)
+                if deadline is not None:
+                    wait_time = max(0.0, min(wait_time, deadline - time.monotonic()))
                 logger.warning(
                     f"Fetch attempt {attempt + 1}/{self.MAX_RETRIES} "
-                    f"failed for {ticker}. Waiting {wait_time}s. Error: {str(e)}"
+                    f"failed for {ticker}. Waiting {wait_time:.1f}s. Error: {str(e)}"
                 )
-                if attempt < self.MAX_RETRIES - 1:
-                    time.sleep(wait_time)
-                else:
+                if attempt == self.MAX_RETRIES - 1 or wait_time <= 0:
                     self._error_queue.put(
-                        f"Failed to fetch data for {ticker} after {self.MAX_RETRIES} attempts"
+                        f"Failed to fetch data for {ticker} after {attempt + 1} attempts"
                     )
-                    return None
+                    return None, False
+                self._stop_event.wait(wait_time)
+
+    def fetch_all(self, tickers: Optional[List[str]] = None) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Fetch every ticker concurrently within one deadline for the whole cycle.
+
+        A slow ticker or its retry backoff only holds up its own worker.
+        Tickers still pending at the deadline are reported as None; a fetch
+        that was already running keeps going and its bars are merged into
+        the next cycle, since the provider has already handed them out.
+        Tickers that ran out of time are submitted first in the next cycle,
+        so a rate limit delays every ticker in turn rather than starving the
+        same ones each cycle.
+
+        Args:
+            tickers: List of tickers (None for all)
+
+        Returns:
+            Dict of ticker -> new bars, or None if the fetch failed
+        """
+        tickers = tickers or self.tickers
+        missed = set(self._missed)
+        ordered = [ticker for ticker in self._missed if ticker in set(tickers)] + \
+                  [ticker for ticker in tickers if ticker not in missed]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix='live-fetch'
+            )
+
+        started = time.monotonic()
+        deadline = started + self.fetch_timeout
+        futures = {}
+        carried = {}
+        for ticker in ordered:
+            late = self._late.pop(ticker, None)
+            if late is not None and not late.done():
+                futures[late] = ticker  # Still in flight; give it this cycle's deadline
+                continue
+            if late is not None:
+                carried[ticker] = self._fetch_result(late, ticker)[0]
+            futures[self._executor.submit(self._fetch, ticker, deadline)] = ticker
+        done, pending = wait(futures, timeout=self.fetch_timeout)
+
+        results = {}
+        self._missed = []
+        for future in done:
+            ticker = futures[future]
+            results[ticker], timed_out = self._fetch_result(future, ticker)
+            if timed_out:
+                self._missed.append(ticker)
+        for future in pending:
+            ticker = futures[future]
+            if not future.cancel():
+                self._late[ticker] = future
+            self._error_queue.put(f"Deadline exceeded fetching data for {ticker}")
+            results[ticker] = None
+            self._missed.append(ticker)
+        self._missed.sort(key=ordered.index)
+
+        for ticker, data in carried.items():
+            if data is None:
+                continue
+            current = results.get(ticker)
+            results[ticker] = data if current is None else pd.concat([data, current], ignore_index=True)
+
+        failed = sum(1 for data in results.values() if data is None)
+        self.last_cycle_stats = {
+            'tickers': len(tickers),
+            'fetched': len(tickers) - failed,
+            'failed': failed,
+            'timed_out': len(self._missed),
+            'duration': time.monotonic() - started
+        }
+        if failed:
+            logger.warning(f"Fetched {len(tickers) - failed}/{len(tickers)} tickers "
+                           f"({len(self._missed)} timed out)")
+        return results
+
+    def _fetch_result(self, future: Future, ticker: str) -> Tuple[Optional[pd.DataFrame], bool]:
+        """(bars, deadline ran out) of a finished fetch; (None, False) if it raised."""
+        try:
+            return future.result()
+        except Exception as e:
+            self._error_queue.put(f"Fetch error for {ticker}: {str(e)}")
+            return None, False
+
+    def subscribe(self, callback: Callable[[Dict[str, pd.DataFrame]], None]) -> None:
+        """
+        Register a callback for new bars.
+
+        Args:
+            callback: Called once per update cycle with ticker -> bars added in that cycle
+        """
+        self._subscribers.append(callback)
+
+    def update_once(self) -> Dict[str, pd.DataFrame]:
+        """
+        Run one update cycle: fetch, store and publish the new bars.
+
+        Returns:
+            Dict of ticker -> bars added in this cycle
+        """
+        updates = {}
+        for ticker, data in self.fetch_all().items():
+            if data is None or data.empty:
+                continue
+            try:
+                with self._data_lock:
+                    n_added = self._update_ticker_data(ticker, data)
+            except Exception:
+                continue  # Already logged and queued; keep the other tickers going
+            if n_added:
+                updates[ticker] = self.store.tail(ticker, n_added)
+
+        if updates:
+            for callback in self._subscribers:
+                try:
+                    callback(updates)
+                except Exception as e:
+                    logger.error(f"Error in live data subscriber: {str(e)}")
+                    self._error_queue.put(f"Subscriber error: {str(e)}")
+        return updates
 
     def update_live_data(self) -> None:
-        """Update live data for each ticker independently."""
+        """Update live data for all tickers concurrently, once per update interval."""
         logger.info("Starting live data update loop")
 
         while not self._stop_event.is_set():
+            cycle_start = time.monotonic()
             try:
-                fetch_time = datetime.now(pytz.UTC)
-
-                for ticker in self.tickers:
-                    data = self.fetch_live_data(ticker)
-                    if data is not None:
-                        with self._data_lock:
-                            self._update_ticker_data(ticker, data)
-
-                time.sleep(self.update_interval)
+                self.update_once()
 
             except Exception as e:
                 logger.error(f"Error in update loop: {str(e)}")
                 self._error_queue.put(str(e))
-                time.sleep(self.update_interval)
-
-    def _update_ticker_data(self, ticker: str, new_data: pd.DataFrame) -> None:
-        """Update data for a single ticker and save to file with verification."""
-        try:
-            ticker_file = self.live_data_dir / f"{ticker}.csv"
-
-            current_rows = 0
-            if ticker_file.exists():
-                current_data = pd.read_csv(ticker_file)
-                current_rows = len(current_data)
-                print(f"\nBefore update - {ticker} file has {current_rows} rows")
-
-                current_data['Date'] = pd.to_datetime(current_data['Date'])
-                if current_data['Date'].dt.tz is None:
-                    current_data['Date'] = current_data['Date'].dt.tz_localize('UTC')
-                else:
-                    current_data['Date'] = current_data['Date'].dt.tz_convert('UTC')
-            else:
-                current_data = pd.DataFrame()
-                print(f"\nCreating new file for {ticker}")
-
-            print(f"New data rows for {ticker}: {len(new_data)}")
-
-            new_data['Date'] = pd.to_datetime(new_data['Date'])
-
-            if not current_data.empty:
-                latest_current = current_data['Date'].max()
-                new_records = new_data[new_data['Date'] > latest_current]
-                print(f"Number of new records: {len(new_records)}")
-            else:
-                new_records = new_data
-
-            if len(new_records) > 0:
-                updated_data = pd.concat(
-                    [current_data, new_records],
-                    ignore_index=True
-                ).drop_duplicates(
-                    subset=['Date', 'Symbol'],
-                    keep='last'
-                )
-
-                updated_data = updated_data.sort_values('Date')
 
-                if self.archive_data and len(updated_data) >= self.archive_threshold:
-                    self._archive_ticker_data(ticker, updated_data)
-                    updated_data = updated_data.iloc[-self.max_stored_rows:]
+            self._stop_event.wait(max(0.0, self.update_interval - (time.monotonic() - cycle_start)))
 
-                updated_data.to_csv(ticker_file, index=False)
-
-                if ticker_file.exists():
-                    verify_data = pd.read_csv(ticker_file)
-                    print(f"After update - {ticker} file has {len(verify_data)} rows")
-                    print(f"Added {len(verify_data) - current_rows} new rows")
-
-                    self.live_data[ticker] = updated_data.iloc[-self.max_stored_rows:]
-                else:
-                    raise IOError(f"Failed to write data to {ticker_file}")
-            else:
-                print(f"No new data to add for {ticker}")
+    def _update_ticker_data(self, ticker: str, new_data: pd.DataFrame) -> int:
+        """Append the new bars of a single ticker to its segment and ring buffer."""
+        try:
+            n_added = self.store.append(ticker, new_data)
+            logger.debug(f"Added {n_added} of {len(new_data)} fetched rows for {ticker}")
+            return n_added
 
         except Exception as e:
             logger.error(f"Error updating {ticker} data: {str(e)}")
             self._error_queue.put(f"Update error for {ticker}: {str(e)}")
             raise
 
-    def _archive_ticker_data(self, ticker: str, data: pd.DataFrame) -> None:
-        """Archive old data to disk."""
-        with self._archive_lock:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{ticker}_archive_{timestamp}.csv"
-            filepath = self.archive_dir / filename
-
-            try:
-                cutoff_idx = len(data) - self.max_stored_rows
-                archive_data = data.iloc[:cutoff_idx]
-                archive_data.to_csv(filepath, index=False)
-                logger.info(f"Archived {len(archive_data)} rows for {ticker}")
-
-            except Exception as e:
-                logger.error(f"Error archiving {ticker} data: {str(e)}")
-                self._error_queue.put(f"Archive error for {ticker}: {str(e)}")
-
     def start_live_updates(self) -> None:
         """Start the live data update thread."""
         self._stop_event.clear()
@@ -252,6 +314,12 @@ class LiveDataHandler:
             if self.update_thread.is_alive():
                 logger.warning("Update thread did not stop cleanly")
 
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._late.clear()
+        self._missed = []
+
         logger.info("Live data updates stopped")
 
     def get_latest_data(self, tickers: Optional[List[str]] = None) -> pd.DataFrame:
@@ -264,25 +332,10 @@ class LiveDataHandler:
         Returns:
             DataFrame of latest data
         """
-        tickers = tickers or self.tickers
-        latest_data = []
-
-        for ticker in tickers:
-            ticker_file = self.live_data_dir / f"{ticker}.csv"
-            if ticker_file.exists():
-                try:
-                    data = pd.read_csv(ticker_file)
-                    if not data.empty:
-                        latest = data.iloc[-1:].copy()
-                        latest_data.append(latest)
-                except Exception as e:
-                    logger.error(f"Error reading latest data for {ticker}: {str(e)}")
-
-        if latest_data:
-            return pd.concat(latest_data, ignore_index=True)
-        else:
+        latest_data = self.store.latest_frame(tickers or self.tickers)
+        if latest_data.empty:
             logger.warning("No live data available")
-            return pd.DataFrame()
+        return latest_data
 
     def get_error_messages(self) -> List[str]:
         """Get any error messages from the update thread."""
@@ -313,10 +366,7 @@ def main():
             print(f"\nCheck {i+1}/12:", flush=True)
 
             for ticker in tickers:
-                file_path = handler.live_data_dir / f"{ticker}.csv"
-                if file_path.exists():
-                    data = pd.read_csv(file_path)
-                    print(f"{ticker} file size: {len(data)} rows", flush=True)
+                print(f"{ticker} file size: {handler.store.segment_rows(ticker)} rows", flush=True)
 
     except KeyboardInterrupt:
         print("\nReceived interrupt signal", flush=True)
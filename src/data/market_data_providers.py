@@ -0,0 +1,264 @@
+"""
+Market Data Providers
+
+Sources of live bars for LiveDataHandler. A provider fetches the recent bars
+of one ticker; the handler fans those fetches out over a thread pool, so each
+provider carries its own rate limit and concurrency cap.
+"""
+
+import threading
+import time
+import zlib
+import pandas as pd
+import yfinance as yf
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import pytz
+from config.settings import RAW_DATA_DIR
+from config.logging_config import logger
+
+LIVE_BAR_COLUMNS = ['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume', 'fetch_time']
+
+
+class RateLimiter:
+    """Thread-safe token bucket."""
+
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        """
+        Args:
+            rate: Requests per second (None for unlimited)
+            burst: Requests that may be issued back to back
+        """
+        self.rate = rate
+        self.burst = max(int(burst), 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take one token, waiting for it if necessary.
+
+        Tokens are reserved in the order callers arrive, so waiting threads
+        are served first come, first served.
+
+        Args:
+            timeout: Maximum seconds to wait (None to wait indefinitely)
+
+        Returns:
+            bool: False if no token became available within the timeout
+        """
+        if self.rate is None:
+            return True
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait_time = max(1 - self._tokens, 0) / self.rate
+            if timeout is not None and wait_time > timeout:
+                return False
+            # Reserve the token now; the balance goes negative while callers queue for it
+            self._tokens -= 1
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return True
+
+
+class MarketDataProvider:
+    """
+    Base class for live bar sources.
+
+    Subclasses implement ``fetch`` and return a frame with LIVE_BAR_COLUMNS
+    and a UTC ``Date`` column. An empty frame means no new bars; exceptions
+    are retried by the handler.
+    """
+
+    name = 'provider'
+    min_update_interval = 0  # Seconds between polls the source tolerates
+
+    def __init__(self, requests_per_second: Optional[float] = None, max_concurrency: int = 8):
+        """
+        Args:
+            requests_per_second: Rate limit shared by every fetch of this provider
+            max_concurrency: Maximum number of fetches in flight
+        """
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.rate_limiter = RateLimiter(requests_per_second, burst=self.max_concurrency)
+
+    def fetch(self, ticker: str, interval: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    @staticmethod
+    def empty_frame() -> pd.DataFrame:
+        return pd.DataFrame(columns=LIVE_BAR_COLUMNS)
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Intraday bars from Yahoo Finance."""
+
+    name = 'yfinance'
+    min_update_interval = 60
+
+    def __init__(self, requests_per_second: Optional[float] = 2.0, max_concurrency: int = 4):
+        super().__init__(requests_per_second, max_concurrency)
+
+    def fetch(self, ticker: str, interval: str) -> pd.DataFrame:
+        data = yf.download(
+            tickers=ticker,
+            period='1d',
+            interval=interval,
+            progress=False,
+            prepost=True
+        )
+
+        if data.empty:
+            raise ValueError(f"Empty data received for {ticker}")
+
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+
+        data['Symbol'] = ticker
+        fetch_time = datetime.now(pytz.UTC)
+        data['fetch_time'] = fetch_time
+
+        data.index = pd.to_datetime(data.index)
+        if data.index.tz is None:
+            data.index = data.index.tz_localize('UTC')
+        else:
+            data.index = data.index.tz_convert('UTC')
+
+        data = data.reset_index()
+        data.rename(columns={'index': 'Date', 'Datetime': 'Date'}, inplace=True)
+
+        if len(data) > 0:
+            latest_time = data['Date'].max()
+            current_time = pd.Timestamp.now(tz='UTC')
+            time_diff = current_time - latest_time
+            logger.debug(f"{ticker} latest data time: {latest_time} ({time_diff} behind now)")
+
+        return data[LIVE_BAR_COLUMNS]
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Replays historical bars from the raw CSV files as if they were live.
+
+    Every ticker advances through its own file. With ``speed`` set, bars are
+    released at that many bars per second of wall-clock time since the first
+    fetch; otherwise each fetch releases one new bar. With
+    ``synthetic_tickers`` enabled, tickers without a file are mapped onto an
+    existing file, so the live path can be load-tested with more tickers than
+    the raw directory holds.
+    """
+
+    name = 'replay'
+
+    def __init__(
+            self,
+            data_dir: Optional[str] = None,
+            speed: Optional[float] = None,
+            warmup_bars: int = 1,
+            latency: float = 0.0,
+            synthetic_tickers: bool = False,
+            requests_per_second: Optional[float] = None,
+            max_concurrency: int = 32
+    ):
+        """
+        Args:
+            data_dir: Directory of <ticker>.csv files (defaults to the raw data directory)
+            speed: Bars released per second (None for one bar per fetch)
+            warmup_bars: Bars available on the first fetch
+            latency: Simulated seconds spent in every fetch
+            synthetic_tickers: Map tickers without a file onto existing files
+            requests_per_second: Rate limit of the simulated source
+            max_concurrency: Maximum number of fetches in flight
+        """
+        super().__init__(requests_per_second, max_concurrency)
+        self.data_dir = Path(data_dir or RAW_DATA_DIR.replace(r'\config', ''))
+        self.speed = speed
+        self.warmup_bars = max(int(warmup_bars), 1)
+        self.latency = latency
+        self.synthetic_tickers = synthetic_tickers
+
+        self._bars: Dict[str, pd.DataFrame] = {}
+        self._delivered: Dict[str, int] = {}
+        self._fetches: Dict[str, int] = {}
+        self._started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def available_tickers(self) -> List[str]:
+        return sorted(path.stem for path in self.data_dir.glob('*.csv'))
+
+    def _source_file(self, ticker: str) -> Path:
+        path = self.data_dir / f"{ticker}.csv"
+        if path.exists() or not self.synthetic_tickers:
+            return path
+        available = self.available_tickers()
+        if not available:
+            raise FileNotFoundError(f"No replay files in {self.data_dir}")
+        return self.data_dir / f"{available[zlib.crc32(ticker.encode()) % len(available)]}.csv"
+
+    def _load(self, ticker: str) -> pd.DataFrame:
+        """Bars of one ticker, read once and kept for the whole replay."""
+        bars = self._bars.get(ticker)
+        if bars is not None:
+            return bars
+
+        raw = pd.read_csv(self._source_file(ticker))
+        dates = pd.to_datetime(raw['Date'])
+        dates = dates.dt.tz_localize('UTC') if dates.dt.tz is None else dates.dt.tz_convert('UTC')
+        bars = pd.DataFrame({
+            'Date': dates,
+            'Symbol': ticker,
+            'Open': raw['Open'],
+            'High': raw['High'],
+            'Low': raw['Low'],
+            'Close': raw['Close'],
+            'Volume': raw['Volume']
+        }).sort_values('Date', ignore_index=True)
+        logger.debug(f"Loaded {len(bars)} replay bars for {ticker}")
+        with self._lock:
+            return self._bars.setdefault(ticker, bars)
+
+    def _released(self, ticker: str, n_bars: int) -> int:
+        """Number of bars of a ticker visible at this moment."""
+        if self.speed is None:
+            released = self.warmup_bars + self._fetches.get(ticker, 0)
+            self._fetches[ticker] = self._fetches.get(ticker, 0) + 1
+        else:
+            if self._started is None:
+                self._started = time.monotonic()
+            released = self.warmup_bars + int((time.monotonic() - self._started) * self.speed)
+        return min(released, n_bars)
+
+    def fetch(self, ticker: str, interval: str) -> pd.DataFrame:
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        bars = self._load(ticker)
+        with self._lock:
+            start = self._delivered.get(ticker, 0)
+            end = self._released(ticker, len(bars))
+            self._delivered[ticker] = max(start, end)
+
+        if end <= start:
+            return self.empty_frame()
+
+        data = bars.iloc[start:end].copy()
+        data['fetch_time'] = datetime.now(pytz.UTC)
+        return data.reset_index(drop=True)
+
+    def exhausted(self, ticker: str) -> bool:
+        """Whether every bar of a ticker has been delivered."""
+        with self._lock:
+            return ticker in self._bars and self._delivered.get(ticker, 0) >= len(self._bars[ticker])
+
+    def reset(self):
+        """Restart the replay from the first bar of every ticker."""
+        with self._lock:
+            self._delivered.clear()
+            self._fetches.clear()
+            self._started = None
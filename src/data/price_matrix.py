@@ -0,0 +1,120 @@
+"""
+Price Matrix Module
+
+Immutable, pre-cleaned price matrix shared by a trading system and its pair
+models, so the universe is cleaned once and pairs only hold column indices.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+MIN_PRICE = 0.01
+
+
+class PriceMatrix:
+    """
+    Read-only (dates x symbols) price matrix with a symbol-to-column index.
+
+    Values are stored column-major, so every symbol's history is a contiguous
+    slice and pair models can wrap their two columns without copying.
+    """
+
+    def __init__(
+            self,
+            prices: pd.DataFrame,
+            dtype: type = np.float64,
+            fill_method: str = 'interpolate'
+    ):
+        """
+        Clean ``prices`` once and freeze the result.
+
+        Args:
+            prices (pd.DataFrame): Wide price frame (dates x symbols).
+            dtype (type): Storage dtype, np.float64 or np.float32.
+            fill_method (str): 'interpolate' fills gaps linearly and then pads
+                the ends (the trading system's cleaning); 'pad' forward-fills
+                and then back-fills (the stand-alone pair model's cleaning).
+                Remaining gaps and non-positive prices become MIN_PRICE.
+        """
+        if fill_method not in ('interpolate', 'pad'):
+            raise ValueError(f"Unknown fill method: {fill_method}")
+        dtype = np.dtype(dtype)
+        if dtype not in (np.dtype(np.float64), np.dtype(np.float32)):
+            raise ValueError("PriceMatrix dtype must be float64 or float32")
+
+        numeric = prices
+        if not all(pd.api.types.is_numeric_dtype(t) for t in prices.dtypes):
+            numeric = prices.apply(pd.to_numeric, errors='coerce')
+
+        # Work column-major and in place to keep the peak footprint near one matrix
+        values = np.asfortranarray(numeric.to_numpy(dtype=np.float64, copy=True))
+        gaps = np.flatnonzero(np.isnan(values).any(axis=0))
+        if len(gaps):
+            filled = pd.DataFrame(values[:, gaps])
+            if fill_method == 'interpolate':
+                filled = filled.interpolate(method='linear').bfill().ffill()
+            else:
+                filled = filled.ffill().bfill()
+            values[:, gaps] = filled.to_numpy()
+
+        for j in range(values.shape[1]):
+            col = values[:, j]
+            np.maximum(col, MIN_PRICE, out=col)
+            col[np.isnan(col)] = MIN_PRICE
+
+        self.values = values if dtype == values.dtype else values.astype(dtype, order='F')
+        self.values.flags.writeable = False
+        self.index = prices.index
+        self.symbols: List[str] = list(prices.columns)
+        self.column_index: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._frame: Optional[pd.DataFrame] = None
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.column_index
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index(self.symbols)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def column(self, symbol: str) -> np.ndarray:
+        """Read-only price history of one symbol."""
+        return self.values[:, self.column_index[symbol]]
+
+    def row(self, position: int) -> Dict[str, float]:
+        """Prices of every symbol at one row position."""
+        return dict(zip(self.symbols, self.values[position].tolist()))
+
+    def frame(self, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        DataFrame over the matrix without copying the price data.
+
+        Args:
+            symbols (Optional[Sequence[str]]): Columns to include; all if None.
+
+        Returns:
+            pd.DataFrame: Read-only frame indexed by date.
+        """
+        if symbols is None:
+            if self._frame is None:
+                self._frame = pd.DataFrame(
+                    self.values, index=self.index, columns=self.symbols, copy=False
+                )
+            return self._frame
+
+        return pd.DataFrame(
+            {symbol: self.column(symbol) for symbol in symbols},
+            index=self.index,
+            copy=False
+        )
@@ -36,6 +36,7 @@ from filterpy.kalman import KalmanFilter
 
 from config.settings import MODEL_DIR
 from src.data.feature_engineering import FeatureEngineer
+from src.analysis.cointegration import rolling_cointegration_pvalues
 from config.logging_config import logger
 import warnings
 
@@ -323,21 +324,9 @@ class MachineLearningModel:
             var = returns2.shift(1).rolling(window).var()
             features[f'beta_{window}'] = cov / (var + 1e-8)
 
-            coint_pvalues = []
-            for i in range(len(price1)):
-                if i < window:
-                    coint_pvalues.append(np.nan)
-                else:
-                    try:
-                        _, pvalue, _ = sm.tsa.stattools.coint(
-                            price1.iloc[i - window:i - 1],
-                            price2.iloc[i - window:i - 1]
-                        )
-                        coint_pvalues.append(pvalue)
-                    except:
-                        coint_pvalues.append(np.nan)
-
-            features[f'coint_pvalue_{window}'] = coint_pvalues
+            # Test on rows [i - window, i - 1): the shared (window - 1) series lagged one bar
+            coint_pvalues = rolling_cointegration_pvalues(price1, price2, window - 1).shift(1)
+            features[f'coint_pvalue_{window}'] = coint_pvalues.values
 
         price_ratio = price1 / price2
         features['price_ratio'] = price_ratio.shift(1)
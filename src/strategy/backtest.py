@@ -12,6 +12,23 @@ import os
 import json
 
 from src.strategy.pairs_strategy_integrated import IntegratedPairsStrategy
+from src.utils.trade_ledger import TradeLedger
+
+TRADE_HISTORY_SCHEMA = {
+    'Date': 'datetime64[ns]',
+    'Pair': object,
+    'Action': object,
+    'Reason': object,
+    'Quantity': np.float64,
+    'Price1': np.float64,
+    'Price2': np.float64,
+    'Cost': np.float64,
+    'PnL': np.float64,
+    'Model_Confidence': np.float64,
+    'Cointegration_Score': np.float64,
+    'Spread_Zscore': np.float64,
+    'Feature_Values': object
+}
 
 
 class MultiPairBackTester:
@@ -43,12 +60,17 @@ class MultiPairBackTester:
         self.current_capital = initial_capital
         self.active_pairs = {}
         self.pair_performance = {}
-        self.trade_history = pd.DataFrame()
+        self.trade_ledger = TradeLedger(TRADE_HISTORY_SCHEMA, pair_column='Pair')
         self.cointegration_history = {}
         self.feature_history = {}
 
         self._initialize_components()
 
+    @property
+    def trade_history(self) -> pd.DataFrame:
+        """Trade history as a DataFrame view over the trade ledger"""
+        return self.trade_ledger.to_frame()
+
     def _calculate_returns(self, data: pd.DataFrame) -> pd.DataFrame:
         """Calculate returns maintaining original structure"""
         returns = data.copy()
@@ -69,14 +91,6 @@ class MultiPairBackTester:
             self.prices['Date'] = pd.to_datetime(self.prices['Date'])
             self.prices = self.prices.sort_values(['Date', 'Symbol'])
 
-        self.trade_history = pd.DataFrame(
-            columns=[
-                'Date', 'Pair', 'Action', 'Quantity', 'Price1', 'Price2',
-                'Cost', 'Model_Confidence', 'Cointegration_Score',
-                'Spread_Zscore', 'Feature_Values'
-            ]
-        )
-
         if self.feature_engineer is None:
             from src.data.feature_engineering import FeatureEngineer
             self.feature_engineer = FeatureEngineer()
@@ -103,30 +117,28 @@ class MultiPairBackTester:
             try:
                 strategy_results = self.strategy.run_strategy(asset1_data, asset2_data)
 
-                self.equity_curve = pd.Series(dtype=float)
-                portfolio_value = self.initial_capital
-
-                for date, row in strategy_results.iterrows():
-                    if date == strategy_results.index[0]:
-                        self.equity_curve[date] = portfolio_value
-                        continue
+                growth = 1 + strategy_results['returns'].to_numpy(dtype=np.float64)
+                growth[:1] = 1.0
+                self.equity_curve = pd.Series(
+                    self.initial_capital * np.cumprod(growth),
+                    index=strategy_results.index,
+                    dtype=float
+                )
 
-                    portfolio_value *= (1 + row['returns'])
-                    self.equity_curve[date] = portfolio_value
-
-                    if row['signal'] != 0:
-                        self.trade_history = pd.concat([
-                            self.trade_history,
-                            pd.DataFrame([{
-                                'Date': date,
-                                'Pair': f"{asset1}/{asset2}",
-                                'Action': 'ENTRY' if row['signal'] != 0 else 'EXIT',
-                                'Quantity': row['position_size1'],
-                                'Price1': asset1_data.loc[date, 'Adj_Close'],
-                                'Price2': asset2_data.loc[date, 'Adj_Close'],
-                                'PnL': row['returns'] * portfolio_value if 'returns' in row else 0
-                            }])
-                        ], ignore_index=True)
+                traded = strategy_results['signal'].to_numpy() != 0
+                traded[:1] = False
+                if traded.any():
+                    trade_rows = strategy_results[traded]
+                    trade_dates = trade_rows.index
+                    self.trade_ledger.extend({
+                        'Date': trade_dates,
+                        'Pair': f"{asset1}/{asset2}",
+                        'Action': 'ENTRY',
+                        'Quantity': trade_rows['position_size1'].to_numpy(),
+                        'Price1': asset1_data['Adj_Close'].reindex(trade_dates).to_numpy(),
+                        'Price2': asset2_data['Adj_Close'].reindex(trade_dates).to_numpy(),
+                        'PnL': trade_rows['returns'].to_numpy() * self.equity_curve[traded].to_numpy()
+                    })
 
                 self.strategy_results = strategy_results
                 self.asset1_data = asset1_data
@@ -409,21 +421,18 @@ class MultiPairBackTester:
             'transaction_costs': total_cost
         }
 
-        self.trade_history = pd.concat([
-            self.trade_history,
-            pd.DataFrame([{
-                'Date': current_date,
-                'Pair': f"{asset1}/{asset2}",
-                'Action': 'ENTRY',
-                'Quantity': quantity * signal,
-                'Price1': price1,
-                'Price2': price2,
-                'Cost': total_cost,
-                'Model_Confidence': confidence,
-                'Feature_Values': str(features[features['Date'] == current_date].iloc[-1].to_dict()
-                                      if not features.empty else {})
-            }])
-        ], ignore_index=True)
+        self.trade_ledger.append(
+            Date=current_date,
+            Pair=f"{asset1}/{asset2}",
+            Action='ENTRY',
+            Quantity=quantity * signal,
+            Price1=price1,
+            Price2=price2,
+            Cost=total_cost,
+            Model_Confidence=confidence,
+            Feature_Values=str(features[features['Date'] == current_date].iloc[-1].to_dict()
+                               if not features.empty else {})
+        )
 
         return portfolio_value - total_cost - position_value
 
@@ -458,21 +467,18 @@ class MultiPairBackTester:
         exit_cost = exit_value * self.transaction_cost
         total_pnl = spread_pnl - position['transaction_costs'] - exit_cost
 
-        self.trade_history = pd.concat([
-            self.trade_history,
-            pd.DataFrame([{
-                'Date': current_date,
-                'Pair': f"{asset1}/{asset2}",
-                'Action': 'EXIT',
-                'Reason': reason,
-                'Quantity': -position['quantity'] * position['signal'],
-                'Price1': current_price1,
-                'Price2': current_price2,
-                'Cost': exit_cost,
-                'PnL': total_pnl,
-                'Model_Confidence': position['confidence']
-            }])
-        ], ignore_index=True)
+        self.trade_ledger.append(
+            Date=current_date,
+            Pair=f"{asset1}/{asset2}",
+            Action='EXIT',
+            Reason=reason,
+            Quantity=-position['quantity'] * position['signal'],
+            Price1=current_price1,
+            Price2=current_price2,
+            Cost=exit_cost,
+            PnL=total_pnl,
+            Model_Confidence=position['confidence']
+        )
 
         if pair not in self.pair_performance:
             self.pair_performance[pair] = []
@@ -525,8 +531,8 @@ class MultiPairBackTester:
             'Annual_Volatility': returns.std() * np.sqrt(252),
             'Sharpe_Ratio': (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0,
             'Max_Drawdown': self.risk_manager.calculate_drawdown(self.equity_curve) if self.risk_manager else None,
-            'Win_Rate': len([t for t in self.trade_history['PnL'] if t > 0]) / len(self.trade_history) if len(
-                self.trade_history) > 0 else 0
+            'Win_Rate': np.count_nonzero(self.trade_ledger.column('PnL') > 0) / len(self.trade_ledger) if len(
+                self.trade_ledger) > 0 else 0
         }
 
     def _analyze_pair_performance(self) -> Dict[str, Dict[str, float]]:
@@ -1,14 +1,312 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import random
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 from sklearn.linear_model import LinearRegression
 import logging
+import time
+from src.data.price_matrix import PriceMatrix
 from streamlit_system.components.strategy_builder import MultiPairTradingSystem, PairModel, fill_missing_values
 
 logger = logging.getLogger(__name__)
 
+
+class _PairCandidatePool:
+    """
+    Ranked pool of cointegrated pair candidates for rotation.
+
+    The pool only ever sees prices strictly before the date it was refreshed
+    to, so rotation decisions carry no look-ahead. Return moments of the
+    universe are accumulated incrementally, which keeps every correlation
+    current for the cost of the new rows. The Engle-Granger/ADF test is rerun
+    only for candidates whose correlation has drifted since their last test,
+    or whose test has grown stale.
+    """
+
+    def __init__(
+            self,
+            prices: pd.DataFrame,
+            test_fn: Callable[[pd.Series, pd.Series], Tuple[bool, float]],
+            min_correlation: float,
+            min_data_points: int,
+            max_symbols: int = 50,
+            correlation_drift: float = 0.05,
+            max_test_age: int = 252
+    ):
+        """
+        Args:
+            prices: Cleaned price frame of the whole universe
+            test_fn: Cointegration test returning (is_cointegrated, p-value)
+            min_correlation: Minimum absolute return correlation to test a pair
+            min_data_points: Minimum history before any pair is tested
+            max_symbols: Number of most liquid symbols considered
+            correlation_drift: Correlation change that triggers a re-test
+            max_test_age: Bars after which a test result is re-run
+        """
+        liquidity = prices.count()
+        universe = sorted(prices.columns, key=lambda s: liquidity[s], reverse=True)[:max_symbols]
+
+        self.prices = prices[universe]
+        self.universe = universe
+        self.test_fn = test_fn
+        self.min_correlation = min_correlation
+        self.min_data_points = min_data_points
+        self.correlation_drift = correlation_drift
+        self.max_test_age = max_test_age
+
+        n_symbols = len(universe)
+        self._values = self.prices.to_numpy(dtype=np.float64)
+        self._upper = np.triu_indices(n_symbols, k=1)
+        self.as_of = 0  # Rows [0, as_of) have been absorbed
+        self._n_returns = 0
+        self._sum = np.zeros(n_symbols)
+        self._cross = np.zeros((n_symbols, n_symbols))
+
+        self.candidates: Dict[Tuple[int, int], Dict] = {}
+        self.ranked: List[Dict] = []
+        self.n_tests = 0
+
+    def _reset(self):
+        self.as_of = 0
+        self._n_returns = 0
+        self._sum[:] = 0.0
+        self._cross[:] = 0.0
+        self.candidates = {}
+        self.ranked = []
+
+    def correlation(self) -> np.ndarray:
+        """Return correlation matrix of the universe over the absorbed rows."""
+        n = self._n_returns
+        if n < 2:
+            return np.full(self._cross.shape, np.nan)
+        mean = self._sum / n
+        cov = (self._cross - n * np.outer(mean, mean)) / (n - 1)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return cov / np.outer(std, std)
+
+    def refresh(self, end_idx: int):
+        """
+        Absorb rows up to (not including) ``end_idx`` and re-rank.
+
+        Args:
+            end_idx: Row position of the evaluation date
+        """
+        if end_idx < self.as_of:
+            self._reset()
+        if end_idx == self.as_of:
+            return
+
+        # Returns of rows first..end_idx-1 (the first row has no return)
+        first = max(self.as_of, 1)
+        if end_idx > first:
+            returns = self._values[first:end_idx] / self._values[first - 1:end_idx - 1] - 1
+            returns = returns[~np.isnan(returns).any(axis=1)]
+            self._n_returns += len(returns)
+            self._sum += returns.sum(axis=0)
+            self._cross += returns.T @ returns
+        self.as_of = end_idx
+
+        if self.as_of < self.min_data_points:
+            return
+
+        corr = self.correlation()
+        n_tests = self.n_tests
+        for i, j in zip(*self._upper):
+            correlation = abs(corr[i, j])
+            entry = self.candidates.get((i, j))
+            if not correlation >= self.min_correlation:
+                if entry is not None:
+                    entry['correlation'] = correlation
+                continue
+
+            if (entry is None
+                    or abs(correlation - entry['tested_correlation']) > self.correlation_drift
+                    or self.as_of - entry['tested_at'] > self.max_test_age):
+                is_coint, pvalue = self.test_fn(
+                    self.prices.iloc[:self.as_of, i],
+                    self.prices.iloc[:self.as_of, j]
+                )
+                entry = {
+                    'pair': (self.universe[i], self.universe[j]),
+                    'is_cointegrated': is_coint,
+                    'pvalue': pvalue,
+                    'tested_correlation': correlation,
+                    'tested_at': self.as_of
+                }
+                self.candidates[(i, j)] = entry
+                self.n_tests += 1
+
+            entry['correlation'] = correlation
+            entry['score'] = correlation / (entry['pvalue'] + 0.001)
+
+        self.ranked = sorted(
+            (entry for entry in self.candidates.values()
+             if entry['is_cointegrated'] and entry['correlation'] >= self.min_correlation),
+            key=lambda entry: entry['score'],
+            reverse=True
+        )
+        logger.info(f"Candidate pool refreshed over {self.as_of} rows: "
+                    f"{len(self.ranked)} qualified, {self.n_tests - n_tests} re-tested")
+
+    def best(self, num_pairs: int, exclude: Callable[[Tuple[str, str]], bool]) -> List[Tuple[str, str]]:
+        """Top ``num_pairs`` ranked pairs that are not excluded."""
+        selected = []
+        for entry in self.ranked:
+            if len(selected) >= num_pairs:
+                break
+            if not exclude(entry['pair']):
+                selected.append(entry['pair'])
+        return selected
+
+
+class _PairStabilityCache:
+    """
+    Rolling ADF regression moments for the pair stability checks.
+
+    Log prices are computed once per symbol. For each pair the cache keeps the
+    Gram matrix of the ADF regressors (level, difference and lagged
+    differences of both legs) over the current lookback window, and slides it
+    by adding and removing rows as the evaluation date moves. Because the
+    spread is linear in the two legs, the moments of any hedge ratio follow
+    from that Gram matrix, so a re-estimated beta never invalidates it. The
+    lag selection (AIC) and the test statistic match ``adfuller`` with its
+    default arguments.
+    """
+
+    def __init__(self, price_matrix: PriceMatrix):
+        """
+        Args:
+            price_matrix: Shared cleaned price matrix of the system
+        """
+        self.price_matrix = price_matrix
+        self._log_prices: Dict[str, np.ndarray] = {}
+        self._moments: Dict[Tuple[str, str], Dict] = {}
+        self.n_rebuilds = 0
+
+    def log_prices(self, symbol: str) -> np.ndarray:
+        """Log price history of one symbol, centred on its first value."""
+        log_prices = self._log_prices.get(symbol)
+        if log_prices is None:
+            log_prices = np.log(self.price_matrix.column(symbol).astype(np.float64))
+            log_prices = log_prices - log_prices[0]
+            self._log_prices[symbol] = log_prices
+        return log_prices
+
+    def discard(self, pair: Tuple[str, str]):
+        """Drop the moments of a pair that is no longer checked."""
+        self._moments.pop(pair, None)
+
+    @staticmethod
+    def max_lag(n_obs: int) -> int:
+        """Schwert's rule capped as in ``adfuller`` for a constant-only regression."""
+        return min(n_obs // 2 - 2, int(np.ceil(12.0 * np.power(n_obs / 100.0, 1 / 4.0))))
+
+    def _regressors(self, pair: Tuple[str, str], rows: np.ndarray, max_lag: int) -> np.ndarray:
+        """Rows of [1, dy_t, y_t-1, dy_t-1..t-L, dx_t, x_t-1, dx_t-1..t-L]."""
+        blocks = [np.ones((len(rows), 1))]
+        lags = rows[:, None] - np.arange(max_lag + 1)[None, :]
+        for symbol in (pair[1], pair[0]):
+            log_prices = self.log_prices(symbol)
+            diffs = log_prices[lags] - log_prices[lags - 1]
+            blocks.append(diffs[:, :1])
+            blocks.append(log_prices[rows - 1][:, None])
+            blocks.append(diffs[:, 1:])
+        return np.hstack(blocks)
+
+    def _slide(self, pair: Tuple[str, str], start: int, end: int, max_lag: int) -> np.ndarray:
+        """Gram matrix of the regressors over the window [start, end)."""
+        lo, hi = start + max_lag + 1, end
+        state = self._moments.get(pair)
+
+        if (state is None or state['max_lag'] != max_lag
+                or lo >= state['hi'] or state['lo'] >= hi
+                or state['updates'] > hi - lo):
+            regressors = self._regressors(pair, np.arange(lo, hi), max_lag)
+            state = {'max_lag': max_lag, 'lo': lo, 'hi': hi, 'updates': 0,
+                     'gram': regressors.T @ regressors}
+            self._moments[pair] = state
+            self.n_rebuilds += 1
+            return state['gram']
+
+        gram = state['gram']
+        changes = [
+            (lo, min(state['lo'], hi), 1.0), (max(state['hi'], lo), hi, 1.0),
+            (state['lo'], min(lo, state['hi']), -1.0), (max(hi, state['lo']), state['hi'], -1.0)
+        ]
+        for first, last, sign in changes:
+            if last > first:
+                regressors = self._regressors(pair, np.arange(first, last), max_lag)
+                gram += sign * (regressors.T @ regressors)
+                state['updates'] += last - first
+        state['lo'], state['hi'] = lo, hi
+        return gram
+
+    def adf_pvalue(self, pair: Tuple[str, str], start: int, end: int, beta: float) -> float:
+        """
+        ADF p-value of log(y) - beta * log(x) over rows [start, end).
+
+        Args:
+            pair: (symbol_x, symbol_y)
+            start: First row of the window
+            end: Row after the last row of the window
+            beta: Hedge ratio of the pair
+
+        Returns:
+            float: MacKinnon p-value of the ADF statistic
+        """
+        from statsmodels.tsa.adfvalues import mackinnonp
+
+        n_obs = end - start
+        max_lag = self.max_lag(n_obs)
+        gram = self._slide(pair, start, end, max_lag)
+
+        # Project the two legs onto the spread: w = [1, block_y - beta * block_x]
+        width = max_lag + 2
+        projection = np.zeros((width + 1, 2 * width + 1))
+        projection[0, 0] = 1.0
+        projection[1:, 1:width + 1] = np.eye(width)
+        projection[1:, width + 1:] = -beta * np.eye(width)
+        moments = projection @ gram @ projection.T
+
+        # Columns of the spread moments: 0 const, 1 response, 2 level, 3.. lags
+        n_used = n_obs - max_lag - 1
+        best_aic, best_lag = np.inf, 0
+        for lag in range(max_lag + 1):
+            cols = [0, 2] + list(range(3, 3 + lag))
+            xtx = moments[np.ix_(cols, cols)]
+            xty = moments[cols, 1]
+            ssr = moments[1, 1] - xty @ np.linalg.solve(xtx, xty)
+            llf = -n_used / 2.0 * (np.log(2 * np.pi) + np.log(ssr / n_used) + 1)
+            aic = -2 * llf + 2 * len(cols)
+            if (aic, lag) < (best_aic, best_lag):
+                best_aic, best_lag = aic, lag
+
+        # The chosen lag can use the max_lag - best_lag rows the search skipped
+        cols = [0, 1, 2] + list(range(3, 3 + best_lag))
+        moments = moments[np.ix_(cols, cols)]
+        if best_lag < max_lag:
+            rows = np.arange(start + best_lag + 1, start + max_lag + 1)
+            spread = self.log_prices(pair[1]) - beta * self.log_prices(pair[0])
+            lags = rows[:, None] - np.arange(best_lag + 1)[None, :]
+            diffs = spread[lags] - spread[lags - 1]
+            extra = np.column_stack([np.ones(len(rows)), diffs[:, 0], spread[rows - 1], diffs[:, 1:]])
+            moments = moments + extra.T @ extra
+
+        regressors = [0, 2] + list(range(3, 3 + best_lag))
+        xtx_inv = np.linalg.inv(moments[np.ix_(regressors, regressors)])
+        xty = moments[regressors, 1]
+        coef = xtx_inv @ xty
+        ssr = moments[1, 1] - xty @ coef
+        n_used = n_obs - best_lag - 1
+        sigma2 = ssr / (n_used - len(regressors))
+        adf_stat = coef[1] / np.sqrt(sigma2 * xtx_inv[1, 1])
+
+        if not np.isfinite(adf_stat):
+            raise np.linalg.LinAlgError("Degenerate ADF regression")
+        return float(mackinnonp(adf_stat, regression='c', N=1))
+
+
 class DynamicPairTradingSystem(MultiPairTradingSystem):
     """Enhanced trading system with dynamic pair selection and management"""
 
@@ -33,7 +331,10 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
             min_correlation: float = 0.6,  # Minimum correlation threshold
             lookback_window: int = 252,  # Window for stability tests
             volatility_adjustment_factor: float = 1.5,  # How much to adjust allocation in volatile periods
-            min_data_points: int = 252  # Minimum data history needed for analysis
+            min_data_points: int = 252,  # Minimum data history needed for analysis
+            price_dtype: type = np.float64,  # Storage dtype of the shared price matrix
+            net_orders: bool = False,  # Net the pairs' orders per symbol before they are costed
+            execution_scheduler=None  # ExecutionScheduler working the trades over the next bar
     ):
         """
         Initialize the dynamic pair trading system with all parameters.
@@ -104,11 +405,17 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
             max_holding_period=max_holding_period,
             profit_target_pct=profit_target_pct,
             loss_limit_pct=loss_limit_pct,
-            capital_reallocation_freq=capital_reallocation_freq
+            capital_reallocation_freq=capital_reallocation_freq,
+            price_dtype=price_dtype,
+            net_orders=net_orders,
+            execution_scheduler=execution_scheduler
         )
 
         # Add tracking for market state
         self.market_state_history = []
+        self._market_volatility = None  # (short, long) cross-sectional vol per date
+        self.candidate_pool = None  # Built on the first rotation
+        self.stability_cache = _PairStabilityCache(self.price_matrix)
 
     def find_best_pairs(self, prices_df: pd.DataFrame, num_pairs: int) -> List[Tuple[str, str]]:
         """
@@ -121,49 +428,10 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
         Returns:
             List of pairs that are both correlated and likely cointegrated
         """
-        from statsmodels.tsa.stattools import adfuller, coint
         from itertools import combinations
 
         logger.info(f"Finding best {num_pairs} pairs from {len(prices_df.columns)} symbols...")
 
-        # Function to check cointegration with Engle-Granger method
-        def is_cointegrated(s1, s2, threshold=self.min_cointegration_pvalue):
-            try:
-                # Ensure minimum data and positive values
-                s1_clean = fill_missing_values(s1)
-                s2_clean = fill_missing_values(s2)
-
-                # Only proceed if we have enough data
-                if len(s1_clean) < self.min_data_points:
-                    return False, 1.0
-
-                # Take log of prices for better properties
-                s1_log = np.log(s1_clean)
-                s2_log = np.log(s2_clean)
-
-                # Test for cointegration using Engle-Granger two-step approach
-                result = coint(s1_log, s2_log)
-                p_value = result[1]
-
-                # Check residuals for stationarity as a double-check
-                model = LinearRegression()
-                X = s1_log.values.reshape(-1, 1)
-                y = s2_log.values
-                model.fit(X, y)
-
-                # Calculate residuals (spread)
-                spread = y - model.predict(X)
-
-                # Test residuals for stationarity
-                adf_result = adfuller(spread)
-                adf_pvalue = adf_result[1]
-
-                # Return the more conservative result
-                return (p_value < threshold and adf_pvalue < threshold), max(p_value, adf_pvalue)
-            except Exception as e:
-                logger.error(f"Error testing cointegration: {e}")
-                return False, 1.0
-
         # Get the most liquid symbols (based on non-NaN data points)
         symbol_liquidity = {}
         for symbol in prices_df.columns:
@@ -213,7 +481,7 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
                 price2 = prices_df[symbol2]
 
                 # Check for cointegration
-                is_coint, pvalue = is_cointegrated(price1, price2)
+                is_coint, pvalue = self._test_cointegration(price1, price2)
 
                 if is_coint:
                     # Save the pair with its metrics
@@ -241,6 +509,81 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
         needed = min(num_pairs, len(new_pairs))
         return new_pairs[:needed]
 
+    def _test_cointegration(self, s1: pd.Series, s2: pd.Series) -> Tuple[bool, float]:
+        """
+        Engle-Granger test plus an ADF test of the regression residuals.
+
+        Returns:
+            Tuple[bool, float]: Whether both tests pass and the larger p-value
+        """
+        from statsmodels.tsa.stattools import adfuller, coint
+
+        threshold = self.min_cointegration_pvalue
+        try:
+            # Ensure minimum data and positive values
+            s1_clean = fill_missing_values(s1)
+            s2_clean = fill_missing_values(s2)
+
+            # Only proceed if we have enough data
+            if len(s1_clean) < self.min_data_points:
+                return False, 1.0
+
+            # Take log of prices for better properties
+            s1_log = np.log(s1_clean)
+            s2_log = np.log(s2_clean)
+
+            # Test for cointegration using Engle-Granger two-step approach
+            result = coint(s1_log, s2_log)
+            p_value = result[1]
+
+            # Check residuals for stationarity as a double-check
+            model = LinearRegression()
+            X = s1_log.values.reshape(-1, 1)
+            y = s2_log.values
+            model.fit(X, y)
+
+            # Calculate residuals (spread)
+            spread = y - model.predict(X)
+
+            # Test residuals for stationarity
+            adf_result = adfuller(spread)
+            adf_pvalue = adf_result[1]
+
+            # Return the more conservative result
+            return (p_value < threshold and adf_pvalue < threshold), max(p_value, adf_pvalue)
+        except Exception as e:
+            logger.error(f"Error testing cointegration: {e}")
+            return False, 1.0
+
+    def find_replacement_pairs(self, current_date, num_pairs: int) -> List[Tuple[str, str]]:
+        """
+        Best new pairs from the candidate pool, using only data before current_date.
+
+        Args:
+            current_date: Current date; later prices are never looked at
+            num_pairs: Number of pairs to return
+
+        Returns:
+            List of qualified pairs not traded, excluded or broken down already
+        """
+        if self.candidate_pool is None:
+            self.candidate_pool = _PairCandidatePool(
+                self.prices,
+                self._test_cointegration,
+                min_correlation=self.min_correlation,
+                min_data_points=self.min_data_points
+            )
+        self.candidate_pool.refresh(self.prices.index.get_loc(current_date))
+
+        existing_pairs = set(self.active_pairs) | set(self.pairs)
+
+        def exclude(pair):
+            reverse = (pair[1], pair[0])
+            return (pair in existing_pairs or reverse in existing_pairs
+                    or pair in self.inactive_pairs or reverse in self.inactive_pairs)
+
+        return self.candidate_pool.best(num_pairs, exclude)
+
     def check_pair_stability(self, pair: Tuple[str, str], current_date) -> bool:
         """
         Check if a pair is still stable (cointegrated/correlated).
@@ -252,8 +595,14 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
         Returns:
             bool: True if the pair is still stable
         """
-        from statsmodels.tsa.stattools import adfuller
+        started = time.perf_counter()
+        try:
+            return self._check_pair_stability(pair, current_date)
+        finally:
+            logger.debug(f"Stability check for pair {pair} took "
+                         f"{(time.perf_counter() - started) * 1000:.2f} ms")
 
+    def _check_pair_stability(self, pair: Tuple[str, str], current_date) -> bool:
         symbol_x, symbol_y = pair
         model = self.pair_models[pair]
 
@@ -262,23 +611,19 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
             current_idx = self.prices.index.get_loc(current_date)
             start_idx = max(0, current_idx - self.lookback_window)
 
-            # Get price data for the window
-            window_data = self.prices.iloc[start_idx:current_idx]
-
             # Check if we have enough data
-            if len(window_data) < 60:  # Need at least 60 data points
+            if current_idx - start_idx < 60:  # Need at least 60 data points
                 return True  # Assume stable if not enough data to check
 
-            # Get the price series
-            price_x = window_data[symbol_x]
-            price_y = window_data[symbol_y]
+            # Get the price series for the window
+            price_x = self.price_matrix.column(symbol_x)[start_idx:current_idx].astype(np.float64)
+            price_y = self.price_matrix.column(symbol_y)[start_idx:current_idx].astype(np.float64)
 
-            # Check correlation
-            x_returns = price_x.pct_change().dropna()
-            y_returns = price_y.pct_change().dropna()
-
-            # Calculate recent correlation
-            correlation = x_returns.corr(y_returns)
+            # Calculate recent correlation of returns
+            x_returns = price_x[1:] / price_x[:-1] - 1
+            y_returns = price_y[1:] / price_y[:-1] - 1
+            with np.errstate(divide='ignore', invalid='ignore'):
+                correlation = np.corrcoef(x_returns, y_returns)[0, 1]
 
             # Fail if correlation is too low
             if abs(correlation) < self.min_correlation * 0.8:  # Allow some degradation
@@ -294,19 +639,14 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
                 return True  # Can't check without parameters
 
             # Calculate spread using current parameters
-            price_x_clean = fill_missing_values(price_x)
-            price_y_clean = fill_missing_values(price_y)
-
-            # Log prices
-            log_x = np.log(price_x_clean.apply(lambda x: max(x, 0.01)))
-            log_y = np.log(price_y_clean.apply(lambda x: max(x, 0.01)))
-
-            # Calculate spread
-            spread = log_y - (beta * log_x + alpha)
+            spread = np.log(price_y) - (beta * np.log(price_x) + alpha)
 
-            # Test for stationarity
-            adf_result = adfuller(spread)
-            p_value = adf_result[1]
+            # Test for stationarity, reusing the regression moments of the last check
+            try:
+                p_value = self.stability_cache.adf_pvalue(pair, start_idx, current_idx, float(beta))
+            except np.linalg.LinAlgError:
+                from statsmodels.tsa.stattools import adfuller
+                p_value = adfuller(spread)[1]
 
             # Pair is stable if spread is still stationary
             if p_value > self.min_cointegration_pvalue * 2:  # Allow some degradation
@@ -324,7 +664,8 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
             mean2, std2 = np.mean(spread2), np.std(spread2)
 
             # Check if the means or stds have shifted significantly
-            mean_shift = abs(mean2 - mean1) / std1
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean_shift = abs(mean2 - mean1) / std1
             vol_ratio = std2 / std1 if std1 > 0 else 1.0
 
             # If large shifts, consider a structural break
@@ -358,40 +699,14 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
             is_volatile: Boolean indicating if market is in high volatility
         """
         try:
-            # Get the lookback window indices
             current_idx = self.prices.index.get_loc(current_date)
-            short_window = 20  # 1 month for recent volatility
-            long_window = 252  # 1 year for baseline volatility
-
-            # Get data for both windows
-            short_idx = max(0, current_idx - short_window)
-            long_idx = max(0, current_idx - long_window)
-
-            short_data = self.prices.iloc[short_idx:current_idx]
-            long_data = self.prices.iloc[long_idx:current_idx]
-
-            # Calculate volatility (average of all symbols)
-            short_vol = []
-            long_vol = []
 
-            # Sample a subset of symbols to make calculation faster
-            symbols_to_check = random.sample(self.all_symbols, min(20, len(self.all_symbols)))
-
-            for symbol in symbols_to_check:
-                if symbol in short_data.columns:
-                    # Calculate returns
-                    short_returns = short_data[symbol].pct_change().dropna()
-                    long_returns = long_data[symbol].pct_change().dropna()
-
-                    # Calculate volatility (std of returns)
-                    if len(short_returns) > 0:
-                        short_vol.append(short_returns.std())
-                    if len(long_returns) > 0:
-                        long_vol.append(long_returns.std())
-
-            # Calculate average volatilities
-            avg_short_vol = np.mean(short_vol) if short_vol else 0
-            avg_long_vol = np.mean(long_vol) if long_vol else 0
+            # Average volatility of all symbols, precomputed for every date
+            if self._market_volatility is None:
+                self._market_volatility = self._build_market_volatility()
+            short_vol, long_vol = self._market_volatility
+            avg_short_vol = short_vol[current_idx]
+            avg_long_vol = long_vol[current_idx]
 
             # Volatility ratio (current vs historical)
             vol_ratio = avg_short_vol / avg_long_vol if avg_long_vol > 0 else 1.0
@@ -423,6 +738,36 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
             logger.error(f"Error checking market volatility: {e}")
             return False
 
+    def _build_market_volatility(
+            self,
+            short_window: int = 20,  # 1 month for recent volatility
+            long_window: int = 252  # 1 year for baseline volatility
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cross-sectional average return volatility for every date, computed once.
+
+        The value at position i covers the window of prices strictly before
+        date i (the window check_market_volatility used to slice), averaged
+        over the whole universe.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Short- and long-window average volatility
+        """
+        prices = self.price_matrix.values.astype(np.float64)
+        n_dates = len(prices)
+        returns = pd.DataFrame(prices[1:] / prices[:-1] - 1)
+
+        averages = []
+        for window in (short_window, long_window):
+            # A window of `window` prices holds `window - 1` returns; shorter
+            # windows at the start of the history are expanding
+            symbol_vol = returns.rolling(window - 1, min_periods=1).std().to_numpy()
+            average = np.zeros(n_dates)  # No returns before the third date
+            average[2:] = symbol_vol.mean(axis=1)[:n_dates - 2]
+            averages.append(average)
+
+        return averages[0], averages[1]
+
     def adjust_for_volatility(self):
         """
         Adjust strategy parameters based on current volatility regime.
@@ -502,7 +847,7 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
             if needed_pairs > 0:
                 # Find and add new pairs
                 logger.info(f"Finding {needed_pairs} new replacement pairs")
-                new_pairs = self.find_best_pairs(self.prices, needed_pairs)
+                new_pairs = self.find_replacement_pairs(current_date, needed_pairs)
                 self.add_pairs(new_pairs)
 
     def full_universe_evaluation(self, current_date):
@@ -544,7 +889,7 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
         # 3. Get the best possible new pairs from the universe
         potential_new_count = min(5, self.max_active_pairs - len(self.pairs) + len(underperforming))
         if potential_new_count > 0:
-            potential_new_pairs = self.find_best_pairs(self.prices, potential_new_count)
+            potential_new_pairs = self.find_replacement_pairs(current_date, potential_new_count)
 
             # 4. Remove underperforming pairs
             if underperforming:
@@ -570,7 +915,7 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
                 # Create a new model for this pair
                 model = PairModel(
                     pair=pair,
-                    prices=self.prices,
+                    prices=self.price_matrix,
                     initial_capital=self.capital_per_pair,
                     window_size=self.window_size,
                     threshold=self.pair_models[self.pairs[0]].base_threshold if self.pairs else 2.0,
@@ -579,7 +924,9 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
                     capital_utilization=self.capital_utilization,
                     max_holding_period=self.max_holding_period,
                     profit_target_pct=self.profit_target_pct,
-                    loss_limit_pct=self.loss_limit_pct
+                    loss_limit_pct=self.loss_limit_pct,
+                    trade_ledger=self.trade_ledger,
+                    defer_transaction_costs=self.net_orders or self.execution_scheduler is not None
                 )
 
                 # Add to our pairs list and model dictionary
@@ -621,6 +968,7 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
 
                 # Remove from our collections
                 self.pairs.remove(pair)
+                self.stability_cache.discard(pair)
 
                 # Don't delete the model so we keep the history
 
@@ -744,7 +1092,7 @@ class DynamicPairTradingSystem(MultiPairTradingSystem):
             logger.warning("No trade history to plot pair rotation")
             return
 
-        trades_df = pd.DataFrame(all_trades)
+        trades_df = all_trades.to_frame()
 
         # Get unique pair IDs from trades
         all_pair_ids = trades_df['pair_id'].unique() if 'pair_id' in trades_df.columns else []
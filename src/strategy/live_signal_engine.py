@@ -0,0 +1,327 @@
+"""
+Live Signal Engine
+
+Streaming counterpart of the pair model's spread logic. Every pair keeps a
+small vector of running moments of its log prices and realized spread, so a
+new bar updates beta, alpha, the spread mean and volatility, the z-score and
+the half-life in constant time instead of refitting over the window.
+"""
+
+import numpy as np
+import pandas as pd
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from config.logging_config import logger
+from src.utils.latency import LatencyHistogram
+
+# Running moments per pair
+_W, _X, _Y, _XX, _XY, _YY, _W_AR, _S, _DS, _SS, _SDS = range(11)
+_N_MOMENTS = 11
+_NO_TIME = np.iinfo(np.int64).min
+
+
+@dataclass
+class PairSignal:
+    """Entry or exit signal for one pair."""
+    date: pd.Timestamp
+    pair: Tuple[str, str]
+    action: str  # 'enter_long' (long Y, short X), 'enter_short' (short Y, long X) or 'exit'
+    zscore: float
+    beta: float
+    alpha: float
+    half_life: float
+
+
+class LiveSignalEngine:
+    """
+    Constant-time-per-bar pair signals for live trading.
+
+    Beta and alpha are the OLS fit of log(y) on log(x), either over the last
+    ``window`` bars or exponentially weighted with ``halflife``. Like
+    PairModel.update, the z-score of a bar is taken against the fit and the
+    spread statistics of the bars before it, so a bar never informs its own
+    signal. The half-life comes from an AR(1) fit of the realized spread.
+    A pair advances once both legs have a bar newer than its last step.
+    """
+
+    def __init__(
+            self,
+            pairs: List[Tuple[str, str]],
+            mode: str = 'window',
+            window: int = 90,
+            halflife: float = 60.0,
+            entry_threshold: float = 2.0,
+            exit_threshold: float = 1.0,
+            min_observations: int = 30,
+            price_field: str = 'Close',
+            max_signals: int = 10000
+    ):
+        """
+        Args:
+            pairs: (symbol_x, symbol_y) pairs to track
+            mode: 'window' for rolling-window moments, 'ewm' for exponential weighting
+            window: Bars in the rolling window
+            halflife: Half-life in bars of the exponential weights
+            entry_threshold: |z-score| that opens a position
+            exit_threshold: |z-score| below which an open position is closed
+            min_observations: Bars needed before a pair emits signals
+            price_field: Bar column used as the price
+            max_signals: Recent signals kept in ``signals``
+        """
+        if mode not in ('window', 'ewm'):
+            raise ValueError(f"Unknown moment mode: {mode}")
+
+        self.pairs = list(pairs)
+        self.symbols = sorted({symbol for pair in self.pairs for symbol in pair})
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.mode = mode
+        self.window = window
+        self.decay = 0.5 ** (1.0 / halflife)
+        self.entry_threshold = entry_threshold
+        self.exit_threshold = exit_threshold
+        self.min_observations = min(min_observations, window) if mode == 'window' else min_observations
+        self.price_field = price_field
+
+        n_symbols, n_pairs = len(self.symbols), len(self.pairs)
+        self._ix = np.array([self.symbol_index[x] for x, _ in self.pairs], dtype=np.int64)
+        self._iy = np.array([self.symbol_index[y] for _, y in self.pairs], dtype=np.int64)
+        self._log_price = np.full(n_symbols, np.nan)
+        self._origin = np.full(n_symbols, np.nan)  # Log prices are centred on the first one seen
+        self._price_time = np.full(n_symbols, _NO_TIME, dtype=np.int64)
+        self._pair_time = np.full(n_pairs, _NO_TIME, dtype=np.int64)
+
+        self._moments = np.zeros((n_pairs, _N_MOMENTS))
+        self._last_spread = np.full(n_pairs, np.nan)
+        self.n_bars = np.zeros(n_pairs, dtype=np.int64)
+        if mode == 'window':
+            self._ring = np.zeros((window, n_pairs, _N_MOMENTS))
+
+        self.position = np.zeros(n_pairs, dtype=np.int8)
+        self.beta = np.full(n_pairs, np.nan)
+        self.alpha = np.full(n_pairs, np.nan)
+        self.spread_mean = np.full(n_pairs, np.nan)
+        self.spread_std = np.full(n_pairs, np.nan)
+        self.zscore = np.full(n_pairs, np.nan)
+        self.half_life = np.full(n_pairs, np.nan)
+
+        self.latency = LatencyHistogram()
+        self.signals = deque(maxlen=max_signals)
+        self._signal_callbacks: List[Callable[[List[PairSignal]], None]] = []
+
+    def attach(self, handler) -> 'LiveSignalEngine':
+        """Subscribe to the bar updates of a LiveDataHandler."""
+        handler.subscribe(self.on_bars)
+        return self
+
+    def on_signals(self, callback: Callable[[List[PairSignal]], None]):
+        """Register a callback receiving the signals of every update cycle."""
+        self._signal_callbacks.append(callback)
+
+    def on_bars(self, updates: Dict[str, pd.DataFrame]) -> List[PairSignal]:
+        """
+        Process one update cycle of new bars.
+
+        Args:
+            updates: Ticker -> new bars (with Date and the price field)
+
+        Returns:
+            List[PairSignal]: Signals emitted in this cycle
+        """
+        started = time.perf_counter()
+        events = []
+        for ticker, bars in updates.items():
+            if ticker not in self.symbol_index or bars is None or bars.empty:
+                continue
+            dates = pd.DatetimeIndex(pd.to_datetime(bars['Date'], utc=True))
+            for date, price in zip(dates, bars[self.price_field].to_numpy(dtype=np.float64)):
+                events.append((date, ticker, price))
+        events.sort(key=lambda event: event[0])
+
+        signals = []
+        i = 0
+        while i < len(events):
+            date = events[i][0]
+            prices = {}
+            while i < len(events) and events[i][0] == date:
+                prices[events[i][1]] = events[i][2]
+                i += 1
+            signals.extend(self._step(date, prices))
+
+        self.latency.record(time.perf_counter() - started)
+        self._publish(signals)
+        return signals
+
+    def update(self, date, prices: Dict[str, float]) -> List[PairSignal]:
+        """
+        Process one bar of prices for any subset of the symbols.
+
+        Args:
+            date: Bar timestamp
+            prices: Symbol -> price
+
+        Returns:
+            List[PairSignal]: Signals emitted for this bar
+        """
+        started = time.perf_counter()
+        signals = self._step(pd.Timestamp(date), prices)
+        self.latency.record(time.perf_counter() - started)
+        self._publish(signals)
+        return signals
+
+    def warm_up(self, prices: pd.DataFrame) -> int:
+        """
+        Feed historical prices (dates x symbols) through the engine without emitting signals.
+
+        Returns:
+            int: Number of bars processed
+        """
+        columns = [symbol for symbol in prices.columns if symbol in self.symbol_index]
+        values = prices[columns].to_numpy(dtype=np.float64)
+        for date, row in zip(prices.index, values):
+            self._step(pd.Timestamp(date), dict(zip(columns, row)), emit=False)
+        logger.info(f"Warmed up live signal engine on {len(prices)} bars")
+        return len(prices)
+
+    def _publish(self, signals: List[PairSignal]):
+        if not signals:
+            return
+        self.signals.extend(signals)
+        for callback in self._signal_callbacks:
+            try:
+                callback(signals)
+            except Exception as e:
+                logger.error(f"Error in signal callback: {str(e)}")
+
+    def _step(self, date: pd.Timestamp, prices: Dict[str, float], emit: bool = True) -> List[PairSignal]:
+        """Advance every pair whose two legs both have a bar newer than its last step."""
+        stamp = (date.tz_convert('UTC') if date.tzinfo is not None else date).value
+        for symbol, price in prices.items():
+            i = self.symbol_index.get(symbol)
+            if i is None or not np.isfinite(price) or price <= 0:
+                continue
+            log_price = np.log(max(price, 0.01))
+            if np.isnan(self._origin[i]):
+                self._origin[i] = log_price
+            self._log_price[i] = log_price - self._origin[i]
+            self._price_time[i] = stamp
+
+        leg_time = np.minimum(self._price_time[self._ix], self._price_time[self._iy])
+        idx = np.flatnonzero(leg_time > self._pair_time)
+        if len(idx) == 0:
+            return []
+        self._pair_time[idx] = leg_time[idx]
+        x = self._log_price[self._ix[idx]]
+        y = self._log_price[self._iy[idx]]
+
+        # Fit and spread statistics of the bars before this one
+        m = self._moments[idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w = m[:, _W]
+            mean_x, mean_y = m[:, _X] / w, m[:, _Y] / w
+            var_x = m[:, _XX] / w - mean_x ** 2
+            cov_xy = m[:, _XY] / w - mean_x * mean_y
+            var_y = m[:, _YY] / w - mean_y ** 2
+            beta = cov_xy / var_x
+            alpha = mean_y - beta * mean_x
+            spread_mean = mean_y - beta * mean_x - alpha
+            spread_var = var_y - 2 * beta * cov_xy + beta ** 2 * var_x
+            spread_std = np.sqrt(np.clip(spread_var, 0.0, None))
+
+            ready = (self.n_bars[idx] >= self.min_observations) & (var_x > 0)
+            beta = np.where(ready, beta, np.nan)
+            alpha = np.where(ready, alpha, np.nan)
+            spread = y - beta * x - alpha
+            zscore = np.where(spread_std > 0, (spread - spread_mean) / spread_std, np.nan)
+
+            w_ar = m[:, _W_AR]
+            mean_s, mean_ds = m[:, _S] / w_ar, m[:, _DS] / w_ar
+            var_s = m[:, _SS] / w_ar - mean_s ** 2
+            ar_slope = (m[:, _SDS] / w_ar - mean_s * mean_ds) / var_s
+            half_life = np.where(ar_slope < 0, -np.log(2) / ar_slope, np.inf)
+            half_life = np.where(np.isfinite(ar_slope), half_life, np.nan)
+
+        origin_x, origin_y = self._origin[self._ix[idx]], self._origin[self._iy[idx]]
+        self.beta[idx] = beta
+        self.alpha[idx] = alpha + origin_y - beta * origin_x  # Alpha on uncentred log prices
+        self.spread_mean[idx] = np.where(ready, spread_mean, np.nan)
+        self.spread_std[idx] = np.where(ready, spread_std, np.nan)
+        self.zscore[idx] = zscore
+        self.half_life[idx] = half_life
+
+        # Absorb this bar
+        previous = self._last_spread[idx]
+        has_ar = np.isfinite(previous) & np.isfinite(spread)
+        previous = np.where(has_ar, previous, 0.0)
+        change = np.where(has_ar, spread - previous, 0.0)
+        contribution = np.column_stack([
+            np.ones(len(idx)), x, y, x * x, x * y, y * y,
+            has_ar.astype(np.float64), previous, change, previous * previous, previous * change
+        ])
+        self._last_spread[idx] = spread
+        self._absorb(idx, contribution)
+
+        if not emit:
+            return []
+        return self._signals(date, idx, zscore)
+
+    def _absorb(self, idx: np.ndarray, contribution: np.ndarray):
+        if self.mode == 'ewm':
+            self._moments[idx] = self.decay * self._moments[idx] + contribution
+        else:
+            slot = self.n_bars[idx] % self.window
+            self._moments[idx] += contribution - self._ring[slot, idx]
+            self._ring[slot, idx] = contribution
+            # Re-sum once per window so rounding in the running sums cannot accumulate
+            resum = idx[slot == self.window - 1]
+            if len(resum):
+                self._moments[resum] = self._ring[:, resum].sum(axis=0)
+        self.n_bars[idx] += 1
+
+    def _signals(self, date: pd.Timestamp, idx: np.ndarray, zscore: np.ndarray) -> List[PairSignal]:
+        flat = self.position[idx] == 0
+        with np.errstate(invalid='ignore'):
+            enter_short = flat & (zscore > self.entry_threshold)
+            enter_long = flat & (zscore < -self.entry_threshold)
+            exit_position = ~flat & (np.abs(zscore) < self.exit_threshold)
+
+        signals = []
+        for mask, action, position in ((enter_long, 'enter_long', 1),
+                                       (enter_short, 'enter_short', -1),
+                                       (exit_position, 'exit', 0)):
+            for p in idx[mask]:
+                self.position[p] = position
+                signals.append(PairSignal(
+                    date=date,
+                    pair=self.pairs[p],
+                    action=action,
+                    zscore=float(self.zscore[p]),
+                    beta=float(self.beta[p]),
+                    alpha=float(self.alpha[p]),
+                    half_life=float(self.half_life[p])
+                ))
+        return signals
+
+    def state(self) -> pd.DataFrame:
+        """Current per-pair estimates, one row per pair."""
+        return pd.DataFrame({
+            'beta': self.beta,
+            'alpha': self.alpha,
+            'spread_mean': self.spread_mean,
+            'spread_std': self.spread_std,
+            'zscore': self.zscore,
+            'half_life': self.half_life,
+            'position': self.position,
+            'bars': self.n_bars
+        }, index=pd.MultiIndex.from_tuples(self.pairs, names=['symbol_x', 'symbol_y']))
+
+    def reset_positions(self, pairs: Optional[List[Tuple[str, str]]] = None):
+        """Mark pairs (all if None) as flat, e.g. after fills were rejected."""
+        if pairs is None:
+            self.position[:] = 0
+            return
+        lookup = {pair: i for i, pair in enumerate(self.pairs)}
+        for pair in pairs:
+            if pair in lookup:
+                self.position[lookup[pair]] = 0
@@ -1,7 +1,7 @@
 """
 Enhanced multi-strategy optimizer supporting various strategies and advanced optimization techniques.
 """
-from typing import Dict, Tuple, Optional, Any, List, Union
+from typing import Dict, Tuple, Optional, Any, List, Sequence, Union
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import TimeSeriesSplit
@@ -1206,23 +1206,30 @@ class MarketImpactModel:
             num_periods: int,
             price_data: Optional[pd.DataFrame] = None,
             volume_data: Optional[pd.DataFrame] = None,
-            current_date: Optional[pd.Timestamp] = None
+            current_date: Optional[pd.Timestamp] = None,
+            volume_profile: Optional[Sequence[float]] = None
     ) -> pd.Series:
         """
         Calculate optimal trade schedule using TWAP/VWAP hybrid approach.
 
         Args:
             pair: Trading pair identifier
-            total_size: Total position to trade
+            total_size: Total position to trade (signed)
             num_periods: Number of periods to split the trade
             price_data: Historical price data
             volume_data: Historical volume data
             current_date: Current date
+            volume_profile: Expected volume of each period, used instead of
+                the profile derived from volume_data (e.g. an intraday profile
+                when volume_data holds daily volumes)
 
         Returns:
             Series of trade sizes for each period
         """
-        if volume_data is not None:
+        if volume_profile is not None:
+            volume_profile = np.asarray(volume_profile, dtype=np.float64)
+            trade_sizes = pd.Series(total_size * volume_profile / volume_profile.sum())
+        elif volume_data is not None:
             volume_profile = self._calculate_volume_profile(volume_data, num_periods)
             trade_sizes = total_size * volume_profile
         else:
@@ -1230,7 +1237,7 @@ class MarketImpactModel:
 
         adv = self._get_adv(pair, volume_data, current_date)
         max_trade_size = adv * 0.1
-        trade_sizes = trade_sizes.clip(upper=max_trade_size)
+        trade_sizes = trade_sizes.clip(lower=-max_trade_size, upper=max_trade_size)
 
         # Rescale to ensure sum equals total_size
         trade_sizes = trade_sizes * (total_size / trade_sizes.sum())
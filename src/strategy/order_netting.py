@@ -0,0 +1,202 @@
+"""
+Order Netting Module
+
+Portfolio-level netting between independently traded pair models and the
+broker. When several pairs share a leg, their per-bar position changes in
+that symbol are summed and only the net change is sent as an order; the
+offsetting part is crossed internally at the bar price, and the cost of the
+net order is attributed back to the pairs that traded in its direction.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Hashable, Mapping, Optional, Tuple
+from config.logging_config import logger
+from src.utils.trade_ledger import TradeLedger
+
+NET_ORDER_SCHEMA = {
+    'date': 'datetime64[ns]',
+    'symbol': object,
+    'quantity': np.float64,  # Signed net order
+    'gross_quantity': np.float64,  # Sum of the pairs' absolute changes
+    'n_pairs': np.int64,
+    'price': np.float64,
+    'cost': np.float64,
+    'gross_cost': np.float64  # Cost had every pair traded on its own
+}
+
+ATTRIBUTION_SCHEMA = {
+    'pair_id': object,
+    'date': 'datetime64[ns]',
+    'symbol': object,
+    'quantity': np.float64,  # Signed change of the pair's position
+    'external_quantity': np.float64,  # Share of the net order, unsigned
+    'internal_quantity': np.float64,  # Crossed against other pairs, unsigned
+    'price': np.float64,
+    'cost': np.float64
+}
+
+
+class OrderNettingBook:
+    """
+    Aggregates per-symbol target positions across pairs and nets their orders.
+
+    Each bar, ``net`` receives the current positions of the pairs that traded
+    and compares them with the positions it last saw. Per symbol:
+
+    - the net order is the sum of the pairs' signed changes;
+    - pairs trading in the direction of the net order share it pro rata to
+      their change and pay its cost in the same proportion;
+    - the rest of every change is crossed internally at the bar price, free.
+
+    Costs are the proportional fee of ``transaction_cost_bps`` plus, when an
+    impact model is given, its square-root market impact. The same cost
+    model prices the orders the pairs would have sent on their own, which is
+    what ``summary`` compares against.
+    """
+
+    def __init__(
+            self,
+            transaction_cost_bps: float = 1.0,
+            impact_model=None,
+            price_data: Optional[pd.DataFrame] = None,
+            volume_data: Optional[pd.DataFrame] = None
+    ):
+        """
+        Args:
+            transaction_cost_bps: Fee per traded notional, in basis points
+            impact_model: Optional optimization.MarketImpactModel for impact costs
+            price_data: Price history for the impact model's volatility
+            volume_data: Volume history for the impact model's ADV
+        """
+        self.transaction_cost_bps = transaction_cost_bps
+        self.impact_model = impact_model
+        self.price_data = price_data
+        self.volume_data = volume_data
+
+        self.pair_positions: Dict[Hashable, Dict[str, float]] = {}
+        self.positions: Dict[str, float] = {}
+        self.net_orders = TradeLedger(NET_ORDER_SCHEMA, capacity=1024)
+        self.attribution = TradeLedger(ATTRIBUTION_SCHEMA, pair_column='pair_id', capacity=1024)
+        self.gross_order_count = 0
+
+    def _cost(self, symbol: str, date, quantities: np.ndarray, price: float) -> np.ndarray:
+        """Cost of orders of ``quantities`` shares (unsigned), each traded on its own."""
+        notional = quantities * price
+        cost = notional * (self.transaction_cost_bps / 10000)
+        if self.impact_model is not None:
+            model = self.impact_model
+            volatility = model._get_volatility(symbol, self.price_data, date)
+            adv = model._get_adv(symbol, self.volume_data, date)
+            cost = cost + notional * (model._calculate_temporary_impact(quantities, volatility, adv)
+                                      + model._calculate_permanent_impact(quantities, volatility, adv))
+        return cost
+
+    def net(
+            self,
+            date,
+            targets: Mapping[Hashable, Mapping[str, float]],
+            prices: Mapping[str, float]
+    ) -> Dict[Hashable, Dict[str, float]]:
+        """
+        Net one bar of pair position changes into per-symbol orders.
+
+        Args:
+            date: Bar date
+            targets: Pair -> symbol -> position after the bar, for the pairs that traded
+            prices: Bar prices of the traded symbols
+
+        Returns:
+            Dict[Hashable, Dict[str, float]]: Pair -> symbol -> attributed cost
+        """
+        # Per-symbol changes of every pair
+        changes: Dict[str, Dict[Hashable, float]] = {}
+        for pair, target in targets.items():
+            previous = self.pair_positions.setdefault(pair, {})
+            for symbol, quantity in target.items():
+                delta = quantity - previous.get(symbol, 0)
+                if delta != 0:
+                    changes.setdefault(symbol, {})[pair] = delta
+                    previous[symbol] = quantity
+
+        attributed: Dict[Hashable, Dict[str, float]] = {}
+        rows = {name: [] for name in ATTRIBUTION_SCHEMA if name != 'date'}
+        for symbol, pair_changes in changes.items():
+            price = prices[symbol]
+            pairs = list(pair_changes)
+            deltas = np.fromiter(pair_changes.values(), dtype=np.float64, count=len(pairs))
+            net = deltas.sum()
+            gross_cost = self._cost(symbol, date, np.abs(deltas), price).sum()
+
+            # Pairs on the side of the net order share it; the rest crosses internally
+            same_side = np.sign(deltas) == np.sign(net) if net != 0 else np.zeros(len(deltas), dtype=bool)
+            external = np.where(same_side, np.abs(deltas), 0.0)
+            if net != 0:
+                external *= abs(net) / external.sum()
+                cost = float(self._cost(symbol, date, np.array([abs(net)]), price)[0])
+                pair_cost = cost * external / abs(net)
+                self.positions[symbol] = self.positions.get(symbol, 0) + net
+            else:
+                cost = 0.0
+                pair_cost = np.zeros(len(deltas))
+
+            self.gross_order_count += len(pairs)
+            self.net_orders.append(date=date, symbol=symbol, quantity=net, gross_quantity=np.abs(deltas).sum(),
+                                   n_pairs=len(pairs), price=price, cost=cost, gross_cost=gross_cost)
+            for pair, share in zip(pairs, pair_cost):
+                attributed.setdefault(pair, {})[symbol] = float(share)
+            rows['pair_id'].extend(pairs)
+            rows['symbol'].extend([symbol] * len(pairs))
+            rows['quantity'].extend(deltas.tolist())
+            rows['external_quantity'].extend(external.tolist())
+            rows['internal_quantity'].extend((np.abs(deltas) - external).tolist())
+            rows['price'].extend([price] * len(pairs))
+            rows['cost'].extend(pair_cost.tolist())
+
+        if rows['pair_id']:
+            self.attribution.extend({**rows, 'date': date})
+        return attributed
+
+    def pair_attribution(self, pair: Hashable) -> pd.DataFrame:
+        """Fills and costs attributed to one pair."""
+        return self.attribution.take(self.attribution.pair_rows(pair))
+
+    def summary(self) -> Dict[str, float]:
+        """Order count and cost with netting against the pairs trading on their own."""
+        net_orders = self.net_orders.to_frame()
+        gross_cost = float(net_orders['gross_cost'].sum())
+        net_cost = float(net_orders['cost'].sum())
+        n_net = int((net_orders['quantity'] != 0).sum())
+        gross_shares = float(net_orders['gross_quantity'].sum())
+        net_shares = float(net_orders['quantity'].abs().sum())
+        return {
+            'gross_orders': self.gross_order_count,
+            'net_orders': n_net,
+            'order_reduction_pct': (1 - n_net / self.gross_order_count) * 100 if self.gross_order_count else 0.0,
+            'gross_shares': gross_shares,
+            'net_shares': net_shares,
+            'internalized_shares': gross_shares - net_shares,
+            'gross_cost': gross_cost,
+            'net_cost': net_cost,
+            'cost_saving': gross_cost - net_cost,
+            'cost_reduction_pct': (1 - net_cost / gross_cost) * 100 if gross_cost else 0.0,
+            'shared_leg_bars': int((net_orders['n_pairs'] > 1).sum())
+        }
+
+    def reconcile(self) -> Tuple[bool, Dict[str, float]]:
+        """
+        Check the portfolio position of every symbol against the sum of the pairs'.
+
+        Returns:
+            Tuple[bool, Dict[str, float]]: Whether all match, and the mismatches
+        """
+        totals: Dict[str, float] = {}
+        for positions in self.pair_positions.values():
+            for symbol, quantity in positions.items():
+                totals[symbol] = totals.get(symbol, 0) + quantity
+        mismatches = {symbol: self.positions.get(symbol, 0) - quantity
+                      for symbol, quantity in totals.items()
+                      if not np.isclose(self.positions.get(symbol, 0), quantity)}
+        if mismatches:
+            logger.warning(f"Netting book out of line with pair positions: {mismatches}")
+        return not mismatches, mismatches
@@ -20,6 +20,7 @@ import plotly.graph_objects as go
 from sklearn.model_selection import train_test_split
 
 from src.strategy.base import BaseStrategy
+from src.analysis.cointegration import rolling_cointegration_pvalues
 from src.models.machine_learning import MachineLearningModel, time_series_cross_validation
 from config.logging_config import logger
 from config.settings import MODEL_DIR, DATA_DIR
@@ -242,18 +243,7 @@ class MLPairsStrategy(BaseStrategy):
                                         price2: pd.Series,
                                         window: int = 60) -> pd.Series:
         """Calculate rolling cointegration p-value."""
-        p_values = pd.Series(index=price1.index, dtype=float)
-
-        for i in range(window, len(price1)):
-            try:
-                _, p_value, _ = sm.tsa.stattools.coint(
-                    price1.iloc[i - window:i],
-                    price2.iloc[i - window:i]
-                )
-                p_values.iloc[i] = p_value
-            except:
-                p_values.iloc[i] = np.nan
-
+        p_values = rolling_cointegration_pvalues(price1, price2, window)
         return p_values.fillna(1.0)
 
     def generate_signals(self, prices: pd.DataFrame) -> pd.DataFrame:
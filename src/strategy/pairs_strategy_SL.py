@@ -4,6 +4,8 @@ import pandas as pd
 import numpy as np
 from dataclasses import dataclass, field
 import os
+import heapq
+from collections import deque
 
 from src.strategy.base import BaseStrategy
 from src.models.statistical import StatisticalModel
@@ -31,6 +33,217 @@ class RegimeMetrics:
     start_date: pd.Timestamp
     end_date: Optional[pd.Timestamp] = None
 
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Column sums over each complete trailing window (rows window-1 onwards)."""
+    cumulative = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    return cumulative[window:] - cumulative[:-window]
+
+
+def _rolling_moment(values: np.ndarray, window: int, moment: str) -> np.ndarray:
+    """
+    Rolling mean or sample variance per column from cumulative sums.
+
+    Matches pandas ``rolling(window).mean()`` / ``.var()``: a window containing any
+    NaN is NaN.
+    """
+    result = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return result
+
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    centre = np.where(counts > 0, np.where(valid, values, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+    clean = np.where(valid, values - centre, 0.0)
+
+    sums = _window_sums(clean, window)
+    if moment == 'mean':
+        out = sums / window + centre
+    else:
+        squares = _window_sums(clean ** 2, window)
+        out = (squares - sums ** 2 / window) / (window - 1)
+        out[out <= 1e-10 * squares / (window - 1)] = 0.0
+
+    out[_window_sums(valid.astype(np.float64), window) < window] = np.nan
+    result[window - 1:] = out
+    return result
+
+
+def _average_correlation(sum_var: np.ndarray, asset_var: np.ndarray) -> np.ndarray:
+    """Volatility-weighted average pairwise correlation from Var(sum r_i) and var_i."""
+    asset_var = np.atleast_2d(asset_var)
+    total_var = asset_var.sum(axis=-1)
+    denominator = np.sqrt(asset_var).sum(axis=-1) ** 2 - total_var
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = (sum_var - total_var) / denominator
+    return np.where(denominator > 0, correlation, np.nan)
+
+
+def _nanmean_rows(values: np.ndarray) -> np.ndarray:
+    """Row mean ignoring NaN; rows with no data are NaN."""
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=1)
+    totals = np.where(valid, values, 0.0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+
+class _RegimeFeatureState:
+    """
+    Running window sums behind MarketRegimeDetector.update.
+
+    Each bar adds the new row and drops the oldest one in O(N). The sums are rebuilt
+    from the ring buffer every time it wraps so floating-point drift stays bounded.
+    """
+
+    def __init__(self,
+                 window: int,
+                 symbols: pd.Index,
+                 prices: np.ndarray,
+                 filled: np.ndarray,
+                 returns: np.ndarray,
+                 volumes: np.ndarray,
+                 dispersion: np.ndarray):
+        self.window = window
+        self.symbols = symbols
+        self.last_price = prices[-1].copy() if len(prices) else np.full(len(symbols), np.nan)
+
+        n_assets = len(symbols)
+        self.filled = np.zeros((window, n_assets))
+        self.returns = np.full((window, n_assets), np.nan)
+        self.volumes = np.full((window, n_assets), np.nan)
+        self.dispersion = np.full(window, np.nan)
+
+        seed = slice(max(len(prices) - window, 0), len(prices))
+        n_seed = seed.stop - seed.start
+        self.filled[:n_seed] = filled[seed]
+        self.returns[:n_seed] = returns[seed]
+        self.volumes[:n_seed] = volumes[seed]
+        self.dispersion[:n_seed] = dispersion[seed]
+        self.count = n_seed
+        self.position = n_seed % window
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        n = min(self.count, self.window)
+        filled = self.filled[:n]
+        basket = filled.sum(axis=1)
+        self.sum_filled = filled.sum(axis=0)
+        self.sq_filled = (filled ** 2).sum(axis=0)
+        self.sum_basket = basket.sum()
+        self.sq_basket = (basket ** 2).sum()
+        self.sum_returns = np.nansum(self.returns[:n], axis=0)
+        self.valid_returns = (~np.isnan(self.returns[:n])).sum(axis=0)
+        self.sum_volumes = np.nansum(self.volumes[:n], axis=0)
+        self.valid_volumes = (~np.isnan(self.volumes[:n])).sum(axis=0)
+        self.sum_dispersion = np.nansum(self.dispersion[:n])
+        self.valid_dispersion = int((~np.isnan(self.dispersion[:n])).sum())
+
+    def _add(self, filled: np.ndarray, returns: np.ndarray, volumes: np.ndarray,
+             dispersion: float, sign: float) -> None:
+        basket = filled.sum()
+        self.sum_filled += sign * filled
+        self.sq_filled += sign * filled ** 2
+        self.sum_basket += sign * basket
+        self.sq_basket += sign * basket ** 2
+        self.sum_returns += sign * np.nan_to_num(returns)
+        self.valid_returns += int(sign) * ~np.isnan(returns)
+        self.sum_volumes += sign * np.nan_to_num(volumes)
+        self.valid_volumes += int(sign) * ~np.isnan(volumes)
+        if not np.isnan(dispersion):
+            self.sum_dispersion += sign * dispersion
+            self.valid_dispersion += int(sign)
+
+    def push(self, prices: np.ndarray, volumes: np.ndarray) -> List[float]:
+        """Advance the window by one bar and return the feature row."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = prices / self.last_price - 1
+        self.last_price = prices
+        filled = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+        dispersion = filled.std(ddof=1) if len(filled) > 1 else np.nan
+
+        slot = self.position
+        if self.count >= self.window:
+            self._add(self.filled[slot], self.returns[slot], self.volumes[slot],
+                      self.dispersion[slot], -1.0)
+        self.filled[slot] = filled
+        self.returns[slot] = returns
+        self.volumes[slot] = volumes
+        self.dispersion[slot] = dispersion
+        self._add(filled, returns, volumes, dispersion, 1.0)
+
+        self.count += 1
+        self.position = (slot + 1) % self.window
+        if self.position == 0:
+            self._rebuild()
+        return self.features()
+
+    def features(self) -> List[float]:
+        """Current volatility, correlation, trend strength and volume intensity."""
+        if self.count < self.window:
+            return [np.nan] * 4
+
+        n = self.window
+        asset_var = np.maximum((self.sq_filled - self.sum_filled ** 2 / n) / (n - 1), 0.0)
+        basket_var = max((self.sq_basket - self.sum_basket ** 2 / n) / (n - 1), 0.0)
+        correlation = _average_correlation(np.array([basket_var]), asset_var)[0]
+
+        full_returns = self.valid_returns == n
+        full_volumes = self.valid_volumes == n
+        trend = np.abs(self.sum_returns[full_returns] / n).mean() if full_returns.any() else np.nan
+        volume = (self.sum_volumes[full_volumes] / n).mean() if full_volumes.any() else np.nan
+        volatility = self.sum_dispersion / n if self.valid_dispersion == n else np.nan
+
+        return [volatility, correlation, trend, volume]
+
+
+class _ExpandingQuantile:
+    """
+    Exact quantile of all values pushed so far, interpolated linearly as pandas does.
+
+    The lower order statistics sit in a max-heap and the rest in a min-heap, sized
+    so the two values around position q * (n - 1) are the heap tops; a push costs
+    O(log n).
+    """
+
+    def __init__(self, q: float, values: np.ndarray):
+        self.q = q
+        values = np.sort(values[~np.isnan(values)])
+        self.count = len(values)
+        split = self._lower_size()
+        self.lower = (-values[:split]).tolist()
+        self.upper = values[split:].tolist()
+        heapq.heapify(self.lower)
+        heapq.heapify(self.upper)
+
+    def _lower_size(self) -> int:
+        return int(np.floor(self.q * (self.count - 1))) + 1 if self.count else 0
+
+    def push(self, value: float) -> None:
+        if np.isnan(value):
+            return
+        self.count += 1
+        if self.lower and value <= -self.lower[0]:
+            heapq.heappush(self.lower, -value)
+        else:
+            heapq.heappush(self.upper, value)
+
+        target = self._lower_size()
+        while len(self.lower) > target:
+            heapq.heappush(self.upper, -heapq.heappop(self.lower))
+        while len(self.lower) < target:
+            heapq.heappush(self.lower, -heapq.heappop(self.upper))
+
+    def value(self) -> float:
+        if not self.count:
+            return np.nan
+        position = self.q * (self.count - 1)
+        fraction = position - np.floor(position)
+        below = -self.lower[0]
+        if fraction == 0 or not self.upper:
+            return below
+        return below + fraction * (self.upper[0] - below)
+
+
 class MarketRegimeDetector:
     """
     Detect market regimes using statistical thresholds and indicators.
@@ -39,6 +252,14 @@ class MarketRegimeDetector:
     market regimes based on their statistical characteristics.
     """
 
+    FEATURES = ['volatility', 'correlation', 'trend_strength', 'volume_intensity']
+    THRESHOLDS = {  # Quantile levels of each feature used by _classify_regime
+        'volatility': (0.9, 0.7, 0.3),
+        'correlation': (0.7, 0.3),
+        'trend_strength': (0.7, 0.3),
+        'volume_intensity': (0.7,)
+    }
+
     def __init__(self, window: int = 63):
         """
         Initialize regime detector.
@@ -47,13 +268,34 @@ class MarketRegimeDetector:
             window: Rolling window size for calculations in days
         """
         self.window = window
+        self._state: Optional[_RegimeFeatureState] = None
+
+        # Feature history in growable arrays, and the thresholds over it
+        self._values = np.empty((0, len(self.FEATURES)))
+        self._dates: List = []
+        self._frame: Optional[pd.DataFrame] = None
+        self._quantiles: Dict[Tuple[str, float], _ExpandingQuantile] = {}
+
+    @property
+    def features_(self) -> Optional[pd.DataFrame]:
+        """Feature history, forward filled; built from the arrays on first access after a change."""
+        if self._frame is None and self._dates:
+            n = len(self._dates)
+            self._frame = pd.DataFrame(self._values[:n], index=pd.Index(self._dates), columns=self.FEATURES)
+        return self._frame
 
     def calculate_features(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         Calculate regime detection features from price data.
 
+        All features come from a single pivot of the long frame. The average pairwise
+        correlation uses the closed form rho = (Var(sum r_i) - sum var_i) /
+        ((sum sigma_i)^2 - sum var_i) over each window, i.e. the volatility-weighted
+        mean of the pairwise correlations, which costs O(N) per bar instead of a full
+        correlation matrix per window.
+
         Args:
-            data: DataFrame with columns Date, Symbol, Adj_Close
+            data: DataFrame with columns Date, Symbol, Adj_Close, Volume
 
         Returns:
             DataFrame with regime features:
@@ -62,49 +304,93 @@ class MarketRegimeDetector:
                 - Trend strength
                 - Volume profile
         """
-        features = pd.DataFrame(index=data['Date'].unique())
-
-        symbol_groups = data.groupby('Symbol')
-        returns_by_symbol = {}
-
-        for symbol, group in symbol_groups:
-            group_sorted = group.sort_values('Date')
-            returns_by_symbol[symbol] = pd.Series(
-                group_sorted['Adj_Close'].pct_change().values,
-                index=group_sorted['Date']
-            )
-
-        returns_matrix = pd.DataFrame(returns_by_symbol).fillna(0)
-
-        features['volatility'] = returns_matrix.std(axis=1).rolling(window=self.window).mean()
-
-        features['correlation'] = returns_matrix.rolling(window=self.window).apply(self._calculate_correlation)
-
-        prices = data.pivot(index='Date', columns='Symbol', values='Adj_Close')
-        trends = prices.pct_change().rolling(window=self.window).mean()
-        features['trend_strength'] = trends.abs().mean(axis=1)
-
-        volume_profile = data.pivot(index='Date', columns='Symbol', values='Volume')
-        features['volume_intensity'] = volume_profile.rolling(window=self.window).mean().mean(axis=1)
-
-        return features.ffill()
+        wide = data.pivot(index='Date', columns='Symbol', values=['Adj_Close', 'Volume']).sort_index()
+        symbols = wide['Adj_Close'].columns
+        prices = wide['Adj_Close'].to_numpy(dtype=np.float64)
+        volumes = wide['Volume'].reindex(columns=symbols).to_numpy(dtype=np.float64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.full_like(prices, np.nan)
+            returns[1:] = prices[1:] / prices[:-1] - 1
+        filled = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+        dispersion = filled.std(axis=1, ddof=1) if filled.shape[1] > 1 else np.full(len(filled), np.nan)
+        asset_var = _rolling_moment(filled, self.window, 'var')
+        sum_var = _rolling_moment(filled.sum(axis=1, keepdims=True), self.window, 'var')[:, 0]
+        correlation = _average_correlation(sum_var, asset_var)
+
+        with np.errstate(invalid='ignore'):
+            features = pd.DataFrame({
+                'volatility': _rolling_moment(dispersion[:, None], self.window, 'mean')[:, 0],
+                'correlation': correlation,
+                'trend_strength': _nanmean_rows(np.abs(_rolling_moment(returns, self.window, 'mean'))),
+                'volume_intensity': _nanmean_rows(_rolling_moment(volumes, self.window, 'mean'))
+            }, index=wide.index)
+
+        self._state = _RegimeFeatureState(self.window, symbols, prices, filled, returns, volumes, dispersion)
+        features = features.reindex(data['Date'].unique()).ffill()
+
+        self._values = features.to_numpy(dtype=np.float64)
+        self._dates = list(features.index)
+        self._frame = features
+        self._quantiles = {
+            (name, q): _ExpandingQuantile(q, self._values[:, column])
+            for column, name in enumerate(self.FEATURES)
+            for q in self.THRESHOLDS[name]
+        }
+        return features
 
-    def _calculate_correlation(self, x: pd.DataFrame) -> float:
+    def update(self, bar: pd.DataFrame) -> str:
         """
-        Calculate average pairwise correlation from returns matrix.
+        Append one day of data and re-classify the regime.
+
+        Features are advanced from running window sums in O(N) per bar rather than
+        recomputed over the full history, appended to preallocated arrays, and the
+        quantile thresholds are kept incrementally, so an update does not depend on
+        the length of the history.
 
         Args:
-            x: Returns matrix for correlation calculation
+            bar: Rows for a single date with columns Date, Symbol, Adj_Close, Volume
 
         Returns:
-            float: Average correlation value
+            str: Classified regime type for the new date
         """
-        if len(x.columns) < 2:
-            return 0
+        if self._state is None:
+            raise ValueError("Call calculate_features before incremental updates")
+
+        date = pd.Timestamp(bar['Date'].iloc[0])
+        row = bar.set_index('Symbol').reindex(self._state.symbols)
+        values = self._state.push(
+            row['Adj_Close'].to_numpy(dtype=np.float64),
+            row['Volume'].to_numpy(dtype=np.float64)
+        )
 
-        corr_matrix = x.corr()
-        upper_tri = np.triu(corr_matrix.values, k=1)
-        return np.mean(upper_tri[np.triu_indices_from(upper_tri, k=1)])
+        n = len(self._dates)
+        if n == len(self._values):
+            grown = np.empty((max(2 * n, 64), len(self.FEATURES)))
+            grown[:n] = self._values[:n]
+            self._values = grown
+        current = np.asarray(values, dtype=np.float64)
+        if n:
+            current = np.where(np.isnan(current), self._values[n - 1], current)  # Forward fill
+        self._values[n] = current
+        self._dates.append(date)
+        self._frame = None
+
+        thresholds = {}
+        for column, name in enumerate(self.FEATURES):
+            for q in self.THRESHOLDS[name]:
+                quantile = self._quantiles[(name, q)]
+                quantile.push(current[column])
+                thresholds[(name, q)] = quantile.value()
+
+        return self._classify_regime(
+            *current,
+            thresholds[('volatility', 0.9)], thresholds[('volatility', 0.7)], thresholds[('volatility', 0.3)],
+            thresholds[('correlation', 0.7)], thresholds[('correlation', 0.3)],
+            thresholds[('trend_strength', 0.7)], thresholds[('trend_strength', 0.3)],
+            thresholds[('volume_intensity', 0.7)]
+        )
 
     def detect_regime(self, features: pd.DataFrame) -> str:
         """
@@ -211,6 +497,135 @@ class MarketRegimeDetector:
         return 'Mean Reverting'
 
 
+HEDGE_RATIO_WINDOW = 63
+SIGNAL_WINDOW = 21
+ZSCORE_WINDOW = 20
+
+
+class _ExpandingMoments:
+    """Running sums and cross-products of a fixed set of variables."""
+
+    def __init__(self, n_vars: int):
+        self.n = 0
+        self.sums = np.zeros(n_vars)
+        self.cross = np.zeros((n_vars, n_vars))
+
+    def add(self, values: np.ndarray) -> None:
+        self.n += 1
+        self.sums += values
+        self.cross += np.outer(values, values)
+
+    def mean(self) -> np.ndarray:
+        return self.sums / self.n
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance matrix (ddof=1)."""
+        return (self.cross - np.outer(self.sums, self.sums) / self.n) / (self.n - 1)
+
+
+class _PairSignalState:
+    """
+    Streaming statistics for one pair in EnhancedStatPairsStrategy.generate_signals.
+
+    Holds expanding moments for the full-history OLS spread, its OU half-life and the
+    return correlation, plus the last few aligned prices for the z-score and hedge ratio
+    windows. Prices are shifted by the first observation to keep the sums well conditioned.
+    """
+
+    def __init__(self, tail: int):
+        self.n = 0
+        self.origin: Optional[np.ndarray] = None
+        self.dates: deque = deque(maxlen=tail)
+        self.prices1: deque = deque(maxlen=tail)
+        self.prices2: deque = deque(maxlen=tail)
+        self.levels = _ExpandingMoments(2)
+        self.transitions = _ExpandingMoments(4)
+        self.returns = _ExpandingMoments(2)
+        self._fit: Optional[Tuple[float, float]] = None
+
+    def push(self, date: pd.Timestamp, price1: float, price2: float) -> None:
+        """Add one aligned observation."""
+        level = np.array([price1, price2])
+        if self.origin is None:
+            self.origin = level.copy()
+        else:
+            previous = np.array([self.prices1[-1], self.prices2[-1]])
+            self.transitions.add(np.concatenate([previous - self.origin, level - previous]))
+            self.returns.add(level / previous - 1)
+
+        self.levels.add(level - self.origin)
+        self.dates.append(date)
+        self.prices1.append(price1)
+        self.prices2.append(price2)
+        self.n += 1
+        self._fit = None
+
+    def fit(self) -> Tuple[float, float]:
+        """Full-history OLS of price1 on price2: (beta, alpha)."""
+        if self._fit is None:
+            cov = self.levels.covariance()
+            mean = self.levels.mean()
+            beta = cov[0, 1] / cov[1, 1]
+            alpha = mean[0] - beta * mean[1] + self.origin[0] - beta * self.origin[1]
+            self._fit = (beta, alpha)
+        return self._fit
+
+    def _spread_tail(self, length: int) -> np.ndarray:
+        beta, alpha = self.fit()
+        asset1 = np.array(self.prices1)[-length:]
+        asset2 = np.array(self.prices2)[-length:]
+        return asset1 - (beta * asset2 + alpha)
+
+    def zscore(self) -> float:
+        """Latest spread z-score over ZSCORE_WINDOW, as StatisticalModel.calculate_spread_zscore."""
+        spread = self._spread_tail(ZSCORE_WINDOW)
+        zscore = (spread[-1] - spread.mean()) / (spread.std(ddof=1) + 1e-8)
+        return float(zscore) if np.isfinite(zscore) else 0.0
+
+    def signal(self, threshold: float) -> int:
+        """Mean reversion signal confirmed by the Bollinger band signal over SIGNAL_WINDOW."""
+        spread = self._spread_tail(SIGNAL_WINDOW)
+        mean, std = spread.mean(), spread.std(ddof=1)
+        current = spread[-1]
+
+        zscore = (current - mean) / (std + 1e-12)
+        mr_signal = -1 if zscore > threshold else (1 if zscore < -threshold else 0)
+
+        bb_signal = 0
+        if current < mean - threshold * std:
+            bb_signal = 1
+        if current > mean + threshold * std:
+            bb_signal = -1
+
+        return mr_signal if mr_signal == bb_signal and mr_signal != 0 else 0
+
+    def spread_std(self) -> float:
+        """Standard deviation of the full-history spread."""
+        beta, _ = self.fit()
+        cov = self.levels.covariance()
+        return float(np.sqrt(max(cov[0, 0] - 2 * beta * cov[0, 1] + beta ** 2 * cov[1, 1], 0.0)))
+
+    def half_life(self) -> float:
+        """OU half-life of the full-history spread, regressing its change on its lag."""
+        beta, _ = self.fit()
+        cov = self.transitions.covariance()
+        lagged = np.array([1.0, -beta, 0.0, 0.0])
+        change = np.array([0.0, 0.0, 1.0, -beta])
+        gamma = (lagged @ cov @ change) / (lagged @ cov @ lagged)
+        half_life = -np.log(2) / gamma if gamma < 0 else np.inf
+        return half_life if np.isfinite(half_life) and half_life >= 0 else np.inf
+
+    def return_correlation(self) -> float:
+        """Correlation of the two assets' simple returns over the full history."""
+        cov = self.returns.covariance()
+        return float(cov[0, 1] / np.sqrt(cov[0, 0] * cov[1, 1]))
+
+    def window_series(self) -> Tuple[pd.Series, pd.Series]:
+        """Aligned price window used for the rolling hedge ratio."""
+        index = pd.DatetimeIndex(list(self.dates))
+        return pd.Series(list(self.prices1), index=index), pd.Series(list(self.prices2), index=index)
+
+
 @dataclass
 class PairStats:
     """
@@ -452,7 +867,7 @@ class EnhancedStatPairsStrategy(BaseStrategy):
         return confirm_count >= self.confirmation_periods * 0.8
 
     def _record_trade(self, pair: Tuple[str, str], date: pd.Timestamp, reason: str,
-                      current_pos: float, asset1_data: pd.Series, asset2_data: pd.Series,
+                      current_pos: float, price1: float, price2: float,
                       zscore: float, pnl: float = None) -> None:
         """
         Record details of a trade execution.
@@ -462,8 +877,8 @@ class EnhancedStatPairsStrategy(BaseStrategy):
             date: Trade execution timestamp
             reason: Reason for the trade (entry/exit)
             current_pos: Current position size
-            asset1_data: Price data for first asset
-            asset2_data: Price data for second asset
+            price1: Latest price of the first asset
+            price2: Latest price of the second asset
             zscore: Current z-score at trade time
             pnl: Profit/loss if known (for exits)
         """
@@ -476,8 +891,8 @@ class EnhancedStatPairsStrategy(BaseStrategy):
             'Action': 'EXIT' if current_pos != 0 else 'ENTRY',
             'Signal': -current_pos if current_pos != 0 else current_pos,
             'ZScore': zscore,
-            'Price1': asset1_data.iloc[-1],
-            'Price2': asset2_data.iloc[-1],
+            'Price1': price1,
+            'Price2': price2,
             'Position1': stats.position_sizes['asset1'] if stats else 0,
             'Position2': stats.position_sizes['asset2'] if stats else 0,
         }
@@ -499,6 +914,11 @@ class EnhancedStatPairsStrategy(BaseStrategy):
         - Stop losses
         - Signal reversals
 
+        Prices are streamed one date at a time into per-pair rolling state (expanding
+        OLS moments, a short price window for the z-scores), so each bar costs O(1) per
+        pair instead of refitting on the full history. Signals and trades are identical
+        to the full-history reference in ``src.strategy.signal_benchmark``.
+
         Args:
             prices: DataFrame with price history for all assets
 
@@ -507,122 +927,128 @@ class EnhancedStatPairsStrategy(BaseStrategy):
         """
         dates = prices['Date'].unique()
         columns = pd.MultiIndex.from_tuples(self.pairs, names=['asset1', 'asset2'])
-        signals = pd.DataFrame(0, index=dates, columns=columns)
-
-        for date in dates:
-            historical_data = prices[prices['Date'] <= date].copy()
 
-            for pair in self.pairs:
+        symbols = list(dict.fromkeys(asset for pair in self.pairs for asset in pair))
+        frame = prices[prices['Symbol'].isin(symbols)]
+        wide = frame.pivot(index='Date', columns='Symbol', values='Adj_Close')
+        ordered_dates = np.sort(dates)
+        wide = wide.reindex(index=ordered_dates, columns=symbols)
+        values = wide.to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        column_of = {symbol: k for k, symbol in enumerate(symbols)}
+
+        signal_values = np.zeros((len(ordered_dates), len(self.pairs)), dtype=np.int64)
+        states = {pair: _PairSignalState(HEDGE_RATIO_WINDOW) for pair in self.pairs}
+        symbol_tails = {symbol: deque(maxlen=HEDGE_RATIO_WINDOW) for symbol in symbols}
+
+        for t, date in enumerate(ordered_dates):
+            for symbol in symbols:
+                if present[t, column_of[symbol]]:
+                    symbol_tails[symbol].append(values[t, column_of[symbol]])
+
+            for p, pair in enumerate(self.pairs):
                 try:
-                    asset1, asset2 = pair
+                    state = states[pair]
+                    i, j = column_of[pair[0]], column_of[pair[1]]
+                    if present[t, i] and present[t, j]:
+                        state.push(date, values[t, i], values[t, j])
 
-                    # Get asset data
-                    asset1_data = historical_data[historical_data['Symbol'] == asset1].set_index('Date')['Adj_Close']
-                    asset2_data = historical_data[historical_data['Symbol'] == asset2].set_index('Date')['Adj_Close']
-                    asset1_data, asset2_data = asset1_data.align(asset2_data, join='inner')
-
-                    if len(asset1_data) < self.lookback_window:
+                    if state.n < self.lookback_window:
                         continue
 
-                    # Calculate core metrics
-                    hedge_ratio = self.calculator.calculate_hedge_ratio(asset1_data, asset2_data)
-                    spread = self.calculator.calculate_spread(asset1_data, asset2_data)
-                    zscore = self.calculator.calculate_spread_zscore(spread)
-                    current_zscore = zscore.iloc[-1]
-
-                    # Update zscore history
-                    if pair not in self.zscore_history:
-                        self.zscore_history[pair] = []
-                    self.zscore_history[pair].append(current_zscore)
-
-                    # Generate signals
-                    mr_signal = self.calculator.mean_reversion_signal(
-                        spread, window=21, z_threshold=self.zscore_entry
-                    )
-                    bb_signal = self.calculator.bollinger_band_signal(
-                        spread, window=21, num_std_dev=self.zscore_entry
+                    previous = signal_values[t - 1, p] if t > 0 else 0
+                    signal_values[t, p] = self._process_pair_bar(
+                        pair, pd.Timestamp(date), state, previous, symbol_tails
                     )
 
-                    current_signal = 0
-                    if mr_signal.iloc[-1] == bb_signal.iloc[-1] and mr_signal.iloc[-1] != 0:
-                        current_signal = mr_signal.iloc[-1]
-
-                    # Position management
-                    current_prices = {
-                        'asset1': asset1_data.iloc[-1],
-                        'asset2': asset2_data.iloc[-1]
-                    }
-
-                    if pair in self.positions:
-                        prev_signals = signals.loc[signals.index < date, pair]
-                        current_pos = prev_signals.iloc[-1] if len(prev_signals) > 0 else 0
-
-                        # Update position age and max prices
-                        self.position_age[pair] = self.position_age.get(pair, 0) + 1
-
-                        if pair in self.max_prices:
-                            self.max_prices[pair] = {
-                                'asset1': max(self.max_prices[pair]['asset1'], current_prices['asset1']),
-                                'asset2': max(self.max_prices[pair]['asset2'], current_prices['asset2'])
-                            }
-
-                        # Check exit conditions
-                        exit_flag, exit_reason = self._check_exit_conditions(
-                            pair, current_prices, current_zscore, current_pos
-                        )
-
-                        if exit_flag:
-                            signals.loc[date, pair] = 0
-                            self._record_trade(
-                                pair, date, exit_reason, current_pos,
-                                asset1_data, asset2_data, current_zscore,
-                                self._calculate_pnl(pair, current_prices)
-                            )
-
-                            # Reset position tracking
-                            if pair in self.positions:
-                                del self.positions[pair]
-                            if pair in self.position_age:
-                                del self.position_age[pair]
-                            if pair in self.max_prices:
-                                del self.max_prices[pair]
-                            if pair in self.entry_prices:
-                                del self.entry_prices[pair]
-
-                            continue
-
-                    # Update or enter new position
-                    signals.loc[date, pair] = current_signal
-
-                    if current_signal != 0:
-                        # Initialize or update position tracking
-                        if pair not in self.entry_prices:
-                            self.entry_prices[pair] = current_prices.copy()
-                        if pair not in self.max_prices:
-                            self.max_prices[pair] = current_prices.copy()
-                        if pair not in self.position_age:
-                            self.position_age[pair] = 0
-
-                        # Update position stats
-                        stats = PairStats(
-                            hedge_ratio=hedge_ratio,
-                            half_life=self.calculator.calculate_half_life(spread),
-                            coint_pvalue=0.0,
-                            spread_zscore=current_zscore,
-                            spread_vol=spread.std(),
-                            correlation=asset1_data.pct_change().corr(asset2_data.pct_change()),
-                            last_update=pd.Timestamp(date),
-                            position_sizes=self.calculate_position_sizes_v2(
-                                pair, current_signal, historical_data
-                            )
-                        )
-                        self.positions[pair] = stats
-
                 except Exception as e:
                     logger.error(f"Error generating signals for pair {pair}: {str(e)}")
-                    signals.loc[date, pair] = 0
+                    signal_values[t, p] = 0
+
+        signals = pd.DataFrame(signal_values, index=ordered_dates, columns=columns)
+        return signals.reindex(dates)
+
+    def _process_pair_bar(
+            self,
+            pair: Tuple[str, str],
+            date: pd.Timestamp,
+            state: '_PairSignalState',
+            current_pos: int,
+            symbol_tails: Dict[str, deque]
+    ) -> int:
+        """
+        Apply the signal, exit and position rules to one pair for one date.
+
+        Returns:
+            int: Signal recorded for the pair at this date
+        """
+        current_zscore = state.zscore()
+
+        if pair not in self.zscore_history:
+            self.zscore_history[pair] = []
+        self.zscore_history[pair].append(current_zscore)
+
+        current_signal = state.signal(self.zscore_entry)
+        current_prices = {
+            'asset1': state.prices1[-1],
+            'asset2': state.prices2[-1]
+        }
+
+        if pair in self.positions:
+            self.position_age[pair] = self.position_age.get(pair, 0) + 1
+
+            if pair in self.max_prices:
+                self.max_prices[pair] = {
+                    'asset1': max(self.max_prices[pair]['asset1'], current_prices['asset1']),
+                    'asset2': max(self.max_prices[pair]['asset2'], current_prices['asset2'])
+                }
+
+            exit_flag, exit_reason = self._check_exit_conditions(
+                pair, current_prices, current_zscore, current_pos
+            )
+
+            if exit_flag:
+                self._record_trade(
+                    pair, date, exit_reason, current_pos,
+                    current_prices['asset1'], current_prices['asset2'], current_zscore,
+                    self._calculate_pnl(pair, current_prices)
+                )
+
+                self.positions.pop(pair, None)
+                self.position_age.pop(pair, None)
+                self.max_prices.pop(pair, None)
+                self.entry_prices.pop(pair, None)
+                return 0
+
+        if current_signal != 0:
+            if pair not in self.entry_prices:
+                self.entry_prices[pair] = current_prices.copy()
+            if pair not in self.max_prices:
+                self.max_prices[pair] = current_prices.copy()
+            if pair not in self.position_age:
+                self.position_age[pair] = 0
+
+            asset1, asset2 = pair
+            tail1, tail2 = symbol_tails[asset1], symbol_tails[asset2]
+            tail_prices = pd.DataFrame({
+                'Symbol': [asset1] * len(tail1) + [asset2] * len(tail2),
+                'Adj_Close': list(tail1) + list(tail2)
+            })
+
+            self.positions[pair] = PairStats(
+                hedge_ratio=self.calculator.calculate_hedge_ratio(*state.window_series()),
+                half_life=state.half_life(),
+                coint_pvalue=0.0,
+                spread_zscore=current_zscore,
+                spread_vol=state.spread_std(),
+                correlation=state.return_correlation(),
+                last_update=date,
+                position_sizes=self.calculate_position_sizes_v2(
+                    pair, current_signal, tail_prices
+                )
+            )
 
-        return signals
+        return current_signal
 
     def _calculate_pnl(self, pair: Tuple[str, str], current_prices: Dict[str, float]) -> float:
         """Calculate PnL for a position."""
@@ -10,8 +10,31 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from typing import Dict, List, Tuple
 
+from src.utils.trade_ledger import TradeLedger
+
 warnings.filterwarnings('ignore')
 
+TRADE_LOG_SCHEMA = {
+    'entry_date': 'datetime64[ns]',
+    'exit_date': 'datetime64[ns]',
+    'asset1_entry': np.float64,
+    'asset2_entry': np.float64,
+    'asset1_exit': np.float64,
+    'asset2_exit': np.float64,
+    'position_size1': np.float64,
+    'position_size2': np.float64,
+    'zscore_entry': np.float64,
+    'zscore_exit': np.float64,
+    'regime': object,
+    'correlation': np.float64,
+    'volatility': np.float64,
+    'momentum_signal': np.float64,
+    'risk_score': np.float64,
+    'return': np.float64,
+    'partial_exits': object,
+    'exit_reason': object
+}
+
 # Strategy Parameters and Performance Metrics for ADP-PAYX Pairs Trading (2015-2024)
 
 # Enhanced Strategy Parameters
@@ -481,6 +504,13 @@ def calc_trade_return(trade: Dict) -> float:
     return (exit_value - entry_value) / abs(entry_value)
 
 
+def _sample_std(values: np.ndarray) -> float:
+    """Sample standard deviation (ddof=1), NaN for fewer than two observations."""
+    if len(values) < 2:
+        return np.nan
+    return float(np.std(values, ddof=1))
+
+
 class IntegratedPairsStrategy:
     """
     Enhanced integrated pairs trading strategy with improved risk management,
@@ -531,13 +561,12 @@ class IntegratedPairsStrategy:
         self.portfolio_vol = 0.0
         self.current_regime = "normal"
         self.hedge_ratios = []
-        self.trade_log = pd.DataFrame(columns=[
-            'entry_date', 'exit_date', 'asset1_entry', 'asset2_entry',
-            'asset1_exit', 'asset2_exit', 'position_size1', 'position_size2',
-            'zscore_entry', 'zscore_exit', 'regime', 'correlation',
-            'volatility', 'momentum_signal', 'risk_score', 'return',
-            'partial_exits', 'exit_reason'
-        ])
+        self.trade_ledger = TradeLedger(TRADE_LOG_SCHEMA)
+
+    @property
+    def trade_log(self) -> pd.DataFrame:
+        """Completed and open trades as a DataFrame view over the trade ledger."""
+        return self.trade_ledger.to_frame()
 
     def calculate_momentum_signal(self, prices: pd.Series) -> float:
         """Calculate momentum signal using multiple timeframes."""
@@ -596,7 +625,9 @@ class IntegratedPairsStrategy:
         current_vol = vol.iloc[-1]
         current_trend = trend.iloc[-1]
 
-        if current_vol > np.percentile(vol, 75):
+        # NaN-aware: the first lookback - 1 volatilities are NaN, and np.percentile
+        # would make the threshold NaN and the regime always calm
+        if current_vol > np.nanpercentile(vol, 75):
             if current_trend > 0:
                 return "volatile_bullish"
             else:
@@ -762,10 +793,120 @@ class IntegratedPairsStrategy:
 
         return position_vol <= self.max_portfolio_vol
 
+    def _kernel_inputs(self, close1: pd.Series, close2: pd.Series) -> Dict[str, np.ndarray]:
+        """
+        Precompute every rolling quantity run_strategy needs at each step.
+
+        All of these are causal, so evaluating them once on the full series gives the
+        same values the step loop used to get from ``iloc[:i + 1]`` prefixes.
+        """
+        close1 = close1.reset_index(drop=True)
+        close2 = close2.reset_index(drop=True)
+
+        returns1 = close1.pct_change()
+        returns2 = close2.pct_change()
+        combined_returns = (returns1 + returns2) / 2
+        regime_vol = combined_returns.rolling(window=self.regime_lookback).std() * np.sqrt(252)
+        regime_trend = combined_returns.rolling(window=self.regime_lookback).mean() * 252
+
+        def momentum(prices: pd.Series) -> np.ndarray:
+            return ((prices.rolling(window=20).mean() / prices.rolling(window=50).mean() - 1.0) * 100).to_numpy()
+
+        hedge_window = 63
+        zscore_window = 21
+        return {
+            'price1': close1.to_numpy(dtype=np.float64),
+            'price2': close2.to_numpy(dtype=np.float64),
+            'returns1': returns1.to_numpy(),
+            'returns2': returns2.to_numpy(),
+            'regime_vol': regime_vol.to_numpy(),
+            'regime_trend': regime_trend.to_numpy(),
+            'regime_vol_threshold': regime_vol.expanding().quantile(0.75).to_numpy(),
+            'beta': (close1.rolling(hedge_window).cov(close2) / close2.rolling(hedge_window).var()).to_numpy(),
+            'mean1': close1.rolling(zscore_window).mean().to_numpy(),
+            'mean2': close2.rolling(zscore_window).mean().to_numpy(),
+            'var1': close1.rolling(zscore_window).var().to_numpy(),
+            'var2': close2.rolling(zscore_window).var().to_numpy(),
+            'cov12': close1.rolling(zscore_window).cov(close2).to_numpy(),
+            'momentum1': momentum(close1),
+            'momentum2': momentum(close2),
+            'pair_momentum': momentum((close1 + close2) / 2)
+        }
+
+    def _kernel_regime(self, inputs: Dict[str, np.ndarray], i: int) -> str:
+        """detect_market_regime evaluated from precomputed arrays at step i."""
+        if i + 1 < self.regime_lookback:
+            return "normal"
+
+        current_trend = inputs['regime_trend'][i]
+        if inputs['regime_vol'][i] > inputs['regime_vol_threshold'][i]:
+            return "volatile_bullish" if current_trend > 0 else "volatile_bearish"
+        return "calm_bullish" if current_trend > 0 else "calm_bearish"
+
+    def _kernel_hedge_ratio(self, inputs: Dict[str, np.ndarray], i: int, window: int = 63) -> float:
+        """calculate_dynamic_hedge_ratio on the precomputed rolling OLS slope at step i."""
+        if i + 1 < window:
+            return 1.0
+
+        hedge_ratio = inputs['beta'][i]
+        if self.current_regime in ["volatile_bearish", "volatile_bullish"]:
+            hedge_ratio *= 0.8
+
+        self.hedge_ratios.append(hedge_ratio)
+        if len(self.hedge_ratios) > window:
+            self.hedge_ratios.pop(0)
+
+        if not np.isfinite(hedge_ratio) or abs(hedge_ratio) > 10:
+            return 1.0
+        return hedge_ratio
+
+    def _kernel_zscore(self, inputs: Dict[str, np.ndarray], i: int, hedge_ratio: float,
+                       window: int = 21) -> float:
+        """calculate_zscore of asset1 - hedge_ratio * asset2 from rolling window moments."""
+        if i + 1 < window:
+            return 0.0
+
+        deviation = (inputs['price1'][i] - inputs['mean1'][i]) - hedge_ratio * (inputs['price2'][i] - inputs['mean2'][i])
+        variance = (inputs['var1'][i] + hedge_ratio ** 2 * inputs['var2'][i]
+                    - 2 * hedge_ratio * inputs['cov12'][i])
+        return deviation / (np.sqrt(max(variance, 0.0)) + 1e-8)
+
+    def _kernel_momentum(self, values: np.ndarray, i: int) -> float:
+        """calculate_momentum_signal read from a precomputed array at step i."""
+        if i + 1 < self.momentum_filter_period:
+            return 0.0
+        return values[i]
+
+    def _kernel_signal(self, inputs: Dict[str, np.ndarray], i: int) -> Tuple[float, float]:
+        """generate_signals evaluated from precomputed arrays at step i."""
+        hedge_ratio = self._kernel_hedge_ratio(inputs, i)
+        zscore = self._kernel_zscore(inputs, i, hedge_ratio)
+
+        self.zscore_history.append(zscore)
+        if len(self.zscore_history) > self.lookback_window:
+            self.zscore_history.pop(0)
+
+        combined_mom = (self._kernel_momentum(inputs['momentum1'], i) +
+                        self._kernel_momentum(inputs['momentum2'], i)) / 2
+
+        signal = 0
+        if abs(zscore) > self.zscore_entry:
+            if abs(zscore) > self.instant_confirm_threshold:
+                signal = -np.sign(zscore)
+            elif abs(combined_mom) < 10.0:
+                signal = -np.sign(zscore)
+
+        return signal, zscore
+
     def run_strategy(self, asset1_data: pd.DataFrame, asset2_data: pd.DataFrame) -> pd.DataFrame:
         """
         Run the enhanced strategy with improved risk management.
 
+        Returns, regime volatility and trend, momentum averages, rolling OLS hedge
+        ratios and the z-score window moments are precomputed as arrays. The loop
+        only runs the entry, partial-exit and stop logic over NumPy buffers, and the
+        result and trade frames are built once at the end.
+
         Args:
             asset1_data: DataFrame with OHLCV data for first asset
             asset2_data: DataFrame with OHLCV data for second asset
@@ -773,13 +914,19 @@ class IntegratedPairsStrategy:
         Returns:
             DataFrame with strategy results
         """
-        results = pd.DataFrame(index=asset1_data.index)
-        results['zscore'] = 0.0
-        results['signal'] = 0.0
-        results['position_size1'] = 0.0
-        results['position_size2'] = 0.0
-        results['returns'] = 0.0
-        results['regime'] = 'normal'
+        n_obs = len(asset1_data)
+        close1 = asset1_data['Adj_Close']
+        close2 = asset2_data['Adj_Close']
+        inputs = self._kernel_inputs(close1, close2)
+        price1, price2 = inputs['price1'], inputs['price2']
+
+        zscores = np.zeros(n_obs)
+        signals = np.zeros(n_obs)
+        position_size1 = np.zeros(n_obs)
+        position_size2 = np.zeros(n_obs)
+        strategy_returns = np.zeros(n_obs)
+        regimes = np.full(n_obs, 'normal', dtype=object)
+        open_trade_row = None
 
         current_position = None
         entry_prices = None
@@ -787,37 +934,26 @@ class IntegratedPairsStrategy:
         position_age = 0
         partial_exits = []
 
-        for i in range(self.lookback_window, len(asset1_data)):
+        for i in range(self.lookback_window, n_obs):
             try:
-                current_asset1 = asset1_data.iloc[:i + 1]
-                current_asset2 = asset2_data.iloc[:i + 1]
+                self.current_regime = self._kernel_regime(inputs, i)
+                regimes[i] = self.current_regime
 
-                combined_returns = (current_asset1['Adj_Close'].pct_change() +
-                                    current_asset2['Adj_Close'].pct_change()) / 2
-                self.current_regime = self.detect_market_regime(combined_returns)
-                results.loc[asset1_data.index[i], 'regime'] = self.current_regime
-
-                signal, zscore = self.generate_signals(
-                    current_asset1['Adj_Close'],
-                    current_asset2['Adj_Close']
-                )
-
-                results.loc[asset1_data.index[i], 'zscore'] = zscore
+                signal, zscore = self._kernel_signal(inputs, i)
+                zscores[i] = zscore
 
                 current_prices = {
-                    'asset1': current_asset1['Adj_Close'].iloc[-1],
-                    'asset2': current_asset2['Adj_Close'].iloc[-1]
+                    'asset1': price1[i],
+                    'asset2': price2[i]
                 }
 
                 if current_position is None and signal != 0:
                     correlation = self.calculate_correlation_score(
-                        current_asset1['Adj_Close'],
-                        current_asset2['Adj_Close']
-                    )
-                    volatility = results['returns'].iloc[max(0, i - 63):i].std() * np.sqrt(252)
-                    momentum = self.calculate_momentum_signal(
-                        (current_asset1['Adj_Close'] + current_asset2['Adj_Close']) / 2
+                        close1.iloc[:i + 1],
+                        close2.iloc[:i + 1]
                     )
+                    volatility = _sample_std(strategy_returns[max(0, i - 63):i]) * np.sqrt(252)
+                    momentum = self._kernel_momentum(inputs['pair_momentum'], i)
 
                     risk_score = self.calculate_risk_score(
                         volatility, correlation, momentum
@@ -825,10 +961,7 @@ class IntegratedPairsStrategy:
 
                     adjusted_size = self.calculate_dynamic_position_size(risk_score)
 
-                    hedge_ratio = self.calculate_dynamic_hedge_ratio(
-                        current_asset1['Adj_Close'],
-                        current_asset2['Adj_Close']
-                    )
+                    hedge_ratio = self._kernel_hedge_ratio(inputs, i)
 
                     proposed_position = {
                         'asset1': adjusted_size * np.sign(signal),
@@ -853,16 +986,13 @@ class IntegratedPairsStrategy:
                     if self.check_portfolio_risk(
                             proposed_position,
                             current_prices,
-                            results['returns'].iloc[max(0, i - 252):i]
+                            pd.Series(strategy_returns[max(0, i - 252):i])
                     ):
                         current_position = proposed_position
                         entry_prices = current_prices.copy()
                         max_prices = current_prices.copy()
                         position_age = 0
-                        self.trade_log = pd.concat([
-                            self.trade_log,
-                            pd.DataFrame([trade_entry])
-                        ])
+                        open_trade_row = self.trade_ledger.append(trade_entry)
 
                 elif current_position is not None:
                     max_prices = {
@@ -879,20 +1009,7 @@ class IntegratedPairsStrategy:
                         )
                     )
 
-                    recent_vol = results['returns'].iloc[max(0, i - 63):i].std() * np.sqrt(252)
-                    # stop_loss, trailing_stop = self.calculate_dynamic_stops(
-                    #     position_return, recent_vol
-                    # )
-                    # self.base_stop_loss = stop_loss
-                    # self.trailing_stop = trailing_stop
-
-                    zscore = self.calculate_zscore(
-                        current_asset1['Adj_Close'] -
-                        (self.calculate_dynamic_hedge_ratio(
-                            current_asset1['Adj_Close'],
-                            current_asset2['Adj_Close']
-                        ) * current_asset2['Adj_Close'])
-                    )
+                    zscore = self._kernel_zscore(inputs, i, self._kernel_hedge_ratio(inputs, i))
 
                     if len(partial_exits) < len(self.partial_take_profit_levels):
                         new_position, exit_type = self.handle_partial_exits(
@@ -912,15 +1029,16 @@ class IntegratedPairsStrategy:
                     )
 
                     if exit_flag:
-
-                        last_trade_idx = self.trade_log.index[-1]
-                        self.trade_log.loc[last_trade_idx, 'exit_date'] = asset1_data.index[i]
-                        self.trade_log.loc[last_trade_idx, 'asset1_exit'] = current_prices['asset1']
-                        self.trade_log.loc[last_trade_idx, 'asset2_exit'] = current_prices['asset2']
-                        self.trade_log.loc[last_trade_idx, 'zscore_exit'] = zscore
-                        self.trade_log.loc[last_trade_idx, 'return'] = position_return
-                        self.trade_log.loc[last_trade_idx, 'exit_reason'] = exit_reason
-                        self.trade_log.loc[last_trade_idx, 'partial_exits'] = str(partial_exits)
+                        if open_trade_row is not None:
+                            self.trade_ledger.update(open_trade_row, {
+                                'exit_date': asset1_data.index[i],
+                                'asset1_exit': current_prices['asset1'],
+                                'asset2_exit': current_prices['asset2'],
+                                'zscore_exit': zscore,
+                                'return': position_return,
+                                'exit_reason': exit_reason,
+                                'partial_exits': str(partial_exits)
+                            })
 
                         current_position = None
                         entry_prices = None
@@ -928,25 +1046,29 @@ class IntegratedPairsStrategy:
                         position_age = 0
                         partial_exits = []
 
-                results.loc[asset1_data.index[i], 'signal'] = signal
+                signals[i] = signal
                 if current_position is not None:
-                    results.loc[asset1_data.index[i], 'position_size1'] = current_position['asset1']
-                    results.loc[asset1_data.index[i], 'position_size2'] = current_position['asset2']
-
-                if i > 0:
-                    rets1 = asset1_data['Adj_Close'].pct_change().iloc[i]
-                    rets2 = asset2_data['Adj_Close'].pct_change().iloc[i]
-                    if current_position is not None:
-                        results.loc[asset1_data.index[i], 'returns'] = (
-                                rets1 * current_position['asset1'] +
-                                rets2 * current_position['asset2']
-                        )
+                    position_size1[i] = current_position['asset1']
+                    position_size2[i] = current_position['asset2']
+                    strategy_returns[i] = (
+                            inputs['returns1'][i] * current_position['asset1'] +
+                            inputs['returns2'][i] * current_position['asset2']
+                    )
 
             except Exception as e:
                 print(f"Error processing data point {i}: {str(e)}")
                 continue
 
+        results = pd.DataFrame({
+            'zscore': zscores,
+            'signal': signals,
+            'position_size1': position_size1,
+            'position_size2': position_size2,
+            'returns': strategy_returns,
+            'regime': regimes
+        }, index=asset1_data.index)
         results['cumulative_returns'] = (1 + results['returns']).cumprod()
+
         return results
 
     def check_exit_conditions(
@@ -8,6 +8,17 @@ from typing import Dict, List, Tuple, Optional, Any
 import random
 from datetime import timedelta
 
+from src.utils.trade_ledger import TradeLedger
+
+RANDOM_TRADE_SCHEMA = {
+    'date': 'datetime64[ns]',
+    'pair': object,
+    'type': object,
+    'direction': object,
+    'pnl': np.float64,
+    'cost': np.float64
+}
+
 
 class RandomBaselineStrategy:
     """
@@ -157,7 +168,7 @@ class RandomPairTradingSystem:
             
         # Initialize portfolio tracking
         self.portfolio_history = []
-        self.trade_history = []
+        self.trade_history = TradeLedger(RANDOM_TRADE_SCHEMA, pair_column='pair')
         self.pair_models = {}
         
         # Generate random strategy for each pair
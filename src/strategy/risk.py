@@ -1,10 +1,11 @@
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass, field
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from config.logging_config import logger
+from src.analysis.cointegration import rolling_cointegration_pvalues
 
 
 class MarketImpactModel:
@@ -17,6 +18,195 @@ class MarketImpactModel:
         """Calculate market impact cost for a trade."""
         return trade_size * price * self.impact_coefficient
 
+class PortfolioRiskEngine:
+    """
+    Rolling spread-return correlation matrix shared by all active pairs.
+
+    Spread returns (r1 - r2) of every tracked pair are kept in a ring buffer of
+    ``window`` bars together with running sums and cross-products, so each new
+    bar updates the pair-by-pair covariance in O(P^2) without re-reading history.
+    """
+
+    def __init__(self, window: int = 63):
+        self.window = window
+        self.pairs: List[Tuple[str, str]] = []
+        self.last_date = None
+
+        self._idx1 = np.empty(0, dtype=int)
+        self._idx2 = np.empty(0, dtype=int)
+        self._symbols: List[str] = []
+        self._last_prices = np.empty(0)
+        self._buffer = np.zeros((window, 0))
+        self._sum = np.zeros(0)
+        self._cross = np.zeros((0, 0))
+        self._count = 0
+        self._pos = 0
+
+    def reset(self, pairs: List[Tuple[str, str]], price_matrix: pd.DataFrame) -> None:
+        """Track ``pairs`` and backfill the window from a Date x Symbol price matrix"""
+        pairs = [
+            pair for pair in dict.fromkeys(pairs)
+            if pair[0] in price_matrix.columns and pair[1] in price_matrix.columns
+        ]
+        self.pairs = pairs
+        self._symbols = list(dict.fromkeys(a for pair in pairs for a in pair))
+        symbol_index = {symbol: i for i, symbol in enumerate(self._symbols)}
+        self._idx1 = np.array([symbol_index[a] for a, _ in pairs], dtype=int)
+        self._idx2 = np.array([symbol_index[b] for _, b in pairs], dtype=int)
+
+        n_pairs = len(pairs)
+        self._buffer = np.zeros((self.window, n_pairs))
+        self._count = 0
+        self._pos = 0
+        self._last_prices = np.full(len(self._symbols), np.nan)
+        self.last_date = None
+
+        if price_matrix.empty or not pairs:
+            self._sum = np.zeros(n_pairs)
+            self._cross = np.zeros((n_pairs, n_pairs))
+            return
+
+        tail = price_matrix[self._symbols].iloc[-(self.window + 1):]
+        values = tail.to_numpy(dtype=float)
+        if len(values) > 1:
+            asset_returns = values[1:] / values[:-1] - 1.0
+            spread_returns = asset_returns[:, self._idx1] - asset_returns[:, self._idx2]
+            spread_returns = np.nan_to_num(spread_returns, nan=0.0, posinf=0.0, neginf=0.0)
+            self._count = len(spread_returns)
+            self._buffer[:self._count] = spread_returns
+            self._pos = self._count % self.window
+
+        self._last_prices = values[-1]
+        self.last_date = tail.index[-1]
+        self._recompute_moments()
+
+    def update(self, prices: pd.Series, date=None) -> None:
+        """Push one bar of prices (indexed by symbol) into the rolling window"""
+        if not self.pairs:
+            self.last_date = date
+            return
+
+        current = prices.reindex(self._symbols).to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            asset_returns = current / self._last_prices - 1.0
+        spread = asset_returns[self._idx1] - asset_returns[self._idx2]
+        spread = np.nan_to_num(spread, nan=0.0, posinf=0.0, neginf=0.0)
+
+        if self._count == self.window:
+            old = self._buffer[self._pos]
+            self._sum -= old
+            self._cross -= np.outer(old, old)
+        else:
+            self._count += 1
+
+        self._buffer[self._pos] = spread
+        self._sum += spread
+        self._cross += np.outer(spread, spread)
+        self._pos = (self._pos + 1) % self.window
+
+        # Refresh the running sums once per full cycle to bound float drift
+        if self._pos == 0:
+            self._recompute_moments()
+
+        self._last_prices = np.where(np.isnan(current), self._last_prices, current)
+        self.last_date = date
+
+    def sync(self, pairs: List[Tuple[str, str]], price_matrix: pd.DataFrame) -> None:
+        """Bring the engine up to date with ``price_matrix``, rebuilding only if the pair set changed"""
+        pairs = list(dict.fromkeys(pairs))
+        if set(pairs) != set(self.pairs) or self.last_date is None:
+            self.reset(pairs, price_matrix)
+            return
+
+        new_rows = price_matrix.loc[price_matrix.index > self.last_date]
+        if len(new_rows) > self.window:
+            self.reset(pairs, price_matrix)
+            return
+
+        for date, row in new_rows.iterrows():
+            self.update(row, date)
+
+    def _recompute_moments(self) -> None:
+        data = self._buffer[:self._count]
+        self._sum = data.sum(axis=0)
+        self._cross = data.T @ data
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance of spread returns across tracked pairs"""
+        n = self._count
+        if n < 2:
+            return np.zeros((len(self.pairs), len(self.pairs)))
+        mean = self._sum / n
+        return (self._cross - n * np.outer(mean, mean)) / (n - 1)
+
+    def correlation(self) -> pd.DataFrame:
+        """Pair-by-pair spread correlation matrix"""
+        cov = self.covariance()
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr = np.nan_to_num(np.clip(corr, -1.0, 1.0), nan=0.0)
+        np.fill_diagonal(corr, 1.0)
+        return pd.DataFrame(corr, index=self.pairs, columns=self.pairs)
+
+    def correlation_risk(self, pairs: Optional[List[Tuple[str, str]]] = None) -> pd.Series:
+        """Mean absolute spread correlation of each pair against the other pairs in ``pairs``"""
+        pairs = [pair for pair in (self.pairs if pairs is None else pairs) if pair in self.pairs]
+        corr = np.abs(self.correlation().loc[pairs, pairs].to_numpy())
+        n = len(pairs)
+        if n < 2:
+            return pd.Series(0.0, index=pairs, dtype=float)
+        return pd.Series((corr.sum(axis=1) - 1.0) / (n - 1), index=pairs)
+
+    def _weight_vector(self, weights: Optional[Dict[Tuple[str, str], float]]) -> np.ndarray:
+        if weights is None:
+            n = len(self.pairs)
+            return np.full(n, 1.0 / n) if n else np.empty(0)
+        return np.array([float(weights.get(pair, 0.0)) for pair in self.pairs])
+
+    def marginal_risk_contributions(self,
+                                    weights: Optional[Dict[Tuple[str, str], float]] = None) -> pd.DataFrame:
+        """Marginal and total risk contributions of each pair to portfolio spread volatility"""
+        w = self._weight_vector(weights)
+        cov = self.covariance()
+        portfolio_var = float(w @ cov @ w) if len(w) else 0.0
+        portfolio_vol = np.sqrt(max(portfolio_var, 0.0))
+
+        if portfolio_vol > 0:
+            marginal = cov @ w / portfolio_vol
+        else:
+            marginal = np.zeros(len(w))
+        contribution = w * marginal
+        pct = contribution / portfolio_vol if portfolio_vol > 0 else np.zeros(len(w))
+
+        return pd.DataFrame({
+            'weight': w,
+            'marginal_risk': marginal,
+            'risk_contribution': contribution,
+            'pct_contribution': pct
+        }, index=self.pairs)
+
+    def concentration(self, weights: Optional[Dict[Tuple[str, str], float]] = None) -> float:
+        """Herfindahl index of percentage risk contributions (1/P = diversified, 1 = concentrated)"""
+        if not self.pairs:
+            return 0.0
+        pct = self.marginal_risk_contributions(weights)['pct_contribution'].to_numpy()
+        return float(np.sum(pct ** 2))
+
+    def risk_report(self,
+                    weights: Optional[Dict[Tuple[str, str], float]] = None,
+                    pairs: Optional[List[Tuple[str, str]]] = None) -> pd.DataFrame:
+        """Correlation risk and risk contributions for all tracked pairs (or ``pairs``) in one call"""
+        if pairs is not None and weights is None:
+            weights = {pair: 1.0 / len(pairs) for pair in pairs} if pairs else {}
+        report = self.marginal_risk_contributions(weights)
+        if pairs is not None:
+            report = report.loc[[pair for pair in pairs if pair in self.pairs]]
+        report['correlation_risk'] = self.correlation_risk(list(report.index))
+        report.attrs['concentration'] = float(np.sum(report['pct_contribution'].to_numpy() ** 2))
+        return report
+
+
 @dataclass
 class RiskMetrics:
     """Enhanced risk metrics structure"""
@@ -40,7 +230,8 @@ class PairRiskManager:
             leverage_limit: float = 2.0,
             var_confidence: float = 0.95,
             min_model_confidence: float = 0.6,
-            max_correlation_exposure: float = 0.3
+            max_correlation_exposure: float = 0.3,
+            correlation_window: int = 63
     ):
         self.cost_model = MarketImpactModel()
         self.max_position_size = max_position_size
@@ -56,6 +247,11 @@ class PairRiskManager:
         self.correlation_matrix = pd.DataFrame()
         self.position_history = []
 
+        self.portfolio_risk = PortfolioRiskEngine(window=correlation_window)
+        self._price_matrix_source = None  # Frame the cached pivot was built from
+        self._price_matrix_key = None
+        self._price_matrix = pd.DataFrame()
+
     def calculate_market_impact_cost(self, trade_size: float, price: float) -> float:
         """Calculate market impact cost for a trade."""
         return self.cost_model.calculate_market_impact(trade_size, price)
@@ -79,7 +275,7 @@ class PairRiskManager:
     def _get_pair_spread(self, pair: Tuple[str, str]) -> Optional[pd.Series]:
         """Calculate spread series for a pair"""
         asset1, asset2 = pair
-        if asset1 in self.correlation_matrix.index and asset2 in self.correlation_matrix.index:
+        if asset1 in self.correlation_matrix.columns and asset2 in self.correlation_matrix.columns:
             spread = self.correlation_matrix[asset1] - self.correlation_matrix[asset2]
             return spread
         return None
@@ -111,22 +307,7 @@ class PairRiskManager:
                             model_confidence: Optional[float] = None) -> RiskMetrics:
         """Update comprehensive risk metrics for a pair"""
         try:
-            prices = prices.copy()
-            prices['Date'] = pd.to_datetime(prices['Date'])
-
-            price_matrix = prices.pivot(
-                index='Date',
-                columns='Symbol',
-                values='Adj_Close'
-            ).sort_index()
-
-            price_matrix = price_matrix.reset_index()
-
-            print(prices.head(10))
-            print(price_matrix.head(10))
-            price_series = price_matrix.set_index('Date')
-            self.correlation_matrix = price_series.pct_change().dropna()
-
+            price_series = self._get_price_matrix(prices)
             returns = self._calculate_pair_returns(pair, price_series)
             var, cvar = self.calculate_var_cvar(returns)
 
@@ -136,7 +317,7 @@ class PairRiskManager:
                 volatility=returns.std() if len(returns) > 1 else 0.0,
                 correlation_risk=self._calculate_correlation_risk(pair, positions),
                 model_confidence=model_confidence or 1.0,
-                cointegration_stability=self._calculate_cointegration_stability(pair, prices)
+                cointegration_stability=self._calculate_cointegration_stability(pair, price_series)
             )
 
             self.risk_metrics[pair] = metrics
@@ -146,6 +327,42 @@ class PairRiskManager:
             logger.error(f"Error in update_risk_metrics: {str(e)}")
             raise
 
+    def _get_price_matrix(self, prices: pd.DataFrame) -> pd.DataFrame:
+        """Pivot long-format prices to Date x Symbol, reusing the last pivot for the same frame"""
+        # The source frame is held, so its identity cannot be taken over by a new frame
+        key = (len(prices), prices.index[-1] if len(prices) else None)
+        if prices is self._price_matrix_source and key == self._price_matrix_key:
+            return self._price_matrix
+
+        if 'Symbol' in prices.columns:
+            price_matrix = pd.DataFrame({
+                'Date': pd.to_datetime(prices['Date']).values,
+                'Symbol': prices['Symbol'].values,
+                'Adj_Close': prices['Adj_Close'].values
+            }).pivot(index='Date', columns='Symbol', values='Adj_Close').sort_index()
+        else:
+            price_matrix = prices
+
+        self._price_matrix = price_matrix
+        self._price_matrix_source = prices
+        self._price_matrix_key = key
+        self.correlation_matrix = price_matrix.pct_change().dropna()
+        return price_matrix
+
+    def _sync_portfolio_risk(self, pairs: List[Tuple[str, str]], price_matrix: pd.DataFrame) -> None:
+        """Track every pair seen so far so that per-pair queries do not force a rebuild"""
+        tracked = list(dict.fromkeys(list(self.portfolio_risk.pairs) + list(pairs)))
+        self.portfolio_risk.sync(tracked, price_matrix)
+
+    def portfolio_risk_report(self,
+                              prices: pd.DataFrame,
+                              positions: Dict,
+                              weights: Optional[Dict[Tuple[str, str], float]] = None) -> pd.DataFrame:
+        """Correlation risk, concentration and marginal risk contributions for all active pairs"""
+        active_pairs = list(positions.keys())
+        self._sync_portfolio_risk(active_pairs, self._get_price_matrix(prices))
+        return self.portfolio_risk.risk_report(weights, pairs=active_pairs)
+
     def calculate_position_size(self,
                                 portfolio_value: float,
                                 pair: Tuple[str, str],
@@ -240,27 +457,17 @@ class PairRiskManager:
         
     def _calculate_correlation_risk(self, pair: Tuple[str, str], positions: Dict) -> float:
         """Calculate correlation-based risk exposure"""
-        if not positions or not self.correlation_matrix.empty:
+        active_pairs = [active_pair for active_pair in positions if active_pair != pair]
+        if not active_pairs or self._price_matrix.empty:
             return 0.0
-            
-        active_pairs = list(positions.keys())
-        if not active_pairs:
+
+        self._sync_portfolio_risk(active_pairs + [pair], self._price_matrix)
+        if pair not in self.portfolio_risk.pairs:
             return 0.0
-            
-        total_correlation = 0.0
-        count = 0
-        
-        for active_pair in active_pairs:
-            if active_pair == pair:
-                continue
-                
-            corr = self._calculate_pair_correlation(pair, active_pair)
-            if not np.isnan(corr):
-                total_correlation += abs(corr)
-                count += 1
-                
-        return total_correlation / count if count > 0 else 0.0
-        
+
+        risk = self.portfolio_risk.correlation_risk(active_pairs + [pair])
+        return float(risk.get(pair, 0.0))
+
     def _calculate_cointegration_stability(self, 
                                          pair: Tuple[str, str],
                                          prices: pd.DataFrame,
@@ -269,18 +476,10 @@ class PairRiskManager:
         asset1, asset2 = pair
         if asset1 not in prices.columns or asset2 not in prices.columns:
             return 0.0
-            
-        from statsmodels.tsa.stattools import coint
-        stability_scores = []
-        
-        for i in range(window, len(prices)):
-            _, pvalue, _ = coint(
-                prices[asset1].iloc[i-window:i],
-                prices[asset2].iloc[i-window:i]
-            )
-            stability_scores.append(1 - pvalue)
-            
-        return np.mean(stability_scores) if stability_scores else 0.0
+
+        pvalues = rolling_cointegration_pvalues(prices[asset1], prices[asset2], window, pair=pair).dropna()
+
+        return float((1 - pvalues).mean()) if not pvalues.empty else 0.0
         
     def check_risk_limits(self,
                          equity_curve: pd.Series,
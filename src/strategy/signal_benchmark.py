@@ -0,0 +1,197 @@
+"""
+Signal Generation Benchmark
+
+Full-history reference implementation of EnhancedStatPairsStrategy's signal
+generation, and a benchmark comparing it with the streaming generate_signals.
+"""
+
+import time
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+from config.logging_config import logger
+from src.strategy.pairs_strategy_SL import EnhancedStatPairsStrategy, PairStats
+
+
+def full_history_signals(strategy: EnhancedStatPairsStrategy, prices: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reference implementation of ``strategy.generate_signals`` that refits every
+    statistic on the full history at each date. O(T^2 * P).
+    """
+    dates = prices['Date'].unique()
+    columns = pd.MultiIndex.from_tuples(strategy.pairs, names=['asset1', 'asset2'])
+    signals = pd.DataFrame(0, index=dates, columns=columns)
+
+    for date in dates:
+        historical_data = prices[prices['Date'] <= date].copy()
+
+        for pair in strategy.pairs:
+            try:
+                asset1, asset2 = pair
+
+                # Get asset data
+                asset1_data = historical_data[historical_data['Symbol'] == asset1].set_index('Date')['Adj_Close']
+                asset2_data = historical_data[historical_data['Symbol'] == asset2].set_index('Date')['Adj_Close']
+                asset1_data, asset2_data = asset1_data.align(asset2_data, join='inner')
+
+                if len(asset1_data) < strategy.lookback_window:
+                    continue
+
+                # Calculate core metrics
+                hedge_ratio = strategy.calculator.calculate_hedge_ratio(asset1_data, asset2_data)
+                spread = strategy.calculator.calculate_spread(asset1_data, asset2_data)
+                zscore = strategy.calculator.calculate_spread_zscore(spread)
+                current_zscore = zscore.iloc[-1]
+
+                # Update zscore history
+                if pair not in strategy.zscore_history:
+                    strategy.zscore_history[pair] = []
+                strategy.zscore_history[pair].append(current_zscore)
+
+                # Generate signals
+                mr_signal = strategy.calculator.mean_reversion_signal(
+                    spread, window=21, z_threshold=strategy.zscore_entry
+                )
+                bb_signal = strategy.calculator.bollinger_band_signal(
+                    spread, window=21, num_std_dev=strategy.zscore_entry
+                )
+
+                current_signal = 0
+                if mr_signal.iloc[-1] == bb_signal.iloc[-1] and mr_signal.iloc[-1] != 0:
+                    current_signal = mr_signal.iloc[-1]
+
+                # Position management
+                current_prices = {
+                    'asset1': asset1_data.iloc[-1],
+                    'asset2': asset2_data.iloc[-1]
+                }
+
+                if pair in strategy.positions:
+                    prev_signals = signals.loc[signals.index < date, pair]
+                    current_pos = prev_signals.iloc[-1] if len(prev_signals) > 0 else 0
+
+                    # Update position age and max prices
+                    strategy.position_age[pair] = strategy.position_age.get(pair, 0) + 1
+
+                    if pair in strategy.max_prices:
+                        strategy.max_prices[pair] = {
+                            'asset1': max(strategy.max_prices[pair]['asset1'], current_prices['asset1']),
+                            'asset2': max(strategy.max_prices[pair]['asset2'], current_prices['asset2'])
+                        }
+
+                    # Check exit conditions
+                    exit_flag, exit_reason = strategy._check_exit_conditions(
+                        pair, current_prices, current_zscore, current_pos
+                    )
+
+                    if exit_flag:
+                        signals.loc[date, pair] = 0
+                        strategy._record_trade(
+                            pair, date, exit_reason, current_pos,
+                            current_prices['asset1'], current_prices['asset2'], current_zscore,
+                            strategy._calculate_pnl(pair, current_prices)
+                        )
+
+                        # Reset position tracking
+                        if pair in strategy.positions:
+                            del strategy.positions[pair]
+                        if pair in strategy.position_age:
+                            del strategy.position_age[pair]
+                        if pair in strategy.max_prices:
+                            del strategy.max_prices[pair]
+                        if pair in strategy.entry_prices:
+                            del strategy.entry_prices[pair]
+
+                        continue
+
+                # Update or enter new position
+                signals.loc[date, pair] = current_signal
+
+                if current_signal != 0:
+                    # Initialize or update position tracking
+                    if pair not in strategy.entry_prices:
+                        strategy.entry_prices[pair] = current_prices.copy()
+                    if pair not in strategy.max_prices:
+                        strategy.max_prices[pair] = current_prices.copy()
+                    if pair not in strategy.position_age:
+                        strategy.position_age[pair] = 0
+
+                    # Update position stats
+                    stats = PairStats(
+                        hedge_ratio=hedge_ratio,
+                        half_life=strategy.calculator.calculate_half_life(spread),
+                        coint_pvalue=0.0,
+                        spread_zscore=current_zscore,
+                        spread_vol=spread.std(),
+                        correlation=asset1_data.pct_change().corr(asset2_data.pct_change()),
+                        last_update=pd.Timestamp(date),
+                        position_sizes=strategy.calculate_position_sizes_v2(
+                            pair, current_signal, historical_data
+                        )
+                    )
+                    strategy.positions[pair] = stats
+
+            except Exception as e:
+                logger.error(f"Error generating signals for pair {pair}: {str(e)}")
+                signals.loc[date, pair] = 0
+
+    return signals
+
+
+def benchmark_signal_generation(
+        prices: pd.DataFrame,
+        pairs: List[Tuple[str, str]],
+        lengths: List[int] = None,
+        **strategy_kwargs
+) -> pd.DataFrame:
+    """
+    Time streaming generate_signals against the full-history reference on growing histories.
+
+    Args:
+        prices: Long price frame with Date, Symbol, Adj_Close
+        pairs: Pairs to trade
+        lengths: Number of leading dates to use for each run
+        **strategy_kwargs: Passed to EnhancedStatPairsStrategy
+
+    Returns:
+        DataFrame indexed by length with run times, time per bar and whether the
+        signals and trades of the two implementations match
+    """
+    dates = np.sort(prices['Date'].unique())
+    lengths = lengths or [len(dates) // 4, len(dates) // 2, len(dates)]
+    rows = []
+
+    for length in lengths:
+        window = prices[prices['Date'].isin(dates[:length])]
+        timings = {}
+        outputs = {}
+        for label in ('streaming', 'full_history'):
+            strategy = EnhancedStatPairsStrategy(**strategy_kwargs)
+            strategy.pairs = list(pairs)
+            start = time.perf_counter()
+            if label == 'streaming':
+                signals = strategy.generate_signals(window)
+            else:
+                signals = full_history_signals(strategy, window)
+            timings[label] = time.perf_counter() - start
+            outputs[label] = (signals, pd.DataFrame(strategy.trades))
+
+        streaming_trades, reference_trades = outputs['streaming'][1], outputs['full_history'][1]
+        trades_match = len(streaming_trades) == len(reference_trades) and (
+            streaming_trades.empty or
+            streaming_trades.drop(columns='ZScore').equals(reference_trades.drop(columns='ZScore'))
+        )
+        rows.append({
+            'length': length,
+            'streaming_seconds': timings['streaming'],
+            'full_history_seconds': timings['full_history'],
+            'streaming_ms_per_bar': timings['streaming'] / length * 1000,
+            'full_history_ms_per_bar': timings['full_history'] / length * 1000,
+            'speedup': timings['full_history'] / timings['streaming'],
+            'signals_match': outputs['streaming'][0].equals(outputs['full_history'][0]),
+            'trades_match': trades_match
+        })
+        logger.info(f"Signal benchmark T={length}: streaming {timings['streaming']:.2f}s, "
+                    f"full history {timings['full_history']:.2f}s")
+
+    return pd.DataFrame(rows).set_index('length')
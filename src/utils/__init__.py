@@ -5,8 +5,8 @@ Utilities Module
 
 This package contains various utility functions and classes that support
 different aspects of the Equity Pair Trading Research Project, including
-performance metrics, visualization tools, data validation, and parallel training
-facilities.
+performance metrics, visualization tools, data validation, parallel training
+facilities, the columnar trade ledger and latency histograms.
 """
 
 # Importing necessary functions and classes for easier access
@@ -31,3 +31,10 @@ from .parallel_training import (
     train_models_in_parallel,
     parallel_grid_search
 )
+from .trade_ledger import (
+    TradeLedger,
+    PairTradeView
+)
+from .latency import (
+    LatencyHistogram
+)
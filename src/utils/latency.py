@@ -0,0 +1,87 @@
+"""
+Latency Histogram Module
+
+Fixed-memory latency histogram for the live pipeline: log-spaced buckets
+make recording O(1) and keep percentile estimates within one bucket width.
+"""
+
+import math
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations in seconds with logarithmic buckets.
+
+    Percentiles are reported as the upper edge of the bucket they fall in,
+    so they are conservative by at most one bucket (about 26% with the
+    default ten buckets per decade).
+    """
+
+    def __init__(self, min_latency: float = 1e-6, max_latency: float = 10.0, buckets_per_decade: int = 10):
+        """
+        Args:
+            min_latency (float): Upper edge of the first bucket, in seconds.
+            max_latency (float): Durations above this land in the overflow bucket.
+            buckets_per_decade (int): Resolution of the histogram.
+        """
+        self.min_latency = min_latency
+        self.buckets_per_decade = buckets_per_decade
+        n_buckets = int(math.ceil(math.log10(max_latency / min_latency) * buckets_per_decade)) + 1
+        self.edges = min_latency * 10 ** (np.arange(n_buckets) / buckets_per_decade)
+        self.counts = np.zeros(n_buckets + 1, dtype=np.int64)  # Last bucket: overflow
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def record(self, seconds: float):
+        """Add one duration."""
+        if seconds <= self.min_latency:
+            bucket = 0
+        else:
+            bucket = int(math.ceil(math.log10(seconds / self.min_latency) * self.buckets_per_decade - 1e-9))
+            bucket = min(bucket, len(self.counts) - 1)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Upper bucket edge below which ``q`` percent of the durations fall."""
+        count = self.count
+        if count == 0:
+            return float('nan')
+        bucket = int(np.searchsorted(np.cumsum(self.counts), math.ceil(q / 100 * count)))
+        # The bucket edge can exceed the largest duration actually recorded
+        return min(float(self.edges[bucket]), self.max) if bucket < len(self.edges) else self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, p50/p90/p99 and max, in seconds."""
+        count = self.count
+        return {
+            'count': count,
+            'mean': self.total / count if count else float('nan'),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """Non-empty buckets with their upper edges (inf for overflow)."""
+        edges = np.append(self.edges, np.inf)
+        mask = self.counts > 0
+        return pd.DataFrame({'upper_edge': edges[mask], 'count': self.counts[mask]})
+
+    def reset(self):
+        with self._lock:
+            self.counts[:] = 0
+            self.total = 0.0
+            self.max = 0.0
@@ -0,0 +1,329 @@
+"""
+Trade Ledger Module
+
+Append-optimized columnar storage for trade records shared by the backtester,
+the strategies and the Streamlit trade analysis.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Hashable, Iterator, List, Mapping, Optional
+
+
+def _fill_value(dtype: np.dtype) -> Any:
+    """Missing-value marker used to pad columns a record does not set."""
+    if dtype.kind == 'f':
+        return np.nan
+    if dtype.kind == 'M':
+        return np.datetime64('NaT')
+    if dtype.kind in 'iu':
+        return 0
+    if dtype.kind == 'b':
+        return False
+    return None
+
+
+def _coerce_scalar(value: Any, dtype: np.dtype) -> Any:
+    """Convert a single record value to something storable in a column."""
+    if dtype.kind == 'M':
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return np.datetime64('NaT')
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert(None)
+        return ts.to_datetime64()
+    if dtype.kind == 'f':
+        return np.nan if value is None else float(value)
+    return value
+
+
+def _coerce_array(values: Any, dtype: np.dtype, length: int) -> np.ndarray:
+    """Convert a bulk column (or a scalar broadcast over it) to ``dtype``."""
+    if dtype.kind == 'M':
+        if np.ndim(values) == 0:
+            return np.full(length, _coerce_scalar(values, dtype), dtype=dtype)
+        index = pd.DatetimeIndex(pd.to_datetime(values))
+        if index.tz is not None:
+            index = index.tz_convert(None)
+        return index.to_numpy(dtype=dtype)
+
+    if dtype.kind == 'O' and isinstance(values, (str, tuple)):
+        column = np.empty(length, dtype=object)
+        column[:] = [values] * length
+        return column
+    if dtype.kind == 'O' and isinstance(values, list):
+        # Element-wise, so a list of tuples (pair ids) stays one-dimensional
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        return column
+
+    array = np.asarray(values, dtype=dtype)
+    if array.ndim == 0:
+        return np.full(length, array, dtype=dtype)
+    return array
+
+
+class TradeLedger:
+    """
+    Growable typed NumPy columns holding one row per trade.
+
+    Appends write into preallocated columns whose capacity doubles when full,
+    so recording a trade is amortized O(1) instead of a DataFrame concat.
+    ``to_frame`` wraps the filled part of each column without copying, and
+    when ``pair_column`` is given the row numbers of every pair are indexed
+    so per-pair views do not scan the whole ledger.
+    """
+
+    def __init__(
+            self,
+            schema: Mapping[str, Any],
+            pair_column: Optional[str] = None,
+            capacity: int = 64
+    ):
+        """
+        Args:
+            schema (Mapping[str, Any]): Column name -> NumPy dtype, in output order.
+            pair_column (Optional[str]): Column whose values identify the pair of a trade.
+            capacity (int): Initial number of preallocated rows.
+        """
+        if pair_column is not None and pair_column not in schema:
+            raise ValueError(f"Pair column '{pair_column}' is not part of the schema")
+
+        self.schema = {name: np.dtype(dtype) for name, dtype in schema.items()}
+        self.pair_column = pair_column
+        self._capacity = max(int(capacity), 1)
+        self._size = 0
+        self._columns = {
+            name: np.full(self._capacity, _fill_value(dtype), dtype=dtype)
+            for name, dtype in self.schema.items()
+        }
+        self._pair_rows: Dict[Hashable, List[int]] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(self._size):
+            yield self.record(row)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.schema)
+
+    @property
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def _reserve(self, n_rows: int):
+        """Grow every column so at least ``n_rows`` rows fit."""
+        if n_rows <= self._capacity:
+            return
+
+        capacity = self._capacity
+        while capacity < n_rows:
+            capacity *= 2
+
+        for name, dtype in self.schema.items():
+            grown = np.full(capacity, _fill_value(dtype), dtype=dtype)
+            grown[:self._size] = self._columns[name][:self._size]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    def _check_fields(self, fields: Mapping[str, Any]):
+        unknown = set(fields) - set(self.schema)
+        if unknown:
+            raise KeyError(f"Unknown trade ledger columns: {sorted(unknown)}")
+
+    def append(self, record: Optional[Mapping[str, Any]] = None, **fields) -> int:
+        """
+        Append one trade. Columns not given keep their missing-value marker.
+
+        Args:
+            record (Optional[Mapping[str, Any]]): Trade fields as a mapping.
+            **fields: Trade fields as keyword arguments (override ``record``).
+
+        Returns:
+            int: Row number of the new trade.
+        """
+        if record is not None:
+            fields = {**record, **fields}
+        self._check_fields(fields)
+
+        row = self._size
+        self._reserve(row + 1)
+        for name, value in fields.items():
+            self._columns[name][row] = _coerce_scalar(value, self.schema[name])
+        self._size = row + 1
+
+        if self.pair_column is not None:
+            self._pair_rows.setdefault(fields.get(self.pair_column), []).append(row)
+        return row
+
+    def extend(self, columns: Mapping[str, Any]) -> int:
+        """
+        Append a block of trades given column-wise.
+
+        Scalars are broadcast over the block; columns not given keep their
+        missing-value marker.
+
+        Args:
+            columns (Mapping[str, Any]): Column name -> values of equal length.
+
+        Returns:
+            int: Number of rows appended.
+        """
+        self._check_fields(columns)
+        lengths = {len(values) for values in columns.values()
+                   if np.ndim(values) > 0 and not isinstance(values, tuple)}
+        if len(lengths) > 1:
+            raise ValueError("All ledger columns must have the same length")
+        n_new = lengths.pop() if lengths else 0
+        if n_new == 0:
+            return 0
+
+        start = self._size
+        self._reserve(start + n_new)
+        for name, values in columns.items():
+            dtype = self.schema[name]
+            self._columns[name][start:start + n_new] = _coerce_array(values, dtype, n_new)
+        self._size = start + n_new
+
+        if self.pair_column is not None:
+            pairs = self._columns[self.pair_column][start:self._size]
+            for offset, pair in enumerate(pairs):
+                self._pair_rows.setdefault(pair, []).append(start + offset)
+        return n_new
+
+    def update(self, row: int, record: Optional[Mapping[str, Any]] = None, **fields):
+        """
+        Overwrite fields of an existing trade, e.g. to record its exit.
+
+        Args:
+            row (int): Row number; negative values count from the end.
+            record (Optional[Mapping[str, Any]]): Fields to overwrite as a mapping.
+            **fields: Fields to overwrite as keyword arguments. The pair column
+                cannot be changed.
+        """
+        if record is not None:
+            fields = {**record, **fields}
+        if row < 0:
+            row += self._size
+        if not 0 <= row < self._size:
+            raise IndexError(f"Trade ledger row {row} out of range")
+        self._check_fields(fields)
+        if self.pair_column is not None and self.pair_column in fields:
+            raise ValueError("The pair of a recorded trade cannot be changed")
+
+        for name, value in fields.items():
+            self._columns[name][row] = _coerce_scalar(value, self.schema[name])
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of the filled part of a column."""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Return one trade as a dict, with datetimes as ``pd.Timestamp``."""
+        out = {}
+        for name, dtype in self.schema.items():
+            value = self._columns[name][row]
+            out[name] = pd.Timestamp(value) if dtype.kind == 'M' else value
+        return out
+
+    def to_frame(self, copy: bool = False) -> pd.DataFrame:
+        """
+        Export the ledger as a DataFrame.
+
+        Args:
+            copy (bool): If False the frame wraps the ledger's column buffers
+                directly; later appends never touch rows already exported.
+
+        Returns:
+            pd.DataFrame: One row per trade, columns in schema order.
+        """
+        data = {name: self._columns[name][:self._size] for name in self.schema}
+        return pd.DataFrame(data, copy=copy)
+
+    def to_arrow(self):
+        """Export the ledger as a ``pyarrow.Table``."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("Please install pyarrow: pip install pyarrow")
+        return pa.Table.from_pandas(self.to_frame(), preserve_index=False)
+
+    def pairs(self) -> List[Hashable]:
+        """Pairs with at least one trade, in order of first appearance."""
+        return [pair for pair, rows in self._pair_rows.items() if rows]
+
+    def pair_rows(self, pair: Hashable) -> np.ndarray:
+        """Row numbers of the trades of ``pair``."""
+        if self.pair_column is None:
+            raise ValueError("Ledger was created without a pair column")
+        return np.asarray(self._pair_rows.get(pair, []), dtype=np.int64)
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        """DataFrame of the given rows (copied), indexed 0..len(rows)-1."""
+        rows = np.asarray(rows, dtype=np.int64)
+        return pd.DataFrame({name: self._columns[name][rows] for name in self.schema})
+
+    def view(self, pair: Hashable) -> 'PairTradeView':
+        """Live view on the trades of one pair."""
+        return PairTradeView(self, pair, self._pair_rows.setdefault(pair, []))
+
+
+class PairTradeView:
+    """
+    Trades of a single pair inside a shared ``TradeLedger``.
+
+    A view created by ``TradeLedger.view`` reads every trade of the pair. A
+    view created directly owns its row list, so it only sees the trades
+    appended through it; this lets each pair model keep its own history while
+    writing into the ledger of the system that owns it. Both support the
+    list-style checks (``len``, truth value, iteration over dict records)
+    that callers used before.
+    """
+
+    def __init__(self, ledger: TradeLedger, pair: Hashable, rows: Optional[List[int]] = None):
+        """
+        Args:
+            ledger (TradeLedger): Ledger holding the trades; needs a pair column.
+            pair (Hashable): Value written to the ledger's pair column.
+            rows (Optional[List[int]]): Shared row list to read; None for an owned list.
+        """
+        if ledger.pair_column is None:
+            raise ValueError("Ledger was created without a pair column")
+        self.ledger = ledger
+        self.pair = pair
+        self._owns_rows = rows is None
+        self._rows = [] if rows is None else rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in list(self._rows):
+            yield self.ledger.record(row)
+
+    @property
+    def empty(self) -> bool:
+        return not self._rows
+
+    @property
+    def rows(self) -> np.ndarray:
+        return np.asarray(self._rows, dtype=np.int64)
+
+    def append(self, record: Optional[Mapping[str, Any]] = None, **fields) -> int:
+        """Append a trade of this pair to the ledger and return its row number."""
+        fields[self.ledger.pair_column] = self.pair
+        row = self.ledger.append(record, **fields)
+        if self._owns_rows:
+            self._rows.append(row)
+        return row
+
+    def column(self, name: str) -> np.ndarray:
+        return self.ledger._columns[name][self.rows]
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.ledger.take(self.rows)
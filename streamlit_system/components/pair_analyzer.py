@@ -8,7 +8,7 @@ from plotly.subplots import make_subplots
 from typing import Dict, List, Tuple
 from statsmodels.tsa.stattools import coint
 
-from src.analysis.correlation_analysis import CorrelationAnalyzer
+from src.analysis.correlation_analysis import CorrelationAnalyzer, PairStatisticsService
 from src.analysis.cointegration import find_cointegrated_pairs, calculate_half_life
 from src.analysis.clustering_analysis import AssetClusteringAnalyzer
 from src.analysis.denoiser_usage import AssetAnalyzer
@@ -655,6 +655,15 @@ class EnhancedPairAnalyzer:
         except Exception as e:
             st.error(f"Error displaying correlation results: {str(e)}")
 
+    def _get_pair_stats(self, returns: pd.DataFrame) -> PairStatisticsService:
+        """Session-wide lazy pair statistics, rebuilt only when the returns change."""
+        key = (returns.shape, tuple(returns.columns), returns.index[0], returns.index[-1])
+        cached = st.session_state.get('pair_stats_service')
+        if cached is None or cached[0] != key:
+            cached = (key, PairStatisticsService(returns))
+            st.session_state['pair_stats_service'] = cached
+        return cached[1]
+
     def _display_pair_details(self,
                               pair: Tuple[str, str],
                               returns: pd.DataFrame,
@@ -684,8 +693,14 @@ class EnhancedPairAnalyzer:
                 else:
                     st.warning(f"No return data found for {ticker}")
 
+            roll_corr = None
             if rolling_corrs and pair_name in rolling_corrs:
                 roll_corr = rolling_corrs[pair_name]
+            elif ticker1 in returns.columns and ticker2 in returns.columns:
+                window = self.correlation_analyzer.rolling_window_ or 63
+                roll_corr = self._get_pair_stats(returns).rolling_correlation(ticker1, ticker2, window)
+
+            if roll_corr is not None:
                 fig.add_trace(
                     go.Scatter(
                         x=roll_corr.index,
@@ -711,7 +726,9 @@ class EnhancedPairAnalyzer:
                 stats = {
                     "Full Period Correlation": returns[ticker1].corr(returns[ticker2]),
                     "Recent Correlation (63d)": returns[ticker1].tail(63).corr(returns[ticker2].tail(63)),
-                    "Correlation Stability": returns[ticker1].rolling(63).corr(returns[ticker2]).std()
+                    "Correlation Stability": self._get_pair_stats(returns).rolling_correlation(
+                        ticker1, ticker2, 63
+                    ).std()
                 }
                 st.write("### Correlation Statistics")
                 st.write(pd.Series(stats).round(4))
@@ -1082,23 +1099,12 @@ class EnhancedPairAnalyzer:
 
         window_sizes = [21, 63, 126]
         rolling_metrics = {}
+        pair_stats = self._get_pair_stats(returns)
 
         for window in window_sizes:
-            roll_corr = returns[ticker1].rolling(window=window).corr(returns[ticker2])
-
-            roll_beta = (
-                    returns[[ticker1, ticker2]]
-                    .rolling(window=window)
-                    .cov()
-                    .unstack()[ticker2][ticker1] /
-                    returns[ticker2]
-                    .rolling(window=window)
-                    .var()
-            )
-
             rolling_metrics[f'{window}d'] = {
-                'correlation': roll_corr,
-                'beta': roll_beta
+                'correlation': pair_stats.rolling_correlation(ticker1, ticker2, window),
+                'beta': pair_stats.rolling_beta(ticker1, ticker2, window)
             }
 
         fig = make_subplots(
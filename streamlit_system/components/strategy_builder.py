@@ -5,19 +5,227 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import io
 import traceback
-from typing import Dict, List, Tuple
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Union
 from sklearn.linear_model import LinearRegression
 
 from config.logging_config import logger
+from src.data.price_matrix import PriceMatrix
 from src.strategy.backtest import MultiPairBackTester
 from src.strategy.dynamic_pairs_strategy import DynamicPairTradingSystem
+from src.strategy.order_netting import OrderNettingBook
 from src.strategy.pairs_strategy_integrated import IntegratedPairsStrategy, create_strategy_dashboard
 from src.strategy.risk import PairRiskManager
 from src.strategy.pairs_strategy_SL import EnhancedStatPairsStrategy
 from src.strategy.pairs_strategy_ML import MLPairsStrategy
 from src.strategy.pairs_strategy_DL import PairsTradingDL
+from src.utils.trade_ledger import PairTradeView, TradeLedger
 from streamlit_system.components.session_state_management import SessionStateManager
 
+PAIR_TRADE_SCHEMA = {
+    'pair_id': object,
+    'date': 'datetime64[ns]',
+    'symbol': object,
+    'type': object,
+    'quantity': np.float64,
+    'price': np.float64,
+    'cost': np.float64,
+    'transaction_cost': np.float64,
+    'trade_value': np.float64,
+    'trade_direction': np.int64,
+    'capital_after': np.float64
+}
+
+
+class PairPerformanceTracker:
+    """
+    Online performance statistics for one pair model.
+
+    Updated as bars are recorded and trades are executed or closed, so every
+    metrics query is O(1) no matter how long the backtest has run. Trade
+    cycles follow the grouping get_metrics always used: a new cycle starts
+    whenever the trade direction flips between buy and sell.
+
+    With ``defer_costs`` the costs of trades are only known once they are
+    settled, so cycles closed since the last settlement are held back until
+    settle_costs has charged every trade's cost to its own cycle.
+    """
+
+    def __init__(self, recent_window: int = 10, defer_costs: bool = False):
+        # Portfolio value path
+        self.n_values = 0
+        self.last_value = None
+        self.peak_value = -np.inf
+        self.current_drawdown = 0.0
+        self.max_drawdown = 0.0
+
+        # Welford moments of bar-to-bar returns
+        self.n_returns = 0
+        self.mean_return = 0.0
+        self._return_m2 = 0.0
+
+        # Trade cycles; the last one stays open until the direction flips
+        self.n_trades = 0
+        self._last_direction = None
+        self._open_cycle_pnl = 0.0
+        self._closed_cycles = 0
+        self._closed_wins = 0
+        self._closed_win_sum = 0.0
+        self._closed_losses = 0
+        self._closed_loss_sum = 0.0
+        self._closed_total = 0.0
+        self._closed_best = -np.inf
+        self._closed_worst = np.inf
+
+        # Deferred costs: cycles closed since the last settlement, and the cycle of each unsettled trade
+        self._held_cycles = [] if defer_costs else None
+        self._unsettled_trades = []
+
+        # Window of the most recent closed positions
+        self.recent_trades = deque(maxlen=recent_window)
+        self._recent_wins = 0
+        self._recent_win_sum = 0.0
+        self._recent_losses = 0
+        self._recent_loss_sum = 0.0
+        self._recent_pnl_sum = 0.0
+        self._recent_holding_sum = 0.0
+
+    def record_value(self, portfolio_value: float):
+        """Add one bar of the portfolio value path."""
+        if self.last_value is not None and self.last_value != 0:
+            ret = portfolio_value / self.last_value - 1
+            self.n_returns += 1
+            delta = ret - self.mean_return
+            self.mean_return += delta / self.n_returns
+            self._return_m2 += delta * (ret - self.mean_return)
+
+        self.n_values += 1
+        self.last_value = portfolio_value
+        self.peak_value = max(self.peak_value, portfolio_value)
+        if self.peak_value > 0:
+            self.current_drawdown = (self.peak_value - portfolio_value) / self.peak_value
+            self.max_drawdown = max(self.max_drawdown, self.current_drawdown)
+
+    def record_trade(self, trade_direction: int, trade_value: float):
+        """Add one executed leg (+1 buy / -1 sell) and its cash flow."""
+        if self._last_direction is not None and trade_direction + self._last_direction == 0:
+            if self._held_cycles is None:
+                self._close_cycle(self._open_cycle_pnl)
+            else:
+                self._held_cycles.append(self._open_cycle_pnl)
+            self._open_cycle_pnl = 0.0
+        self._open_cycle_pnl += trade_value
+        self._last_direction = trade_direction
+        self.n_trades += 1
+        if self._held_cycles is not None:
+            self._unsettled_trades.append(len(self._held_cycles))
+
+    def record_cost(self, cost: float):
+        """Charge a cost settled after its legs were recorded to the open cycle."""
+        self._open_cycle_pnl -= cost
+
+    def settle_costs(self, trade_costs: List[float]):
+        """
+        Charge deferred costs to the cycles of their trades and close the held cycles they complete.
+
+        Args:
+            trade_costs: Cost of each of the oldest trades not yet settled, in order;
+                a cycle with a later trade still unsettled stays held back
+        """
+        if self._held_cycles is None:
+            self.record_cost(sum(trade_costs))
+            return
+        for cycle, cost in zip(self._unsettled_trades, trade_costs):
+            if cycle < len(self._held_cycles):
+                self._held_cycles[cycle] -= cost
+            else:
+                self._open_cycle_pnl -= cost
+        del self._unsettled_trades[:len(trade_costs)]
+
+        settled = self._unsettled_trades[0] if self._unsettled_trades else len(self._held_cycles)
+        for pnl in self._held_cycles[:settled]:
+            self._close_cycle(pnl)
+        del self._held_cycles[:settled]
+        self._unsettled_trades = [cycle - settled for cycle in self._unsettled_trades]
+
+    def _close_cycle(self, pnl: float):
+        self._closed_cycles += 1
+        self._closed_total += pnl
+        self._closed_best = max(self._closed_best, pnl)
+        self._closed_worst = min(self._closed_worst, pnl)
+        if pnl > 0:
+            self._closed_wins += 1
+            self._closed_win_sum += pnl
+        elif pnl < 0:
+            self._closed_losses += 1
+            self._closed_loss_sum += pnl
+
+    def record_closed_position(self, trade_result: Dict):
+        """Add a closed position to the recent-trade window."""
+        if len(self.recent_trades) == self.recent_trades.maxlen:
+            self._update_recent(self.recent_trades[0], -1)
+        self.recent_trades.append(trade_result)
+        self._update_recent(trade_result, 1)
+
+    def _update_recent(self, trade_result: Dict, sign: int):
+        pnl = trade_result['pnl']
+        self._recent_pnl_sum += sign * pnl
+        self._recent_holding_sum += sign * trade_result['holding_period']
+        if pnl > 0:
+            self._recent_wins += sign
+            self._recent_win_sum = self._recent_win_sum + sign * pnl if self._recent_wins else 0.0
+        elif pnl < 0:
+            self._recent_losses += sign
+            self._recent_loss_sum = self._recent_loss_sum + sign * pnl if self._recent_losses else 0.0
+
+    @property
+    def return_std(self) -> float:
+        """Sample standard deviation of bar returns (NaN below two returns)."""
+        if self.n_returns < 2:
+            return np.nan
+        return np.sqrt(max(self._return_m2, 0.0) / (self.n_returns - 1))
+
+    def sharpe_ratio(self) -> float:
+        std = self.return_std
+        if self.n_returns > 0 and std > 0:
+            return (self.mean_return * 4 / std) * np.sqrt(252)
+        return 0
+
+    def cycle_summary(self) -> Dict:
+        """Per-cycle PnL statistics including the still-open last cycle."""
+        pnl = self._open_cycle_pnl
+        n_cycles = self._closed_cycles + 1
+        wins = self._closed_wins + (pnl > 0)
+        win_sum = self._closed_win_sum + (pnl if pnl > 0 else 0.0)
+        losses = self._closed_losses + (pnl < 0)
+        loss_sum = self._closed_loss_sum + (pnl if pnl < 0 else 0.0)
+
+        return {
+            'num_trades': n_cycles,
+            'win_rate': wins / n_cycles * 100,
+            'profit_factor': abs(win_sum / loss_sum) if losses > 0 and loss_sum != 0 else 0,
+            'total_pnl': self._closed_total + pnl,
+            'avg_win': win_sum / wins if wins > 0 else 0,
+            'avg_loss': loss_sum / losses if losses > 0 else 0,
+            'best_trade': max(self._closed_best, pnl),
+            'worst_trade': min(self._closed_worst, pnl)
+        }
+
+    def recent_summary(self) -> Dict:
+        """Allocation metrics over the recent-trade window."""
+        n_recent = len(self.recent_trades)
+        if self._recent_losses > 0:
+            profit_factor = abs(self._recent_win_sum / self._recent_loss_sum) if self._recent_wins > 0 else 0
+        else:
+            profit_factor = 2.0 if self._recent_wins > 0 else 0.5  # Default values
+
+        return {
+            'win_rate': self._recent_wins / n_recent * 100,
+            'profit_factor': profit_factor,
+            'avg_holding_period': self._recent_holding_sum / n_recent,
+            'avg_pnl': self._recent_pnl_sum / n_recent
+        }
+
 
 class PairModel:
     """Single pair trading model managing one pair's strategy"""
@@ -25,7 +233,7 @@ class PairModel:
     def __init__(
             self,
             pair: Tuple[str, str],
-            prices: pd.DataFrame,
+            prices: Union[PriceMatrix, pd.DataFrame],
             initial_capital: float = 100000,
             window_size: int = 90,  # Single window for both regression and spread
             threshold: float = 2.0,
@@ -34,29 +242,31 @@ class PairModel:
             capital_utilization: float = 0.8,
             max_holding_period: int = 30,  # Maximum days to hold a position
             profit_target_pct: float = 0.05,  # Target profit to exit
-            loss_limit_pct: float = 0.03  # Tighter loss limit than stop loss
+            loss_limit_pct: float = 0.03,  # Tighter loss limit than stop loss
+            trade_ledger: Optional[TradeLedger] = None,  # Shared ledger of the owning system
+            defer_transaction_costs: bool = False  # Costs are charged later by order netting or scheduled execution
     ):
         """
         Initialize a trading model for a single pair.
+
+        ``prices`` is normally the owning system's shared PriceMatrix, in which
+        case the model only wraps its two columns. A raw DataFrame is cleaned
+        into a private two-column matrix.
         """
         # Store pair information
         self.pair = pair
         self.symbol_x, self.symbol_y = pair
 
-        # Ensure both symbols exist in the dataframe
+        # Ensure both symbols exist in the price data
         if self.symbol_x not in prices.columns or self.symbol_y not in prices.columns:
             raise ValueError(f"One or both symbols in pair {pair} not found in price data")
 
-        # Filter prices for just this pair and handle any missing values
-        self.data = prices[[self.symbol_x, self.symbol_y]].copy()
-        self.data = self.data.ffill().bfill()
-
-        # Make sure both columns are numeric and positive
-        for symbol in [self.symbol_x, self.symbol_y]:
-            self.data[symbol] = pd.to_numeric(self.data[symbol], errors='coerce')
-            # Replace any remaining NaN or non-positive values with small positive values
-            self.data[symbol] = self.data[symbol].replace(0, np.nan).fillna(0.01)
-            self.data[symbol] = self.data[symbol].apply(lambda x: max(x, 0.01))
+        # Cleaned, read-only view of just this pair's prices
+        if not isinstance(prices, PriceMatrix):
+            prices = PriceMatrix(prices[[self.symbol_x, self.symbol_y]], fill_method='pad')
+        self.price_matrix = prices
+        self.price_columns = (prices.column_index[self.symbol_x], prices.column_index[self.symbol_y])
+        self.data = prices.frame([self.symbol_x, self.symbol_y])
 
         # Parameters
         self.initial_capital = initial_capital
@@ -71,6 +281,7 @@ class PairModel:
         self.max_holding_period = max_holding_period
         self.profit_target_pct = profit_target_pct
         self.loss_limit_pct = loss_limit_pct
+        self.defer_transaction_costs = defer_transaction_costs
 
         # Regression parameters storage
         self.beta = None
@@ -89,12 +300,16 @@ class PairModel:
         # Activity tracking
         self.active = False  # Is this pair currently being traded
         self.portfolio_history = []
-        self.trade_history = []
+        if trade_ledger is None:
+            trade_ledger = TradeLedger(PAIR_TRADE_SCHEMA, pair_column='pair_id')
+        self.trade_ledger = trade_ledger
+        self.trade_history = PairTradeView(trade_ledger, pair)
         self.spread_history = []
         self.total_transaction_costs = 0
 
         # Performance tracking for allocation decisions
-        self.recent_trades = []  # Store most recent trade results
+        self.performance = PairPerformanceTracker(recent_window=10, defer_costs=defer_transaction_costs)
+        self.recent_trades = self.performance.recent_trades  # Most recent trade results
 
         # Debug counters
         self.regression_updates = 0
@@ -103,14 +318,9 @@ class PairModel:
     def track_drawdown(self):
         """Calculate and track drawdown for this specific pair"""
         if len(self.portfolio_history) > 1:
-            portfolio_df = pd.DataFrame(self.portfolio_history)
-            portfolio_df.set_index('date', inplace=True)
-
-            # Calculate current drawdown
-            peak = portfolio_df['portfolio_value'].cummax()
-            drawdown = (peak - portfolio_df['portfolio_value']) / peak
-            current_drawdown = drawdown.iloc[-1]
-            max_drawdown = drawdown.max()
+            # Running peak and drawdown are maintained as bars are recorded
+            current_drawdown = self.performance.current_drawdown
+            max_drawdown = self.performance.max_drawdown
 
             # Store for allocation decisions
             self.current_drawdown = current_drawdown
@@ -258,9 +468,10 @@ class PairModel:
         if quantity == 0:
             return
 
-        # Calculate costs
+        # Calculate costs; deferred costs are charged once orders are netted across pairs
         cost = quantity * price
-        transaction_cost = abs(quantity) * price * (self.transaction_cost_bps / 10000)
+        cost_bps = 0 if self.defer_transaction_costs else self.transaction_cost_bps
+        transaction_cost = abs(quantity) * price * (cost_bps / 10000)
 
         if trade_type == 'buy':
             total_cost = cost + transaction_cost
@@ -272,7 +483,7 @@ class PairModel:
 
                 # Recalculate with adjusted quantity
                 cost = adjusted_quantity * price
-                transaction_cost = abs(adjusted_quantity) * price * (self.transaction_cost_bps / 10000)
+                transaction_cost = abs(adjusted_quantity) * price * (cost_bps / 10000)
                 total_cost = cost + transaction_cost
                 quantity = adjusted_quantity
 
@@ -289,6 +500,7 @@ class PairModel:
             trade_value = total_proceeds  # Positive for sells (money inflow)
 
         self.total_transaction_costs += transaction_cost
+        self.performance.record_trade(1 if trade_type == 'buy' else -1, trade_value)
 
         # Add trade to history
         self.trade_history.append({
@@ -304,6 +516,19 @@ class PairModel:
             'capital_after': self.current_capital
         })
 
+    def charge_transaction_cost(self, cost: float):
+        """Charge a transaction cost settled after the trade, e.g. by portfolio order netting"""
+        self.current_capital -= cost
+        self.total_transaction_costs += cost
+        self.performance.record_cost(cost)
+
+    def settle_deferred_costs(self, trade_costs: List[float]):
+        """Charge deferred costs, one per trade from the oldest unsettled on, to the trades' own cycles"""
+        cost = sum(trade_costs)
+        self.current_capital -= cost
+        self.total_transaction_costs += cost
+        self.performance.settle_costs(trade_costs)
+
     def close_position(self, current_prices: Dict[str, float], date, reason="manual"):
         """Close all positions for this pair and record the reason"""
         if not self.active:
@@ -340,9 +565,7 @@ class PairModel:
         }
 
         # Record for performance-based allocation
-        self.recent_trades.append(trade_result)
-        if len(self.recent_trades) > 10:
-            self.recent_trades.pop(0)
+        self.performance.record_closed_position(trade_result)
 
         self.active = False
         self.entry_date = None
@@ -567,6 +790,7 @@ class PairModel:
                 'cash': self.current_capital,
                 'position_value': portfolio_value - self.current_capital
             })
+            self.performance.record_value(portfolio_value)
 
         except Exception as e:
             print(f"Error in update for {self.pair} on {date}: {e}")
@@ -581,31 +805,7 @@ class PairModel:
                 'avg_pnl': 0
             }
 
-        # Calculate win rate
-        winning_trades = [t for t in self.recent_trades if t['pnl'] > 0]
-        win_rate = len(winning_trades) / len(self.recent_trades) * 100
-
-        # Calculate profit factor with safeguards
-        winning_sum = sum(t['pnl'] for t in winning_trades)
-        losing_sum = sum(t['pnl'] for t in self.recent_trades if t['pnl'] < 0)
-
-        if losing_sum < 0:
-            profit_factor = abs(winning_sum / losing_sum) if winning_sum > 0 else 0
-        else:
-            profit_factor = 2.0 if winning_sum > 0 else 0.5  # Default values
-
-        # Calculate average holding period
-        avg_holding = sum(t['holding_period'] for t in self.recent_trades) / len(self.recent_trades)
-
-        # Calculate average P&L
-        avg_pnl = sum(t['pnl'] for t in self.recent_trades) / len(self.recent_trades)
-
-        return {
-            'win_rate': win_rate,
-            'profit_factor': profit_factor,
-            'avg_holding_period': avg_holding,
-            'avg_pnl': avg_pnl
-        }
+        return self.performance.recent_summary()
 
     def get_metrics(self) -> Dict:
         """Calculate performance metrics for this pair"""
@@ -619,77 +819,41 @@ class PairModel:
                 'sharpe_ratio': 0
             }
 
-        # Convert portfolio history to DataFrame
-        portfolio_df = pd.DataFrame(self.portfolio_history)
-        portfolio_df.set_index('date', inplace=True)
-
-        # Calculate returns and drawdown
-        returns = portfolio_df['portfolio_value'].pct_change()
-        returns = returns.dropna()
-        drawdown = ((portfolio_df['portfolio_value'].cummax() - portfolio_df['portfolio_value']) /
-                    portfolio_df['portfolio_value'].cummax())
+        # Return, drawdown and Sharpe come from the running accumulators
+        performance = self.performance
+        base_metrics = {
+            'total_return': (performance.last_value / self.initial_capital - 1) * 100,
+            'max_drawdown': performance.max_drawdown * 100,
+            'sharpe_ratio': performance.sharpe_ratio()
+        }
 
-        # Process trade history to calculate trade metrics
         if not self.trade_history:
             return {
-                'total_return': (portfolio_df['portfolio_value'].iloc[-1] / self.initial_capital - 1) * 100,
-                'num_trades': 0,
-                'win_rate': 0,
-                'profit_factor': 0,
-                'max_drawdown': drawdown.max() * 100 if not drawdown.empty else 0,
-                'sharpe_ratio': (returns.mean() * 4 / returns.std()) * np.sqrt(252) if len(
-                    returns) > 0 and returns.std() > 0 else 0,
-                'regression_updates': self.regression_updates,
-                'nan_errors': self.nan_errors
-            }
-
-        # Convert trade history to DataFrame
-        trade_df = pd.DataFrame(self.trade_history)
-
-        # Calculate trade-level metrics with proper PnL
-        trade_df = trade_df.sort_values('date')
-
-        # Group trades by cycle (open/close position)
-        trade_df['position_change'] = trade_df['trade_direction'].rolling(window=2).sum().fillna(0)
-        trade_df['cycle_id'] = (trade_df['position_change'] == 0).cumsum()
-
-        # Calculate PnL for each complete trade cycle
-        cycle_pnl = trade_df.groupby('cycle_id')['trade_value'].sum()
-
-        # Make sure we have at least one complete cycle
-        if len(cycle_pnl) == 0:
-            return {
-                'total_return': (portfolio_df['portfolio_value'].iloc[
-                                     -1] + cycle_pnl.sum() / self.initial_capital - 1) * 100,
+                'total_return': base_metrics['total_return'],
                 'num_trades': 0,
                 'win_rate': 0,
                 'profit_factor': 0,
-                'max_drawdown': drawdown.max() * 100 if not drawdown.empty else 0,
-                'sharpe_ratio': (returns.mean() * 4 / returns.std()) * np.sqrt(252) if len(
-                    returns) > 0 and returns.std() > 0 else 0,
+                'max_drawdown': base_metrics['max_drawdown'],
+                'sharpe_ratio': base_metrics['sharpe_ratio'],
                 'regression_updates': self.regression_updates,
                 'nan_errors': self.nan_errors
             }
 
-        # Identify winning and losing trades
-        winning_trades = cycle_pnl[cycle_pnl > 0]
-        losing_trades = cycle_pnl[cycle_pnl < 0]
+        # Trade cycles (open/close position) are grouped as legs are executed
+        cycles = performance.cycle_summary()
 
-        # Calculate metrics
         metrics = {
-            'total_return': (portfolio_df['portfolio_value'].iloc[-1] / self.initial_capital - 1) * 100,
-            'num_trades': len(cycle_pnl),
-            'win_rate': len(winning_trades) / len(cycle_pnl) * 100 if len(cycle_pnl) > 0 else 0,
-            'profit_factor': abs(winning_trades.sum() / losing_trades.sum()) if len(
-                losing_trades) > 0 and losing_trades.sum() != 0 else 0,
-            'max_drawdown': drawdown.max() * 100 if not drawdown.empty else 0,
-            'sharpe_ratio': (returns.mean() * 4 / returns.std()) * np.sqrt(252) if len(
-                returns) > 0 and returns.std() > 0 else 0,
-            'total_pnl': cycle_pnl.sum(),
-            'avg_win': winning_trades.mean() if len(winning_trades) > 0 else 0,
-            'avg_loss': losing_trades.mean() if len(losing_trades) > 0 else 0,
-            'best_trade': cycle_pnl.max() if len(cycle_pnl) > 0 else 0,
-            'worst_trade': cycle_pnl.min() if len(cycle_pnl) > 0 else 0,
+            'total_return': base_metrics['total_return'],
+            'num_trades': cycles['num_trades'],
+            'win_rate': cycles['win_rate'],
+            'profit_factor': cycles['profit_factor'],
+            'max_drawdown': base_metrics['max_drawdown'],
+            'sharpe_ratio': base_metrics['sharpe_ratio'],
+            'total_pnl': cycles['total_pnl'],
+            'avg_win': cycles['avg_win'],
+            'avg_loss': cycles['avg_loss'],
+            'best_trade': cycles['best_trade'],
+            'worst_trade': cycles['worst_trade'],
             'total_transaction_costs': self.total_transaction_costs,
             'regression_updates': self.regression_updates,
             'nan_errors': self.nan_errors
@@ -834,10 +998,10 @@ class PairModel:
 
         # 5. Trade Points and P&L
         if self.trade_history:
-            trade_df = pd.DataFrame(self.trade_history)
+            trade_df = self.trade_history.to_frame()
 
             # Process trade data for visualization
-            trade_df = trade_df.sort_values('date')
+            trade_df = trade_df.sort_values('date', kind='stable')
 
             # Group by trade cycle
             trade_df['position_change'] = trade_df['trade_direction'].rolling(window=2).sum().fillna(0)
@@ -924,27 +1088,44 @@ class MultiPairTradingSystem:
             max_holding_period: int = 30,  # Maximum days to hold a position
             profit_target_pct: float = 0.05,  # Target profit to exit
             loss_limit_pct: float = 0.03,  # Tighter loss limit than stop loss
-            capital_reallocation_freq: int = 60  # Reallocate capital every 60 days
+            capital_reallocation_freq: int = 60,  # Reallocate capital every 60 days
+            price_dtype: type = np.float64,  # np.float32 halves the price matrix
+            net_orders: bool = False,  # Net the pairs' orders per symbol before they are costed
+            execution_scheduler=None  # ExecutionScheduler working the trades over the next bar
     ):
         """
         Initialize the multi-pair trading system with the updated parameter structure
+
+        With ``net_orders`` the pair models trade without paying costs; after
+        every bar their position changes are netted per symbol in an
+        OrderNettingBook and each pair is charged its share of the net orders.
+
+        With an ``execution_scheduler`` (execution.execution_scheduler) the
+        trades booked at a bar's close are worked as child orders over the
+        next bar's synthetic intraday bars. The pair models trade without
+        paying costs; each pair is charged the implementation shortfall and
+        fees of its fills against the close it traded at. The pair models book
+        their trades in full, so the scheduler must complete each day's plan by
+        the close. It works each pair's own trades, so it cannot be combined
+        with ``net_orders``.
         """
         self.pairs = pairs
-        self.prices = prices.copy()
-        for col in self.prices.columns:
-            self.prices[col] = fill_missing_values(self.prices[col])
         self.capital_reallocation_freq = capital_reallocation_freq
         self.last_reallocation_date = None
 
-        # Clean the price data
-        # Replace zeros or negative values with small positive values
-        for col in self.prices.columns:
-            self.prices[col] = self.prices[col].apply(lambda x: max(x, 0.01) if pd.notnull(x) else 0.01)
+        # Clean the price data once into a shared read-only matrix: gaps are
+        # interpolated and zero or negative values replaced with small positive
+        # values. Pair models only keep views of their two columns.
+        if isinstance(prices, PriceMatrix):
+            self.price_matrix = prices
+        else:
+            self.price_matrix = PriceMatrix(prices, dtype=price_dtype)
+        self.prices = self.price_matrix.frame()
 
         # Validate the pairs
         valid_pairs = []
         for pair in pairs:
-            if pair[0] in prices.columns and pair[1] in prices.columns:
+            if pair[0] in self.price_matrix and pair[1] in self.price_matrix:
                 valid_pairs.append(pair)
             else:
                 print(f"Warning: Pair {pair} contains symbols not found in the data. Skipping.")
@@ -957,12 +1138,31 @@ class MultiPairTradingSystem:
         self.initial_capital = initial_capital
         self.capital_per_pair = initial_capital / len(self.pairs)
 
+        # Portfolio-level netting of the pair models' orders
+        self.net_orders = net_orders
+        self.order_netting = OrderNettingBook(transaction_cost_bps) if net_orders else None
+        self._netted_rows = 0
+
+        # Intraday execution of the pair models' trades
+        if execution_scheduler is not None:
+            if not execution_scheduler.complete_by_close:
+                raise ValueError("execution_scheduler must have complete_by_close set: the pair models "
+                                 "book their trades in full")
+            if net_orders:
+                raise ValueError("net_orders and execution_scheduler cannot be combined")
+        self.execution_scheduler = execution_scheduler
+        self._scheduled_rows = 0
+        self._working_rows = (0, 0)  # Ledger rows whose parents are worked over the next bar
+        self._parent_rows = {}  # Parent order_id -> (ledger rows, share of the parent's quantity)
+        self._scheduled_prices = {}
+
         # Create separate models for each pair with the CORRECT parameter structure
+        self.trade_ledger = TradeLedger(PAIR_TRADE_SCHEMA, pair_column='pair_id')
         self.pair_models = {}
         for pair in self.pairs:
             self.pair_models[pair] = PairModel(
                 pair=pair,
-                prices=self.prices,
+                prices=self.price_matrix,
                 initial_capital=self.capital_per_pair,
                 window_size=window_size,  # CORRECT parameter
                 threshold=threshold,
@@ -971,7 +1171,9 @@ class MultiPairTradingSystem:
                 capital_utilization=capital_utilization,
                 max_holding_period=max_holding_period,  # New parameter
                 profit_target_pct=profit_target_pct,  # New parameter
-                loss_limit_pct=loss_limit_pct  # New parameter
+                loss_limit_pct=loss_limit_pct,  # New parameter
+                trade_ledger=self.trade_ledger,
+                defer_transaction_costs=net_orders or execution_scheduler is not None
             )
 
         # Track overall portfolio performance
@@ -982,15 +1184,9 @@ class MultiPairTradingSystem:
         self.processing_errors = 0
 
     @property
-    def trade_history(self):
-        """Aggregate trade history from all pair models into a single list"""
-        all_trades = []
-        for pair, model in self.pair_models.items():
-            for trade in model.trade_history:
-                trade_copy = dict(trade)
-                trade_copy['pair_id'] = pair
-                all_trades.append(trade_copy)
-        return all_trades
+    def trade_history(self) -> TradeLedger:
+        """Trade ledger shared by all pair models, keyed by pair_id"""
+        return self.trade_ledger
 
     @property
     def data(self):
@@ -1090,7 +1286,8 @@ class MultiPairTradingSystem:
     def run_backtest(self):
         """Run the backtest for all pair models with enhanced capital allocation"""
         # Get all unique dates from the price data
-        dates = self.prices.index.sort_values()
+        date_order = self.prices.index.argsort(kind='stable')
+        dates = self.prices.index[date_order]
 
         # Progress tracking
         total_dates = len(dates)
@@ -1101,24 +1298,8 @@ class MultiPairTradingSystem:
             if i % 100 == 0:  # Print progress every 100 days
                 print(f"Processing date {i + 1}/{total_dates}: {date.strftime('%Y-%m-%d')}")
 
-            # Get current prices for all symbols
-            current_prices = {}
-            for symbol in self.prices.columns:
-                try:
-                    price = self.prices.loc[date, symbol]
-                    if pd.notnull(price) and price > 0:
-                        current_prices[symbol] = price
-                    else:
-                        # Use last valid price or fallback to 0.01
-                        last_valid = self.prices[symbol].loc[:date].dropna()
-                        if len(last_valid) > 0:
-                            current_prices[symbol] = last_valid.iloc[-1]
-                        else:
-                            current_prices[symbol] = 0.01
-                            self.nan_count += 1
-                except Exception as e:
-                    self.processing_errors += 1
-                    continue
+            # Get current prices for all symbols (already cleaned and positive)
+            current_prices = self.price_matrix.row(date_order[i])
 
             # First, update capital allocation based on performance
             if i > 180:  # Allow some initial trading history to accumulate
@@ -1140,6 +1321,14 @@ class MultiPairTradingSystem:
                     print(f"Error updating model for {pair} on {date}: {e}")
                     self.processing_errors += 1
 
+            # Send only the net orders and charge their costs back to the pairs
+            if self.order_netting is not None:
+                total_portfolio_value -= self.settle_net_orders(date)
+
+            # Work the previous bar's trades over this bar and charge their shortfall
+            if self.execution_scheduler is not None:
+                total_portfolio_value -= self.settle_scheduled_orders(date, current_prices)
+
             # Record overall portfolio statistics
             self.portfolio_history.append({
                 'date': date,
@@ -1150,6 +1339,167 @@ class MultiPairTradingSystem:
         print("Backtest completed successfully")
         print(f"NaN values encountered: {self.nan_count}")
         print(f"Processing errors: {self.processing_errors}")
+        if self.order_netting is not None:
+            netting = self.order_netting.summary()
+            print(f"Order netting: {netting['gross_orders']} pair orders -> {netting['net_orders']} net orders, "
+                  f"costs {netting['gross_cost']:.2f} -> {netting['net_cost']:.2f}")
+        if self.execution_scheduler is not None:
+            execution = self.execution_scheduler.summary()
+            print(f"Scheduled execution: {execution['parent_orders']} orders in {execution['child_orders']} "
+                  f"child orders, shortfall {execution['shortfall']:.2f} ({execution['shortfall_bps']:.2f} bps)")
+
+    def settle_net_orders(self, date) -> float:
+        """
+        Net the pair trades recorded since the last call and charge their costs.
+
+        The attributed cost of each pair and symbol is spread over that pair's
+        ledger rows in proportion to their quantity, and the rows' cash fields
+        are corrected accordingly.
+
+        Returns:
+            Total cost charged
+        """
+        ledger = self.trade_ledger
+        start, end = self._netted_rows, len(ledger)
+        if start == end:
+            return 0.0
+        self._netted_rows = end
+
+        pair_ids = ledger.column('pair_id')[start:end]
+        symbols = ledger.column('symbol')[start:end]
+        quantities = np.abs(ledger.column('quantity')[start:end])
+        prices = dict(zip(symbols, ledger.column('price')[start:end]))
+        targets = {pair: self.pair_models[pair].positions for pair in dict.fromkeys(pair_ids)}
+        costs = self.order_netting.net(date, targets, prices)
+
+        traded = {}
+        for pair, symbol, quantity in zip(pair_ids, symbols, quantities):
+            traded[(pair, symbol)] = traded.get((pair, symbol), 0) + quantity
+
+        charged = {}
+        row_costs = {}
+        for offset, (pair, symbol, quantity) in enumerate(zip(pair_ids, symbols, quantities)):
+            total = traded[(pair, symbol)]
+            row_cost = costs.get(pair, {}).get(symbol, 0.0) * quantity / total if total else 0.0
+            charged[pair] = charged.get(pair, 0.0) + row_cost
+            row_costs.setdefault(pair, []).append(row_cost)
+            record = ledger.record(start + offset)
+            ledger.update(start + offset,
+                          transaction_cost=row_cost,
+                          trade_value=record['trade_value'] - row_cost,
+                          capital_after=record['capital_after'] - charged[pair])
+
+        # Each row's cost belongs to the trade cycle of that row
+        for pair, trade_costs in row_costs.items():
+            self.pair_models[pair].settle_deferred_costs(trade_costs)
+        return sum(charged.values())
+
+    def settle_scheduled_orders(self, date, current_prices: Dict[str, float]) -> float:
+        """
+        Execute the scheduled orders over this bar and queue the bar's new trades.
+
+        The bar is split into intraday bars running from the previous close to
+        this close, with the day's volume from the scheduler's volume_data when
+        it has it. Each child fill's shortfall against the close its trade was
+        booked at, plus its fee, is charged to the ledger rows its parent was
+        built from, in proportion to their quantity; fills better than that
+        close are credited. Trades recorded since the last call become parent
+        orders per pair and symbol, worked from the next bar. A parent still
+        working for the same pair and symbol is netted into the new one: its
+        remainder is crossed at this close and charged its move since arrival.
+
+        The previous bar's rows are then settled as the pair models' deferred
+        costs, so each cost lands in the trade cycle of its own trade, and the
+        rows' transaction_cost and trade_value are corrected.
+
+        Returns:
+            Total cost charged
+        """
+        scheduler = self.execution_scheduler
+        ledger = self.trade_ledger
+        first, last = self._working_rows
+        row_costs = np.zeros(last - first)
+        late = {}  # Costs of parents worked past their day, whose rows are already settled
+
+        def charge(parent_id, cost):
+            rows, weights = self._parent_rows[parent_id]
+            if rows[0] >= first:
+                row_costs[rows - first] += cost * weights
+            else:
+                pair = scheduler.parents[parent_id].pair_id
+                late[pair] = late.get(pair, 0.0) + cost
+
+        working = scheduler.working_orders()
+        if working:
+            volume_data = scheduler.volume_data
+            bars = {}
+            for symbol in {parent.symbol for parent in working}:
+                close = current_prices[symbol]
+                open_ = self._scheduled_prices.get(symbol, close)
+                volume = np.inf
+                if volume_data is not None and symbol in volume_data.columns and date in volume_data.index:
+                    volume = volume_data.at[date, symbol]
+                bars[symbol] = (open_, max(open_, close), min(open_, close), close, volume)
+
+            start = len(scheduler.children)
+            scheduler.execute_day(date, bars)
+            children = scheduler.children
+            quantities = children.column('quantity')[start:]
+            costs = (quantities * (children.column('price')[start:] - children.column('arrival_price')[start:])
+                     + children.column('fee')[start:])
+            parent_costs = {}
+            for parent_id, cost in zip(children.column('parent_id')[start:], costs.tolist()):
+                parent_costs[parent_id] = parent_costs.get(parent_id, 0.0) + cost
+            for parent_id, cost in parent_costs.items():
+                charge(parent_id, cost)
+
+        # Queue the trades booked at this bar's close
+        start, end = self._scheduled_rows, len(ledger)
+        self._scheduled_rows = end
+        orders = {}
+        for offset, (pair, symbol, quantity, direction, price) in enumerate(zip(
+                ledger.column('pair_id')[start:end], ledger.column('symbol')[start:end],
+                ledger.column('quantity')[start:end], ledger.column('trade_direction')[start:end],
+                ledger.column('price')[start:end])):
+            order = orders.setdefault((pair, symbol), [0, price, [], []])
+            order[0] += quantity * direction
+            order[2].append(start + offset)
+            order[3].append(abs(quantity))
+        previous = {}
+        for parent in scheduler.working_orders():
+            previous.setdefault((parent.pair_id, parent.symbol), []).append(parent)
+        for (pair, symbol), (quantity, price, rows, row_quantities) in orders.items():
+            for parent in previous.get((pair, symbol), []):
+                remaining = parent.remaining
+                parent.last_price = price
+                scheduler.cancel(parent.order_id)
+                charge(parent.order_id, remaining * (price - parent.arrival_price))
+                quantity += remaining
+            parent = scheduler.schedule(symbol, quantity, price, date, pair_id=pair)
+            if parent is not None:
+                row_quantities = np.array(row_quantities, dtype=float)
+                total = row_quantities.sum()
+                weights = row_quantities / total if total else np.full(len(rows), 1 / len(rows))
+                self._parent_rows[parent.order_id] = (np.array(rows), weights)
+        self._scheduled_prices = current_prices
+
+        # Settle the previous bar's rows: each row's cost belongs to the trade cycle of that row
+        pair_costs = {}
+        for offset, (pair, cost) in enumerate(zip(ledger.column('pair_id')[first:last], row_costs.tolist())):
+            pair_costs.setdefault(pair, []).append(cost)
+            if cost:
+                record = ledger.record(first + offset)
+                ledger.update(first + offset, transaction_cost=record['transaction_cost'] + cost,
+                              trade_value=record['trade_value'] - cost)
+        for pair, trade_costs in pair_costs.items():
+            self.pair_models[pair].settle_deferred_costs(trade_costs)
+        for pair, cost in late.items():
+            self.pair_models[pair].charge_transaction_cost(cost)
+        self._working_rows = (start, end)
+        working_ids = {parent.order_id for parent in scheduler.working_orders()}
+        self._parent_rows = {parent_id: entry for parent_id, entry in self._parent_rows.items()
+                             if parent_id in working_ids}
+        return float(row_costs.sum()) + sum(late.values())
 
     def get_portfolio_metrics(self) -> Dict:
         """Calculate and return aggregated portfolio metrics with proper NaN handling"""
@@ -1237,6 +1587,31 @@ class MultiPairTradingSystem:
             'Pair-Specific Metrics': pair_metrics
         }
 
+        if self.order_netting is not None:
+            netting = self.order_netting.summary()
+            portfolio_metrics['Order Netting'] = {
+                'Pair Orders': netting['gross_orders'],
+                'Net Orders': netting['net_orders'],
+                'Order Reduction (%)': netting['order_reduction_pct'],
+                'Internalized Shares': netting['internalized_shares'],
+                'Cost Without Netting': netting['gross_cost'],
+                'Cost With Netting': netting['net_cost'],
+                'Cost Reduction (%)': netting['cost_reduction_pct'],
+                'Shared-Leg Orders': netting['shared_leg_bars']
+            }
+
+        if self.execution_scheduler is not None:
+            execution = self.execution_scheduler.summary()
+            portfolio_metrics['Scheduled Execution'] = {
+                'Parent Orders': execution['parent_orders'],
+                'Child Orders': execution['child_orders'],
+                'Completed Orders': execution['completed_orders'],
+                'Arrival Notional': execution['arrival_notional'],
+                'Impact Cost': execution['impact_cost'],
+                'Implementation Shortfall': execution['shortfall'],
+                'Implementation Shortfall (bps)': execution['shortfall_bps']
+            }
+
         return portfolio_metrics
 
     def plot_portfolio_overview(self):
@@ -2387,7 +2762,7 @@ class EnhancedStrategyBuilder:
             st.warning("No trade history available to plot pair rotation")
             return
 
-        trades_df = pd.DataFrame(all_trades)
+        trades_df = all_trades.to_frame()
 
         # Get unique pair IDs from trades
         all_pair_ids = trades_df['pair_id'].unique() if 'pair_id' in trades_df.columns else []
@@ -2940,7 +3315,7 @@ class EnhancedStrategyBuilder:
 
         # Get trades from all pair models
         all_trades = dynamic_system.trade_history
-        trades_df = pd.DataFrame(all_trades) if all_trades else pd.DataFrame()
+        trades_df = all_trades.to_frame() if all_trades else pd.DataFrame()
 
         # Create aggregate performance metrics
         portfolio_performance = metrics.get('Portfolio Metrics', {})
@@ -2957,6 +3332,7 @@ class EnhancedStrategyBuilder:
                 'Win Rate': metrics.get('Trading Activity', {}).get('Average Win Rate (%)', 0)
             },
             'trades': trades_df,
+            'trade_ledger': all_trades,
             'parameters': {
                 'strategy': {'type': 'Dynamic Pairs Trading', 'params': params},
                 'backtest': backtest_params,
@@ -3101,7 +3477,7 @@ class EnhancedStrategyBuilder:
 
         # Add trade markers if available
         if pair_model.trade_history:
-            trade_df = pd.DataFrame(pair_model.trade_history)
+            trade_df = pair_model.trade_history.to_frame()
 
             # Add trade markers on price chart
             for _, trade in trade_df.iterrows():
@@ -3220,6 +3596,7 @@ class EnhancedStrategyBuilder:
                         'equity_curve': equity_curve,
                         'metrics': backtester._calculate_performance_metrics(),
                         'trades': backtester.trade_history,
+                        'trade_ledger': backtester.trade_ledger,
                         'parameters': {
                             'strategy': strategy_type,
                             'risk': risk_params,
@@ -3314,7 +3691,7 @@ class EnhancedStrategyBuilder:
                     st.plotly_chart(pair_fig)
 
             # Store the results in session state
-            trades_df = pd.DataFrame(system.trade_history)
+            trades_df = system.trade_history.to_frame()
 
             # Create aggregate performance metrics
             portfolio_performance = portfolio_metrics.get('Portfolio Metrics', {})
@@ -3330,6 +3707,7 @@ class EnhancedStrategyBuilder:
                     'Win Rate': portfolio_metrics.get('Trading Activity', {}).get('Average Win Rate (%)', 0)
                 },
                 'trades': trades_df,
+                'trade_ledger': system.trade_history,
                 'parameters': {
                     'strategy': {'type': 'Multi-Pair Statistical', 'params': params},
                     'backtest': backtest_params,
@@ -3641,7 +4019,8 @@ class EnhancedStrategyBuilder:
             results['trades']
         )
 
-        self._display_trade_analysis(results['trades'])
+        trade_ledger = results.get('trade_ledger')
+        self._display_trade_analysis(trade_ledger if trade_ledger is not None else results['trades'])
 
         self._display_risk_analysis(
             results['equity_curve'],
@@ -3731,33 +4110,38 @@ class EnhancedStrategyBuilder:
         fig.update_layout(height=800, showlegend=True)
         st.plotly_chart(fig)
 
-    def _display_trade_analysis(self, trades: pd.DataFrame):
+    def _display_trade_analysis(self, trades: Union[TradeLedger, pd.DataFrame]):
         """
         Display trade analysis.
 
         Args:
-            trades (pd.DataFrame): Trade history to analyze
+            trades (Union[TradeLedger, pd.DataFrame]): Trade ledger (or trade
+                history frame) to analyze
         """
         st.subheader("Trade Analysis")
 
-        trade_stats = trades.groupby('Pair').agg({
-            'PnL': ['count', 'mean', 'sum'],
-            'Duration': 'mean',
-            'Cost': 'sum'
-        })
-        trade_stats.columns = [
-            'Number of Trades',
-            'Average PnL',
-            'Total PnL',
-            'Average Duration',
-            'Total Costs'
-        ]
+        if isinstance(trades, TradeLedger):
+            trade_stats, trade_pnls = self._ledger_trade_stats(trades)
+        else:
+            trade_stats = trades.groupby('Pair').agg({
+                'PnL': ['count', 'mean', 'sum'],
+                'Duration': 'mean',
+                'Cost': 'sum'
+            })
+            trade_stats.columns = [
+                'Number of Trades',
+                'Average PnL',
+                'Total PnL',
+                'Average Duration',
+                'Total Costs'
+            ]
+            trade_pnls = trades['PnL']
         st.dataframe(trade_stats)
 
         fig = go.Figure()
         fig.add_trace(
             go.Histogram(
-                x=trades['PnL'],
+                x=trade_pnls,
                 name='PnL Distribution',
                 nbinsx=50,
                 opacity=0.7
@@ -3770,6 +4154,37 @@ class EnhancedStrategyBuilder:
         )
         st.plotly_chart(fig)
 
+    @staticmethod
+    def _ledger_trade_stats(ledger: TradeLedger) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Per-pair trade statistics straight from the ledger's pair views.
+
+        Args:
+            ledger (TradeLedger): Backtester ledger (PnL/Cost columns) or pair
+                model ledger (trade_value/transaction_cost columns)
+
+        Returns:
+            Tuple[pd.DataFrame, np.ndarray]: Statistics indexed by pair and all trade PnLs
+        """
+        pnl_column = 'PnL' if 'PnL' in ledger.schema else 'trade_value'
+        cost_column = 'Cost' if 'Cost' in ledger.schema else 'transaction_cost'
+
+        stats = {}
+        for pair in ledger.pairs():
+            view = ledger.view(pair)
+            pnl = view.column(pnl_column)
+            pnl = pnl[~np.isnan(pnl)]
+            stats[pair] = {
+                'Number of Trades': len(pnl),
+                'Average PnL': pnl.mean() if len(pnl) else np.nan,
+                'Total PnL': pnl.sum(),
+                'Total Costs': np.nansum(view.column(cost_column))
+            }
+
+        trade_stats = pd.DataFrame.from_dict(stats, orient='index')
+        trade_stats.index.name = ledger.pair_column
+        return trade_stats, ledger.column(pnl_column)
+
     def _display_risk_analysis(self, equity_curve: pd.Series, trades: pd.DataFrame):
         """
         Display risk analysis metrics and visualizations.
@@ -0,0 +1,120 @@
+"""SimulatedBroker recovery from an OrderJournal cut short at every event."""
+
+import pandas as pd
+import pytest
+from execution import Order, OrderSide, OrderType, SimulatedBroker
+from execution.matching_engine import MatchingEngine
+from execution.order_journal import FILL, OrderJournal
+
+BUY, SELL = OrderSide.BUY, OrderSide.SELL
+
+
+class _CrashingJournal(OrderJournal):
+    """Journal that persists nothing after its first ``crash_after`` events, like a process killed there."""
+
+    def __init__(self, directory, crash_after, **kwargs):
+        super().__init__(directory, fsync='always', **kwargs)
+        self.crash_after = crash_after
+        self.crashed = False
+
+    def append(self, *args, **kwargs):
+        if self.crashed or self.stats['events'] >= self.crash_after:
+            self.crashed = True
+            return self.seq
+        return super().append(*args, **kwargs)
+
+    def write_snapshot(self, state):
+        if self.crashed:
+            return self.seq
+        return super().write_snapshot(state)
+
+
+def _broker(journal=None):
+    return SimulatedBroker(initial_balance=100000, transaction_cost=0.001, allow_short=True,
+                           matching_engine=MatchingEngine(max_participation=0.1), journal=journal)
+
+
+def _trade(broker):
+    """Market, limit and stop orders, a rejection, partial fills and a cancel."""
+    broker.update_positions({'X': 100.0, 'Y': 50.0})
+    broker.place_order(Order('X', BUY, 10, OrderType.MARKET))
+    broker.place_order(Order('Y', SELL, 20, OrderType.MARKET))
+    broker.place_order(Order('X', BUY, 30, OrderType.LIMIT, price=99.5))
+    broker.place_order(Order('Y', SELL, 40, OrderType.LIMIT, price=50.5))
+    broker.place_order(Order('X', SELL, 15, OrderType.STOP, stop_price=99.0))
+    broker.place_order(Order('X', BUY, 5, OrderType.LIMIT))  # No limit price: rejected
+    broker.process_bar(pd.Timestamp('2024-01-02'), {'X': (100.0, 100.5, 98.5, 99.0, 200.0),
+                                                   'Y': (50.0, 51.0, 49.5, 50.8, 200.0)})
+    broker.cancel_order(next(iter(broker.orders)))
+    broker.place_order(Order('Y', BUY, 20, OrderType.MARKET))
+    broker.process_bar(pd.Timestamp('2024-01-03'), {'X': (99.0, 99.8, 98.0, 99.2, 1e6),
+                                                   'Y': (50.8, 51.2, 50.1, 50.9, 1e6)})
+
+
+def _summary(broker):
+    return {
+        'balance': round(broker.balance, 6),
+        'order_counter': broker.order_counter,
+        'orders': {order_id: (order.symbol, order.side, order.quantity, order.filled_quantity, order.status)
+                   for order_id, order in broker.orders.items()},
+        'positions': {symbol: (position.quantity, round(position.entry_price, 6))
+                      for symbol, position in broker.positions.items()},
+        'resting': {order_id: order.remaining for order_id, order in broker.engine.orders.items()}
+    }
+
+
+def _recover_after(directory, n_events, snapshot_every):
+    journal = _CrashingJournal(str(directory), n_events, snapshot_every=snapshot_every)
+    _trade(_broker(journal))
+    journal.close()
+
+    recovered_journal = OrderJournal(str(directory))
+    try:
+        return _summary(SimulatedBroker.recover(recovered_journal, transaction_cost=0.001, allow_short=True,
+                                                matching_engine=MatchingEngine(max_participation=0.1)))
+    finally:
+        recovered_journal.close()
+
+
+@pytest.fixture(scope='module')
+def n_events(tmp_path_factory):
+    with OrderJournal(str(tmp_path_factory.mktemp('full'))) as journal:
+        _trade(_broker(journal))
+        return journal.stats['events']
+
+
+def test_recovery_without_crash_matches_live_broker(tmp_path):
+    live = _broker(OrderJournal(str(tmp_path / 'live'), snapshot_every=3))
+    _trade(live)
+    live.journal.close()
+
+    assert _recover_after(tmp_path / 'recovered', float('inf'), snapshot_every=3) == _summary(live)
+
+
+@pytest.mark.parametrize('snapshot_every', [1, 2, 3, 5])
+def test_recovery_after_crash_at_every_event(tmp_path, n_events, snapshot_every):
+    for crash_after in range(n_events + 1):
+        with_snapshots = _recover_after(tmp_path / f'snapshots_{crash_after}', crash_after, snapshot_every)
+        events_only = _recover_after(tmp_path / f'events_{crash_after}', crash_after, snapshot_every=10 ** 9)
+        assert with_snapshots == events_only, f"crash after event {crash_after}"
+
+
+def test_recovery_takes_the_starting_balance_from_the_journal(tmp_path):
+    with OrderJournal(str(tmp_path), snapshot_every=10 ** 9) as journal:
+        live = SimulatedBroker(initial_balance=1_000_000, journal=journal)
+        live.update_positions({'X': 100.0})
+        live.place_order(Order('X', BUY, 100, OrderType.MARKET))
+
+    with OrderJournal(str(tmp_path)) as journal:
+        recovered = SimulatedBroker.recover(journal)
+        assert recovered.balance == pytest.approx(live.balance)
+        assert recovered.balance > 900_000
+
+
+def test_fill_without_its_new_is_corruption(tmp_path):
+    with OrderJournal(str(tmp_path)) as journal:
+        SimulatedBroker(journal=journal)
+        journal.append(FILL, 'ORD_1', 'X', 1, quantity=10, price=100.0)
+
+    with OrderJournal(str(tmp_path)) as journal, pytest.raises(ValueError, match='without its NEW'):
+        SimulatedBroker.recover(journal)
@@ -0,0 +1,39 @@
+"""MatchingEngine fill prices against single bars."""
+
+import pandas as pd
+from execution.matching_engine import LIMIT, STOP, STOP_LIMIT, MatchingEngine
+
+# Opens at 100, rallies to 107 and sells off to 93
+BAR = (100.0, 107.0, 93.0, 100.0, 1e6)
+
+
+def _fills(*orders):
+    """Reference and fill price per order id after one bar."""
+    engine = MatchingEngine()
+    for order_id, side, order_type, limit_price, stop_price in orders:
+        engine.submit(order_id, 'X', side, 10, order_type, limit_price=limit_price, stop_price=stop_price)
+    engine.process_bar('X', pd.Timestamp('2024-01-02'), *BAR)
+    fills = engine.fills.to_frame().set_index('order_id')
+    return fills['reference_price'].to_dict(), fills['price'].to_dict()
+
+
+def test_stop_limits_trade_from_their_trigger_price():
+    references, prices = _fills(('buy', 1, STOP_LIMIT, 106.0, 105.0), ('sell', -1, STOP_LIMIT, 94.0, 95.0))
+
+    assert references == {'buy': 105.0, 'sell': 95.0}
+    assert 105.0 <= prices['buy'] <= 106.0
+    assert 94.0 <= prices['sell'] <= 95.0
+
+
+def test_stop_limits_are_capped_at_their_limit():
+    references, prices = _fills(('buy', 1, STOP_LIMIT, 102.0, 105.0), ('sell', -1, STOP_LIMIT, 98.0, 95.0))
+
+    assert references == {'buy': 102.0, 'sell': 98.0}
+    assert prices == references
+
+
+def test_limits_and_stops_keep_their_prices():
+    references, _ = _fills(('bid', 1, LIMIT, 101.0, None), ('ask', -1, LIMIT, 104.0, None),
+                           ('buy_stop', 1, STOP, None, 103.0), ('sell_stop', -1, STOP, None, 96.0))
+
+    assert references == {'bid': 100.0, 'ask': 104.0, 'buy_stop': 103.0, 'sell_stop': 96.0}
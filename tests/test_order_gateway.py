@@ -0,0 +1,107 @@
+"""Pair orders through AsyncOrderGateway against the in-process StubBroker."""
+
+import asyncio
+from execution.order_gateway import AsyncOrderGateway, Order, OrderSide, OrderType, StubBroker
+
+
+def _buy(symbol='X', quantity=100, price=100.0):
+    return Order(symbol, OrderSide.BUY, quantity, OrderType.MARKET, price=price)
+
+
+def _sell(symbol='Y', quantity=80, price=125.0):
+    return Order(symbol, OrderSide.SELL, quantity, OrderType.MARKET, price=price)
+
+
+def _submit_pair(broker, leg_a, leg_b, timeout, callbacks=()):
+    """Run one pair order on a fresh gateway; returns (result, gateway)."""
+    async def run():
+        async with AsyncOrderGateway(broker) as gateway:
+            for callback in callbacks:
+                gateway.on_update(callback)
+            return await gateway.submit_pair(leg_a, leg_b, timeout=timeout), gateway
+
+    return asyncio.run(run())
+
+
+def test_both_legs_filled():
+    broker = StubBroker(jitter=0.0, partial_fill_probability=0.0, seed=1)
+    result, gateway = _submit_pair(broker, _buy(), _sell(), timeout=1.0)
+
+    assert result.status == 'filled'
+    assert result.unwinds == []
+    assert [leg.status for leg in result.legs] == ['filled', 'filled']
+    assert [leg.filled_quantity for leg in result.legs] == [100, 80]
+    assert [leg.average_price for leg in result.legs] == [100.0, 125.0]
+    assert gateway.pair_latency.count == 1
+
+
+def test_rejected_leg_is_unwound():
+    # The stub rejects orders without a price for a symbol it has no price for
+    broker = StubBroker(jitter=0.0, partial_fill_probability=0.0, seed=1)
+    result, _ = _submit_pair(broker, _buy(), _sell(price=None), timeout=1.0)
+
+    assert result.status == 'unwound'
+    assert [leg.status for leg in result.legs] == ['filled', 'rejected']
+    assert len(result.unwinds) == 1
+    unwind = result.unwinds[0]
+    assert (unwind.order.symbol, unwind.order.side) == ('X', OrderSide.SELL)
+    assert unwind.status == 'filled'
+    assert unwind.filled_quantity == 100
+
+
+def test_partial_fill_at_timeout_is_cancelled_and_offset():
+    # Every leg fills in two chunks 0.1s apart, so the pair times out half filled
+    broker = StubBroker(latency=0.001, jitter=0.0, fill_latency=0.1, partial_fill_probability=1.0,
+                        max_partial_fills=2, seed=1)
+
+    def fill_offsets_at_once(record, report):
+        if report.status == 'cancelled':
+            broker.partial_fill_probability = 0.0
+
+    result, _ = _submit_pair(broker, _buy(), _sell(), timeout=0.15, callbacks=[fill_offsets_at_once])
+
+    assert result.status == 'unwound'
+    assert [leg.status for leg in result.legs] == ['cancelled', 'cancelled']
+    assert [leg.filled_quantity for leg in result.legs] == [50, 40]
+    assert [(unwind.order.symbol, unwind.order.side, unwind.order.quantity) for unwind in result.unwinds] == [
+        ('X', OrderSide.SELL, 50), ('Y', OrderSide.BUY, 40)]
+    assert all(unwind.status == 'filled' for unwind in result.unwinds)
+
+
+def test_rejected_unwind_reports_unwind_failed():
+    broker = StubBroker(jitter=0.0, partial_fill_probability=0.0, seed=1)
+
+    def reject_everything_after(record, report):
+        if report.status == 'rejected':
+            broker.reject_probability = 1.0
+
+    result, _ = _submit_pair(broker, _buy(), _sell(price=None), timeout=1.0,
+                             callbacks=[reject_everything_after])
+
+    assert result.status == 'unwind_failed'
+    assert not result.filled
+    assert result.legs[0].status == 'filled'
+    assert [unwind.status for unwind in result.unwinds] == ['rejected']
+
+
+def test_callbacks_follow_each_order_state_change():
+    broker = StubBroker(jitter=0.0, partial_fill_probability=1.0, max_partial_fills=3, seed=3)
+    updates = []
+
+    def record_update(record, report):
+        # The record is already updated when the callback runs
+        assert record.status == report.status
+        updates.append((record.order_id, report.status, record.filled_quantity))
+
+    result, _ = _submit_pair(broker, _buy(), _sell(), timeout=1.0, callbacks=[record_update])
+    assert result.status == 'filled'
+
+    for leg in result.legs:
+        states = [(status, filled) for order_id, status, filled in updates if order_id == leg.order_id]
+        statuses = [status for status, _ in states]
+        assert statuses[0] == 'acknowledged'
+        assert statuses[-1] == 'filled'
+        assert set(statuses[1:-1]) == {'partially_filled'}
+        filled = [quantity for _, quantity in states]
+        assert filled == sorted(filled)
+        assert filled[-1] == leg.order.quantity